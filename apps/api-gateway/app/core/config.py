@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Job Application Automation System"
@@ -25,14 +25,167 @@ class Settings(BaseSettings):
     
     # OpenAI Configuration
     OPENAI_API_KEY: str = "your-openai-api-key-here"
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    
+    # LLM Client Configuration
+    LLM_DEFAULT_MODEL: str = "gpt-4o-mini"
+    LLM_DEFAULT_MAX_TOKENS: int = 1500
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 200000
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 120.0
+    LLM_MAX_RETRIES: int = 4
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_DIMENSIONS: int = 384
+    EMBEDDING_BATCH_SIZE: int = 256
     
     # AWS Configuration
     AWS_S3_BUCKET: str = "jobapp-documents-dev"
     AWS_REGION: str = "us-east-1"
+    AWS_ACCESS_KEY_ID: str = ""
+    AWS_SECRET_ACCESS_KEY: str = ""
+    # Set for S3-compatible stores (MinIO, R2); buckets are then addressed by path
+    AWS_S3_ENDPOINT_URL: str = ""
+    
+    # Document Storage Configuration ("local" or "s3")
+    DOCUMENT_STORAGE_BACKEND: str = "local"
+    DOCUMENT_STORAGE_PATH: str = "./data/documents"
+    DOCUMENT_STORAGE_CHUNK_SIZE: int = 65536
+    DOCUMENT_MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    # Other content types are stored and served as application/octet-stream
+    DOCUMENT_ALLOWED_CONTENT_TYPES: List[str] = [
+        "application/pdf",
+        "application/msword",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "application/rtf",
+        "text/plain",
+        "image/png",
+        "image/jpeg",
+    ]
+    
+    # Document Rendering Configuration (0 workers means one per core)
+    RENDER_WORKERS: int = 0
+    RENDER_MAX_TASKS_PER_WORKER: int = 200
+    RENDER_JOB_TIMEOUT_SECONDS: float = 30.0
+    
+    # Browser Session Pool Configuration
+    BROWSER_SESSION_POOL_MAX_SIZE: int = 200
+    BROWSER_SESSION_TTL_SECONDS: int = 86400
+    BROWSER_SESSION_RENEW_BEFORE_SECONDS: int = 900
+    BROWSER_SESSION_MAINTENANCE_SECONDS: float = 30.0
+    # Warm sessions keep their stored row claimed; maintenance extends the claim
+    BROWSER_SESSION_LEASE_SECONDS: int = 300
+    BROWSER_SESSION_USER_AGENT: str = (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    )
+    
+    # Scraper HTTP Configuration (rates are requests per second per platform)
+    SCRAPER_PLATFORM_RATE_LIMITS: Dict[str, float] = {"linkedin": 0.5, "indeed": 1.0, "glassdoor": 0.5}
+    SCRAPER_DEFAULT_RATE_PER_SECOND: float = 1.0
+    SCRAPER_BURST_SECONDS: float = 5.0
+    SCRAPER_PLATFORM_CONCURRENCY: int = 4
+    SCRAPER_RATE_RECOVERY_SECONDS: float = 30.0
+    SCRAPER_MAX_RETRY_AFTER_SECONDS: float = 120.0
+    SCRAPER_MAX_CONNECTIONS_PER_HOST: int = 10
+    SCRAPER_KEEPALIVE_SECONDS: float = 60.0
+    SCRAPER_REQUEST_TIMEOUT_SECONDS: float = 30.0
+    SCRAPER_MAX_RETRIES: int = 3
+    SCRAPER_METRICS_FLUSH_SECONDS: float = 5.0
+    
+    # Crawl Scheduling Configuration (budgets are page requests per hour per
+    # platform, yield is expected new postings per request)
+    CRAWL_PLATFORM_REQUEST_BUDGETS: Dict[str, int] = {"linkedin": 600, "indeed": 1200, "glassdoor": 600}
+    CRAWL_DEFAULT_REQUEST_BUDGET: int = 600
+    CRAWL_TARGET_YIELD: float = 0.5
+    CRAWL_MIN_CHANGE_PROBABILITY: float = 0.5
+    CRAWL_MIN_INTERVAL_SECONDS: int = 900
+    CRAWL_MAX_INTERVAL_SECONDS: int = 86400
+    CRAWL_MAX_PAGES_PER_CRAWL: int = 5
+    CRAWL_HISTORY_DECAY: float = 0.9
+    CRAWL_PRIOR_HOURS: float = 6.0
+    CRAWL_INGESTION_HISTORY_DAYS: int = 7
+    CRAWL_TASK_PRIORITY: int = 7
+    CRAWL_SCHEDULE_SECONDS: int = 60
+    
+    # Analytics Rollup Configuration (minutes saved are estimates per
+    # automated action)
+    ANALYTICS_ROLLUP_SECONDS: int = 60
+    ANALYTICS_ROLLUP_LAG_SECONDS: int = 300
+    ANALYTICS_MINUTES_SAVED_PER_RESUME: int = 30
+    ANALYTICS_MINUTES_SAVED_PER_COVER_LETTER: int = 20
+    ANALYTICS_MINUTES_SAVED_PER_SUBMISSION: int = 10
+    ANALYTICS_TREND_DAYS: int = 30
+    ANALYTICS_RECENT_DAYS: int = 7
+    ANALYTICS_FUNNEL_REFRESH_SECONDS: int = 900
     
     # API Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 100
     
+    # Application Configuration
+    BULK_APPLICATION_MAX_JOBS: int = 100
+    
+    # Automation Worker Configuration
+    WORKER_CONCURRENCY: int = 10
+    WORKER_BATCH_SIZE: int = 10
+    WORKER_POLL_INTERVAL_SECONDS: float = 1.0
+    WORKER_TASK_TIMEOUT_SECONDS: int = 300
+    WORKER_STALE_TASK_CHECK_SECONDS: int = 60
+    WORKER_FALLBACK_POLL_SECONDS: int = 30
+    WORKER_USE_DELAYED_SCHEDULER: bool = True
+    DELAYED_SCHEDULER_MAX_SLEEP_SECONDS: float = 0.5
+    
+    # Fair Scheduling Configuration (weights are tasks per round, caps are
+    # running tasks per user and task type)
+    FAIR_SCHEDULER_TIER_WEIGHTS: Dict[str, int] = {"free": 1, "basic": 2, "premium": 4, "enterprise": 8}
+    FAIR_SCHEDULER_TIER_CONCURRENCY: Dict[str, int] = {"free": 2, "basic": 4, "premium": 8, "enterprise": 16}
+    FAIR_SCHEDULER_DEFAULT_TIER: str = "free"
+    FAIR_SCHEDULER_PROMOTE_BATCH: int = 500
+    QUEUE_WAIT_BUCKETS_SECONDS: List[float] = [1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0]
+    
+    # Automation Retry Configuration
+    TASK_RETRY_BASE_DELAY_SECONDS: float = 30.0
+    TASK_RETRY_MAX_DELAY_SECONDS: float = 3600.0
+    TASK_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    TASK_CIRCUIT_FAILURE_RATIO: float = 0.5
+    TASK_CIRCUIT_WINDOW_SECONDS: float = 60.0
+    TASK_CIRCUIT_COOLDOWN_SECONDS: float = 30.0
+    TASK_RESULT_CACHE_TTL_SECONDS: int = 86400
+    
+    # Task Event Streaming Configuration
+    TASK_EVENTS_QUEUE_SIZE: int = 100
+    TASK_EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    TASK_COUNTERS_RECONCILE_SECONDS: int = 600
+    
+    # Generation Cache Configuration
+    GENERATION_CACHE_ENABLED: bool = True
+    GENERATION_CACHE_REDIS_TTL_SECONDS: int = 86400
+    GENERATION_CACHE_TTL_DAYS: int = 30
+    GENERATION_CACHE_MAX_ENTRIES: int = 100000
+    GENERATION_CACHE_EVICT_SECONDS: int = 3600
+    
+    # Content Generation Streaming Configuration
+    GENERATION_CHECKPOINT_SECONDS: float = 2.0
+    GENERATION_STREAM_FLUSH_SECONDS: float = 0.05
+    GENERATION_STREAM_TTL_SECONDS: int = 900
+    GENERATION_STREAM_MAX_EVENTS: int = 10000
+    GENERATION_LEASE_SECONDS: int = 30
+    
+    # Prompt Budget Configuration
+    PROMPT_TOKEN_BUDGETS: Dict[str, int] = {"gpt-4o-mini": 6000, "gpt-4o": 4000}
+    PROMPT_DEFAULT_TOKEN_BUDGET: int = 6000
+    PROMPT_TOKEN_CACHE_MAX_ENTRIES: int = 2000
+    
+    # Experience Ranking Configuration
+    EXPERIENCE_SKILL_MATCH_BONUS: float = 0.15
+    EXPERIENCE_MAX_ACHIEVEMENTS: int = 5
+    EXPERIENCE_MAX_TECHNOLOGIES: int = 8
+    
+    # Skills Extraction Configuration
+    SKILLS_BACKFILL_SECONDS: int = 600
+    SKILLS_BACKFILL_BATCH_SIZE: int = 500
+    
     # Logging Configuration
     LOG_LEVEL: str = "DEBUG"
     
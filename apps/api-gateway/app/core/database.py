@@ -3,7 +3,9 @@ Database Configuration and Session Management
 """
 
 import asyncio
-from typing import AsyncGenerator
+import glob
+import os
+from typing import AsyncGenerator, List
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
@@ -14,6 +16,16 @@ from app.models import Base
 
 logger = logging.getLogger(__name__)
 
+MIGRATIONS_DIR = "migrations"
+MIGRATIONS_LOCK_ID = 7_310_001
+
+CREATE_SCHEMA_MIGRATIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(255) PRIMARY KEY,
+        applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    )
+"""
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
@@ -50,14 +62,13 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 async def init_db() -> None:
     """Initialize database with tables"""
     try:
+        migration_files = sorted(glob.glob(os.path.join(MIGRATIONS_DIR, "*.sql")))
+        if migration_files:
+            await run_migrations(migration_files)
+
         async with engine.begin() as conn:
-            # Run the migration file instead of create_all
-            migration_file = "migrations/001_initial_schema.sql"
-            try:
-                await run_migration(migration_file)
-                logger.info("Database migration executed successfully")
-            except FileNotFoundError:
-                # Fallback to SQLAlchemy create_all if migration file not found
+            if not migration_files:
+                # Fallback to SQLAlchemy create_all if no migration files found
                 await conn.run_sync(Base.metadata.create_all)
                 logger.info("Database tables created successfully (fallback)")
             
@@ -73,15 +84,52 @@ async def init_db() -> None:
         raise
 
 
-async def run_migration(migration_file: str) -> None:
-    """Run a specific migration file"""
+async def run_migrations(migration_files: List[str]) -> None:
+    """Apply the migration files not yet recorded in schema_migrations, in order.
+
+    Each file runs once, in its own transaction together with its
+    schema_migrations row; a failing file stops startup. An advisory lock
+    keeps processes starting together from applying the same file twice.
+    """
+    async with engine.connect() as conn:
+        raw_connection = await conn.get_raw_connection()
+        # Migration files hold many statements, which asyncpg only accepts
+        # through its simple query protocol (no prepared statement)
+        driver = raw_connection.driver_connection
+        await driver.execute("SELECT pg_advisory_lock($1)", MIGRATIONS_LOCK_ID)
+        try:
+            await driver.execute(CREATE_SCHEMA_MIGRATIONS_SQL)
+            applied = {row["version"] for row in await driver.fetch("SELECT version FROM schema_migrations")}
+            if not applied and await driver.fetchval("SELECT to_regclass('public.users') IS NOT NULL"):
+                # Schema created before migrations were tracked: the initial
+                # schema is in place and later files are idempotent
+                baseline = os.path.basename(migration_files[0])
+                await driver.execute("INSERT INTO schema_migrations (version) VALUES ($1)", baseline)
+                applied.add(baseline)
+                logger.info(f"Recorded existing schema as migration {baseline}")
+
+            for migration_file in migration_files:
+                version = os.path.basename(migration_file)
+                if version in applied:
+                    continue
+                await run_migration(driver, migration_file)
+        finally:
+            await driver.execute("SELECT pg_advisory_unlock($1)", MIGRATIONS_LOCK_ID)
+
+
+async def run_migration(driver, migration_file: str) -> None:
+    """Run a specific migration file and record it as applied"""
     try:
         with open(migration_file, 'r') as f:
             migration_sql = f.read()
         
-        async with engine.begin() as conn:
-            await conn.execute(text(migration_sql))
-            logger.info(f"Migration {migration_file} executed successfully")
+        async with driver.transaction():
+            await driver.execute(migration_sql)
+            await driver.execute(
+                "INSERT INTO schema_migrations (version) VALUES ($1)",
+                os.path.basename(migration_file),
+            )
+        logger.info(f"Migration {migration_file} executed successfully")
             
     except Exception as e:
         logger.error(f"Migration {migration_file} failed: {e}")
@@ -0,0 +1,2 @@
+# Development Tools Package
+# Job Application Assistance System
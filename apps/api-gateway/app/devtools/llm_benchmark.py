@@ -0,0 +1,90 @@
+"""
+LLM Client Benchmark
+Drives the shared LLM client with mixed-priority load and reports per-lane results
+
+    python -m app.devtools.llm_benchmark --base-url http://127.0.0.1:8100/v1 --requests 200
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List
+
+from app.services.llm_client import LLMClient, LLMError, LLMPriority
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    client = LLMClient(
+        base_url=args.base_url,
+        api_key="stub",
+        concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+    )
+    rng = random.Random(7)
+    totals: Dict[str, List[float]] = {LLMPriority.INTERACTIVE: [], LLMPriority.BATCH: []}
+    failures: Dict[str, int] = {LLMPriority.INTERACTIVE: 0, LLMPriority.BATCH: 0}
+
+    async def one(i: int) -> None:
+        priority = LLMPriority.INTERACTIVE if rng.random() < args.interactive_share else LLMPriority.BATCH
+        messages = [{"role": "user", "content": f"Write a cover letter for posting {i}. " * 20}]
+        started = time.monotonic()
+        try:
+            if args.stream:
+                async with client.stream_chat(messages, max_tokens=args.max_tokens, priority=priority) as stream:
+                    async for _ in stream:
+                        pass
+            else:
+                await client.chat(messages, max_tokens=args.max_tokens, priority=priority)
+        except LLMError:
+            failures[priority] += 1
+            return
+        totals[priority].append((time.monotonic() - started) * 1000)
+
+    started = time.monotonic()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.monotonic() - started
+    snapshot = client.snapshot()
+    await client.close()
+
+    report = {}
+    for priority, values in totals.items():
+        report[priority] = {
+            "completed": len(values),
+            "failed": failures[priority],
+            "p50_ms": round(_percentile(values, 0.5)),
+            "p95_ms": round(_percentile(values, 0.95)),
+            "rate_limited": snapshot["lanes"].get(priority, {}).get("rate_limited", 0),
+        }
+    report["overall"] = {
+        "elapsed_s": round(elapsed, 2),
+        "requests_per_s": round(sum(len(v) for v in totals.values()) / elapsed, 2),
+    }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the LLM client against a stub server")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8100/v1")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--interactive-share", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--tpm", type=int, default=200000)
+    parser.add_argument("--max-tokens", type=int, default=200)
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+LLM Stub Server
+Local OpenAI-compatible chat completions and embeddings endpoints for offline benchmarking
+
+    python -m app.devtools.llm_stub --port 8100 --latency-ms 400 --rpm 120
+
+Then set OPENAI_BASE_URL=http://127.0.0.1:8100/v1. Responses are
+deterministic filler text and embeddings are hashed bags of words (so texts
+sharing words are similar); latency, streaming speed, rate limits and error
+rate are configurable so client throughput and backpressure can be measured.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import uuid
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+from app.services.llm_client import TokenBucket, estimate_message_tokens, estimate_tokens
+
+FILLER_WORDS = (
+    "experience delivering results across teams with strong ownership of "
+    "scalable systems customer impact and measurable outcomes"
+).split()
+
+
+class StubConfig:
+    """Simulation knobs, settable from the command line"""
+
+    def __init__(
+        self,
+        latency_ms: float = 300.0,
+        tokens_per_second: float = 80.0,
+        completion_tokens: int = 250,
+        requests_per_minute: int = 120,
+        tokens_per_minute: int = 60000,
+        error_rate: float = 0.0,
+    ):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.requests = TokenBucket(requests_per_minute / 60.0, max(1, requests_per_minute / 60.0 * 5))
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+
+
+stub_config = StubConfig()
+app = FastAPI(title="LLM Stub")
+
+
+def _completion_words(messages: List[Dict[str, Any]], count: int) -> List[str]:
+    """Deterministic filler so identical prompts get identical completions"""
+    seed = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).digest()
+    rng = random.Random(seed)
+    return [rng.choice(FILLER_WORDS) for _ in range(count)]
+
+
+def _rate_limited(prompt_tokens: int, completion_tokens: int) -> JSONResponse:
+    config = stub_config
+    retry_after = max(
+        config.requests.delay(1), config.tokens.delay(prompt_tokens + completion_tokens), 0.05
+    )
+    return JSONResponse(
+        status_code=429,
+        content={"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+        headers={
+            "retry-after": str(max(1, round(retry_after))),
+            "retry-after-ms": str(int(retry_after * 1000)),
+        },
+    )
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    config = stub_config
+    messages = body.get("messages") or []
+    model = body.get("model") or "stub-model"
+    prompt_tokens = estimate_message_tokens(messages)
+    completion_tokens = min(body.get("max_tokens") or config.completion_tokens, config.completion_tokens)
+
+    if config.requests.delay(1) > 0 or config.tokens.delay(prompt_tokens + completion_tokens) > 0:
+        return _rate_limited(prompt_tokens, completion_tokens)
+    config.requests.take(1)
+    config.tokens.take(prompt_tokens + completion_tokens)
+
+    if config.error_rate and random.random() < config.error_rate:
+        return JSONResponse(status_code=503, content={"error": {"message": "Simulated overload"}})
+
+    words = _completion_words(messages, completion_tokens)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+    if not body.get("stream"):
+        await asyncio.sleep(config.latency_ms / 1000 + completion_tokens / config.tokens_per_second)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "length" if completion_tokens == body.get("max_tokens") else "stop",
+            }],
+            "usage": usage,
+        }
+
+    include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+    async def events():
+        def chunk(choices: List[Dict[str, Any]], **extra: Any) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": choices,
+                **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        await asyncio.sleep(config.latency_ms / 1000)
+        for i, word in enumerate(words):
+            text = word if i == 0 else f" {word}"
+            yield chunk([{"index": 0, "delta": {"content": text}, "finish_reason": None}])
+            await asyncio.sleep(1 / config.tokens_per_second)
+        yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if include_usage:
+            yield chunk([], usage=usage)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def _hashed_embedding(text: str, dimensions: int) -> List[float]:
+    """Signed feature hashing of lowercased words, L2-normalized"""
+    vector = [0.0] * dimensions
+    for word in re.findall(r"[a-z0-9+#]+", text.lower()):
+        digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "big") % dimensions
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    config = stub_config
+    inputs = body.get("input") or []
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    dimensions = body.get("dimensions") or 1536
+    prompt_tokens = sum(estimate_tokens(text) for text in inputs)
+
+    if config.requests.delay(1) > 0 or config.tokens.delay(prompt_tokens) > 0:
+        return _rate_limited(prompt_tokens, 0)
+    config.requests.take(1)
+    config.tokens.take(prompt_tokens)
+
+    if config.error_rate and random.random() < config.error_rate:
+        return JSONResponse(status_code=503, content={"error": {"message": "Simulated overload"}})
+
+    await asyncio.sleep(config.latency_ms / 1000)
+    return {
+        "object": "list",
+        "model": body.get("model") or "stub-embedding",
+        "data": [
+            {"object": "embedding", "index": i, "embedding": _hashed_embedding(text, dimensions)}
+            for i, text in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible LLM stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="Completion speed")
+    parser.add_argument("--completion-tokens", type=int, default=250)
+    parser.add_argument("--rpm", type=int, default=120, help="Requests per minute before 429s")
+    parser.add_argument("--tpm", type=int, default=60000, help="Tokens per minute before 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 503")
+    args = parser.parse_args()
+
+    global stub_config
+    stub_config = StubConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        error_rate=args.error_rate,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
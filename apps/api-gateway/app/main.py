@@ -9,6 +9,16 @@ from app.core.database import init_db, close_db
 from app.middleware.logging import LoggingMiddleware
 from app.routers.health import router as health_router
 from app.routers.users import router as users_router
+from app.routers.applications import router as applications_router
+from app.routers.automation import router as automation_router
+from app.routers.documents import router as documents_router
+from app.routers.analytics import router as analytics_router
+from app.services.content_generation import content_generator
+from app.services.document_rendering import document_renderer
+from app.services.document_store import document_store
+from app.services.llm_client import llm_client
+from app.services.skill_taxonomy import skill_taxonomy
+from app.services.task_events import task_event_broker
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -33,11 +43,29 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Redis connection failed: {e}")
     
+    # Sync canonical skills before requests normalize skill names
+    try:
+        await skill_taxonomy.sync()
+    except Exception as e:
+        logger.error(f"Skill taxonomy sync failed: {e}")
+    
+    # Warm the rendering workers so the first render does not pay for startup
+    try:
+        await document_renderer.start()
+    except Exception as e:
+        logger.error(f"Document rendering pool failed to start: {e}")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Job Application Automation System API")
     
+    # Checkpoint in-flight generations so readers can resume them
+    try:
+        await content_generator.close()
+    except Exception as e:
+        logger.error(f"Error stopping content generation: {e}")
+    
     # Close database connections
     try:
         await close_db()
@@ -45,6 +73,30 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error closing database connections: {e}")
     
+    # Close task event subscriptions
+    try:
+        await task_event_broker.close()
+    except Exception as e:
+        logger.error(f"Error closing task event broker: {e}")
+    
+    # Stop rendering workers
+    try:
+        await document_renderer.close()
+    except Exception as e:
+        logger.error(f"Error stopping document rendering pool: {e}")
+    
+    # Close document storage connections
+    try:
+        await document_store.close()
+    except Exception as e:
+        logger.error(f"Error closing document store: {e}")
+    
+    # Close pooled LLM connections
+    try:
+        await llm_client.close()
+    except Exception as e:
+        logger.error(f"Error closing LLM client: {e}")
+    
     # Close Redis connection
     try:
         await redis_client.close()
@@ -77,6 +129,10 @@ app.add_middleware(LoggingMiddleware)
 # Include routers
 app.include_router(health_router, prefix="/api/v1", tags=["health"])
 app.include_router(users_router, prefix="/api/v1/users", tags=["users"])
+app.include_router(applications_router, prefix="/api/v1/applications", tags=["applications"])
+app.include_router(automation_router, prefix="/api/v1/automation", tags=["automation"])
+app.include_router(documents_router, prefix="/api/v1/documents", tags=["documents"])
+app.include_router(analytics_router, prefix="/api/v1/analytics", tags=["analytics"])
 
 # Root endpoint
 @app.get("/", tags=["root"])
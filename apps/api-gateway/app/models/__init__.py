@@ -2,11 +2,12 @@
 # Job Application Assistance System
 
 from .base import Base
-from .user import User, UserProfile, UserSkill, UserExperience
-from .application import Application, ApplicationStatusHistory, GeneratedContent
-from .job import Company, JobPosting, JobSearchPreference
+from .user import User, UserProfile, UserSkill, UserExperience, ExperienceItemEmbedding, Skill, SkillSynonym
+from .application import Application, ApplicationStatusHistory, GeneratedContent, GenerationCacheEntry
+from .job import Company, JobPosting, JobSearchPreference, FetchCacheEntry, CrawlSource
 from .automation import AutomationTask, BrowserSession
-from .analytics import UserAnalytics, PlatformMetrics
+from .document import Document, UserDocument
+from .analytics import UserAnalytics, PlatformMetrics, AnalyticsRollupState
 
 __all__ = [
     # Base
@@ -17,22 +18,33 @@ __all__ = [
     "UserProfile", 
     "UserSkill",
     "UserExperience",
+    "ExperienceItemEmbedding",
+    "Skill",
+    "SkillSynonym",
     
     # Application Management
     "Application",
     "ApplicationStatusHistory",
     "GeneratedContent",
+    "GenerationCacheEntry",
     
     # Job Management
     "Company",
     "JobPosting",
     "JobSearchPreference",
+    "FetchCacheEntry",
+    "CrawlSource",
     
     # Automation
     "AutomationTask",
     "BrowserSession",
     
+    # Documents
+    "Document",
+    "UserDocument",
+    
     # Analytics
     "UserAnalytics",
     "PlatformMetrics",
+    "AnalyticsRollupState",
 ] 
\ No newline at end of file
@@ -5,8 +5,8 @@ Models for user analytics and platform metrics
 
 from datetime import date, datetime
 from typing import Optional
-from sqlalchemy import Column, String, Integer, Date, ForeignKey, Numeric
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, BigInteger, Date, DateTime, ForeignKey, Index, Numeric, func, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel
 
@@ -27,13 +27,28 @@ class UserAnalytics(Base, TimestampMixin):
     cover_letters_generated = Column(Integer, default=0)
     interviews_scheduled = Column(Integer, default=0)
     offers_received = Column(Integer, default=0)
+    responses_received = Column(Integer, default=0)
+    # Share of applications submitted up to this day that got a response
     response_rate = Column(Numeric(5, 4))
     time_saved_minutes = Column(Integer, default=0)
     
+    __table_args__ = (
+        Index("uq_user_analytics_user_date", "user_id", "metric_date", unique=True),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="analytics")
 
 
+class AnalyticsRollupState(Base):
+    """Watermark of an incremental analytics rollup"""
+    __tablename__ = "analytics_rollup_state"
+    
+    name = Column(String(50), primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class PlatformMetrics(Base, TimestampMixin):
     """Platform performance and scraping metrics"""
     __tablename__ = "platform_metrics"
@@ -47,6 +62,21 @@ class PlatformMetrics(Base, TimestampMixin):
     rate_limit_hits = Column(Integer, default=0)
     detection_events = Column(Integer, default=0)
     average_response_time_ms = Column(Integer)
+    total_response_time_ms = Column(BigInteger)
+    max_response_time_ms = Column(Integer)
+    # Set by a trigger from latency_histogram (bucket upper bounds)
+    p50_response_time_ms = Column(Integer)
+    p95_response_time_ms = Column(Integer)
+    p99_response_time_ms = Column(Integer)
+    latency_histogram = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    not_modified_responses = Column(Integer, default=0)
+    unchanged_responses = Column(Integer, default=0)
+    bytes_saved = Column(BigInteger, default=0)
+    parse_ms_saved = Column(BigInteger, default=0)
+    
+    __table_args__ = (
+        Index("uq_platform_metrics_platform_date", "platform_name", "metric_date", unique=True),
+    )
 
 
 # Pydantic Models for API
@@ -60,6 +90,7 @@ class UserAnalyticsBase(PydanticBase):
     cover_letters_generated: int = 0
     interviews_scheduled: int = 0
     offers_received: int = 0
+    responses_received: int = 0
     response_rate: Optional[float] = None
     time_saved_minutes: int = 0
 
@@ -96,6 +127,14 @@ class PlatformMetricsBase(PydanticBase):
     rate_limit_hits: int = 0
     detection_events: int = 0
     average_response_time_ms: Optional[int] = None
+    p50_response_time_ms: Optional[int] = None
+    p95_response_time_ms: Optional[int] = None
+    p99_response_time_ms: Optional[int] = None
+    max_response_time_ms: Optional[int] = None
+    not_modified_responses: int = 0
+    unchanged_responses: int = 0
+    bytes_saved: int = 0
+    parse_ms_saved: int = 0
 
 
 class PlatformMetricsCreate(PlatformMetricsBase):
@@ -134,6 +173,7 @@ class PlatformPerformanceSummary(PydanticBase):
     platform_name: str
     success_rate: float
     average_response_time_ms: int
+    p95_response_time_ms: Optional[int] = None
     total_jobs_today: int
     rate_limit_status: str
 
@@ -143,4 +183,50 @@ class AnalyticsDashboard(PydanticBase):
     user_performance: UserPerformanceSummary
     platform_performance: list[PlatformPerformanceSummary]
     recent_metrics: list[UserAnalyticsResponse]
-    trends: dict[str, list[float]] 
\ No newline at end of file
+    trends: dict[str, list[float]]
+
+
+class AnalyticsTrends(PydanticBase):
+    """Daily series from the user analytics rollups, oldest day first"""
+    start_date: date
+    end_date: date
+    trends: dict[str, list[float]]
+
+
+class FunnelStage(PydanticBase):
+    """Applications that reached a funnel stage or beyond"""
+    stage: str
+    applications: int
+    conversion_rate: Optional[float] = None
+
+
+class StageDuration(PydanticBase):
+    """Median time applications spent in a status before moving on"""
+    stage: str
+    transitions: int
+    median_hours: float
+
+
+class ApplicationFunnel(PydanticBase):
+    """Funnel of the user's applications next to all applications"""
+    refreshed_at: Optional[datetime] = None
+    user: list[FunnelStage]
+    overall: list[FunnelStage]
+
+
+class TimeInStage(PydanticBase):
+    """Time-in-stage of the user's applications next to all applications"""
+    refreshed_at: Optional[datetime] = None
+    user: list[StageDuration]
+    overall: list[StageDuration]
+
+
+class PlatformFetchSavings(PydanticBase):
+    """Conditional fetch cache effectiveness for one platform"""
+    platform_name: str
+    fetches: int
+    not_modified_responses: int
+    unchanged_responses: int
+    hit_rate: Optional[float] = None
+    bytes_saved: int
+    parse_seconds_saved: float
@@ -5,10 +5,10 @@ Models for job applications, status tracking, and generated content
 
 from datetime import date, datetime
 from typing import List, Optional, Dict, Any
-from sqlalchemy import Column, String, Boolean, Integer, Text, Date, ForeignKey, DateTime
+from sqlalchemy import Column, String, Boolean, Integer, Text, Date, ForeignKey, DateTime, Index, func
 from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSONB
 from sqlalchemy.orm import relationship
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from .base import Base, TimestampMixin, PydanticBase, BaseResponse, BaseCreate, BaseUpdate
 
@@ -59,6 +59,10 @@ class Application(Base, TimestampMixin):
     rejection_reason = Column(String(500))
     offer_salary = Column(Integer)
     offer_details = Column(JSONB)
+
+    __table_args__ = (
+        Index("uq_applications_user_job_posting", "user_id", "job_posting_id", unique=True),
+    )
     
     # Relationships
     user = relationship("User", back_populates="applications")
@@ -72,10 +76,14 @@ class ApplicationStatusHistory(Base, TimestampMixin):
     __tablename__ = "application_status_history"
     
     id = Column(UUID(as_uuid=True), primary_key=True, server_default="gen_random_uuid()")
-    application_id = Column(UUID(as_uuid=True), ForeignKey("applications.id", ondelete="CASCADE"), nullable=False, index=True)
+    application_id = Column(UUID(as_uuid=True), ForeignKey("applications.id", ondelete="CASCADE"), nullable=False)
     status = Column(String(50), nullable=False)
     notes = Column(Text)
     changed_by = Column(String(50))
+
+    __table_args__ = (
+        Index("idx_app_status_history_app_created", "application_id", "created_at", "id"),
+    )
     
     # Relationships
     application = relationship("Application", back_populates="status_history")
@@ -100,6 +108,28 @@ class GeneratedContent(Base, TimestampMixin):
     application = relationship("Application", back_populates="generated_content")
 
 
+class GenerationCacheEntry(Base):
+    """Durable tier of the LLM generation cache, keyed by prompt/model/params hash"""
+    __tablename__ = "llm_generation_cache"
+    
+    cache_key = Column(String(64), primary_key=True)
+    model_used = Column(String(50), nullable=False)
+    content_text = Column(Text, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    generation_ms = Column(Integer, nullable=False, default=0)
+    generation_metadata = Column(JSONB)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_accessed_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        Index("idx_llm_generation_cache_expires", "expires_at"),
+        Index("idx_llm_generation_cache_last_accessed", "last_accessed_at"),
+    )
+
+
 # Pydantic Models for API
 class ApplicationBase(PydanticBase):
     """Base application model"""
@@ -211,6 +241,19 @@ class GeneratedContentResponse(GeneratedContentBase, BaseResponse):
     pass
 
 
+class GenerationCacheStats(PydanticBase):
+    """LLM generation cache effectiveness"""
+    lookups: int
+    hits: int
+    redis_hits: int
+    postgres_hits: int
+    misses: int
+    bypasses: int
+    hit_rate: Optional[float] = None
+    tokens_saved: int
+    generation_seconds_saved: float
+
+
 # Additional models for application functionality
 class ApplicationStatusUpdate(PydanticBase):
     """Application status update request model"""
@@ -235,4 +278,54 @@ class ApplicationDashboard(PydanticBase):
     total_applications: int
     applications_by_status: Dict[str, int]
     recent_applications: List[ApplicationSummary]
-    upcoming_follow_ups: List[ApplicationSummary] 
\ No newline at end of file
+    upcoming_follow_ups: List[ApplicationSummary] 
+
+class BulkApplicationCreate(PydanticBase):
+    """Bulk application creation request for multi-select job flows"""
+    job_posting_ids: List[str] = Field(..., min_length=1)
+    application_method: Optional[str] = Field(None, pattern="^(automated|manual|referral)$")
+    generate_resume: bool = True
+    generate_cover_letter: bool = True
+    task_priority: int = Field(5, ge=1, le=10)
+
+
+class BulkApplicationItem(PydanticBase):
+    """Application created by a bulk request"""
+    id: str
+    job_posting_id: str
+    company_name: str
+    job_title: str
+    job_url: Optional[str] = None
+    status: str
+
+
+class BulkApplicationResponse(PydanticBase):
+    """Bulk application creation result"""
+    applications: List[BulkApplicationItem]
+    skipped_job_posting_ids: List[str]
+    tasks_created: int
+
+
+class DocumentRenderRequest(PydanticBase):
+    """Render generated resumes/cover letters of selected applications to files"""
+    application_ids: List[str] = Field(..., min_length=1)
+    format: str = Field("pdf", pattern="^(pdf|docx)$")
+    content_types: List[str] = Field(default_factory=lambda: [ContentType.RESUME, ContentType.COVER_LETTER])
+
+
+class RenderedDocumentItem(PydanticBase):
+    """Rendered file of one application's generated content"""
+    application_id: str
+    content_type: str
+    format: str
+    url: Optional[str] = None
+    content_hash: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class DocumentRenderResponse(PydanticBase):
+    """Document rendering batch result"""
+    documents: List[RenderedDocumentItem]
+    rendered: int
+    failed: int
@@ -5,7 +5,7 @@ Models for automation tasks and browser sessions
 
 from datetime import datetime
 from typing import Optional, Dict, Any
-from sqlalchemy import Column, String, Boolean, Integer, Text, ForeignKey, DateTime
+from sqlalchemy import Column, String, Boolean, Integer, Text, ForeignKey, DateTime, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel
@@ -20,6 +20,7 @@ class TaskStatus(str):
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
+    DEAD_LETTER = "dead_letter"
 
 
 class TaskType(str):
@@ -42,7 +43,7 @@ class AutomationTask(Base, TimestampMixin):
     task_type = Column(String(50), nullable=False, index=True)
     status = Column(String(50), default="pending", index=True)
     priority = Column(Integer, default=5)
-    scheduled_at = Column(DateTime(timezone=True), index=True)
+    scheduled_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     started_at = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
     retry_count = Column(Integer, default=0)
@@ -51,6 +52,13 @@ class AutomationTask(Base, TimestampMixin):
     task_config = Column(JSONB)
     result_data = Column(JSONB)
     
+    __table_args__ = (
+        Index(
+            "idx_automation_tasks_claim", "priority", "scheduled_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="automation_tasks")
     application = relationship("Application")
@@ -70,6 +78,9 @@ class BrowserSession(Base, TimestampMixin):
     is_active = Column(Boolean, default=True, index=True)
     last_used_at = Column(DateTime(timezone=True))
     expires_at = Column(DateTime(timezone=True))
+    # Pool process holding the session warm, until the claim lapses
+    leased_by = Column(String(100))
+    leased_until = Column(DateTime(timezone=True))
     
     # Relationships
     user = relationship("User", back_populates="browser_sessions")
@@ -189,4 +200,15 @@ class AutomationDashboard(PydanticBase):
     tasks_by_status: Dict[str, int]
     tasks_by_type: Dict[str, int]
     recent_tasks: list[TaskSummary]
-    failed_tasks: list[TaskSummary] 
\ No newline at end of file
+    failed_tasks: list[TaskSummary] 
+
+class TierQueueWaitMetrics(PydanticBase):
+    """Fair dispatcher queue wait statistics for one subscription tier"""
+    tier: str
+    weight: int
+    concurrency_cap: Optional[int] = None
+    dispatched: int
+    mean_wait_seconds: Optional[float] = None
+    p50_wait_seconds: Optional[float] = None
+    p95_wait_seconds: Optional[float] = None
+    wait_buckets: Dict[str, int]
@@ -0,0 +1,51 @@
+"""
+Document Models
+Models for content-addressed document storage
+"""
+
+from typing import Optional
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, String, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from .base import Base, PydanticBase
+
+
+# SQLAlchemy Models
+class Document(Base):
+    """Stored document blob, keyed by the SHA-256 of its content"""
+    __tablename__ = "documents"
+    
+    content_hash = Column(String(64), primary_key=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    content_type = Column(String(100), nullable=False)
+    storage_backend = Column(String(20), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=text("NOW()"))
+
+
+class UserDocument(Base):
+    """A user's reference to a stored document"""
+    __tablename__ = "user_documents"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    content_hash = Column(String(64), ForeignKey("documents.content_hash"), nullable=False, index=True)
+    filename = Column(String(255))
+    # As uploaded by this user; the blob's own content_type is the first uploader's
+    content_type = Column(String(100), nullable=False, server_default="application/octet-stream")
+    created_at = Column(DateTime(timezone=True), server_default=text("NOW()"))
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "content_hash", name="uq_user_documents_user_content"),
+    )
+
+
+# Pydantic Models for API
+class DocumentResponse(PydanticBase):
+    """Stored document model"""
+    content_hash: str
+    size_bytes: int
+    content_type: str
+    filename: Optional[str] = None
+    url: str
+    # False when the user had already uploaded identical content
+    created: bool
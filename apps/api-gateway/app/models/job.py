@@ -5,7 +5,7 @@ Models for companies, job postings, and search preferences
 
 from datetime import date, datetime
 from typing import List, Optional, Dict, Any
-from sqlalchemy import Column, String, Boolean, Integer, Text, Date, ForeignKey, Numeric, DateTime
+from sqlalchemy import Column, String, Boolean, Integer, Float, Text, Date, ForeignKey, Numeric, DateTime, Index, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSONB
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel, validator
@@ -91,11 +91,19 @@ class JobPosting(Base, TimestampMixin):
     is_active = Column(Boolean, default=True, index=True)
     required_skills = Column(ARRAY(Text))
     preferred_skills = Column(ARRAY(Text))
+    required_skill_ids = Column(ARRAY(Integer), nullable=False, server_default="{}")
+    preferred_skill_ids = Column(ARRAY(Integer), nullable=False, server_default="{}")
     embedding = Column("embedding", String)  # pgvector column - will be handled by migration
+    embedding_hash = Column(String(64))
+    skills_source_hash = Column(String(64))
     
     # Relationships
     company = relationship("Company", back_populates="job_postings")
     applications = relationship("Application", back_populates="job_posting", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("uq_job_postings_source_external", "source_platform", "external_id", unique=True),
+    )
 
 
 class JobSearchPreference(Base, TimestampMixin):
@@ -123,6 +131,55 @@ class JobSearchPreference(Base, TimestampMixin):
     user = relationship("User", back_populates="search_preferences")
 
 
+class FetchCacheEntry(Base):
+    """Validators and body hash of a scraped page, for conditional re-fetching"""
+    __tablename__ = "fetch_cache"
+    
+    url_hash = Column(String(64), primary_key=True)
+    url = Column(Text, nullable=False)
+    platform = Column(String(50), nullable=False)
+    etag = Column(String(500))
+    last_modified = Column(String(100))
+    body_hash = Column(String(64), nullable=False)
+    body_bytes = Column(Integer, nullable=False, default=0)
+    parse_ms = Column(Integer, nullable=False, default=0)
+    fetch_count = Column(Integer, nullable=False, default=1)
+    change_count = Column(Integer, nullable=False, default=1)
+    fetched_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("idx_fetch_cache_platform_fetched", "platform", "fetched_at"),
+    )
+
+
+class CrawlSource(Base, TimestampMixin):
+    """A saved search on one platform, with its learned posting arrival and change rates"""
+    __tablename__ = "crawl_sources"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default="gen_random_uuid()")
+    platform = Column(String(50), nullable=False)
+    search_preference_id = Column(
+        UUID(as_uuid=True), ForeignKey("job_search_preferences.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    new_postings = Column(Float, nullable=False, default=0)
+    observed_hours = Column(Float, nullable=False, default=0)
+    crawls = Column(Float, nullable=False, default=0)
+    changed_crawls = Column(Float, nullable=False, default=0)
+    pages_per_crawl = Column(Float, nullable=False, default=1)
+    crawl_count = Column(Integer, nullable=False, default=0)
+    total_new_postings = Column(Integer, nullable=False, default=0)
+    task_id = Column(UUID(as_uuid=True), ForeignKey("automation_tasks.id", ondelete="SET NULL"))
+    scheduled_at = Column(DateTime(timezone=True))
+    last_crawled_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        UniqueConstraint("platform", "search_preference_id"),
+    )
+
+
 # Pydantic Models for API
 class CompanyBase(PydanticBase):
     """Base company model"""
@@ -286,6 +343,19 @@ class JobSearchRequest(PydanticBase):
     offset: int = 0
 
 
+class JobSkillMatchResponse(PydanticBase):
+    """Job posting matched by overlap with a user's skills"""
+    job_posting_id: str
+    title: str
+    company_id: Optional[str] = None
+    source_platform: str
+    source_url: str
+    posted_date: Optional[date] = None
+    required_skill_count: int
+    matched_required_skills: List[str]
+    matched_preferred_skills: List[str]
+
+
 class JobSearchResponse(PydanticBase):
     """Job search response model"""
     jobs: List[JobPostingResponse]
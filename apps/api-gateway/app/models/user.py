@@ -89,6 +89,7 @@ class UserProfile(Base, TimestampMixin):
     target_salary_min = Column(Integer)
     target_salary_max = Column(Integer)
     preferred_work_type = Column(String(20))
+    skills_source_hash = Column(String(64))
     
     # Constraints
     __table_args__ = (UniqueConstraint("user_id", name="unique_user_profile"),)
@@ -105,6 +106,7 @@ class UserSkill(Base, TimestampMixin):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     skill_name = Column(String(100), nullable=False, index=True)
     skill_category = Column(String(50), index=True)
+    skill_id = Column(Integer, ForeignKey("skills.id"), index=True)
     proficiency_level = Column(String(20))
     years_experience = Column(Numeric(3, 1))
     is_primary = Column(Boolean, default=False)
@@ -113,6 +115,25 @@ class UserSkill(Base, TimestampMixin):
     user = relationship("User", back_populates="skills")
 
 
+class Skill(Base):
+    """Canonical skill; UserSkill rows and job posting skill arrays refer to its id"""
+    __tablename__ = "skills"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    normalized_name = Column(String(100), nullable=False, unique=True)
+    skill_category = Column(String(50))
+    created_at = Column(DateTime(timezone=True), server_default=text("NOW()"))
+
+
+class SkillSynonym(Base):
+    """Normalized spelling of a skill mapped to its canonical skill"""
+    __tablename__ = "skill_synonyms"
+    
+    normalized_name = Column(String(100), primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id", ondelete="CASCADE"), nullable=False, index=True)
+
+
 class UserExperience(Base, TimestampMixin):
     """User work experience and history"""
     __tablename__ = "user_experiences"
@@ -132,6 +153,26 @@ class UserExperience(Base, TimestampMixin):
     user = relationship("User", back_populates="experiences")
 
 
+class ExperienceItemEmbedding(Base):
+    """Embedding of one achievement or technology of a user experience"""
+    __tablename__ = "experience_item_embeddings"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    experience_id = Column(UUID(as_uuid=True), ForeignKey("user_experiences.id", ondelete="CASCADE"), nullable=False)
+    item_type = Column(String(20), nullable=False)
+    item_index = Column(Integer, nullable=False)
+    item_text = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    embedding = Column("embedding", String, nullable=False)  # pgvector column - will be handled by migration
+    embedding_model = Column(String(100), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=text("NOW()"))
+    
+    __table_args__ = (
+        UniqueConstraint("experience_id", "item_type", "item_index", name="uq_experience_item_embeddings_item"),
+    )
+
+
 # Pydantic Models for API
 class UserBase(PydanticBase):
     """Base user model"""
@@ -245,6 +286,7 @@ class UserSkillUpdate(BaseUpdate):
 class UserSkillResponse(UserSkillBase, BaseResponse):
     """User skill response model"""
     user_id: str
+    skill_id: Optional[int] = None
 
 
 class UserExperienceBase(PydanticBase):
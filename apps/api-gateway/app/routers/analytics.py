@@ -0,0 +1,66 @@
+"""
+Analytics Router
+Serves user analytics dashboards and trends from the daily rollups
+"""
+
+import logging
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.user import User
+from app.models.analytics import AnalyticsDashboard, AnalyticsTrends, ApplicationFunnel, TimeInStage
+from app.routers.users import get_current_user
+from app.services.analytics_rollup import analytics_dashboard, user_trends
+from app.services.funnel_views import application_funnel, time_in_stage
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/dashboard", response_model=AnalyticsDashboard)
+async def get_analytics_dashboard(
+    days: int = Query(settings.ANALYTICS_TREND_DAYS, ge=1, le=365),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the user's totals, today's platform performance, recent days and trends"""
+    return await analytics_dashboard(db, current_user.id, days)
+
+
+@router.get("/trends", response_model=AnalyticsTrends)
+async def get_analytics_trends(
+    days: int = Query(settings.ANALYTICS_TREND_DAYS, ge=1, le=365),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the user's daily series, zero-filled; events appear once rolled up.
+
+    Rollups run every ANALYTICS_ROLLUP_SECONDS and trail events by
+    ANALYTICS_ROLLUP_LAG_SECONDS.
+    """
+    return await user_trends(db, current_user.id, days)
+
+
+@router.get("/funnel", response_model=ApplicationFunnel)
+async def get_application_funnel(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get how many applications reached each stage, for the user and overall.
+
+    Read from materialized views refreshed every ANALYTICS_FUNNEL_REFRESH_SECONDS.
+    """
+    return await application_funnel(db, current_user.id)
+
+
+@router.get("/time-in-stage", response_model=TimeInStage)
+async def get_time_in_stage(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the median hours applications spent in each status, for the user and overall"""
+    return await time_in_stage(db, current_user.id)
@@ -0,0 +1,241 @@
+"""
+Application Management Router
+Handles job application creation and tracking
+"""
+
+from datetime import datetime
+from typing import List, Optional
+import uuid
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.core.database import AsyncSessionLocal, get_db
+from app.core.config import settings
+from app.models.user import User
+from app.models.application import (
+    Application,
+    BulkApplicationCreate,
+    BulkApplicationResponse,
+    DocumentRenderRequest,
+    DocumentRenderResponse,
+    RenderedDocumentItem,
+)
+from app.routers.users import get_current_user, get_stream_user
+from app.services.application_package import plan_packages, stream_packages
+from app.services.application_service import (
+    bulk_create_applications,
+    parse_job_posting_ids,
+)
+from app.services.content_generation import GENERATED_CONTENT_TYPES, content_generator
+from app.services.document_rendering import RENDERED_FILE_STEMS, render_application_documents
+from app.services.fair_scheduler import fair_dispatcher
+from app.services.task_counters import task_counters
+from app.services.task_scheduler import task_scheduler
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/bulk", response_model=BulkApplicationResponse, status_code=status.HTTP_201_CREATED)
+async def create_applications_bulk(
+    bulk_data: BulkApplicationCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create applications and generation tasks for multiple selected jobs"""
+    try:
+        job_posting_ids = parse_job_posting_ids(bulk_data.job_posting_ids)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid job posting id"
+        )
+
+    if len(job_posting_ids) > settings.BULK_APPLICATION_MAX_JOBS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_APPLICATION_MAX_JOBS} jobs can be selected at once"
+        )
+
+    result = await bulk_create_applications(
+        db,
+        user_id=current_user.id,
+        job_posting_ids=job_posting_ids,
+        application_method=bulk_data.application_method,
+        generate_resume=bulk_data.generate_resume,
+        generate_cover_letter=bulk_data.generate_cover_letter,
+        task_priority=bulk_data.task_priority,
+    )
+    await db.commit()
+
+    # Workers reconcile pending tasks on startup, so a Redis outage here only
+    # delays pickup instead of losing the tasks
+    try:
+        await fair_dispatcher.set_user_tiers({current_user.id: current_user.subscription_tier})
+        await task_scheduler.schedule_many(result["tasks"])
+    except Exception as e:
+        logger.warning(f"Failed to index bulk tasks in the delayed scheduler: {e}")
+
+    try:
+        await task_counters.record_created(
+            current_user.id, (task[0] for task in result["tasks"])
+        )
+    except Exception as e:
+        logger.warning(f"Failed to update task counters: {e}")
+
+    return result
+
+
+@router.post("/render", response_model=DocumentRenderResponse)
+async def render_application_documents_batch(
+    render_data: DocumentRenderRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Render the generated resumes and cover letters of selected applications to PDF or DOCX.
+
+    Rendering runs in a pool of worker processes, off the event loop; files
+    whose text has not changed since they were last rendered are reused.
+    """
+    try:
+        application_ids = list(dict.fromkeys(uuid.UUID(str(application_id)) for application_id in render_data.application_ids))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid application id"
+        )
+
+    if len(application_ids) > settings.BULK_APPLICATION_MAX_JOBS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_APPLICATION_MAX_JOBS} applications can be rendered at once"
+        )
+
+    unknown = set(render_data.content_types) - set(RENDERED_FILE_STEMS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Content types must be among: {', '.join(RENDERED_FILE_STEMS)}"
+        )
+
+    documents = await render_application_documents(
+        db, current_user.id, application_ids, render_data.format, render_data.content_types
+    )
+    await db.commit()
+
+    return DocumentRenderResponse(
+        documents=[
+            RenderedDocumentItem(
+                application_id=str(document.application_id),
+                content_type=document.content_type,
+                format=document.format,
+                url=document.url,
+                content_hash=document.content_hash,
+                cached=document.cached,
+                error=document.error,
+            )
+            for document in documents
+        ],
+        rendered=sum(1 for document in documents if document.error is None and not document.cached),
+        failed=sum(1 for document in documents if document.error is not None),
+    )
+
+
+@router.get("/{application_id}/content/{content_type}/stream")
+async def stream_generated_content(
+    application_id: uuid.UUID,
+    content_type: str,
+    regenerate: bool = Query(False),
+    last_event_id: Optional[str] = Header(None),
+    current_user: User = Depends(get_stream_user),
+):
+    """Stream a tailored resume, cover letter or follow-up email as Server-Sent Events.
+
+    The latest generated content of the type is reused; an unfinished
+    generation is joined rather than restarted, and reconnecting clients
+    resume from the Last-Event-ID header. Pass regenerate=true for a fresh
+    generation. Events: snapshot (full text so far), delta (text to append),
+    done (generation metadata) and error.
+    """
+    if content_type not in GENERATED_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Content type must be one of: {', '.join(GENERATED_CONTENT_TYPES)}"
+        )
+
+    # Short-lived session so the open stream holds no database connection
+    async with AsyncSessionLocal() as db:
+        application = (await db.execute(
+            select(Application).where(
+                Application.id == application_id,
+                Application.user_id == current_user.id,
+            )
+        )).scalars().first()
+        if application is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Application not found"
+            )
+
+        # EventSource reconnects to the same URL, so a reconnect must not
+        # turn regenerate=true into yet another generation
+        content_id = await content_generator.prepare(
+            db, application, content_type, regenerate=regenerate and not last_event_id
+        )
+
+    return StreamingResponse(
+        content_generator.events(content_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/packages.zip")
+async def download_application_packages(
+    application_ids: List[uuid.UUID] = Query(..., description="Applications to include; repeat the parameter for each"),
+    current_user: User = Depends(get_stream_user),
+):
+    """Download the packages (job details, tailored resume, cover letter) of several applications as one zip.
+
+    The archive is streamed while it is built, so the download starts
+    immediately and memory use does not grow with the number of packages.
+    """
+    if len(application_ids) > settings.BULK_APPLICATION_MAX_JOBS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_APPLICATION_MAX_JOBS} applications can be exported at once"
+        )
+    return await _package_response(current_user, list(dict.fromkeys(application_ids)), "applications")
+
+
+@router.get("/{application_id}/package.zip")
+async def download_application_package(
+    application_id: uuid.UUID,
+    current_user: User = Depends(get_stream_user),
+):
+    """Download one application's package as a zip"""
+    return await _package_response(current_user, [application_id], f"application-{str(application_id)[:8]}")
+
+
+async def _package_response(user: User, application_ids: List[uuid.UUID], name: str) -> StreamingResponse:
+    # Short-lived session: documents are streamed after the planning queries
+    async with AsyncSessionLocal() as db:
+        entries = await plan_packages(db, user.id, application_ids)
+
+    if not entries:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Application not found"
+        )
+
+    filename = f"{name}-{datetime.utcnow():%Y%m%d}.zip"
+    return StreamingResponse(
+        stream_packages(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"},
+    )
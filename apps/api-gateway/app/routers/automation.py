@@ -0,0 +1,191 @@
+"""
+Automation Router
+Handles automation task progress and monitoring
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.user import User
+from app.models.analytics import PlatformFetchSavings, PlatformMetricsBase
+from app.models.application import GenerationCacheStats
+from app.models.automation import (
+    AutomationTask,
+    AutomationDashboard,
+    TaskStatus,
+    TaskSummary,
+    TierQueueWaitMetrics,
+)
+from app.routers.users import get_current_user, get_stream_user
+from app.services.fair_scheduler import fair_dispatcher
+from app.services.fetch_cache import fetch_savings
+from app.services.generation_cache import generation_cache
+from app.services.llm_client import llm_client
+from app.services.scraper_client import recent_platform_metrics
+from app.services.task_counters import task_counters
+from app.services.task_events import task_event_broker
+from app.services.task_queue import status_literal
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+DASHBOARD_TASK_LIMIT = 10
+
+
+def _task_summary(task: AutomationTask) -> TaskSummary:
+    return TaskSummary(
+        id=str(task.id),
+        task_type=task.task_type,
+        status=task.status,
+        priority=task.priority,
+        scheduled_at=task.scheduled_at,
+        started_at=task.started_at,
+        completed_at=task.completed_at,
+        error_message=task.error_message,
+    )
+
+
+@router.get("/dashboard", response_model=AutomationDashboard)
+async def get_automation_dashboard(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get automation task counts and recent activity for the current user"""
+    counts = None
+    try:
+        counts = await task_counters.get(current_user.id)
+        if counts is None:
+            # First dashboard load for this user: seed the counters
+            counts = await task_counters.reconcile_user(db, current_user.id)
+    except Exception as e:
+        logger.warning(f"Task counters unavailable: {e}")
+
+    if counts is None:
+        counts = task_counters.counts_from_rows(
+            await task_counters.count_rows(db, current_user.id)
+        )
+
+    recent = await db.execute(
+        select(AutomationTask)
+        .where(AutomationTask.user_id == current_user.id)
+        .order_by(AutomationTask.created_at.desc())
+        .limit(DASHBOARD_TASK_LIMIT)
+    )
+    failed = await db.execute(
+        select(AutomationTask)
+        .where(
+            AutomationTask.user_id == current_user.id,
+            AutomationTask.status.in_([
+                status_literal(TaskStatus.FAILED),
+                status_literal(TaskStatus.DEAD_LETTER),
+            ]),
+        )
+        .order_by(AutomationTask.completed_at.desc())
+        .limit(DASHBOARD_TASK_LIMIT)
+    )
+
+    return AutomationDashboard(
+        total_tasks=counts["total"],
+        tasks_by_status=counts["tasks_by_status"],
+        tasks_by_type=counts["tasks_by_type"],
+        recent_tasks=[_task_summary(task) for task in recent.scalars().all()],
+        failed_tasks=[_task_summary(task) for task in failed.scalars().all()],
+    )
+
+
+@router.get("/queue-metrics", response_model=List[TierQueueWaitMetrics])
+async def get_queue_wait_metrics(current_user: User = Depends(get_current_user)):
+    """Get time from due to dispatch of automation tasks per subscription tier.
+
+    Percentiles are upper bounds of the histogram bucket they fall in.
+    """
+    try:
+        return await fair_dispatcher.queue_wait_metrics()
+    except Exception as e:
+        logger.error(f"Queue wait metrics unavailable: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Queue metrics unavailable"
+        )
+
+
+@router.get("/generation-cache", response_model=GenerationCacheStats)
+async def get_generation_cache_stats(current_user: User = Depends(get_current_user)):
+    """Get hit rate, tokens and generation time saved by the LLM generation cache"""
+    try:
+        return await generation_cache.stats()
+    except Exception as e:
+        logger.error(f"Generation cache stats unavailable: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Generation cache stats unavailable"
+        )
+
+
+@router.get("/fetch-cache", response_model=List[PlatformFetchSavings])
+async def get_fetch_cache_savings(
+    days: int = Query(7, ge=1, le=90),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get scraped pages skipped as unchanged per platform, with the bytes and parse time saved"""
+    return await fetch_savings(db, days)
+
+
+@router.get("/platform-metrics", response_model=List[PlatformMetricsBase])
+async def get_platform_metrics(
+    days: int = Query(7, ge=1, le=90),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get daily scraper outcomes and response times per platform.
+
+    Percentiles are upper bounds of the histogram bucket they fall in
+    (within 1/16 of the true value).
+    """
+    return await recent_platform_metrics(db, days)
+
+
+@router.get("/llm-client")
+async def get_llm_client_metrics(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
+    """Get this API process's LLM admission state and per-lane call metrics"""
+    return llm_client.snapshot()
+
+
+@router.get("/events")
+async def stream_task_events(current_user: User = Depends(get_stream_user)):
+    """Stream the current user's automation task status changes as Server-Sent Events.
+
+    A `ready` event is sent once the subscription is live; clients should
+    load current task state after it so no transition is missed.
+    """
+    user_id = current_user.id
+
+    async def event_stream():
+        async with task_event_broker.subscribe(user_id) as queue:
+            yield "event: ready\ndata: {}\n\n"
+            while True:
+                try:
+                    data = await asyncio.wait_for(
+                        queue.get(), timeout=settings.TASK_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing idle streams
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: task\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,137 @@
+"""
+Document Router
+Handles streaming document uploads and (range) downloads
+"""
+
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
+from app.models.document import DocumentResponse
+from app.models.user import User
+from app.routers.users import get_current_user, get_stream_user
+from app.services.document_store import (
+    DocumentTooLargeError,
+    RangeNotSatisfiableError,
+    document_store,
+    document_url,
+    parse_range,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
+async def upload_document(
+    request: Request,
+    filename: Optional[str] = Query(None, max_length=255),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Upload a document sent as the raw request body.
+
+    The body is streamed to storage as it arrives; identical content already
+    stored is not stored again. Content types outside the allowed list are
+    stored as application/octet-stream.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.DOCUMENT_MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Documents are limited to {settings.DOCUMENT_MAX_UPLOAD_BYTES} bytes"
+        )
+
+    try:
+        stored = await document_store.put(
+            db,
+            request.stream(),
+            content_type=request.headers.get("content-type"),
+            user_id=current_user.id,
+            filename=filename,
+        )
+    except DocumentTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Documents are limited to {settings.DOCUMENT_MAX_UPLOAD_BYTES} bytes"
+        )
+    await db.commit()
+
+    return DocumentResponse(
+        content_hash=stored.content_hash,
+        size_bytes=stored.size_bytes,
+        content_type=stored.content_type,
+        filename=filename,
+        url=document_url(stored.content_hash),
+        created=stored.created,
+    )
+
+
+@router.get("/{content_hash}")
+async def download_document(
+    content_hash: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_stream_user)
+):
+    """Download a document, or the byte range given by a Range header"""
+    # Short-lived session: the response streams long after the lookup
+    async with AsyncSessionLocal() as db:
+        document = await document_store.get_user_document(db, current_user.id, content_hash)
+
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+
+    # Content never changes under a hash, so it is cacheable indefinitely;
+    # documents are always downloads, never rendered as the declared type
+    headers = {
+        "ETag": f'"{document.content_hash}"',
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Content-Disposition": "attachment",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if document.filename:
+        headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(document.filename)}"
+    if if_none_match and headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    size = document.size_bytes
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiableError:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    if size == 0:
+        return Response(content=b"", media_type=document.content_type, headers=headers)
+
+    if byte_range is None:
+        body = document_store.open(document.content_hash)
+        status_code = status.HTTP_200_OK
+        headers["Content-Length"] = str(size)
+    else:
+        start, end = byte_range
+        body = document_store.open(document.content_hash, start, end)
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        body,
+        status_code=status_code,
+        media_type=document.content_type,
+        headers=headers,
+    )
@@ -3,18 +3,20 @@ User Management Router
 Handles user registration, authentication, and profile management
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
 import bcrypt
 import jwt
 from datetime import datetime, timedelta
 from pydantic import BaseModel, EmailStr
+import logging
 
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_db
 from app.core.config import settings
+from app.models.job import JobSkillMatchResponse
 from app.models.user import (
     User, UserProfile, UserSkill, UserExperience,
     UserCreate, UserUpdate, UserResponse,
@@ -22,9 +24,17 @@ from app.models.user import (
     UserSkillCreate, UserSkillUpdate, UserSkillResponse,
     UserExperienceCreate, UserExperienceUpdate, UserExperienceResponse
 )
+from app.services.fair_scheduler import fair_dispatcher
+from app.services.skill_extraction import queue_skills_extraction, resume_extraction_config
+from app.services.skill_taxonomy import find_matching_jobs, skill_taxonomy, user_skill_ids
+from app.services.task_counters import task_counters
+from app.services.task_scheduler import task_scheduler
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 # JWT Token Management
@@ -51,13 +61,10 @@ def get_password_hash(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token"""
+async def get_user_from_token(token: str, db: AsyncSession) -> User:
+    """Resolve the user a JWT access token was issued to"""
     try:
-        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(
@@ -85,6 +92,34 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Get current authenticated user from JWT token"""
+    return await get_user_from_token(credentials.credentials, db)
+
+
+async def get_stream_user(
+    token: Optional[str] = Query(None, description="Access token, for clients such as EventSource that cannot set headers"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> User:
+    """Get the user for a long-lived streaming request.
+
+    Accepts the bearer header or a token query parameter, and authenticates
+    with a short-lived session so open streams hold no database connection.
+    """
+    access_token = credentials.credentials if credentials else token
+    if not access_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    async with AsyncSessionLocal() as db:
+        return await get_user_from_token(access_token, db)
+
+
 # Authentication endpoints
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
@@ -176,6 +211,20 @@ async def login_user(login: LoginRequest, db: AsyncSession = Depends(get_db)):
 
 
 # User profile endpoints
+async def index_queued_task(user: User, entry: tuple) -> None:
+    """Index a committed task in the delayed scheduler and task counters.
+
+    Workers reconcile pending tasks on startup, so a Redis outage here only
+    delays pickup instead of losing the task.
+    """
+    try:
+        await fair_dispatcher.set_user_tiers({user.id: user.subscription_tier})
+        await task_scheduler.schedule_many([entry])
+        await task_counters.record_created(user.id, [entry[0]])
+    except Exception as e:
+        logger.warning(f"Failed to index task {entry[1]}: {e}")
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information"""
@@ -246,9 +295,17 @@ async def create_user_profile(
     )
     
     db.add(db_profile)
+    task_entry = None
+    if db_profile.resume_text:
+        task_entry = await queue_skills_extraction(
+            db, current_user.id, resume_extraction_config(current_user.id, db_profile.resume_text)
+        )
     await db.commit()
     await db.refresh(db_profile)
     
+    if task_entry is not None:
+        await index_queued_task(current_user, task_entry)
+    
     return db_profile
 
 
@@ -271,16 +328,39 @@ async def update_user_profile(
         )
     
     update_data = profile_update.dict(exclude_unset=True)
+    resume_changed = "resume_text" in update_data and update_data["resume_text"] != profile.resume_text
     
     for field, value in update_data.items():
         setattr(profile, field, value)
     
+    task_entry = None
+    if resume_changed and profile.resume_text:
+        task_entry = await queue_skills_extraction(
+            db, current_user.id, resume_extraction_config(current_user.id, profile.resume_text)
+        )
     await db.commit()
     await db.refresh(profile)
     
+    if task_entry is not None:
+        await index_queued_task(current_user, task_entry)
+    
     return profile
 
 
+async def apply_canonical_skill(skill_fields: dict) -> None:
+    """Replace a skill name with its canonical name and id"""
+    skill = await skill_taxonomy.canonical(skill_fields["skill_name"], skill_fields.get("skill_category"))
+    if skill is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Skill name must not be blank"
+        )
+    skill_fields["skill_name"] = skill.name
+    skill_fields["skill_id"] = skill.id
+    if not skill_fields.get("skill_category") and skill.category:
+        skill_fields["skill_category"] = skill.category
+
+
 # User skills endpoints
 @router.get("/me/skills", response_model=List[UserSkillResponse])
 async def get_user_skills(
@@ -303,9 +383,11 @@ async def create_user_skill(
     db: AsyncSession = Depends(get_db)
 ):
     """Create user skill"""
+    skill_fields = skill_data.dict(exclude={'user_id'})
+    await apply_canonical_skill(skill_fields)
     db_skill = UserSkill(
         user_id=current_user.id,
-        **skill_data.dict(exclude={'user_id'})
+        **skill_fields
     )
     
     db.add(db_skill)
@@ -323,6 +405,10 @@ async def update_user_skill(
     db: AsyncSession = Depends(get_db)
 ):
     """Update user skill"""
+    update_data = skill_update.dict(exclude_unset=True)
+    if update_data.get("skill_name"):
+        await apply_canonical_skill(update_data)
+    
     result = await db.execute(
         select(UserSkill).where(
             UserSkill.id == skill_id,
@@ -337,8 +423,6 @@ async def update_user_skill(
             detail="Skill not found"
         )
     
-    update_data = skill_update.dict(exclude_unset=True)
-    
     for field, value in update_data.items():
         setattr(skill, field, value)
     
@@ -375,6 +459,34 @@ async def delete_user_skill(
     return {"message": "Skill deleted successfully"}
 
 
+@router.get("/me/skills/matching-jobs", response_model=List[JobSkillMatchResponse])
+async def get_skill_matching_jobs(
+    include_preferred: bool = Query(False, description="Also match jobs that only list the skills as preferred"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get active jobs requiring any of the current user's skills, most matched skills first"""
+    skills = await user_skill_ids(db, current_user.id)
+    rows = await find_matching_jobs(db, list(skills), include_preferred, limit, offset)
+    
+    return [
+        JobSkillMatchResponse(
+            job_posting_id=str(row.id),
+            title=row.title,
+            company_id=str(row.company_id) if row.company_id else None,
+            source_platform=row.source_platform,
+            source_url=row.source_url,
+            posted_date=row.posted_date,
+            required_skill_count=row.required_skill_count,
+            matched_required_skills=[skills[skill_id] for skill_id in row.matched_required_ids],
+            matched_preferred_skills=[skills[skill_id] for skill_id in row.matched_preferred_ids],
+        )
+        for row in rows
+    ]
+
+
 # User experience endpoints
 @router.get("/me/experiences", response_model=List[UserExperienceResponse])
 async def get_user_experiences(
@@ -0,0 +1,2 @@
+# Service Layer Package
+# Job Application Assistance System
@@ -0,0 +1,342 @@
+"""
+Analytics Rollup Service
+Incremental daily user analytics from application events, and the dashboard reads served from them
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List
+import uuid
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import RedisClient, redis_client
+
+logger = logging.getLogger(__name__)
+
+USER_ANALYTICS_ROLLUP = "user_analytics"
+ANALYTICS_ROLLUP_LEASE_KEY = "analytics:rollup:lease"
+
+RESPONSE_STATUSES = ("reviewing", "interviewed", "rejected", "offered")
+
+ENSURE_ROLLUP_STATE_SQL = text("""
+    INSERT INTO analytics_rollup_state (name, watermark)
+    VALUES (:name, 'epoch')
+    ON CONFLICT (name) DO NOTHING
+""")
+
+# The window ends a little in the past: rows are timestamped when their
+# transaction starts, so recent ones may still be uncommitted
+ROLLUP_WINDOW_SQL = text("""
+    SELECT watermark, NOW() - make_interval(secs => CAST(:lag AS double precision)) AS until
+    FROM analytics_rollup_state
+    WHERE name = :name
+    FOR UPDATE
+""")
+
+# Status changes count the first time an application reaches a status (and
+# the first response of any kind); content counts when its generation
+# completed; discovery counts the postings a finished crawl ingested
+ROLLUP_EVENTS_SQL = text("""
+    WITH history AS (
+        SELECT a.user_id, a.application_method::text AS application_method,
+               h.status::text AS status, h.created_at AS event_at,
+               NOT EXISTS (
+                   SELECT 1 FROM application_status_history p
+                   WHERE p.application_id = h.application_id AND p.status = h.status
+                     AND (p.created_at, p.id) < (h.created_at, h.id)
+               ) AS first_of_status,
+               h.status::text = ANY(CAST(:response_statuses AS text[])) AND NOT EXISTS (
+                   SELECT 1 FROM application_status_history p
+                   WHERE p.application_id = h.application_id
+                     AND p.status::text = ANY(CAST(:response_statuses AS text[]))
+                     AND (p.created_at, p.id) < (h.created_at, h.id)
+               ) AS first_response
+        FROM application_status_history h
+        JOIN applications a ON a.id = h.application_id
+        WHERE h.created_at > CAST(:since AS timestamptz) AND h.created_at <= CAST(:until AS timestamptz)
+    ),
+    content AS (
+        SELECT a.user_id, g.content_type::text AS content_type,
+               COALESCE(CAST(g.generation_metadata->>'completed_at' AS timestamptz), g.created_at) AS event_at
+        FROM generated_content g
+        JOIN applications a ON a.id = g.application_id
+        WHERE g.updated_at > CAST(:since AS timestamptz)
+          AND COALESCE(g.generation_metadata->>'status', 'completed') = 'completed'
+    ),
+    events AS (
+        SELECT user_id, event_at,
+               CASE WHEN status = 'submitted' AND first_of_status THEN 1 ELSE 0 END AS submitted,
+               CASE WHEN status = 'interviewed' AND first_of_status THEN 1 ELSE 0 END AS interviewed,
+               CASE WHEN status = 'offered' AND first_of_status THEN 1 ELSE 0 END AS offered,
+               CASE WHEN first_response THEN 1 ELSE 0 END AS responded,
+               0 AS resumes, 0 AS cover_letters, 0 AS discovered,
+               CASE WHEN status = 'submitted' AND first_of_status AND application_method = 'automated'
+                    THEN CAST(:submission_minutes AS integer) ELSE 0 END AS minutes_saved
+        FROM history
+        UNION ALL
+        SELECT user_id, event_at, 0, 0, 0, 0,
+               CASE WHEN content_type = 'resume' THEN 1 ELSE 0 END,
+               CASE WHEN content_type = 'cover_letter' THEN 1 ELSE 0 END,
+               0,
+               CASE content_type
+                   WHEN 'resume' THEN CAST(:resume_minutes AS integer)
+                   WHEN 'cover_letter' THEN CAST(:cover_letter_minutes AS integer)
+                   ELSE 0
+               END
+        FROM content
+        WHERE event_at > CAST(:since AS timestamptz) AND event_at <= CAST(:until AS timestamptz)
+        UNION ALL
+        SELECT t.user_id, t.completed_at, 0, 0, 0, 0, 0, 0,
+               COALESCE(CAST(t.result_data->>'new_postings' AS integer), 0), 0
+        FROM automation_tasks t
+        WHERE t.task_type = 'job_discovery' AND t.status = 'completed'
+          AND t.completed_at > CAST(:since AS timestamptz) AND t.completed_at <= CAST(:until AS timestamptz)
+    ),
+    daily AS (
+        SELECT user_id, CAST(event_at AT TIME ZONE 'UTC' AS date) AS metric_date,
+               SUM(submitted) AS submitted, SUM(interviewed) AS interviewed, SUM(offered) AS offered,
+               SUM(responded) AS responded, SUM(resumes) AS resumes, SUM(cover_letters) AS cover_letters,
+               SUM(discovered) AS discovered, SUM(minutes_saved) AS minutes_saved
+        FROM events
+        GROUP BY 1, 2
+        HAVING SUM(submitted + interviewed + offered + responded + resumes + cover_letters + discovered) > 0
+    )
+    INSERT INTO user_analytics AS ua (
+        user_id, metric_date, applications_submitted, interviews_scheduled, offers_received,
+        responses_received, resumes_generated, cover_letters_generated, jobs_discovered, time_saved_minutes
+    )
+    SELECT user_id, metric_date, submitted, interviewed, offered, responded,
+           resumes, cover_letters, discovered, minutes_saved
+    FROM daily
+    ORDER BY user_id, metric_date
+    ON CONFLICT (user_id, metric_date) DO UPDATE
+    SET applications_submitted = COALESCE(ua.applications_submitted, 0) + EXCLUDED.applications_submitted,
+        interviews_scheduled = COALESCE(ua.interviews_scheduled, 0) + EXCLUDED.interviews_scheduled,
+        offers_received = COALESCE(ua.offers_received, 0) + EXCLUDED.offers_received,
+        responses_received = COALESCE(ua.responses_received, 0) + EXCLUDED.responses_received,
+        resumes_generated = COALESCE(ua.resumes_generated, 0) + EXCLUDED.resumes_generated,
+        cover_letters_generated = COALESCE(ua.cover_letters_generated, 0) + EXCLUDED.cover_letters_generated,
+        jobs_discovered = COALESCE(ua.jobs_discovered, 0) + EXCLUDED.jobs_discovered,
+        time_saved_minutes = COALESCE(ua.time_saved_minutes, 0) + EXCLUDED.time_saved_minutes
+    RETURNING user_id, metric_date
+""")
+
+# response_rate is cumulative: responses over submissions up to each day
+RESPONSE_RATE_SQL = text("""
+    WITH cumulative AS (
+        SELECT id,
+               SUM(COALESCE(responses_received, 0)) OVER w AS responses,
+               SUM(COALESCE(applications_submitted, 0)) OVER w AS submitted
+        FROM user_analytics
+        WHERE user_id = ANY(CAST(:user_ids AS uuid[]))
+        WINDOW w AS (PARTITION BY user_id ORDER BY metric_date)
+    ),
+    rates AS (
+        SELECT id, CASE WHEN submitted > 0
+                        THEN LEAST(ROUND(responses / CAST(submitted AS numeric), 4), 1) END AS response_rate
+        FROM cumulative
+    )
+    UPDATE user_analytics ua
+    SET response_rate = r.response_rate
+    FROM rates r
+    WHERE ua.id = r.id AND ua.response_rate IS DISTINCT FROM r.response_rate
+""")
+
+ADVANCE_WATERMARK_SQL = text("""
+    UPDATE analytics_rollup_state SET watermark = :watermark WHERE name = :name
+""")
+
+USER_TRENDS_SQL = text("""
+    SELECT d.day,
+           COALESCE(ua.applications_submitted, 0) AS applications_submitted,
+           COALESCE(ua.interviews_scheduled, 0) AS interviews_scheduled,
+           COALESCE(ua.offers_received, 0) AS offers_received,
+           COALESCE(ua.responses_received, 0) AS responses_received,
+           COALESCE(ua.resumes_generated, 0) AS resumes_generated,
+           COALESCE(ua.cover_letters_generated, 0) AS cover_letters_generated,
+           COALESCE(ua.jobs_discovered, 0) AS jobs_discovered,
+           COALESCE(ua.time_saved_minutes, 0) AS time_saved_minutes,
+           ua.response_rate
+    FROM generate_series(CAST(:start_date AS date), CAST(:end_date AS date), interval '1 day') AS d(day)
+    LEFT JOIN user_analytics ua ON ua.user_id = :user_id AND ua.metric_date = d.day
+    ORDER BY d.day
+""")
+
+# Response rate carried into the window from before it
+RESPONSE_RATE_BEFORE_SQL = text("""
+    SELECT response_rate
+    FROM user_analytics
+    WHERE user_id = :user_id AND metric_date < CAST(:start_date AS date) AND response_rate IS NOT NULL
+    ORDER BY metric_date DESC
+    LIMIT 1
+""")
+
+USER_TOTALS_SQL = text("""
+    SELECT COALESCE(SUM(applications_submitted), 0) AS applications_submitted,
+           COALESCE(SUM(interviews_scheduled), 0) AS interviews_scheduled,
+           COALESCE(SUM(offers_received), 0) AS offers_received,
+           COALESCE(SUM(time_saved_minutes), 0) AS time_saved_minutes,
+           MIN(metric_date) AS first_date,
+           (SELECT response_rate FROM user_analytics r
+            WHERE r.user_id = :user_id AND r.response_rate IS NOT NULL
+            ORDER BY r.metric_date DESC LIMIT 1) AS response_rate
+    FROM user_analytics
+    WHERE user_id = :user_id
+""")
+
+RECENT_USER_ANALYTICS_SQL = text("""
+    SELECT id::text AS id, user_id::text AS user_id, metric_date,
+           COALESCE(applications_submitted, 0) AS applications_submitted,
+           COALESCE(jobs_discovered, 0) AS jobs_discovered,
+           COALESCE(resumes_generated, 0) AS resumes_generated,
+           COALESCE(cover_letters_generated, 0) AS cover_letters_generated,
+           COALESCE(interviews_scheduled, 0) AS interviews_scheduled,
+           COALESCE(offers_received, 0) AS offers_received,
+           COALESCE(responses_received, 0) AS responses_received,
+           response_rate,
+           COALESCE(time_saved_minutes, 0) AS time_saved_minutes,
+           created_at, COALESCE(updated_at, created_at) AS updated_at
+    FROM user_analytics
+    WHERE user_id = :user_id
+    ORDER BY metric_date DESC
+    LIMIT :limit
+""")
+
+PLATFORM_TODAY_SQL = text("""
+    SELECT platform_name,
+           COALESCE(successful_scrapes, 0) AS successful_scrapes,
+           COALESCE(failed_scrapes, 0) AS failed_scrapes,
+           COALESCE(rate_limit_hits, 0) AS rate_limit_hits,
+           COALESCE(total_jobs_scraped, 0) AS total_jobs_scraped,
+           average_response_time_ms, p95_response_time_ms
+    FROM platform_metrics
+    WHERE metric_date = CURRENT_DATE
+    ORDER BY platform_name
+""")
+
+# Series served by the trends endpoint, in rollup column order
+TREND_SERIES = (
+    "applications_submitted",
+    "interviews_scheduled",
+    "offers_received",
+    "responses_received",
+    "resumes_generated",
+    "cover_letters_generated",
+    "jobs_discovered",
+    "time_saved_minutes",
+)
+
+
+class AnalyticsRollup:
+    """Maintains daily user_analytics rows from events past a watermark.
+
+    Each run reads only the status changes, completed generations and
+    finished discovery crawls between the watermark and shortly before now,
+    adds them to the users' day rows with one upsert, refreshes the touched
+    users' cumulative response rate and advances the watermark, all in one
+    transaction. The watermark row is locked for the run, so concurrent runs
+    queue instead of counting events twice.
+    """
+
+    def __init__(self, client: RedisClient = redis_client, name: str = USER_ANALYTICS_ROLLUP):
+        self.client = client
+        self.name = name
+
+    async def acquire_rollup_lease(self, seconds: int) -> bool:
+        """Let only one worker roll up per period"""
+        client = await self.client.get_client()
+        return bool(await client.set(ANALYTICS_ROLLUP_LEASE_KEY, 1, nx=True, ex=seconds))
+
+    async def run(self, session: AsyncSession) -> Dict[str, Any]:
+        """Roll up events since the watermark; the caller owns the transaction"""
+        await session.execute(ENSURE_ROLLUP_STATE_SQL, {"name": self.name})
+        window = (await session.execute(ROLLUP_WINDOW_SQL, {
+            "name": self.name,
+            "lag": settings.ANALYTICS_ROLLUP_LAG_SECONDS,
+        })).one()
+        since, until = window.watermark, window.until
+        if since >= until:
+            return {"rows": 0, "users": 0}
+
+        rows = (await session.execute(ROLLUP_EVENTS_SQL, {
+            "since": since,
+            "until": until,
+            "response_statuses": list(RESPONSE_STATUSES),
+            "resume_minutes": settings.ANALYTICS_MINUTES_SAVED_PER_RESUME,
+            "cover_letter_minutes": settings.ANALYTICS_MINUTES_SAVED_PER_COVER_LETTER,
+            "submission_minutes": settings.ANALYTICS_MINUTES_SAVED_PER_SUBMISSION,
+        })).all()
+        user_ids = list({row.user_id for row in rows})
+        if user_ids:
+            await session.execute(RESPONSE_RATE_SQL, {"user_ids": user_ids})
+        await session.execute(ADVANCE_WATERMARK_SQL, {"name": self.name, "watermark": until})
+        if rows:
+            logger.info(f"Rolled up analytics to {until}: {len(rows)} day rows of {len(user_ids)} users")
+        return {"rows": len(rows), "users": len(user_ids)}
+
+
+async def user_trends(session: AsyncSession, user_id: uuid.UUID, days: int) -> Dict[str, Any]:
+    """Daily series of the user's rollups over the last days, zero-filled.
+
+    response_rate is cumulative, so days without a row carry the previous
+    day's rate forward.
+    """
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days - 1)
+    params = {"user_id": user_id, "start_date": start_date, "end_date": end_date}
+    rows = (await session.execute(USER_TRENDS_SQL, params)).all()
+    rate = (await session.execute(RESPONSE_RATE_BEFORE_SQL, params)).scalar()
+
+    trends: Dict[str, List[float]] = {name: [] for name in TREND_SERIES}
+    trends["response_rate"] = []
+    for row in rows:
+        for name in TREND_SERIES:
+            trends[name].append(float(getattr(row, name)))
+        if row.response_rate is not None:
+            rate = row.response_rate
+        trends["response_rate"].append(float(rate or 0))
+    return {"start_date": start_date, "end_date": end_date, "trends": trends}
+
+
+async def analytics_dashboard(session: AsyncSession, user_id: uuid.UUID, days: int) -> Dict[str, Any]:
+    """Dashboard summary, recent days and trends, read from the rollups only"""
+    totals = (await session.execute(USER_TOTALS_SQL, {"user_id": user_id})).one()
+    active_days = (date.today() - totals.first_date).days + 1 if totals.first_date else 0
+    submitted = totals.applications_submitted
+
+    platforms = []
+    for row in (await session.execute(PLATFORM_TODAY_SQL)).all():
+        attempts = row.successful_scrapes + row.failed_scrapes
+        platforms.append({
+            "platform_name": row.platform_name,
+            "success_rate": row.successful_scrapes / attempts if attempts else 0.0,
+            "average_response_time_ms": row.average_response_time_ms or 0,
+            "p95_response_time_ms": row.p95_response_time_ms,
+            "total_jobs_today": row.total_jobs_scraped,
+            "rate_limit_status": "limited" if row.rate_limit_hits else "ok",
+        })
+
+    recent = (await session.execute(RECENT_USER_ANALYTICS_SQL, {
+        "user_id": user_id,
+        "limit": settings.ANALYTICS_RECENT_DAYS,
+    })).all()
+    return {
+        "user_performance": {
+            "total_applications": submitted,
+            "total_interviews": totals.interviews_scheduled,
+            "total_offers": totals.offers_received,
+            "response_rate": float(totals.response_rate or 0),
+            "average_time_saved_per_day": totals.time_saved_minutes // active_days if active_days else 0,
+            "success_rate": totals.offers_received / submitted if submitted else 0.0,
+        },
+        "platform_performance": platforms,
+        "recent_metrics": [dict(row._mapping) for row in recent],
+        "trends": (await user_trends(session, user_id, days))["trends"],
+    }
+
+
+# Global analytics rollup instance
+analytics_rollup = AnalyticsRollup()
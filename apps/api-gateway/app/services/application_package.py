@@ -0,0 +1,213 @@
+"""
+Application Package Service
+Streaming zip export of application packages: job link, tailored resume and cover letter
+"""
+
+import mimetypes
+import re
+import time
+import uuid
+import zipfile
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Sequence
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.application import ContentType
+from app.services.document_store import DocumentNotFoundError, DocumentStore, document_store
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_URL_PATTERN = re.compile(r"/api/v1/documents/([0-9a-f]{64})$")
+UNSAFE_PATH_PATTERN = re.compile(r"[^\w.\- ]+")
+FOLDER_NAME_MAX_LENGTH = 80
+
+PACKAGE_APPLICATIONS_SQL = text("""
+    SELECT id, company_name, job_title, job_url, status, submitted_at,
+           tailored_resume_url, cover_letter_url
+    FROM applications
+    WHERE user_id = :user_id AND id = ANY(:application_ids)
+    ORDER BY created_at, id
+""")
+
+# Latest completed resume and cover letter per application
+PACKAGE_CONTENT_SQL = text("""
+    SELECT DISTINCT ON (application_id, content_type)
+           application_id, content_type::text AS content_type, content_text, file_url
+    FROM generated_content
+    WHERE application_id = ANY(:application_ids)
+      AND content_type IN ('resume', 'cover_letter')
+      AND COALESCE(generation_metadata->>'status', 'completed') = 'completed'
+    ORDER BY application_id, content_type, created_at DESC
+""")
+
+PACKAGE_DOCUMENTS_SQL = text("""
+    SELECT d.content_hash, d.size_bytes, d.content_type
+    FROM documents d
+    JOIN user_documents u ON u.content_hash = d.content_hash AND u.user_id = :user_id
+    WHERE d.content_hash = ANY(:content_hashes)
+""")
+
+# File name stems and extensions of generated text without a rendered file
+PACKAGE_FILES = {
+    ContentType.RESUME: ("resume", ".md"),
+    ContentType.COVER_LETTER: ("cover_letter", ".txt"),
+}
+
+
+class PackageEntry(NamedTuple):
+    path: str
+    # Inline content (job details, generated text) ...
+    data: Optional[bytes] = None
+    # ... or a stored document, streamed from the document store
+    content_hash: Optional[str] = None
+
+
+def document_hash(url: Optional[str]) -> Optional[str]:
+    """Content hash of a document store URL; None for other (external) URLs"""
+    match = DOCUMENT_URL_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+
+def _extension(content_type: str) -> str:
+    if content_type == "text/markdown":
+        return ".md"
+    return mimetypes.guess_extension(content_type.split(";")[0].strip()) or ".bin"
+
+
+def _folder_name(application) -> str:
+    name = UNSAFE_PATH_PATTERN.sub("", f"{application.company_name} - {application.job_title}")
+    name = " ".join(name.split())[:FOLDER_NAME_MAX_LENGTH].strip(" .") or "application"
+    # The id suffix keeps folders of same-named applications apart
+    return f"{name} ({str(application.id)[:8]})"
+
+
+def _job_details(application) -> bytes:
+    lines = [
+        f"Job: {application.job_title}",
+        f"Company: {application.company_name}",
+        f"URL: {application.job_url or '-'}",
+        f"Status: {application.status or '-'}",
+    ]
+    if application.submitted_at:
+        lines.append(f"Submitted: {application.submitted_at.isoformat()}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def plan_packages(
+    session: AsyncSession, user_id: uuid.UUID, application_ids: Sequence[uuid.UUID]
+) -> List[PackageEntry]:
+    """Archive entries for the user's applications, in three queries.
+
+    A rendered file in the document store is preferred over generated
+    text; applications of other users are silently left out.
+    """
+    params = {"user_id": user_id, "application_ids": list(application_ids)}
+    applications = (await session.execute(PACKAGE_APPLICATIONS_SQL, params)).all()
+    if not applications:
+        return []
+    contents: Dict[tuple, object] = {
+        (row.application_id, row.content_type): row
+        for row in (await session.execute(PACKAGE_CONTENT_SQL, params)).all()
+    }
+
+    files: Dict[tuple, Optional[str]] = {}
+    for application in applications:
+        for content_type, url in (
+            (ContentType.RESUME, application.tailored_resume_url),
+            (ContentType.COVER_LETTER, application.cover_letter_url),
+        ):
+            content = contents.get((application.id, content_type))
+            files[(application.id, content_type)] = document_hash(url) or document_hash(
+                content.file_url if content is not None else None
+            )
+    documents = {
+        row.content_hash: row
+        for row in (await session.execute(PACKAGE_DOCUMENTS_SQL, {
+            "user_id": user_id,
+            "content_hashes": [content_hash for content_hash in files.values() if content_hash],
+        })).all()
+    }
+
+    entries = []
+    for application in applications:
+        folder = _folder_name(application)
+        entries.append(PackageEntry(f"{folder}/job.txt", data=_job_details(application)))
+        for content_type, (stem, text_extension) in PACKAGE_FILES.items():
+            document = documents.get(files[(application.id, content_type)])
+            content = contents.get((application.id, content_type))
+            if document is not None:
+                entries.append(PackageEntry(
+                    f"{folder}/{stem}{_extension(document.content_type)}", content_hash=document.content_hash
+                ))
+            elif content is not None and content.content_text:
+                entries.append(PackageEntry(f"{folder}/{stem}{text_extension}", data=content.content_text.encode()))
+    return entries
+
+
+class _ZipSink:
+    """Write-only file object zipfile writes into and the stream drains.
+
+    Having no tell() makes zipfile treat it as unseekable and write each
+    member's sizes and CRC in a data descriptor after its data, so nothing
+    ever needs to be rewritten.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_packages(
+    entries: Sequence[PackageEntry], store: DocumentStore = document_store
+) -> AsyncIterator[bytes]:
+    """Zip archive of entries, yielded as it is built.
+
+    Stored documents are copied chunk by chunk and flushed after each
+    chunk, so memory use is bounded by one chunk plus the central directory
+    whatever the number of packages, and the first bytes leave immediately.
+    Documents (PDF, DOCX) are already compressed and are stored as is;
+    text entries are deflated.
+    """
+    sink = _ZipSink()
+    date_time = time.localtime()[:6]
+    missing = []
+    with zipfile.ZipFile(sink, "w") as archive:
+        for entry in entries:
+            info = zipfile.ZipInfo(entry.path, date_time=date_time)
+            info.compress_type = zipfile.ZIP_STORED if entry.content_hash else zipfile.ZIP_DEFLATED
+            with archive.open(info, "w") as member:
+                if entry.content_hash is None:
+                    member.write(entry.data)
+                else:
+                    try:
+                        async for chunk in store.open(entry.content_hash):
+                            member.write(chunk)
+                            data = sink.drain()
+                            if data:
+                                yield data
+                    except DocumentNotFoundError:
+                        logger.warning(f"Document {entry.content_hash} missing from storage, left out of package")
+                        missing.append(entry.path)
+            data = sink.drain()
+            if data:
+                yield data
+        if missing:
+            archive.writestr(
+                "MISSING.txt",
+                "These documents could not be read from storage:\n" + "\n".join(missing) + "\n",
+                compress_type=zipfile.ZIP_DEFLATED,
+            )
+    yield sink.drain()
@@ -0,0 +1,141 @@
+"""
+Application Service
+Bulk application creation with automation task fan-out
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.automation import TaskType
+
+logger = logging.getLogger(__name__)
+
+
+# One statement, one round trip: the postings are resolved, the applications,
+# their initial status history rows and the automation tasks are all inserted
+# through data-modifying CTEs. company_name / job_title / job_url are copied
+# from the postings inside Postgres so no posting rows travel to Python.
+# Postings the user already applied to are skipped by the unique
+# (user_id, job_posting_id) index, also against concurrent requests.
+BULK_CREATE_APPLICATIONS_SQL = text("""
+    WITH selected AS (
+        SELECT jp.id, jp.title, jp.source_url,
+               COALESCE(c.name, 'Unknown') AS company_name,
+               sel.ord
+        FROM unnest(CAST(:job_posting_ids AS uuid[])) WITH ORDINALITY AS sel(id, ord)
+        JOIN job_postings jp ON jp.id = sel.id
+        LEFT JOIN companies c ON c.id = jp.company_id
+        WHERE jp.is_active
+    ),
+    inserted AS (
+        INSERT INTO applications (
+            user_id, job_posting_id, company_name, job_title, job_url,
+            status, application_method, last_status_update
+        )
+        SELECT :user_id, s.id, s.company_name, s.title, s.source_url,
+               'pending'::application_status,
+               CAST(:application_method AS application_method),
+               NOW()
+        FROM selected s
+        ORDER BY s.ord
+        ON CONFLICT (user_id, job_posting_id) DO NOTHING
+        RETURNING id, job_posting_id, company_name, job_title, job_url, status
+    ),
+    history AS (
+        INSERT INTO application_status_history (application_id, status, changed_by)
+        SELECT i.id, i.status, 'user'
+        FROM inserted i
+    ),
+    tasks AS (
+        INSERT INTO automation_tasks (
+            user_id, application_id, task_type, status, priority,
+            scheduled_at, task_config
+        )
+        SELECT :user_id, i.id, t.task_type, 'pending'::task_status, :priority,
+               NOW(), jsonb_build_object('job_posting_id', i.job_posting_id)
+        FROM inserted i
+        CROSS JOIN unnest(CAST(:task_types AS varchar[])) AS t(task_type)
+        RETURNING id, application_id, task_type, scheduled_at, user_id, priority
+    )
+    SELECT i.id, i.job_posting_id, i.company_name, i.job_title, i.job_url,
+           i.status::text AS status,
+           COALESCE(
+               (SELECT array_agg(ROW(t.task_type, t.id::text, t.scheduled_at, t.user_id::text, t.priority))
+                FROM tasks t WHERE t.application_id = i.id),
+               '{}'
+           ) AS tasks
+    FROM inserted i
+""")
+
+
+def parse_job_posting_ids(job_posting_ids: Sequence[str]) -> List[UUID]:
+    """Parse and de-duplicate job posting ids, preserving selection order"""
+    parsed: Dict[UUID, None] = {}
+    for job_posting_id in job_posting_ids:
+        parsed.setdefault(UUID(str(job_posting_id)), None)
+    return list(parsed)
+
+
+async def bulk_create_applications(
+    db: AsyncSession,
+    user_id: UUID,
+    job_posting_ids: Sequence[UUID],
+    application_method: Optional[str] = None,
+    generate_resume: bool = True,
+    generate_cover_letter: bool = True,
+    task_priority: int = 5,
+) -> Dict[str, Any]:
+    """Create one application per job posting plus its generation tasks.
+
+    Postings that are inactive, unknown or already applied to by the user are
+    skipped and reported back. The caller owns the transaction.
+    """
+    task_types = []
+    if generate_resume:
+        task_types.append(TaskType.RESUME_GENERATION)
+    if generate_cover_letter:
+        task_types.append(TaskType.COVER_LETTER_GENERATION)
+
+    result = await db.execute(
+        BULK_CREATE_APPLICATIONS_SQL,
+        {
+            "user_id": user_id,
+            "job_posting_ids": list(job_posting_ids),
+            "application_method": application_method,
+            "task_types": task_types,
+            "priority": task_priority,
+        },
+    )
+    rows = result.mappings().all()
+
+    created_posting_ids = {row["job_posting_id"] for row in rows}
+    skipped = [str(pid) for pid in job_posting_ids if pid not in created_posting_ids]
+    tasks = [tuple(task) for row in rows for task in row["tasks"]]
+    tasks_created = len(tasks)
+
+    logger.info(
+        f"Bulk created {len(rows)} applications and {tasks_created} tasks "
+        f"for user {user_id} ({len(skipped)} skipped)"
+    )
+
+    return {
+        "applications": [
+            {
+                "id": str(row["id"]),
+                "job_posting_id": str(row["job_posting_id"]),
+                "company_name": row["company_name"],
+                "job_title": row["job_title"],
+                "job_url": row["job_url"],
+                "status": row["status"],
+            }
+            for row in rows
+        ],
+        "skipped_job_posting_ids": skipped,
+        "tasks_created": tasks_created,
+        # (task_type, task_id, scheduled_at, user_id, priority) for the delayed scheduler
+        "tasks": tasks,
+    }
@@ -0,0 +1,410 @@
+"""
+Browser Session Pool
+Per-user, per-platform pool of warm browser sessions with LRU eviction and proactive renewal
+"""
+
+import asyncio
+import json
+import os
+import socket
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+import logging
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str]
+
+# Claims the most recently used stored session no pool process holds; rows
+# another claim is taking are skipped rather than waited on
+CLAIM_STORED_SESSION_SQL = text("""
+    UPDATE browser_sessions b
+    SET leased_by = :leased_by, leased_until = NOW() + make_interval(secs => CAST(:lease_seconds AS integer))
+    WHERE b.id = (
+        SELECT id
+        FROM browser_sessions
+        WHERE user_id = :user_id AND platform = :platform AND is_active
+          AND (expires_at IS NULL OR expires_at > NOW())
+          AND (leased_until IS NULL OR leased_until < NOW())
+        ORDER BY last_used_at DESC NULLS LAST
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING b.id, b.cookies, b.user_agent, b.proxy_config, b.session_data, b.expires_at
+""")
+
+INSERT_SESSION_SQL = text("""
+    INSERT INTO browser_sessions
+        (user_id, platform, cookies, user_agent, proxy_config, session_data, is_active, last_used_at, expires_at,
+         leased_by, leased_until)
+    VALUES
+        (:user_id, :platform, :cookies, :user_agent, CAST(:proxy_config AS jsonb),
+         CAST(:session_data AS jsonb), true, NOW(), :expires_at,
+         :leased_by, NOW() + make_interval(secs => CAST(:lease_seconds AS integer)))
+    RETURNING id
+""")
+
+UPDATE_SESSION_SQL = text("""
+    UPDATE browser_sessions
+    SET cookies = :cookies, user_agent = :user_agent, proxy_config = CAST(:proxy_config AS jsonb),
+        session_data = CAST(:session_data AS jsonb), expires_at = :expires_at, is_active = true
+    WHERE id = :id
+""")
+
+# One statement for every session used since the last flush
+TOUCH_SESSIONS_SQL = text("""
+    UPDATE browser_sessions b
+    SET last_used_at = t.last_used_at
+    FROM unnest(CAST(:ids AS uuid[]), CAST(:last_used_at AS timestamptz[])) AS t(id, last_used_at)
+    WHERE b.id = t.id AND (b.last_used_at IS NULL OR b.last_used_at < t.last_used_at)
+""")
+
+DEACTIVATE_SESSION_SQL = text("""
+    UPDATE browser_sessions SET is_active = false, leased_by = NULL, leased_until = NULL WHERE id = :id
+""")
+
+EXTEND_LEASES_SQL = text("""
+    UPDATE browser_sessions
+    SET leased_until = NOW() + make_interval(secs => CAST(:lease_seconds AS integer))
+    WHERE id = ANY(CAST(:ids AS uuid[])) AND leased_by = :leased_by
+""")
+
+RELEASE_LEASE_SQL = text("""
+    UPDATE browser_sessions
+    SET leased_by = NULL, leased_until = NULL
+    WHERE id = :id AND leased_by = :leased_by
+""")
+
+
+class BrowserSessionState(NamedTuple):
+    cookies: Optional[str] = None
+    user_agent: Optional[str] = None
+    proxy_config: Optional[Dict[str, Any]] = None
+    session_data: Optional[Dict[str, Any]] = None
+    expires_at: Optional[datetime] = None
+    # Live, process-local session object (e.g. a browser context); never stored
+    handle: Any = None
+
+
+class BrowserSessionFactory:
+    """Creates and renews a platform's sessions; subclass and register per platform.
+
+    create() receives the stored state of a previous session when one can
+    be restored (cookies, user agent) and should reuse it rather than log
+    in again; it is the slow path the pool exists to avoid.
+    """
+
+    async def create(
+        self, user_id: uuid.UUID, platform: str, stored: Optional[BrowserSessionState]
+    ) -> BrowserSessionState:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.BROWSER_SESSION_TTL_SECONDS)
+        if stored is not None:
+            return stored._replace(expires_at=stored.expires_at or expires_at)
+        return BrowserSessionState(user_agent=settings.BROWSER_SESSION_USER_AGENT, expires_at=expires_at)
+
+    async def renew(self, user_id: uuid.UUID, platform: str, current: BrowserSessionState) -> BrowserSessionState:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.BROWSER_SESSION_TTL_SECONDS)
+        return current._replace(expires_at=expires_at)
+
+    async def close(self, state: BrowserSessionState) -> None:
+        """Release the live handle of a session leaving the pool"""
+
+
+class BrowserSessionFactoryRegistry:
+    """Maps platforms to their session factory; others use the default factory"""
+
+    def __init__(self):
+        self._factories: Dict[str, BrowserSessionFactory] = {}
+        self.default = BrowserSessionFactory()
+
+    def register(self, platform: str) -> Callable[[Type[BrowserSessionFactory]], Type[BrowserSessionFactory]]:
+        """Class decorator registering a session factory for a platform"""
+        def decorator(factory_class: Type[BrowserSessionFactory]) -> Type[BrowserSessionFactory]:
+            if platform in self._factories:
+                raise ValueError(f"Session factory already registered for platform {platform}")
+            self._factories[platform] = factory_class()
+            return factory_class
+        return decorator
+
+    def get(self, platform: str) -> BrowserSessionFactory:
+        return self._factories.get(platform, self.default)
+
+
+class PooledBrowserSession:
+    """A warm session leased from the pool"""
+
+    def __init__(self, session_id: uuid.UUID, user_id: uuid.UUID, platform: str, state: BrowserSessionState):
+        self.id = session_id
+        self.user_id = user_id
+        self.platform = platform
+        self.state = state
+        self.last_used_at = datetime.now(timezone.utc)
+        self.invalid = False
+
+    @property
+    def key(self) -> SessionKey:
+        return (str(self.user_id), self.platform)
+
+    def expires_within(self, seconds: float) -> bool:
+        expires_at = self.state.expires_at
+        return expires_at is not None and expires_at <= datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+    def invalidate(self) -> None:
+        """Mark the session unusable (e.g. logged out); it is dropped on release"""
+        self.invalid = True
+
+
+def _json(value: Optional[Dict[str, Any]]) -> Optional[str]:
+    return json.dumps(value) if value is not None else None
+
+
+class BrowserSessionPool:
+    """Process-wide pool of warm browser sessions, keyed by (user, platform).
+
+    A leased session is returned to the pool and reused by the next task of
+    the same user on the same platform. Without a warm one, the most
+    recently used stored session is restored from its cookies, and only
+    then is a new one created. At most max_size sessions are kept warm;
+    the least recently used idle ones are closed first (their rows stay
+    active, so they can be restored later).
+
+    A warm session's stored row is claimed by this pool (leased_by /
+    leased_until), so other processes' pools restore other rows; a stored
+    session is claimed atomically before it is restored, and the claim is
+    released when the session leaves the pool or lapses if the process
+    dies. The slow restore or login runs with no database session open.
+
+    last_used_at is written in batches by the maintenance loop, which also
+    extends the claims, and renews idle sessions shortly before they
+    expire, so tasks rarely wait for a renewal.
+    """
+
+    def __init__(
+        self,
+        registry: Optional[BrowserSessionFactoryRegistry] = None,
+        max_size: int = settings.BROWSER_SESSION_POOL_MAX_SIZE,
+    ):
+        self.registry = registry or session_factories
+        self.max_size = max_size
+        # Every warm session, leased or idle
+        self._sessions: Dict[uuid.UUID, PooledBrowserSession] = {}
+        # Idle sessions, least recently used first
+        self._idle: "OrderedDict[uuid.UUID, PooledBrowserSession]" = OrderedDict()
+        self._touched: Dict[uuid.UUID, datetime] = {}
+        # Claim owner of this pool's stored rows
+        self.lease_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"[:100]
+        self._maintainer: Optional[asyncio.Task] = None
+        self.stats = {"reused": 0, "restored": 0, "created": 0, "renewed": 0, "evicted": 0}
+
+    @asynccontextmanager
+    async def session(self, user_id: uuid.UUID, platform: str) -> AsyncIterator[PooledBrowserSession]:
+        """Lease a session of the user on the platform for the duration of the block"""
+        pooled = await self.acquire(user_id, platform)
+        try:
+            yield pooled
+        finally:
+            await self.release(pooled)
+
+    async def acquire(self, user_id: uuid.UUID, platform: str) -> PooledBrowserSession:
+        self._ensure_started()
+        key = (str(user_id), platform)
+        # Most recently used idle session of the key
+        for pooled in reversed(self._idle.values()):
+            if pooled.key != key:
+                continue
+            del self._idle[pooled.id]
+            if pooled.expires_within(0):
+                try:
+                    await self._renew(pooled)
+                except Exception as e:
+                    logger.warning(f"Failed to renew expired {platform} browser session {pooled.id}: {e}")
+                    await self._discard(pooled)
+                    break
+            self.stats["reused"] += 1
+            return pooled
+
+        factory = self.registry.get(platform)
+        async with AsyncSessionLocal() as db:
+            stored = (await db.execute(CLAIM_STORED_SESSION_SQL, {
+                "user_id": user_id,
+                "platform": platform,
+                "leased_by": self.lease_owner,
+                "lease_seconds": settings.BROWSER_SESSION_LEASE_SECONDS,
+            })).first()
+            await db.commit()
+
+        if stored is not None:
+            try:
+                state = await factory.create(user_id, platform, BrowserSessionState(
+                    stored.cookies, stored.user_agent, stored.proxy_config, stored.session_data, stored.expires_at
+                ))
+                async with AsyncSessionLocal() as db:
+                    await db.execute(UPDATE_SESSION_SQL, self._row(stored.id, state))
+                    await db.commit()
+            except BaseException:
+                # Otherwise the claim would only lapse after the lease time
+                await self._release_lease(stored.id)
+                raise
+            session_id = stored.id
+            self.stats["restored"] += 1
+        else:
+            state = await factory.create(user_id, platform, None)
+            params = self._row(None, state)
+            params.update(
+                user_id=user_id,
+                platform=platform,
+                leased_by=self.lease_owner,
+                lease_seconds=settings.BROWSER_SESSION_LEASE_SECONDS,
+            )
+            async with AsyncSessionLocal() as db:
+                session_id = (await db.execute(INSERT_SESSION_SQL, params)).scalar_one()
+                await db.commit()
+            self.stats["created"] += 1
+
+        pooled = PooledBrowserSession(session_id, user_id, platform, state)
+        self._sessions[session_id] = pooled
+        return pooled
+
+    async def release(self, pooled: PooledBrowserSession) -> None:
+        pooled.last_used_at = datetime.now(timezone.utc)
+        self._touched[pooled.id] = pooled.last_used_at
+        if pooled.invalid:
+            await self._discard(pooled)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(DEACTIVATE_SESSION_SQL, {"id": pooled.id})
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"Failed to deactivate browser session {pooled.id}: {e}")
+            return
+        if pooled.id in self._sessions:
+            self._idle[pooled.id] = pooled
+        await self._evict()
+
+    @property
+    def size(self) -> int:
+        return len(self._sessions)
+
+    async def close(self) -> None:
+        """Stop maintenance, write pending last_used_at updates and close every session"""
+        if self._maintainer is not None:
+            self._maintainer.cancel()
+            self._maintainer = None
+        await self.flush()
+        for pooled in list(self._sessions.values()):
+            await self._discard(pooled)
+
+    async def extend_leases(self) -> None:
+        """Keep the stored rows of every warm session claimed by this pool"""
+        if not self._sessions:
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(EXTEND_LEASES_SQL, {
+                "ids": list(self._sessions),
+                "leased_by": self.lease_owner,
+                "lease_seconds": settings.BROWSER_SESSION_LEASE_SECONDS,
+            })
+            await db.commit()
+
+    async def flush(self) -> None:
+        """Write the last_used_at of sessions used since the previous flush"""
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(TOUCH_SESSIONS_SQL, {
+                    "ids": list(touched), "last_used_at": list(touched.values()),
+                })
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to record browser session usage: {e}")
+            for session_id, used_at in touched.items():
+                self._touched.setdefault(session_id, used_at)
+
+    async def renew_expiring(self) -> None:
+        """Renew idle sessions expiring within BROWSER_SESSION_RENEW_BEFORE_SECONDS"""
+        expiring: List[PooledBrowserSession] = [
+            pooled for pooled in self._idle.values()
+            if pooled.expires_within(settings.BROWSER_SESSION_RENEW_BEFORE_SECONDS)
+        ]
+        for pooled in expiring:
+            # Leased while renewing, so no task picks up a half-renewed session
+            if self._idle.pop(pooled.id, None) is None:
+                continue
+            try:
+                await self._renew(pooled)
+            except Exception as e:
+                logger.warning(f"Failed to renew {pooled.platform} browser session {pooled.id}: {e}")
+                await self._discard(pooled)
+                continue
+            self._idle[pooled.id] = pooled
+            self._idle.move_to_end(pooled.id, last=False)
+
+    def _ensure_started(self) -> None:
+        if self._maintainer is None or self._maintainer.done():
+            self._maintainer = asyncio.create_task(self._maintain())
+
+    async def _maintain(self) -> None:
+        while True:
+            await asyncio.sleep(settings.BROWSER_SESSION_MAINTENANCE_SECONDS)
+            try:
+                await self.flush()
+                await self.extend_leases()
+                await self.renew_expiring()
+            except Exception as e:
+                logger.warning(f"Browser session pool maintenance failed: {e}")
+
+    async def _renew(self, pooled: PooledBrowserSession) -> None:
+        pooled.state = await self.registry.get(pooled.platform).renew(pooled.user_id, pooled.platform, pooled.state)
+        async with AsyncSessionLocal() as db:
+            await db.execute(UPDATE_SESSION_SQL, self._row(pooled.id, pooled.state))
+            await db.commit()
+        self.stats["renewed"] += 1
+
+    async def _evict(self) -> None:
+        while len(self._sessions) > self.max_size and self._idle:
+            _, pooled = self._idle.popitem(last=False)
+            await self._discard(pooled)
+            self.stats["evicted"] += 1
+
+    async def _discard(self, pooled: PooledBrowserSession) -> None:
+        self._sessions.pop(pooled.id, None)
+        self._idle.pop(pooled.id, None)
+        try:
+            await self.registry.get(pooled.platform).close(pooled.state)
+        except Exception as e:
+            logger.warning(f"Failed to close {pooled.platform} browser session {pooled.id}: {e}")
+        await self._release_lease(pooled.id)
+
+    async def _release_lease(self, session_id: uuid.UUID) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(RELEASE_LEASE_SQL, {"id": session_id, "leased_by": self.lease_owner})
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to release browser session {session_id}: {e}")
+
+    @staticmethod
+    def _row(session_id: Optional[uuid.UUID], state: BrowserSessionState) -> Dict[str, Any]:
+        return {
+            "id": session_id,
+            "cookies": state.cookies,
+            "user_agent": state.user_agent,
+            "proxy_config": _json(state.proxy_config),
+            "session_data": _json(state.session_data),
+            "expires_at": state.expires_at,
+        }
+
+
+# Global session factory registry and browser session pool instances
+session_factories = BrowserSessionFactoryRegistry()
+browser_session_pool = BrowserSessionPool()
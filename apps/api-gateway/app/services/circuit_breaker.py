@@ -0,0 +1,129 @@
+"""
+Circuit Breaker
+Pauses work against a failing downstream until it recovers
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over a sliding time window.
+
+    The circuit opens once at least failure_threshold outcomes in the window
+    are failures and they make up at least failure_ratio of all outcomes.
+    While open nothing is allowed through. After the cooldown a single trial
+    is let through (half-open): success closes the circuit, failure reopens
+    it with the cooldown doubled, up to ten times the configured cooldown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = settings.TASK_CIRCUIT_FAILURE_THRESHOLD,
+        failure_ratio: float = settings.TASK_CIRCUIT_FAILURE_RATIO,
+        window_seconds: float = settings.TASK_CIRCUIT_WINDOW_SECONDS,
+        cooldown_seconds: float = settings.TASK_CIRCUIT_COOLDOWN_SECONDS,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_ratio = failure_ratio
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.state = CircuitState.CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._current_cooldown = cooldown_seconds
+        self._trial_in_flight = False
+
+    def allowance(self, requested: int) -> int:
+        """How many of the requested units of work may start now"""
+        if self.state == CircuitState.CLOSED:
+            return requested
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self._current_cooldown:
+                return 0
+            self.state = CircuitState.HALF_OPEN
+            self._trial_in_flight = False
+            logger.info(f"Circuit {self.name} half-open, allowing a trial")
+        if self._trial_in_flight or requested <= 0:
+            return 0
+        self._trial_in_flight = True
+        return 1
+
+    def release(self, unused: int) -> None:
+        """Return allowance that was granted but not used"""
+        if unused > 0 and self.state == CircuitState.HALF_OPEN:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            logger.info(f"Circuit {self.name} closed")
+            self.state = CircuitState.CLOSED
+            self._current_cooldown = self.cooldown_seconds
+            self._outcomes.clear()
+            self._failures = 0
+            return
+        self._record(False)
+
+    def record_failure(self) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            self._open(min(self._current_cooldown * 2, self.cooldown_seconds * 10))
+            return
+        self._record(True)
+        if self.state == CircuitState.CLOSED and self._should_open():
+            self._open(self.cooldown_seconds)
+
+    def _record(self, failed: bool) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            _, old_failed = self._outcomes.popleft()
+            self._failures -= old_failed
+
+    def _should_open(self) -> bool:
+        return (
+            self._failures >= self.failure_threshold
+            and self._failures / len(self._outcomes) >= self.failure_ratio
+        )
+
+    def _open(self, cooldown: float) -> None:
+        self.state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+        self._current_cooldown = cooldown
+        self._trial_in_flight = False
+        self._outcomes.clear()
+        self._failures = 0
+        logger.warning(f"Circuit {self.name} opened for {cooldown:.0f}s")
+
+
+class CircuitBreakerRegistry:
+    """Lazily created circuit breakers keyed by name"""
+
+    def __init__(self, **breaker_options):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breaker_options = breaker_options
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **self._breaker_options)
+            self._breakers[name] = breaker
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        return {name: breaker.state for name, breaker in self._breakers.items()}
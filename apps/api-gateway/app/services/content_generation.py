@@ -0,0 +1,554 @@
+"""
+Content Generation Service
+Streams LLM-generated resumes and cover letters with incremental persistence
+"""
+
+import asyncio
+from datetime import datetime, timezone
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+import logging
+
+from sqlalchemy import literal_column, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import RedisClient, redis_client
+from app.models.application import Application, ContentType, GeneratedContent
+from app.models.job import Company, JobPosting
+from app.models.user import User, UserExperience, UserProfile, UserSkill
+from app.services.experience_ranking import experience_ranker
+from app.services.generation_cache import GenerationCache, generation_cache, generation_cache_key
+from app.services.llm_client import LLMClient, LLMPriority, llm_client
+from app.services.prompt_budget import (
+    AssembledPrompt,
+    PromptSection,
+    TrimStrategy,
+    extract_keywords,
+    prompt_assembler,
+)
+
+logger = logging.getLogger(__name__)
+
+GENERATION_STREAM_KEY_PREFIX = "generation:stream"
+
+# Extend the lease only while this producer still holds it
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+GENERATED_CONTENT_TYPES = (ContentType.RESUME, ContentType.COVER_LETTER, ContentType.FOLLOW_UP_EMAIL)
+
+CONTINUE_INSTRUCTION = (
+    "Continue exactly where the text above stops. Do not repeat any of it "
+    "and do not add any preamble."
+)
+
+SYSTEM_PROMPTS = {
+    ContentType.RESUME: (
+        "You are an expert resume writer. Tailor the candidate's resume to the "
+        "job posting: lead with the most relevant experience, mirror the "
+        "posting's terminology where it is truthful, and quantify achievements. "
+        "Never invent experience, employers, dates or skills. Respond with the "
+        "resume in Markdown only."
+    ),
+    ContentType.COVER_LETTER: (
+        "You are an expert career coach writing a cover letter for the "
+        "candidate. Keep it under 400 words, specific to the company and role, "
+        "grounded only in the candidate's real experience, in a confident and "
+        "professional tone. Respond with the letter text only."
+    ),
+    ContentType.FOLLOW_UP_EMAIL: (
+        "You write short, courteous follow-up emails from a job applicant to "
+        "a hiring team. Keep it under 150 words. Respond with the email only."
+    ),
+}
+
+
+class GenerationStatus(str):
+    STREAMING = "streaming"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+def content_type_literal(content_type: str):
+    """Content type as an inline literal (the column is the content_type enum)"""
+    if content_type not in GENERATED_CONTENT_TYPES:
+        raise ValueError(f"Unknown content type {content_type}")
+    return literal_column(f"'{content_type}'")
+
+
+def _section(title: str, body: Optional[str]) -> str:
+    return f"## {title}\n{body.strip()}" if body and body.strip() else ""
+
+
+async def build_generation_messages(
+    db: AsyncSession, application: Application, content_type: str, model: str
+) -> Tuple[List[Dict[str, str]], AssembledPrompt]:
+    """Assemble the chat prompt from the application, posting and candidate profile.
+
+    Source text is fitted to the model's prompt token budget; the returned
+    assembly reports what was dropped.
+    """
+    posting, company_name = None, application.company_name
+    if application.job_posting_id is not None:
+        row = (await db.execute(
+            select(JobPosting, Company.name)
+            .outerjoin(Company, Company.id == JobPosting.company_id)
+            .where(JobPosting.id == application.job_posting_id)
+        )).first()
+        if row is not None:
+            posting, company_name = row[0], row[1] or company_name
+
+    user = await db.get(User, application.user_id)
+    profile = (await db.execute(
+        select(UserProfile).where(UserProfile.user_id == application.user_id)
+    )).scalars().first()
+    experiences = (await db.execute(
+        select(UserExperience)
+        .where(UserExperience.user_id == application.user_id)
+        .order_by(UserExperience.start_date.desc())
+    )).scalars().all()
+    skills = (await db.execute(
+        select(UserSkill.skill_name)
+        .where(UserSkill.user_id == application.user_id)
+        .order_by(UserSkill.is_primary.desc(), UserSkill.skill_name)
+    )).scalars().all()
+
+    candidate = [f"Name: {' '.join(filter(None, [user.first_name, user.last_name]))}"] if user else []
+    if profile is not None and profile.current_title:
+        candidate.append(f"Current title: {profile.current_title}")
+    if profile is not None and profile.years_experience:
+        candidate.append(f"Years of experience: {profile.years_experience}")
+
+    sections = [
+        PromptSection("Role", f"{application.job_title} at {company_name}", required=True),
+        PromptSection("Candidate", "\n".join(candidate), required=True),
+        PromptSection("Job description", posting.description if posting else "", weight=2.0),
+        PromptSection("Requirements", posting.requirements if posting else "", weight=1.5),
+        PromptSection("Skills", ", ".join(skills), weight=0.5),
+    ]
+    rankings = None
+    if posting is not None:
+        rankings = await experience_ranker.rank(
+            db, application.user_id, posting, priority=LLMPriority.INTERACTIVE
+        )
+
+    headings = {}
+    for experience in experiences:
+        end = "present" if experience.is_current or not experience.end_date else experience.end_date.isoformat()
+        heading = (
+            f"### {experience.job_title} at {experience.company_name} "
+            f"({experience.start_date.isoformat()} to {end})"
+        )
+        name = f"experience:{experience.id}"
+        headings[name] = heading
+        ranking = rankings.get(experience.id) if rankings else None
+        if ranking is not None:
+            # Most relevant first, so budget trimming drops the least relevant
+            achievements = [item.text for item in ranking.achievements[:settings.EXPERIENCE_MAX_ACHIEVEMENTS]]
+            technologies = [item.text for item in ranking.technologies[:settings.EXPERIENCE_MAX_TECHNOLOGIES]]
+            strategy = TrimStrategy.HEAD
+        else:
+            achievements = experience.achievements or []
+            technologies = experience.technologies_used or []
+            strategy = TrimStrategy.RELEVANT
+        body = [experience.description.strip()] if experience.description else []
+        body += [f"* {achievement}" for achievement in achievements]
+        if technologies:
+            body.append(f"Technologies: {', '.join(technologies)}")
+        # Recent roles get more of the budget than older ones
+        weight = 2.0 if len(headings) <= 2 else 1.0
+        sections.append(PromptSection(name, "\n".join(body), strategy, weight))
+    sections.append(PromptSection("Current resume", profile.resume_text if profile else "", weight=1.0))
+
+    job_keywords = extract_keywords(" ".join(filter(None, [
+        application.job_title,
+        posting.description if posting else None,
+        posting.requirements if posting else None,
+    ])))
+    assembled = prompt_assembler.assemble(sections, model, keywords=job_keywords)
+    texts = assembled.sections
+
+    experience_text = "\n\n".join(
+        f"{heading}\n{texts[name]}" if name in texts else heading
+        for name, heading in headings.items()
+    )
+    parts = [
+        _section("Role", texts.get("Role")),
+        _section("Job description", texts.get("Job description")),
+        _section("Requirements", texts.get("Requirements")),
+        _section("Candidate", texts.get("Candidate")),
+        _section("Experience", experience_text),
+        _section("Skills", texts.get("Skills")),
+        _section("Current resume", texts.get("Current resume")),
+    ]
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPTS[content_type]},
+        {"role": "user", "content": "\n\n".join(part for part in parts if part)},
+    ]
+    return messages, assembled
+
+
+def render_prompt(messages: List[Dict[str, str]]) -> str:
+    """Human-readable prompt stored in generation_prompt"""
+    return "\n\n".join(f"[{m['role']}]\n{m['content']}" for m in messages)
+
+
+class ContentGenerator:
+    """Runs streamed generations and fans them out to any number of readers.
+
+    Generation runs in a background task of the API process, decoupled from
+    the request that started it, and appends each batch of deltas to a Redis
+    stream. Readers replay that stream from the SSE Last-Event-ID, so a
+    reconnecting client picks up exactly where it left off and never starts a
+    second generation. The partial text is checkpointed into
+    GeneratedContent.content_text every few seconds; if the generating
+    process dies, the next reader finds no live lease and the generation is
+    resumed from the checkpoint by asking the model to continue it.
+
+    Stream events: snapshot (replace text), delta (append), done, error.
+    """
+
+    def __init__(
+        self,
+        client: RedisClient = redis_client,
+        llm: LLMClient = llm_client,
+        cache: GenerationCache = generation_cache,
+    ):
+        self.client = client
+        self.llm = llm
+        self.cache = cache
+        self._producers: Set[asyncio.Task] = set()
+        self._instance_id = uuid.uuid4().hex
+        self._renew_script = None
+
+    def stream_key(self, content_id: Any) -> str:
+        return f"{GENERATION_STREAM_KEY_PREFIX}:{content_id}"
+
+    def lease_key(self, content_id: Any) -> str:
+        return f"{GENERATION_STREAM_KEY_PREFIX}:{content_id}:lease"
+
+    async def prepare(
+        self,
+        db: AsyncSession,
+        application: Application,
+        content_type: str,
+        regenerate: bool = False,
+    ) -> str:
+        """Return the GeneratedContent id to stream, starting generation if needed.
+
+        The latest content of this type is reused unless regenerate is set or
+        its generation failed; an interrupted generation is resumed. Commits,
+        so the background producer can see the row.
+        """
+        latest = (await db.execute(
+            select(GeneratedContent)
+            .where(
+                GeneratedContent.application_id == application.id,
+                GeneratedContent.content_type == content_type_literal(content_type),
+            )
+            .order_by(GeneratedContent.created_at.desc())
+            .limit(1)
+        )).scalars().first()
+
+        status = (latest.generation_metadata or {}).get("status") if latest is not None else None
+        if latest is not None and not regenerate and status != GenerationStatus.FAILED:
+            content_id = str(latest.id)
+            if status == GenerationStatus.STREAMING:
+                messages = (latest.generation_metadata or {}).get("messages")
+                await self.start(
+                    content_id, messages, latest.model_used, resume_text=latest.content_text or ""
+                )
+            return content_id
+
+        model = settings.LLM_DEFAULT_MODEL
+        messages, assembled = await build_generation_messages(db, application, content_type, model)
+        content_id = str(uuid.uuid4())
+        db.add(GeneratedContent(
+            id=content_id,
+            application_id=application.id,
+            content_type=content_type_literal(content_type),
+            content_text="",
+            generation_prompt=render_prompt(messages),
+            model_used=model,
+            generation_metadata={
+                "status": GenerationStatus.STREAMING,
+                "messages": messages,
+                "prompt_budget": assembled.report(),
+            },
+        ))
+        await db.commit()
+        await self.start(content_id, messages, model, bypass_cache=regenerate)
+        return content_id
+
+    async def start(
+        self,
+        content_id: str,
+        messages: Optional[List[Dict[str, str]]],
+        model: Optional[str],
+        resume_text: str = "",
+        bypass_cache: bool = False,
+    ) -> bool:
+        """Start a producer unless one holds the lease for this content"""
+        client = await self.client.get_client()
+        acquired = await client.set(
+            self.lease_key(content_id), self._instance_id, nx=True, ex=settings.GENERATION_LEASE_SECONDS
+        )
+        if not acquired:
+            return False
+        if not messages:
+            await self._fail(content_id, "Generation cannot be resumed: prompt unavailable")
+            return False
+
+        producer = asyncio.create_task(
+            self._produce(content_id, messages, model or settings.LLM_DEFAULT_MODEL, resume_text, bypass_cache)
+        )
+        self._producers.add(producer)
+        producer.add_done_callback(self._producers.discard)
+        return True
+
+    async def _produce(
+        self,
+        content_id: str,
+        messages: List[Dict[str, str]],
+        model: str,
+        resume_text: str,
+        bypass_cache: bool,
+    ) -> None:
+        client = await self.client.get_client()
+        stream_key = self.stream_key(content_id)
+        text = resume_text
+        last_checkpoint = time.monotonic()
+        heartbeat = asyncio.create_task(self._hold_lease(client, content_id))
+        try:
+            if not resume_text:
+                await client.delete(stream_key)
+            await self._append(client, stream_key, "snapshot", {"text": text})
+
+            cache_key = generation_cache_key(render_prompt(messages), model)
+            use_cache = settings.GENERATION_CACHE_ENABLED and not resume_text
+            cached = None
+            if use_cache and not bypass_cache:
+                async with AsyncSessionLocal() as session:
+                    cached = await self.cache.lookup(session, cache_key)
+                    await session.commit()
+
+            if cached is not None:
+                generation, source = cached
+                await self.cache.record_stats(source, generation)
+                text = generation.content_text
+                await self._append(client, stream_key, "delta", {"text": text})
+                metadata = {
+                    "prompt_tokens": generation.prompt_tokens,
+                    "completion_tokens": generation.completion_tokens,
+                    "latency_ms": 0,
+                    "model": generation.model_used,
+                    "cache_hit": source,
+                }
+            else:
+                request_messages = messages
+                if resume_text:
+                    request_messages = messages + [
+                        {"role": "assistant", "content": resume_text},
+                        {"role": "user", "content": CONTINUE_INSTRUCTION},
+                    ]
+                pending: List[str] = []
+                last_flush = time.monotonic()
+                async with self.llm.stream_chat(
+                    request_messages, model=model, priority=LLMPriority.INTERACTIVE
+                ) as stream:
+                    async for delta in stream:
+                        pending.append(delta)
+                        now = time.monotonic()
+                        if now - last_flush >= settings.GENERATION_STREAM_FLUSH_SECONDS:
+                            chunk = "".join(pending)
+                            pending.clear()
+                            text += chunk
+                            last_flush = now
+                            await self._append(client, stream_key, "delta", {"text": chunk})
+                        if now - last_checkpoint >= settings.GENERATION_CHECKPOINT_SECONDS:
+                            last_checkpoint = now
+                            await self._checkpoint(content_id, text + "".join(pending))
+                if pending:
+                    chunk = "".join(pending)
+                    text += chunk
+                    await self._append(client, stream_key, "delta", {"text": chunk})
+
+                response = stream.response
+                metadata = {
+                    "prompt_tokens": response.prompt_tokens,
+                    "completion_tokens": response.completion_tokens,
+                    "latency_ms": response.latency_ms,
+                    "queue_ms": response.queue_ms,
+                    "model": response.model,
+                    "finish_reason": response.finish_reason,
+                    "cache_hit": None,
+                }
+                if resume_text:
+                    metadata["resumed_from_chars"] = len(resume_text)
+                elif use_cache:
+                    # A resumed text is not a pure function of the prompt, so only
+                    # uninterrupted generations are cached
+                    generation = response.to_generation()
+                    async with AsyncSessionLocal() as session:
+                        await self.cache.store(session, cache_key, generation)
+                        await session.commit()
+                    await self.cache.record_stats("bypasses" if bypass_cache else "misses", generation)
+
+            metadata.update({
+                "status": GenerationStatus.COMPLETED,
+                "cache_key": cache_key,
+                "chars": len(text),
+                "completed_at": datetime.now(timezone.utc).isoformat(),
+            })
+            await self._save(content_id, text, metadata, model_used=metadata["model"])
+            await self._append(client, stream_key, "done", {k: v for k, v in metadata.items() if k != "messages"})
+            logger.info(f"Generated content {content_id} ({len(text)} chars)")
+        except asyncio.CancelledError:
+            # Shutting down: keep the checkpoint so the next reader resumes it
+            await self._checkpoint(content_id, text)
+            raise
+        except Exception as e:
+            logger.error(f"Generation of content {content_id} failed: {e}")
+            await self._checkpoint(content_id, text)
+            await self._fail(content_id, str(e) or e.__class__.__name__)
+        finally:
+            heartbeat.cancel()
+            try:
+                await client.expire(stream_key, settings.GENERATION_STREAM_TTL_SECONDS)
+                await client.delete(self.lease_key(content_id))
+            except Exception as e:
+                logger.warning(f"Failed to release generation lease for {content_id}: {e}")
+
+    async def _hold_lease(self, client, content_id: str) -> None:
+        """Renew the lease every third of its TTL until the producer finishes.
+
+        Waiting for LLM admission or the first token can outlast the lease;
+        an expired lease would let a reconnecting reader start a second
+        producer on the same content.
+        """
+        if self._renew_script is None:
+            self._renew_script = client.register_script(RENEW_LEASE_SCRIPT)
+        ttl = settings.GENERATION_LEASE_SECONDS
+        while True:
+            await asyncio.sleep(ttl / 3)
+            try:
+                renewed = await self._renew_script(
+                    keys=[self.lease_key(content_id)], args=[self._instance_id, ttl], client=client
+                )
+                if not renewed:
+                    logger.warning(f"Lost generation lease for {content_id}")
+                    return
+            except Exception as e:
+                logger.warning(f"Failed to renew generation lease for {content_id}: {e}")
+
+    async def events(self, content_id: str, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """SSE lines for a content's generation, replayed after last_event_id"""
+        client = await self.client.get_client()
+        stream_key = self.stream_key(content_id)
+        last_id = last_event_id or "0-0"
+        heartbeat_ms = int(settings.TASK_EVENTS_HEARTBEAT_SECONDS * 1000)
+
+        while True:
+            entries = await client.xread({stream_key: last_id}, count=100)
+            if not entries:
+                if not await client.exists(self.lease_key(content_id)):
+                    # No producer and nothing new (stream expired, or a reconnect
+                    # after the final event): serve the stored content instead
+                    async for line in self._stored_events(content_id):
+                        yield line
+                    return
+                entries = await client.xread({stream_key: last_id}, count=100, block=heartbeat_ms)
+                if not entries:
+                    yield ": keepalive\n\n"
+                    continue
+
+            for entry_id, fields in entries[0][1]:
+                last_id = entry_id
+                yield f"id: {entry_id}\nevent: {fields['event']}\ndata: {fields['data']}\n\n"
+                if fields["event"] in ("done", "error"):
+                    return
+
+    async def close(self) -> None:
+        """Cancel running producers; their checkpoints are resumed later"""
+        for producer in list(self._producers):
+            producer.cancel()
+        if self._producers:
+            await asyncio.gather(*self._producers, return_exceptions=True)
+
+    async def _stored_events(self, content_id: str) -> AsyncIterator[str]:
+        async with AsyncSessionLocal() as session:
+            content = await session.get(GeneratedContent, content_id)
+        if content is None:
+            yield f"event: error\ndata: {json.dumps({'detail': 'Content not found'})}\n\n"
+            return
+        metadata = {k: v for k, v in (content.generation_metadata or {}).items() if k != "messages"}
+        yield f"event: snapshot\ndata: {json.dumps({'text': content.content_text or ''})}\n\n"
+        if metadata.get("status") == GenerationStatus.FAILED:
+            yield f"event: error\ndata: {json.dumps({'detail': metadata.get('error')})}\n\n"
+        elif metadata.get("status") != GenerationStatus.STREAMING:
+            yield f"event: done\ndata: {json.dumps(metadata, default=str)}\n\n"
+        # An interrupted generation ends the stream without done; the client's
+        # reconnect goes through prepare(), which resumes it from the checkpoint
+
+    async def _append(self, client, stream_key: str, event: str, data: Dict[str, Any]) -> None:
+        await client.xadd(
+            stream_key,
+            {"event": event, "data": json.dumps(data, default=str)},
+            maxlen=settings.GENERATION_STREAM_MAX_EVENTS,
+            approximate=True,
+        )
+
+    async def _checkpoint(self, content_id: str, text: str) -> None:
+        try:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    await session.execute(
+                        update(GeneratedContent)
+                        .where(GeneratedContent.id == content_id)
+                        .values(content_text=text)
+                    )
+        except Exception as e:
+            logger.warning(f"Failed to checkpoint content {content_id}: {e}")
+
+    async def _save(self, content_id: str, text: str, metadata: Dict[str, Any], model_used: str) -> None:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                content = await session.get(GeneratedContent, content_id)
+                existing = (content.generation_metadata or {}) if content else {}
+                await session.execute(
+                    update(GeneratedContent)
+                    .where(GeneratedContent.id == content_id)
+                    .values(
+                        content_text=text,
+                        model_used=model_used[:50],
+                        generation_metadata={**existing, **metadata},
+                    )
+                )
+
+    async def _fail(self, content_id: str, error: str) -> None:
+        try:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    content = await session.get(GeneratedContent, content_id)
+                    if content is not None:
+                        content.generation_metadata = {
+                            **(content.generation_metadata or {}),
+                            "status": GenerationStatus.FAILED,
+                            "error": error,
+                        }
+            client = await self.client.get_client()
+            await self._append(client, self.stream_key(content_id), "error", {"detail": error})
+        except Exception as e:
+            logger.error(f"Failed to record generation failure for {content_id}: {e}")
+
+
+# Global content generator instance
+content_generator = ContentGenerator()
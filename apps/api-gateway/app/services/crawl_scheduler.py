@@ -0,0 +1,342 @@
+"""
+Crawl Scheduler
+Schedules saved-search recrawls by expected yield, from each source's observed arrival and change rates
+"""
+
+import json
+import math
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import RedisClient, redis_client
+from app.models.automation import TaskType
+from app.services.job_discovery import JobSearchCrawlerRegistry, search_crawlers
+from app.services.task_scheduler import ScheduleEntry
+
+logger = logging.getLogger(__name__)
+
+CRAWL_SCHEDULE_LEASE_KEY = "crawl:schedule:lease"
+
+# Requests are budgeted over a sliding hour
+BUDGET_WINDOW_SECONDS = 3600
+
+# Every active saved search is a crawl source on every crawlable platform
+SYNC_SOURCES_SQL = text("""
+    INSERT INTO crawl_sources (platform, search_preference_id, user_id)
+    SELECT p.platform, s.id, s.user_id
+    FROM job_search_preferences s
+    CROSS JOIN unnest(CAST(:platforms AS varchar[])) AS p(platform)
+    WHERE s.is_active
+    ON CONFLICT (platform, search_preference_id) DO NOTHING
+""")
+
+# Pooled crawl history per platform, plus its recent ingestion volume to
+# seed estimates before any crawl has been observed
+PLATFORM_HISTORY_SQL = text("""
+    SELECT p.platform,
+           COALESCE(SUM(cs.new_postings), 0) AS new_postings,
+           COALESCE(SUM(cs.observed_hours), 0) AS observed_hours,
+           COALESCE(SUM(cs.crawls), 0) AS crawls,
+           COALESCE(SUM(cs.changed_crawls), 0) AS changed_crawls,
+           COUNT(cs.id) AS sources,
+           (SELECT COUNT(*) FROM job_postings jp
+            WHERE jp.source_platform = p.platform
+              AND jp.created_at > NOW() - make_interval(days => CAST(:days AS integer))) AS ingested
+    FROM unnest(CAST(:platforms AS varchar[])) AS p(platform)
+    LEFT JOIN crawl_sources cs ON cs.platform = p.platform
+    GROUP BY p.platform
+""")
+
+# Sources of active searches without a discovery task already waiting or running
+CANDIDATE_SOURCES_SQL = text("""
+    SELECT cs.id, cs.platform, cs.user_id, cs.search_preference_id,
+           cs.new_postings, cs.observed_hours, cs.crawls, cs.changed_crawls, cs.pages_per_crawl,
+           cs.last_crawled_at IS NULL AS never_crawled,
+           EXTRACT(EPOCH FROM NOW() - COALESCE(cs.last_crawled_at, cs.created_at)) / 3600 AS age_hours
+    FROM crawl_sources cs
+    JOIN job_search_preferences s ON s.id = cs.search_preference_id AND s.is_active
+    LEFT JOIN automation_tasks t ON t.id = cs.task_id AND t.status IN ('pending', 'running')
+    WHERE cs.platform = ANY(CAST(:platforms AS varchar[]))
+      AND t.id IS NULL
+""")
+
+BUDGET_USED_SQL = text("""
+    SELECT task_config->>'platform' AS platform,
+           SUM(COALESCE(CAST(task_config->>'expected_pages' AS double precision), 1)) AS pages
+    FROM automation_tasks
+    WHERE task_type = CAST(:task_type AS varchar)
+      AND task_config->>'platform' = ANY(CAST(:platforms AS text[]))
+      AND created_at > NOW() - make_interval(secs => CAST(:window AS double precision))
+    GROUP BY 1
+""")
+
+CREATE_CRAWL_TASKS_SQL = text("""
+    WITH crawls AS (
+        SELECT *
+        FROM jsonb_to_recordset(CAST(:crawls AS jsonb)) AS c(
+            crawl_source_id uuid, user_id uuid, platform text, search_preference_id uuid,
+            expected_pages double precision, expected_new_postings double precision,
+            delay_seconds double precision
+        )
+    ),
+    tasks AS (
+        INSERT INTO automation_tasks (user_id, task_type, status, priority, scheduled_at, task_config)
+        SELECT c.user_id, CAST(:task_type AS varchar), 'pending'::task_status, CAST(:priority AS integer),
+               NOW() + make_interval(secs => c.delay_seconds),
+               jsonb_build_object(
+                   'platform', c.platform,
+                   'search_preference_id', c.search_preference_id,
+                   'crawl_source_id', c.crawl_source_id,
+                   'expected_pages', c.expected_pages,
+                   'expected_new_postings', c.expected_new_postings
+               )
+        FROM crawls c
+        RETURNING id, task_type, scheduled_at, user_id, priority, task_config
+    ),
+    linked AS (
+        UPDATE crawl_sources cs
+        SET task_id = t.id, scheduled_at = NOW()
+        FROM tasks t
+        WHERE cs.id = CAST(t.task_config->>'crawl_source_id' AS uuid)
+    )
+    SELECT task_type, id::text AS id, scheduled_at, user_id::text AS user_id, priority
+    FROM tasks
+""")
+
+# The first crawl of a source only sets its baseline: what it finds is
+# backlog, not arrivals over a known interval
+RECORD_CRAWL_SQL = text("""
+    UPDATE crawl_sources
+    SET new_postings = CASE WHEN last_crawled_at IS NULL THEN new_postings
+            ELSE new_postings * CAST(:decay AS double precision) + CAST(:new_postings AS integer) END,
+        observed_hours = CASE WHEN last_crawled_at IS NULL THEN observed_hours
+            ELSE observed_hours * CAST(:decay AS double precision)
+                 + EXTRACT(EPOCH FROM NOW() - last_crawled_at) / 3600 END,
+        crawls = CASE WHEN last_crawled_at IS NULL THEN crawls
+            ELSE crawls * CAST(:decay AS double precision) + 1 END,
+        changed_crawls = CASE WHEN last_crawled_at IS NULL THEN changed_crawls
+            ELSE changed_crawls * CAST(:decay AS double precision) + CAST(:changed AS integer) END,
+        pages_per_crawl = CASE WHEN crawl_count = 0 THEN CAST(:pages AS integer)
+            ELSE pages_per_crawl * CAST(:decay AS double precision)
+                 + CAST(:pages AS integer) * (1 - CAST(:decay AS double precision)) END,
+        crawl_count = crawl_count + 1,
+        total_new_postings = total_new_postings + CAST(:new_postings AS integer),
+        last_crawled_at = NOW()
+    WHERE platform = :platform AND search_preference_id = :search_preference_id
+""")
+
+
+class CrawlRates(NamedTuple):
+    # Postings per hour, and changes of the result pages per hour
+    arrival: float
+    change: float
+
+
+class PlannedCrawl(NamedTuple):
+    crawl_source_id: uuid.UUID
+    user_id: uuid.UUID
+    platform: str
+    search_preference_id: uuid.UUID
+    expected_pages: float
+    expected_new_postings: float
+    yield_per_request: float
+
+
+def change_rate(crawls: float, changed_crawls: float, observed_hours: float) -> Optional[float]:
+    """Poisson change rate from how many crawls found a change.
+
+    Counting changed crawls underestimates the rate when several changes
+    fall between two crawls; the log estimator corrects for that (the 0.5
+    terms keep it finite when every crawl found a change).
+    """
+    if crawls <= 0 or observed_hours <= 0:
+        return None
+    mean_interval = observed_hours / crawls
+    unchanged = max(crawls - changed_crawls, 0.0)
+    return -math.log((unchanged + 0.5) / (crawls + 0.5)) / mean_interval
+
+
+def blend(observed: float, observed_hours: float, prior: float) -> float:
+    """Shrink an estimate towards the prior until enough hours are observed"""
+    prior_hours = settings.CRAWL_PRIOR_HOURS
+    return (observed * observed_hours + prior * prior_hours) / (observed_hours + prior_hours)
+
+
+class CrawlScheduler:
+    """Learns how fast each saved search gains postings and recrawls it when worth it.
+
+    A crawl source is a saved search on one platform. After every crawl its
+    decayed history (new postings, hours observed, crawls that found a
+    change, pages fetched) is updated, giving a posting arrival rate and a
+    result page change rate, both shrunk towards the platform's pooled rates
+    (seeded from recent ingestion volume) while the source is young.
+
+    A new source is crawled at once for a baseline and again after
+    CRAWL_MIN_INTERVAL_SECONDS for its first observation. After that it is
+    due when enough postings are expected per page request since its last
+    crawl and its pages have probably changed, or when it has gone
+    CRAWL_MAX_INTERVAL_SECONDS without a crawl. Due sources are taken in
+    order of expected yield per request until the platform's hourly request
+    budget is spent, and their job_discovery tasks are spread over the hour.
+    """
+
+    def __init__(
+        self,
+        client: RedisClient = redis_client,
+        crawlers: JobSearchCrawlerRegistry = search_crawlers,
+    ):
+        self.client = client
+        self.crawlers = crawlers
+
+    async def acquire_schedule_lease(self, seconds: int) -> bool:
+        """Let only one worker schedule crawls per period"""
+        client = await self.client.get_client()
+        return bool(await client.set(CRAWL_SCHEDULE_LEASE_KEY, 1, nx=True, ex=seconds))
+
+    async def platform_rates(self, session: AsyncSession, platforms: Sequence[str]) -> Dict[str, CrawlRates]:
+        """Pooled rates per platform, used as each source's prior"""
+        days = settings.CRAWL_INGESTION_HISTORY_DAYS
+        rows = (await session.execute(PLATFORM_HISTORY_SQL, {"platforms": list(platforms), "days": days})).all()
+        rates = {}
+        for row in rows:
+            seed = row.ingested / (days * 24) / max(row.sources, 1)
+            observed = row.new_postings / row.observed_hours if row.observed_hours else 0.0
+            arrival = blend(observed, row.observed_hours, seed)
+            change = change_rate(row.crawls, row.changed_crawls, row.observed_hours)
+            # New postings change the result pages, so the arrival rate stands in
+            rates[row.platform] = CrawlRates(
+                arrival, blend(change, row.observed_hours, arrival) if change is not None else arrival
+            )
+        return rates
+
+    def source_rates(self, row, prior: CrawlRates) -> CrawlRates:
+        observed = row.new_postings / row.observed_hours if row.observed_hours else 0.0
+        change = change_rate(row.crawls, row.changed_crawls, row.observed_hours)
+        return CrawlRates(
+            blend(observed, row.observed_hours, prior.arrival),
+            blend(change, row.observed_hours, prior.change) if change is not None else prior.change,
+        )
+
+    def plan(self, rows, rates: Dict[str, CrawlRates], budgets: Dict[str, float]) -> List[PlannedCrawl]:
+        """Pick the due sources worth their requests, within each platform's remaining budget"""
+        min_age = settings.CRAWL_MIN_INTERVAL_SECONDS / 3600
+        max_age = settings.CRAWL_MAX_INTERVAL_SECONDS / 3600
+        candidates = defaultdict(list)
+        for row in rows:
+            age = float(row.age_hours)
+            source = self.source_rates(row, rates[row.platform])
+            pages = max(row.pages_per_crawl, 1.0)
+            expected_new = source.arrival * age
+            yield_per_request = expected_new / pages
+            if row.never_crawled:
+                # Crawled first to learn its rates
+                rank = math.inf
+            elif age < min_age:
+                continue
+            elif not row.crawls:
+                # Only a baseline so far; the next crawl gives the first observed interval
+                rank = math.inf
+            elif age >= max_age:
+                rank = yield_per_request
+            elif (
+                yield_per_request >= settings.CRAWL_TARGET_YIELD
+                and 1 - math.exp(-source.change * age) >= settings.CRAWL_MIN_CHANGE_PROBABILITY
+            ):
+                rank = yield_per_request
+            else:
+                continue
+            candidates[row.platform].append((rank, PlannedCrawl(
+                row.id, row.user_id, row.platform, row.search_preference_id,
+                pages, expected_new, yield_per_request,
+            )))
+
+        planned: List[PlannedCrawl] = []
+        for platform, ranked in candidates.items():
+            remaining = budgets.get(platform, 0.0)
+            ranked.sort(key=lambda item: item[0], reverse=True)
+            for _, crawl in ranked:
+                if crawl.expected_pages > remaining:
+                    continue
+                remaining -= crawl.expected_pages
+                planned.append(crawl)
+        return planned
+
+    async def schedule_due(self, session: AsyncSession) -> List[ScheduleEntry]:
+        """Create job_discovery tasks for the sources due now; returns their schedule entries.
+
+        The caller owns the transaction and indexes the returned tasks.
+        """
+        platforms = self.crawlers.platforms
+        if not platforms:
+            return []
+        await session.execute(SYNC_SOURCES_SQL, {"platforms": platforms})
+        rates = await self.platform_rates(session, platforms)
+
+        used = {
+            row.platform: row.pages
+            for row in (await session.execute(BUDGET_USED_SQL, {
+                "task_type": TaskType.JOB_DISCOVERY,
+                "platforms": platforms,
+                "window": BUDGET_WINDOW_SECONDS,
+            })).all()
+        }
+        limits = {
+            platform: settings.CRAWL_PLATFORM_REQUEST_BUDGETS.get(platform, settings.CRAWL_DEFAULT_REQUEST_BUDGET)
+            for platform in platforms
+        }
+        budgets = {platform: max(limits[platform] - used.get(platform, 0.0), 0.0) for platform in platforms}
+
+        rows = (await session.execute(CANDIDATE_SOURCES_SQL, {"platforms": platforms})).all()
+        planned = self.plan(rows, rates, budgets)
+        if not planned:
+            return []
+
+        # Spread each platform's crawls over the window at its budgeted pace
+        crawls = []
+        spent: Dict[str, float] = defaultdict(float)
+        for crawl in planned:
+            delay = spent[crawl.platform] * BUDGET_WINDOW_SECONDS / max(limits[crawl.platform], 1)
+            spent[crawl.platform] += crawl.expected_pages
+            crawls.append({
+                "crawl_source_id": str(crawl.crawl_source_id),
+                "user_id": str(crawl.user_id),
+                "platform": crawl.platform,
+                "search_preference_id": str(crawl.search_preference_id),
+                "expected_pages": round(crawl.expected_pages, 2),
+                "expected_new_postings": round(crawl.expected_new_postings, 2),
+                "delay_seconds": delay,
+            })
+        result = await session.execute(CREATE_CRAWL_TASKS_SQL, {
+            "crawls": json.dumps(crawls),
+            "task_type": TaskType.JOB_DISCOVERY,
+            "priority": settings.CRAWL_TASK_PRIORITY,
+        })
+        entries = [
+            (row.task_type, row.id, row.scheduled_at, row.user_id, row.priority)
+            for row in result.all()
+        ]
+        logger.info(f"Scheduled {len(entries)} crawls ({dict(spent)} page requests by platform)")
+        return entries
+
+    async def record_crawl(
+        self, session: AsyncSession, platform: str, search_preference_id: uuid.UUID, result: Dict[str, Any]
+    ) -> None:
+        """Fold a finished crawl into its source's history"""
+        await session.execute(RECORD_CRAWL_SQL, {
+            "platform": platform,
+            "search_preference_id": search_preference_id,
+            "decay": settings.CRAWL_HISTORY_DECAY,
+            "new_postings": result["new_postings"],
+            "changed": 1 if result["changed_pages"] else 0,
+            "pages": result["pages"],
+        })
+
+
+# Global crawl scheduler instance
+crawl_scheduler = CrawlScheduler()
@@ -0,0 +1,259 @@
+"""
+Document Rendering Service
+Warm worker process pool rendering generated resumes and cover letters to PDF/DOCX
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.application import ContentType
+from app.services.document_store import DocumentStore, document_store, document_url
+from app.services.document_writers import (
+    RENDER_CONTENT_TYPES,
+    RenderJob,
+    RenderResult,
+    render_document,
+    warm_worker,
+)
+
+logger = logging.getLogger(__name__)
+
+# Extra time the caller waits beyond the worker-side timeout (queueing, IPC)
+RESULT_GRACE_SECONDS = 5.0
+WORKER_CRASHED_ERROR = "Rendering worker crashed"
+
+RENDER_SOURCES_SQL = text("""
+    SELECT DISTINCT ON (g.application_id, g.content_type)
+           g.id, g.application_id, g.content_type::text AS content_type, g.content_text,
+           g.generation_metadata, a.company_name, a.job_title
+    FROM generated_content g
+    JOIN applications a ON a.id = g.application_id AND a.user_id = :user_id
+    WHERE g.application_id = ANY(:application_ids)
+      AND g.content_type::text = ANY(:content_types)
+      AND COALESCE(g.generation_metadata->>'status', 'completed') = 'completed'
+    ORDER BY g.application_id, g.content_type, g.created_at DESC
+""")
+
+UPDATE_RENDERED_SQL = text("""
+    UPDATE generated_content
+    SET file_url = :file_url,
+        generation_metadata = jsonb_set(
+            COALESCE(generation_metadata, '{}'::jsonb), '{rendered}',
+            COALESCE(generation_metadata->'rendered', '{}'::jsonb) || CAST(:rendered AS jsonb)
+        ),
+        updated_at = NOW()
+    WHERE id = :id
+""")
+
+# Application column holding the rendered file of each content type
+APPLICATION_URL_COLUMNS = {
+    ContentType.RESUME: "tailored_resume_url",
+    ContentType.COVER_LETTER: "cover_letter_url",
+}
+
+RENDERED_FILE_STEMS = {
+    ContentType.RESUME: "resume",
+    ContentType.COVER_LETTER: "cover_letter",
+}
+
+
+class RenderedDocument(NamedTuple):
+    application_id: uuid.UUID
+    content_type: str
+    format: str
+    content_hash: Optional[str] = None
+    url: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class DocumentRenderer:
+    """Pool of pre-warmed rendering processes.
+
+    Workers load fonts and templates once (pool initializer). Each worker
+    exits after RENDER_MAX_TASKS_PER_WORKER jobs to cap memory growth, and
+    its replacement runs the initializer again. Rendering never runs on the
+    event loop, and throughput scales with the number of workers (one per
+    core by default).
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def workers(self) -> int:
+        return settings.RENDER_WORKERS or os.cpu_count() or 1
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # Forkserver (or spawn) keeps the API process state (event loop,
+        # connections) out of workers; the preload makes each fork cheap
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["app.services.document_writers"])
+        else:
+            context = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=warm_worker,
+            max_tasks_per_child=settings.RENDER_MAX_TASKS_PER_WORKER or None,
+        )
+
+    async def _warm(self, executor: ProcessPoolExecutor) -> None:
+        # Submitting one task per worker makes the pool start all of them
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, os.getpid) for _ in range(self.workers)))
+
+    async def start(self) -> None:
+        """Start the pool and warm every worker before the first request"""
+        async with self._lock:
+            if self._executor is not None:
+                return
+            executor = self._create_executor()
+            await self._warm(executor)
+            self._executor = executor
+        logger.info(f"Document rendering pool started with {self.workers} workers")
+
+    async def _replace_broken(self, executor: ProcessPoolExecutor) -> None:
+        async with self._lock:
+            if self._executor is not executor:
+                return
+            logger.warning("Document rendering pool broken, restarting it")
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        await self.start()
+
+    async def _render(self, executor: ProcessPoolExecutor, job: RenderJob) -> RenderResult:
+        timeout = settings.RENDER_JOB_TIMEOUT_SECONDS
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(executor, render_document, job, timeout),
+                timeout + RESULT_GRACE_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Rendering {job.key} ({job.format}) timed out")
+            return RenderResult(job.key, job.format, error="Rendering timed out")
+        except BrokenProcessPool:
+            return RenderResult(job.key, job.format, error=WORKER_CRASHED_ERROR)
+
+    async def render_batch(self, jobs: Sequence[RenderJob]) -> List[RenderResult]:
+        """Render jobs in parallel across the pool, results in job order.
+
+        Each job has its own timeout and failure; a worker crash fails only
+        the jobs in flight and the pool is restarted for later batches.
+        """
+        if not jobs:
+            return []
+        if self._executor is None:
+            await self.start()
+        executor = self._executor
+        results = await asyncio.gather(*(self._render(executor, job) for job in jobs))
+        if any(result.error == WORKER_CRASHED_ERROR for result in results):
+            await self._replace_broken(executor)
+        return list(results)
+
+    async def close(self) -> None:
+        async with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+
+def _source_hash(content_text: str, fmt: str) -> str:
+    return hashlib.sha256(f"{fmt}\0{content_text}".encode()).hexdigest()
+
+
+async def render_application_documents(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    application_ids: Sequence[uuid.UUID],
+    fmt: str,
+    content_types: Sequence[str] = (ContentType.RESUME, ContentType.COVER_LETTER),
+    store: DocumentStore = document_store,
+) -> List[RenderedDocument]:
+    """Render the latest generated resume/cover letter of applications as one batch.
+
+    Rendered files go to the document store and are linked from the
+    generated content and the application. Content rendered before from
+    the same text is not rendered again. The caller owns the transaction.
+    """
+    rows = (await session.execute(RENDER_SOURCES_SQL, {
+        "user_id": user_id,
+        "application_ids": list(application_ids),
+        "content_types": list(content_types),
+    })).all()
+
+    documents: List[RenderedDocument] = []
+    pending: Dict[str, tuple] = {}
+    for row in rows:
+        if not row.content_text:
+            continue
+        source_hash = _source_hash(row.content_text, fmt)
+        rendered = ((row.generation_metadata or {}).get("rendered") or {}).get(fmt) or {}
+        if rendered.get("source_hash") == source_hash and await store.get_user_document(
+            session, user_id, rendered.get("content_hash", "")
+        ) is not None:
+            url = await _link_rendered(session, row, fmt, source_hash, rendered["content_hash"])
+            documents.append(RenderedDocument(
+                row.application_id, row.content_type, fmt, rendered["content_hash"], url, cached=True
+            ))
+            continue
+        pending[str(row.id)] = (row, source_hash)
+
+    results = await document_renderer.render_batch([
+        RenderJob(key, row.content_text, fmt, title=f"{row.job_title} - {row.company_name}")
+        for key, (row, _) in pending.items()
+    ])
+
+    for result in results:
+        row, source_hash = pending[result.key]
+        if result.error is not None:
+            logger.warning(f"Rendering {row.content_type} of application {row.application_id} failed: {result.error}")
+            documents.append(RenderedDocument(row.application_id, row.content_type, fmt, error=result.error))
+            continue
+        stored = await store.put_bytes(
+            session,
+            result.data,
+            content_type=RENDER_CONTENT_TYPES[fmt],
+            user_id=user_id,
+            filename=f"{RENDERED_FILE_STEMS.get(row.content_type, row.content_type)}.{fmt}",
+        )
+        url = await _link_rendered(session, row, fmt, source_hash, stored.content_hash)
+        documents.append(RenderedDocument(row.application_id, row.content_type, fmt, stored.content_hash, url))
+    return documents
+
+
+async def _link_rendered(session: AsyncSession, row, fmt: str, source_hash: str, content_hash: str) -> str:
+    """Point the generated content and its application at the rendered file"""
+    url = document_url(content_hash)
+    await session.execute(UPDATE_RENDERED_SQL, {
+        "id": row.id,
+        "file_url": url,
+        "rendered": json.dumps({fmt: {"source_hash": source_hash, "content_hash": content_hash}}),
+    })
+    column = APPLICATION_URL_COLUMNS.get(row.content_type)
+    if column is not None:
+        await session.execute(
+            text(f"UPDATE applications SET {column} = :url, updated_at = NOW() "
+                 f"WHERE id = :id AND {column} IS DISTINCT FROM :url"),
+            {"id": row.application_id, "url": url},
+        )
+    return url
+
+
+# Global document renderer instance
+document_renderer = DocumentRenderer()
@@ -0,0 +1,471 @@
+"""
+Document Store Service
+Content-addressed document storage with streaming uploads, range reads, and local or S3 backends
+"""
+
+import asyncio
+from datetime import datetime, timezone
+import hashlib
+import hmac
+import os
+import re
+import tempfile
+import uuid
+from typing import Any, AsyncIterable, AsyncIterator, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+import logging
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+EMPTY_PAYLOAD_HASH = hashlib.sha256(b"").hexdigest()
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+INSERT_DOCUMENT_SQL = text("""
+    INSERT INTO documents (content_hash, size_bytes, content_type, storage_backend)
+    VALUES (:content_hash, :size_bytes, :content_type, :storage_backend)
+    ON CONFLICT (content_hash) DO NOTHING
+""")
+
+# inserted is false when the user already had the content (xmax is only
+# zero on a freshly inserted row version)
+LINK_USER_DOCUMENT_SQL = text("""
+    INSERT INTO user_documents (user_id, content_hash, filename, content_type)
+    VALUES (:user_id, :content_hash, :filename, :content_type)
+    ON CONFLICT ON CONSTRAINT uq_user_documents_user_content DO UPDATE SET
+        filename = COALESCE(EXCLUDED.filename, user_documents.filename),
+        content_type = EXCLUDED.content_type
+    RETURNING (xmax = 0) AS inserted
+""")
+
+DOCUMENT_SQL = text("""
+    SELECT content_hash, size_bytes, content_type
+    FROM documents
+    WHERE content_hash = :content_hash
+""")
+
+USER_DOCUMENT_SQL = text("""
+    SELECT d.content_hash, d.size_bytes, u.content_type, u.filename
+    FROM user_documents u
+    JOIN documents d ON d.content_hash = u.content_hash
+    WHERE u.user_id = :user_id AND u.content_hash = :content_hash
+""")
+
+
+class DocumentTooLargeError(Exception):
+    """Upload exceeded the maximum document size"""
+
+
+class DocumentNotFoundError(Exception):
+    """No stored blob for a content hash"""
+
+
+class RangeNotSatisfiableError(Exception):
+    """Requested byte range starts beyond the end of the document"""
+
+
+class StoredDocument(NamedTuple):
+    content_hash: str
+    size_bytes: int
+    content_type: str
+    # False when the user already had identical content (without a user,
+    # when any upload had stored it)
+    created: bool
+
+
+def allowed_content_type(content_type: Optional[str]) -> str:
+    """The media type of a Content-Type header if allowed, else the default"""
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    return media_type if media_type in settings.DOCUMENT_ALLOWED_CONTENT_TYPES else DEFAULT_CONTENT_TYPE
+
+
+def document_url(content_hash: str) -> str:
+    """API path a stored document is downloaded from; the value kept in *_url columns"""
+    return f"/api/v1/documents/{content_hash}"
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single "bytes=" range, or None for the whole document.
+
+    Malformed and multi-range headers are ignored, as RFC 9110 allows.
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= size:
+            raise RangeNotSatisfiableError(header)
+        return start, min(int(last), size - 1) if last else size - 1
+    suffix = int(last)
+    if suffix == 0 or size == 0:
+        raise RangeNotSatisfiableError(header)
+    return max(0, size - suffix), size - 1
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def sign_v4(
+    method: str,
+    url: str,
+    headers: Dict[str, str],
+    payload_hash: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    service: str = "s3",
+    now: Optional[datetime] = None,
+) -> Dict[str, str]:
+    """Request headers with AWS Signature Version 4 authorization added"""
+    now = now or datetime.now(timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    datestamp = now.strftime("%Y%m%d")
+    parsed = httpx.URL(url)
+
+    signed = {name.lower(): " ".join(str(value).split()) for name, value in headers.items()}
+    signed["host"] = parsed.netloc.decode()
+    signed["x-amz-content-sha256"] = payload_hash
+    signed["x-amz-date"] = amz_date
+    names = sorted(signed)
+    signed_headers = ";".join(names)
+    canonical_query = "&".join(sorted(
+        f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}"
+        for name, value in parsed.params.multi_items()
+    ))
+    canonical_request = "\n".join([
+        method,
+        quote(parsed.path or "/", safe="/-_.~"),
+        canonical_query,
+        "".join(f"{name}:{signed[name]}\n" for name in names),
+        signed_headers,
+        payload_hash,
+    ])
+    scope = f"{datestamp}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()
+    ])
+    key = _hmac(f"AWS4{secret_key}".encode(), datestamp)
+    for part in (region, service, "aws4_request"):
+        key = _hmac(key, part)
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    return {
+        **headers,
+        "x-amz-content-sha256": payload_hash,
+        "x-amz-date": amz_date,
+        "Authorization": (
+            f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        ),
+    }
+
+
+class LocalStorageBackend:
+    """Blobs as files under root/ab/cd/<hash>.
+
+    Uploads are staged under the same root, so publishing one is an atomic
+    rename and readers never see a partial file.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        root: str = settings.DOCUMENT_STORAGE_PATH,
+        chunk_size: int = settings.DOCUMENT_STORAGE_CHUNK_SIZE,
+    ):
+        self.root = root
+        self.chunk_size = chunk_size
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4], content_hash)
+
+    def staging_dir(self) -> Optional[str]:
+        path = os.path.join(self.root, "staging")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    async def exists(self, content_hash: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self._path(content_hash))
+
+    async def publish(self, content_hash: str, staged_path: str, size: int) -> bool:
+        """Move a staged upload into place; False if the blob already exists"""
+        def publish() -> bool:
+            path = self._path(content_hash)
+            if os.path.exists(path):
+                return False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(staged_path, path)
+            return True
+
+        return await asyncio.to_thread(publish)
+
+    async def read(self, content_hash: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        try:
+            handle = await asyncio.to_thread(open, self._path(content_hash), "rb")
+        except FileNotFoundError:
+            raise DocumentNotFoundError(content_hash)
+        try:
+            await asyncio.to_thread(handle.seek, start)
+            remaining = end - start + 1 if end is not None else None
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                chunk = await asyncio.to_thread(handle.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            handle.close()
+
+    async def delete(self, content_hash: str) -> None:
+        try:
+            await asyncio.to_thread(os.remove, self._path(content_hash))
+        except FileNotFoundError:
+            pass
+
+    async def close(self) -> None:
+        pass
+
+
+class S3StorageBackend:
+    """Blobs as objects in S3 or an S3-compatible store.
+
+    Requests go over one pooled httpx client and are signed with Signature
+    V4. The SHA-256 computed while staging an upload is both the object key
+    and the signed payload hash, so uploads need no second pass over the
+    file; reads stream the object, with a Range header for partial reads.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str = settings.AWS_S3_BUCKET,
+        region: str = settings.AWS_REGION,
+        access_key: str = settings.AWS_ACCESS_KEY_ID,
+        secret_key: str = settings.AWS_SECRET_ACCESS_KEY,
+        endpoint_url: str = settings.AWS_S3_ENDPOINT_URL,
+        chunk_size: int = settings.DOCUMENT_STORAGE_CHUNK_SIZE,
+    ):
+        if endpoint_url:
+            self.base_url = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self.base_url = f"https://{bucket}.s3.{region}.amazonaws.com"
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.chunk_size = chunk_size
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _get_http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+        return self._http
+
+    def _url(self, content_hash: str) -> str:
+        return f"{self.base_url}/documents/{content_hash[:2]}/{content_hash}"
+
+    def _sign(
+        self, method: str, url: str, payload_hash: str = EMPTY_PAYLOAD_HASH, headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, str]:
+        return sign_v4(
+            method, url, headers or {}, payload_hash, self.access_key, self.secret_key, self.region
+        )
+
+    def staging_dir(self) -> Optional[str]:
+        return None
+
+    async def exists(self, content_hash: str) -> bool:
+        url = self._url(content_hash)
+        response = await self._get_http().head(url, headers=self._sign("HEAD", url))
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    async def publish(self, content_hash: str, staged_path: str, size: int) -> bool:
+        """Upload a staged file unless the object already exists"""
+        if await self.exists(content_hash):
+            return False
+        url = self._url(content_hash)
+        headers = self._sign("PUT", url, content_hash, {
+            "Content-Length": str(size),
+            "Content-Type": DEFAULT_CONTENT_TYPE,
+        })
+        response = await self._get_http().put(url, content=self._file_chunks(staged_path), headers=headers)
+        response.raise_for_status()
+        return True
+
+    async def _file_chunks(self, path: str) -> AsyncIterator[bytes]:
+        with open(path, "rb") as handle:
+            while True:
+                chunk = await asyncio.to_thread(handle.read, self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    async def read(self, content_hash: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        url = self._url(content_hash)
+        headers = {}
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{end if end is not None else ''}"
+        async with self._get_http().stream("GET", url, headers=self._sign("GET", url, headers=headers)) as response:
+            if response.status_code == 404:
+                raise DocumentNotFoundError(content_hash)
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(self.chunk_size):
+                yield chunk
+
+    async def delete(self, content_hash: str) -> None:
+        url = self._url(content_hash)
+        response = await self._get_http().delete(url, headers=self._sign("DELETE", url))
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+def backend_from_settings():
+    if settings.DOCUMENT_STORAGE_BACKEND == S3StorageBackend.name:
+        return S3StorageBackend()
+    return LocalStorageBackend()
+
+
+class DocumentStore:
+    """Content-addressed documents: each distinct content is stored once.
+
+    An upload is streamed chunk by chunk to a staging file while its SHA-256
+    is computed, so memory use is one chunk whatever the document size. The
+    hash becomes the blob's key; if a blob with that hash exists the staged
+    copy is discarded, so a resume template shared by thousands of
+    applications occupies storage once. Reads stream the blob, optionally a
+    byte range of it.
+    """
+
+    def __init__(self, backend=None, max_bytes: int = settings.DOCUMENT_MAX_UPLOAD_BYTES):
+        self.backend = backend or backend_from_settings()
+        self.max_bytes = max_bytes
+
+    async def put(
+        self,
+        session: AsyncSession,
+        chunks: AsyncIterable[bytes],
+        content_type: Optional[str] = None,
+        user_id: Optional[uuid.UUID] = None,
+        filename: Optional[str] = None,
+    ) -> StoredDocument:
+        """Store a streamed document; the caller owns the transaction.
+
+        content_type outside DOCUMENT_ALLOWED_CONTENT_TYPES is stored as
+        application/octet-stream.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, staged_path = await asyncio.to_thread(
+            tempfile.mkstemp, prefix="upload-", dir=self.backend.staging_dir()
+        )
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                def write(chunk: bytes) -> None:
+                    digest.update(chunk)
+                    handle.write(chunk)
+
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise DocumentTooLargeError(f"Document exceeds {self.max_bytes} bytes")
+                    await asyncio.to_thread(write, chunk)
+            content_hash = digest.hexdigest()
+            created = await self.backend.publish(content_hash, staged_path, size)
+        finally:
+            if os.path.exists(staged_path):
+                await asyncio.to_thread(os.remove, staged_path)
+
+        return await self._record(session, content_hash, size, content_type, created, user_id, filename)
+
+    async def put_bytes(
+        self,
+        session: AsyncSession,
+        data: bytes,
+        content_type: Optional[str] = None,
+        user_id: Optional[uuid.UUID] = None,
+        filename: Optional[str] = None,
+    ) -> StoredDocument:
+        """Store an in-memory document (e.g. a rendered file); known content is not rewritten"""
+        content_hash = hashlib.sha256(data).hexdigest()
+        existing = (await session.execute(DOCUMENT_SQL, {"content_hash": content_hash})).first()
+        if existing is None:
+            return await self.put(session, _single_chunk(data), content_type, user_id, filename)
+        return await self._record(session, content_hash, existing.size_bytes, content_type, False, user_id, filename)
+
+    async def _record(
+        self,
+        session: AsyncSession,
+        content_hash: str,
+        size: int,
+        content_type: Optional[str],
+        created: bool,
+        user_id: Optional[uuid.UUID],
+        filename: Optional[str],
+    ) -> StoredDocument:
+        content_type = allowed_content_type(content_type)
+        await session.execute(INSERT_DOCUMENT_SQL, {
+            "content_hash": content_hash,
+            "size_bytes": size,
+            "content_type": content_type,
+            "storage_backend": self.backend.name,
+        })
+        if not created:
+            logger.debug(f"Document {content_hash} already stored, upload deduplicated")
+        if user_id is not None:
+            created = (await session.execute(LINK_USER_DOCUMENT_SQL, {
+                "user_id": user_id,
+                "content_hash": content_hash,
+                "filename": filename[:255] if filename else None,
+                "content_type": content_type,
+            })).scalar_one()
+        return StoredDocument(content_hash, size, content_type, created)
+
+    def open(self, content_hash: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream a stored document, or the inclusive byte range start..end of it"""
+        return self.backend.read(content_hash, start, end)
+
+    async def get_user_document(self, session: AsyncSession, user_id: uuid.UUID, content_hash: str) -> Optional[Any]:
+        """Document metadata if the user has stored this content"""
+        if not CONTENT_HASH_PATTERN.match(content_hash):
+            return None
+        return (await session.execute(
+            USER_DOCUMENT_SQL, {"user_id": user_id, "content_hash": content_hash}
+        )).first()
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+async def _single_chunk(data: bytes) -> AsyncIterator[bytes]:
+    yield data
+
+
+# Global document store instance
+document_store = DocumentStore()
@@ -0,0 +1,360 @@
+"""
+Document Writers
+PDF and DOCX rendering of generated resumes and cover letters, run in rendering worker processes
+"""
+
+import io
+import re
+import signal
+import time
+import zipfile
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from xml.sax.saxutils import escape
+
+# Kept free of app imports: spawned rendering workers import only this module
+
+
+class RenderFormat(str):
+    PDF = "pdf"
+    DOCX = "docx"
+
+
+RENDER_CONTENT_TYPES = {
+    RenderFormat.PDF: "application/pdf",
+    RenderFormat.DOCX: "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$")
+BULLET_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*)$")
+INLINE_MARKUP_PATTERN = re.compile(r"\*\*(.+?)\*\*|__(.+?)__|\*(.+?)\*|`(.+?)`|\[(.+?)\]\((.+?)\)")
+
+# Helvetica and Helvetica-Bold advance widths (1/1000 em) for WinAnsi 32..126
+HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+HELVETICA_BOLD_WIDTHS = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+
+# US Letter in points, with 0.75in margins
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 54
+
+# (font, size, space before, space after) per block kind
+PDF_STYLES = {
+    "title": ("F2", 18, 0, 6),
+    "heading": ("F2", 12.5, 10, 3),
+    "subheading": ("F2", 11, 6, 2),
+    "paragraph": ("F1", 10.5, 0, 6),
+    "bullet": ("F1", 10.5, 0, 2),
+}
+
+DOCX_STYLE_IDS = {
+    "title": "Title",
+    "heading": "Heading1",
+    "subheading": "Heading2",
+    "paragraph": None,
+    "bullet": "ListBullet",
+}
+
+
+class RenderJob(NamedTuple):
+    key: str
+    text: str
+    format: str
+    title: str = ""
+
+
+class RenderResult(NamedTuple):
+    key: str
+    format: str
+    data: Optional[bytes] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+class RenderTimeoutError(Exception):
+    """Rendering job exceeded its time limit inside the worker"""
+
+
+class Block(NamedTuple):
+    kind: str
+    text: str
+
+
+class Templates(NamedTuple):
+    """Per-process rendering assets, loaded once when a worker starts"""
+    # WinAnsi byte -> width at 1pt, per PDF font resource
+    widths: Dict[str, Tuple[float, ...]]
+    pdf_fonts: bytes
+    docx_parts: Dict[str, bytes]
+
+
+_templates: Optional[Templates] = None
+
+
+def _width_table(widths: Tuple[int, ...]) -> Tuple[float, ...]:
+    # Bytes outside 32..126 (accented letters, punctuation) use an average width
+    table = [0.556] * 256
+    for code, width in enumerate(widths, start=32):
+        table[code] = width / 1000
+    table[0x95] = 0.35  # bullet
+    table[0x96] = 0.556  # en dash
+    table[0x97] = 1.0  # em dash
+    return tuple(table)
+
+
+DOCX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>
+</Types>"""
+
+DOCX_PACKAGE_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+DOCX_DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+
+def _docx_style(style_id: str, name: str, size: int, bold: bool, before: int, after: int, indent: int = 0) -> str:
+    return (
+        f'<w:style w:type="paragraph" w:styleId="{style_id}"><w:name w:val="{name}"/>'
+        f'<w:basedOn w:val="Normal"/><w:qFormat/>'
+        f'<w:pPr><w:spacing w:before="{before}" w:after="{after}"/>'
+        + (f'<w:ind w:left="{indent}" w:hanging="{indent // 2}"/>' if indent else "")
+        + f'</w:pPr><w:rPr>{"<w:b/>" if bold else ""}<w:sz w:val="{size}"/></w:rPr></w:style>'
+    )
+
+
+def _docx_styles() -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        '<w:docDefaults><w:rPrDefault><w:rPr><w:rFonts w:ascii="Calibri" w:hAnsi="Calibri" w:cs="Calibri"/>'
+        '<w:sz w:val="21"/></w:rPr></w:rPrDefault>'
+        '<w:pPrDefault><w:pPr><w:spacing w:after="120" w:line="264" w:lineRule="auto"/></w:pPr></w:pPrDefault>'
+        '</w:docDefaults>'
+        '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/><w:qFormat/></w:style>'
+        + _docx_style("Title", "Title", 36, True, 0, 120)
+        + _docx_style("Heading1", "heading 1", 25, True, 200, 60)
+        + _docx_style("Heading2", "heading 2", 22, True, 120, 40)
+        + _docx_style("ListBullet", "List Bullet", 21, False, 0, 40, indent=360)
+        + '</w:styles>'
+    )
+
+
+def load_templates() -> Templates:
+    """Build the rendering assets of this process (worker initializer)"""
+    global _templates
+    if _templates is None:
+        widths = {"F1": _width_table(HELVETICA_WIDTHS), "F2": _width_table(HELVETICA_BOLD_WIDTHS)}
+        pdf_fonts = (
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        )
+        docx_parts = {
+            "[Content_Types].xml": DOCX_CONTENT_TYPES.encode(),
+            "_rels/.rels": DOCX_PACKAGE_RELS.encode(),
+            "word/_rels/document.xml.rels": DOCX_DOCUMENT_RELS.encode(),
+            "word/styles.xml": _docx_styles().encode(),
+        }
+        _templates = Templates(widths, b"\n".join(pdf_fonts), docx_parts)
+    return _templates
+
+
+def warm_worker() -> None:
+    """Process pool initializer: load assets and exercise both writers once"""
+    load_templates()
+    sample = "# Name\n## Experience\n- Built **things**\nParagraph text."
+    render_pdf(parse_blocks(sample), "warm-up")
+    render_docx(parse_blocks(sample), "warm-up")
+
+
+def strip_inline_markup(line: str) -> str:
+    return INLINE_MARKUP_PATTERN.sub(
+        lambda m: next(group for group in m.groups()[:5] if group is not None), line
+    )
+
+
+def parse_blocks(source: str) -> List[Block]:
+    """Markdown-ish text (as generated) as title, heading, bullet and paragraph blocks"""
+    blocks: List[Block] = []
+    paragraph: List[str] = []
+
+    def flush() -> None:
+        if paragraph:
+            blocks.append(Block("paragraph", " ".join(paragraph)))
+            paragraph.clear()
+
+    for raw in source.splitlines():
+        line = raw.strip()
+        if not line or re.fullmatch(r"[-*_]{3,}", line):
+            flush()
+            continue
+        heading = HEADING_PATTERN.match(line)
+        bullet = BULLET_PATTERN.match(raw)
+        if heading:
+            flush()
+            level = len(heading.group(1))
+            kind = "title" if level == 1 and not blocks else "heading" if level <= 2 else "subheading"
+            blocks.append(Block(kind, strip_inline_markup(heading.group(2))))
+        elif bullet:
+            flush()
+            blocks.append(Block("bullet", strip_inline_markup(bullet.group(1))))
+        else:
+            paragraph.append(strip_inline_markup(line))
+    flush()
+    return blocks
+
+
+def _wrap(text: bytes, widths: Tuple[float, ...], size: float, max_width: float) -> List[bytes]:
+    lines: List[bytes] = []
+    current: List[bytes] = []
+    current_width = 0.0
+    space = widths[32] * size
+    for word in text.split(b" "):
+        if not word:
+            continue
+        word_width = sum(widths[byte] for byte in word) * size
+        if current and current_width + space + word_width > max_width:
+            lines.append(b" ".join(current))
+            current, current_width = [], 0.0
+        current_width += (space if current else 0.0) + word_width
+        current.append(word)
+    if current:
+        lines.append(b" ".join(current))
+    return lines
+
+
+def _pdf_string(text: bytes) -> bytes:
+    return b"(" + text.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def render_pdf(blocks: List[Block], title: str = "") -> bytes:
+    """Paginated PDF with the standard Helvetica fonts (no font embedding)"""
+    templates = load_templates()
+    pages: List[List[bytes]] = [[]]
+    y = PAGE_HEIGHT - MARGIN
+    for block in blocks:
+        font, size, before, after = PDF_STYLES[block.kind]
+        leading = size * 1.25
+        indent = 14 if block.kind == "bullet" else 0
+        encoded = block.text.encode("cp1252", "replace")
+        lines = _wrap(encoded, templates.widths[font], size, PAGE_WIDTH - 2 * MARGIN - indent)
+        y -= before
+        for i, line in enumerate(lines):
+            if y - leading < MARGIN:
+                pages.append([])
+                y = PAGE_HEIGHT - MARGIN
+            y -= leading
+            ops = pages[-1]
+            if block.kind == "bullet" and i == 0:
+                ops.append(b"BT /F1 %g Tf %.2f %.2f Td (\x95) Tj ET" % (size, MARGIN + 3, y))
+            ops.append(b"BT /%s %g Tf %.2f %.2f Td %s Tj ET" % (
+                font.encode(), size, MARGIN + indent, y, _pdf_string(line)
+            ))
+        y -= after
+
+    # Objects: 1 catalog, 2 pages, 3-4 fonts, 5 info, then a page and its content per page
+    objects: List[bytes] = [b"", b"", *templates.pdf_fonts.split(b"\n")]
+    objects.append(b"<< /Producer (jobapp) /Title %s >>" % _pdf_string(title.encode("cp1252", "replace")))
+    page_ids = []
+    for ops in pages:
+        content = zlib.compress(b"\n".join(ops), 6)
+        page_id, content_id = len(objects) + 1, len(objects) + 2
+        page_ids.append(page_id)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>" % (PAGE_WIDTH, PAGE_HEIGHT, content_id)
+        )
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(content), content))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def render_docx(blocks: List[Block], title: str = "") -> bytes:
+    """Word document using the template styles (Title, Heading 1/2, List Bullet)"""
+    templates = load_templates()
+    paragraphs = []
+    for block in blocks:
+        style_id = DOCX_STYLE_IDS[block.kind]
+        style = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ""
+        text = f"•\t{block.text}" if block.kind == "bullet" else block.text
+        paragraphs.append(f'<w:p>{style}<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>')
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+        + "".join(paragraphs)
+        + '<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+        '<w:pgMar w:top="1080" w:right="1080" w:bottom="1080" w:left="1080" w:header="720" w:footer="720" w:gutter="0"/>'
+        '</w:sectPr></w:body></w:document>'
+    )
+
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        # Fixed timestamps keep identical documents byte-identical (and deduplicated)
+        for name, data in (*templates.docx_parts.items(), ("word/document.xml", document.encode())):
+            archive.writestr(zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0)), data, zipfile.ZIP_DEFLATED)
+    return out.getvalue()
+
+
+def _on_timeout(signum, frame):
+    raise RenderTimeoutError("Rendering timed out")
+
+
+def render_document(job: RenderJob, timeout: float) -> RenderResult:
+    """Render one job (runs in a worker process).
+
+    The timeout is enforced inside the worker with an interval timer, so a
+    runaway job frees its worker instead of occupying it after the caller
+    has given up.
+    """
+    started = time.perf_counter()
+    previous = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        blocks = parse_blocks(job.text)
+        if job.format == RenderFormat.PDF:
+            data = render_pdf(blocks, job.title)
+        elif job.format == RenderFormat.DOCX:
+            data = render_docx(blocks, job.title)
+        else:
+            raise ValueError(f"Unsupported format: {job.format}")
+        return RenderResult(job.key, job.format, data=data, seconds=time.perf_counter() - started)
+    except Exception as e:
+        return RenderResult(job.key, job.format, error=str(e) or type(e).__name__, seconds=time.perf_counter() - started)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
@@ -0,0 +1,287 @@
+"""
+Experience Ranking Service
+Relevance ranking of experience achievements and technologies against job postings
+"""
+
+import hashlib
+import re
+import uuid
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.job import JobPosting
+from app.models.user import ExperienceItemEmbedding, UserExperience
+from app.services.llm_client import LLMClient, LLMPriority, llm_client
+
+logger = logging.getLogger(__name__)
+
+# Characters of a posting embedded for ranking; the opening of a posting
+# carries the role, so the tail adds cost without changing the ranking much
+JOB_EMBEDDING_MAX_CHARS = 8000
+
+UPSERT_ITEM_SQL = text("""
+    INSERT INTO experience_item_embeddings (
+        user_id, experience_id, item_type, item_index, item_text,
+        content_hash, embedding, embedding_model
+    )
+    VALUES (
+        :user_id, :experience_id, :item_type, :item_index, :item_text,
+        :content_hash, CAST(CAST(:embedding AS TEXT) AS vector), :embedding_model
+    )
+    ON CONFLICT ON CONSTRAINT uq_experience_item_embeddings_item DO UPDATE SET
+        item_text = EXCLUDED.item_text,
+        content_hash = EXCLUDED.content_hash,
+        embedding = EXCLUDED.embedding,
+        embedding_model = EXCLUDED.embedding_model,
+        created_at = NOW()
+""")
+
+SET_JOB_EMBEDDING_SQL = text("""
+    UPDATE job_postings
+    SET embedding = CAST(CAST(:embedding AS TEXT) AS vector), embedding_hash = :content_hash
+    WHERE id = :job_posting_id
+""")
+
+# Cosine similarity of every item of a user to one posting, computed in Postgres
+SIMILARITY_SQL = text("""
+    SELECT e.experience_id, e.item_type, e.item_index, e.item_text,
+           1 - (e.embedding <=> j.embedding) AS similarity
+    FROM experience_item_embeddings e
+    JOIN job_postings j ON j.id = :job_posting_id
+    WHERE e.user_id = :user_id AND j.embedding IS NOT NULL
+""")
+
+
+class ExperienceItemType(str):
+    ACHIEVEMENT = "achievement"
+    TECHNOLOGY = "technology"
+
+
+class RankedItem(NamedTuple):
+    text: str
+    index: int
+    similarity: float
+    skill_match: bool
+    score: float
+
+
+class ExperienceRanking(NamedTuple):
+    achievements: List[RankedItem]
+    technologies: List[RankedItem]
+
+
+class EmbeddingPlan(NamedTuple):
+    # (experience_id, item_type, item_index) -> (item_text, content_hash)
+    expected: Dict[Tuple[uuid.UUID, str, int], Tuple[str, str]]
+    changed: List[Tuple[uuid.UUID, str, int]]
+    stale: List[uuid.UUID]
+    # Posting text and hash when the posting needs (re-)embedding
+    job_text: Optional[str]
+    job_hash: str
+
+
+def vector_literal(values: Iterable[float]) -> str:
+    """pgvector text representation"""
+    return "[" + ",".join(f"{value:.6f}" for value in values) + "]"
+
+
+def item_content_hash(item_type: str, item_text: str, model: str, dimensions: int) -> str:
+    return hashlib.sha256(f"{model}:{dimensions}\0{item_type}\0{item_text}".encode()).hexdigest()
+
+
+def job_content_hash(job_text: str, model: str, dimensions: int) -> str:
+    return hashlib.sha256(f"{model}:{dimensions}\0{job_text}".encode()).hexdigest()
+
+
+def _job_text(posting: JobPosting) -> str:
+    job_text = "\n\n".join(filter(None, [posting.title, posting.requirements, posting.description]))
+    return job_text[:JOB_EMBEDDING_MAX_CHARS]
+
+
+def skill_pattern(skills: Optional[Sequence[str]]) -> Optional["re.Pattern[str]"]:
+    """Whole-word matcher for any of the skills (longest first, so 'c++' beats 'c')"""
+    names = sorted({skill.strip().lower() for skill in skills or [] if skill and skill.strip()}, key=len, reverse=True)
+    if not names:
+        return None
+    return re.compile(r"(?<![\w+#])(?:" + "|".join(re.escape(name) for name in names) + r")(?![\w+#])")
+
+
+def _experience_items(experience: UserExperience) -> List[Tuple[str, int, str]]:
+    items = [
+        (ExperienceItemType.ACHIEVEMENT, i, achievement.strip())
+        for i, achievement in enumerate(experience.achievements or [])
+    ]
+    items += [
+        (ExperienceItemType.TECHNOLOGY, i, technology.strip())
+        for i, technology in enumerate(experience.technologies_used or [])
+    ]
+    return [item for item in items if item[2]]
+
+
+class ExperienceRanker:
+    """Ranks a user's achievements and technologies for a job posting.
+
+    Each achievement and technology is embedded once and stored with a hash
+    of its text; rank() embeds new items on first use, only items whose hash
+    changed (an edited experience) are re-embedded, and items that no
+    longer exist are dropped. Job postings
+    are embedded into job_postings.embedding with the hash of their text,
+    so an edited posting is embedded again. Ranking is then a single
+    query computing cosine similarities in Postgres, plus a bonus for items
+    naming one of the posting's required_skills, so tailoring a batch of
+    resumes costs one cheap query per posting rather than an LLM call.
+
+    Embedding failures never fail a generation; callers fall back to
+    unranked content when rank() returns None.
+    """
+
+    def __init__(
+        self,
+        llm: LLMClient = llm_client,
+        model: str = settings.EMBEDDING_MODEL,
+        dimensions: int = settings.EMBEDDING_DIMENSIONS,
+    ):
+        self.llm = llm
+        self.model = model
+        self.dimensions = dimensions
+
+    async def plan(self, session: AsyncSession, user_id: uuid.UUID, posting: Optional[JobPosting]) -> EmbeddingPlan:
+        """Find the items and posting text whose embeddings are missing or stale"""
+        experiences = (await session.execute(
+            select(UserExperience).where(UserExperience.user_id == user_id)
+        )).scalars().all()
+        expected = {}
+        for experience in experiences:
+            for item_type, index, item_text in _experience_items(experience):
+                content_hash = item_content_hash(item_type, item_text, self.model, self.dimensions)
+                expected[(experience.id, item_type, index)] = (item_text, content_hash)
+
+        existing = (await session.execute(
+            select(
+                ExperienceItemEmbedding.id,
+                ExperienceItemEmbedding.experience_id,
+                ExperienceItemEmbedding.item_type,
+                ExperienceItemEmbedding.item_index,
+                ExperienceItemEmbedding.content_hash,
+            ).where(ExperienceItemEmbedding.user_id == user_id)
+        )).all()
+        current = {}
+        stale = []
+        for row in existing:
+            key = (row.experience_id, row.item_type, row.item_index)
+            if key in expected:
+                current[key] = row.content_hash
+            else:
+                stale.append(row.id)
+        changed = [key for key, (_, content_hash) in expected.items() if current.get(key) != content_hash]
+
+        job_text, job_hash = None, ""
+        if posting is not None:
+            job_text = _job_text(posting)
+            job_hash = job_content_hash(job_text, self.model, self.dimensions)
+            embedded = (await session.execute(
+                select(JobPosting.embedding.isnot(None) & (JobPosting.embedding_hash == job_hash))
+                .where(JobPosting.id == posting.id)
+            )).scalar()
+            if embedded:
+                job_text = None
+        return EmbeddingPlan(expected, changed, stale, job_text, job_hash)
+
+    async def embed(self, plan: EmbeddingPlan, priority: str = LLMPriority.BATCH) -> Dict[str, List[float]]:
+        """Embed the planned texts; runs outside any transaction"""
+        # Identical texts (e.g. a technology used in several roles) are embedded once
+        texts = list(dict.fromkeys(plan.expected[key][0] for key in plan.changed))
+        if plan.job_text is not None:
+            texts = list(dict.fromkeys(texts + [plan.job_text]))
+        if not texts:
+            return {}
+        return dict(zip(texts, await self.llm.embed(
+            texts, model=self.model, dimensions=self.dimensions, priority=priority
+        )))
+
+    async def apply(
+        self,
+        session: AsyncSession,
+        user_id: uuid.UUID,
+        posting: Optional[JobPosting],
+        plan: EmbeddingPlan,
+        vectors: Dict[str, List[float]],
+    ) -> None:
+        """Store the embedded items and posting and drop items that no longer exist"""
+        if plan.stale:
+            await session.execute(delete(ExperienceItemEmbedding).where(ExperienceItemEmbedding.id.in_(plan.stale)))
+        if plan.changed:
+            await session.execute(UPSERT_ITEM_SQL, [
+                {
+                    "user_id": user_id,
+                    "experience_id": experience_id,
+                    "item_type": item_type,
+                    "item_index": index,
+                    "item_text": plan.expected[(experience_id, item_type, index)][0],
+                    "content_hash": plan.expected[(experience_id, item_type, index)][1],
+                    "embedding": vector_literal(vectors[plan.expected[(experience_id, item_type, index)][0]]),
+                    "embedding_model": self.model,
+                }
+                for experience_id, item_type, index in plan.changed
+            ])
+            logger.info(f"Embedded {len(plan.changed)} experience items for user {user_id}")
+        if posting is not None and plan.job_text is not None:
+            await session.execute(SET_JOB_EMBEDDING_SQL, {
+                "embedding": vector_literal(vectors[plan.job_text]),
+                "content_hash": plan.job_hash,
+                "job_posting_id": posting.id,
+            })
+
+    async def rank(
+        self,
+        session: AsyncSession,
+        user_id: uuid.UUID,
+        posting: JobPosting,
+        priority: str = LLMPriority.BATCH,
+    ) -> Optional[Dict[uuid.UUID, ExperienceRanking]]:
+        """Achievements and technologies per experience, most relevant first.
+
+        Embeddings are computed before the savepoint opens, so no row locks
+        are held while waiting on the embedding API.
+        """
+        try:
+            plan = await self.plan(session, user_id, posting)
+            vectors = await self.embed(plan, priority)
+            async with session.begin_nested():
+                await self.apply(session, user_id, posting, plan, vectors)
+                rows = (await session.execute(
+                    SIMILARITY_SQL, {"job_posting_id": posting.id, "user_id": user_id}
+                )).all()
+        except Exception as e:
+            logger.warning(f"Experience ranking unavailable for posting {posting.id}: {e}")
+            return None
+
+        pattern = skill_pattern(posting.required_skills)
+        rankings: Dict[uuid.UUID, ExperienceRanking] = {}
+        for row in rows:
+            ranking = rankings.setdefault(row.experience_id, ExperienceRanking([], []))
+            skill_match = bool(pattern and pattern.search(row.item_text.lower()))
+            similarity = float(row.similarity)
+            item = RankedItem(
+                row.item_text,
+                row.item_index,
+                similarity,
+                skill_match,
+                similarity + (settings.EXPERIENCE_SKILL_MATCH_BONUS if skill_match else 0.0),
+            )
+            if row.item_type == ExperienceItemType.ACHIEVEMENT:
+                ranking.achievements.append(item)
+            else:
+                ranking.technologies.append(item)
+        for ranking in rankings.values():
+            ranking.achievements.sort(key=lambda item: (-item.score, item.index))
+            ranking.technologies.sort(key=lambda item: (-item.score, item.index))
+        return rankings
+
+
+# Global experience ranker instance
+experience_ranker = ExperienceRanker()
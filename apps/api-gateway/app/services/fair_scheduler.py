@@ -0,0 +1,421 @@
+"""
+Fair Task Dispatcher
+Weighted deficit round-robin of due automation tasks across users
+"""
+
+import time
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import RedisClient, redis_client
+from app.models.automation import AutomationTask, TaskStatus
+from app.models.user import User
+from app.services.task_queue import status_literal
+from app.services.task_scheduler import DelayedTaskScheduler, task_scheduler
+
+logger = logging.getLogger(__name__)
+
+FAIR_SCHEDULER_KEY_PREFIX = "automation:fair"
+
+# Ready queue scores are priority * PRIORITY_SCALE + due time, so a user's own
+# tasks still run in priority order and the due time can be recovered for the
+# queue wait metric
+PRIORITY_SCALE = 10 ** 10
+
+# Shared by both scripts. KEYS: active, deficit, rounds, running, clock, tiers.
+# ARGV[1]: ready queue key prefix, ARGV[2]: default tier, ARGV[3]: index of the
+# first "tier, weight, cap" triple.
+FAIR_SCRIPT_PRELUDE = """
+local active, deficit, rounds, running, clock, tiers = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5], KEYS[6]
+local ready_prefix, default_tier = ARGV[1], ARGV[2]
+local weights, caps = {}, {}
+for i = tonumber(ARGV[3]), #ARGV, 3 do
+    weights[ARGV[i]] = tonumber(ARGV[i + 1])
+    caps[ARGV[i]] = tonumber(ARGV[i + 2])
+end
+
+local function tier_of(user)
+    local tier = redis.call('HGET', tiers, user)
+    if not tier or not weights[tier] then
+        tier = default_tier
+    end
+    return tier
+end
+
+-- Put a user with queued work and a free slot back into the rotation, no
+-- earlier than the round currently being served
+local function activate(user)
+    if redis.call('ZSCORE', active, user) then
+        return
+    end
+    if tonumber(redis.call('HGET', running, user) or '0') >= caps[tier_of(user)] then
+        return
+    end
+    if redis.call('ZCARD', ready_prefix .. user) == 0 then
+        redis.call('HDEL', rounds, user)
+        return
+    end
+    local round = tonumber(redis.call('HGET', rounds, user) or '0')
+    round = math.max(round, tonumber(redis.call('GET', clock) or '0'))
+    redis.call('ZADD', active, tostring(round), user)
+    redis.call('HDEL', rounds, user)
+end
+"""
+
+# KEYS[7]: due index of the task type. ARGV[4]: now, ARGV[5]: dispatch limit,
+# ARGV[6]: promotion limit, ARGV[7]: priority scale.
+# Returns a flat list of user, task id, due time, tier per dispatched task.
+DISPATCH_SCRIPT = FAIR_SCRIPT_PRELUDE + """
+local delayed = KEYS[7]
+local limit, scale = tonumber(ARGV[5]), tonumber(ARGV[7])
+
+local due = redis.call('ZRANGEBYSCORE', delayed, '-inf', ARGV[4], 'WITHSCORES', 'LIMIT', 0, tonumber(ARGV[6]))
+local touched, seen = {}, {}
+for i = 1, #due, 2 do
+    local member = due[i]
+    redis.call('ZREM', delayed, member)
+    local user, priority, task_id = string.match(member, '^([^:]+):(%d+):(.+)$')
+    if user then
+        local score = tonumber(priority) * scale + tonumber(due[i + 1])
+        redis.call('ZADD', ready_prefix .. user, tostring(score), task_id)
+        if not seen[user] then
+            seen[user] = true
+            touched[#touched + 1] = user
+        end
+    end
+end
+for _, user in ipairs(touched) do
+    activate(user)
+end
+
+local out, served = {}, 0
+while served < limit do
+    local head = redis.call('ZRANGE', active, 0, 0, 'WITHSCORES')
+    if #head == 0 then
+        break
+    end
+    local user, round = head[1], tonumber(head[2])
+    local ready = ready_prefix .. user
+    local item = redis.call('ZRANGE', ready, 0, 0, 'WITHSCORES')
+    if #item == 0 then
+        redis.call('ZREM', active, user)
+        redis.call('HDEL', deficit, user)
+    else
+        local tier = tier_of(user)
+        redis.call('ZREM', ready, item[1])
+        redis.call('SET', clock, tostring(round))
+        local in_flight = redis.call('HINCRBY', running, user, 1)
+
+        -- Each turn adds the tier weight to the user's deficit and every task
+        -- costs one, so per round a user gets as many tasks as its weight
+        local credit = tonumber(redis.call('HGET', deficit, user) or '0')
+        if credit < 1 then
+            credit = credit + weights[tier]
+        end
+        credit = credit - 1
+        local next_round = round
+        if credit < 1 then
+            next_round = round + 1
+        end
+
+        if redis.call('ZCARD', ready) == 0 then
+            redis.call('ZREM', active, user)
+            redis.call('HDEL', deficit, user)
+        else
+            redis.call('HSET', deficit, user, tostring(credit))
+            if in_flight >= caps[tier] then
+                redis.call('ZREM', active, user)
+                redis.call('HSET', rounds, user, tostring(next_round))
+            elseif next_round ~= round then
+                redis.call('ZADD', active, tostring(next_round), user)
+            end
+        end
+
+        local due_at = tonumber(item[2]) % scale
+        out[#out + 1] = user
+        out[#out + 1] = item[1]
+        out[#out + 1] = string.format('%.3f', due_at)
+        out[#out + 1] = tier
+        served = served + 1
+    end
+end
+return out
+"""
+
+# ARGV[4]: running delta for each user in ARGV[5..]. Frees slots of finished
+# tasks (delta -1) or just re-activates parked users (delta 0).
+SETTLE_SCRIPT = FAIR_SCRIPT_PRELUDE + """
+local delta = tonumber(ARGV[4])
+for i = 5, tonumber(ARGV[3]) - 1 do
+    local user = ARGV[i]
+    if delta ~= 0 then
+        if redis.call('HINCRBY', running, user, delta) <= 0 then
+            redis.call('HDEL', running, user)
+        end
+    end
+    activate(user)
+end
+return 1
+"""
+
+
+class DispatchedTask(NamedTuple):
+    user_id: str
+    task_id: str
+    tier: str
+    wait_seconds: float
+
+
+def _percentile(buckets: Sequence[float], counts: Sequence[int], total: int, q: float) -> Optional[float]:
+    """Upper bound of the histogram bucket holding the q-th quantile"""
+    if total <= 0:
+        return None
+    threshold = q * total
+    cumulative = 0
+    for bound, count in zip(buckets, counts):
+        cumulative += count
+        if cumulative >= threshold:
+            return bound
+    return None
+
+
+class FairTaskDispatcher:
+    """Shares worker capacity between users by subscription tier.
+
+    Due entries from the delayed scheduler are moved into one ready queue per
+    user and task type. Users with ready work sit in a sorted set scored by
+    deficit round-robin round, so picking the next user is a ZPOPMIN-style
+    O(log users) operation regardless of how many tasks each user queued.
+    Within a round every user gets as many tasks as its tier weight, so a
+    user with 500 queued tasks cannot starve one with a single task.
+
+    Each user also has a cap on concurrently running tasks per task type;
+    users at their cap leave the rotation until a task finishes and settle()
+    frees the slot. All state changes happen in Lua so any number of workers
+    can dispatch concurrently.
+
+    Time from due to dispatch is recorded per tier as a cumulative histogram.
+    """
+
+    def __init__(
+        self,
+        scheduler: DelayedTaskScheduler = task_scheduler,
+        client: RedisClient = redis_client,
+        key_prefix: str = FAIR_SCHEDULER_KEY_PREFIX,
+        tier_weights: Optional[Mapping[str, int]] = None,
+        tier_concurrency: Optional[Mapping[str, int]] = None,
+        default_tier: str = settings.FAIR_SCHEDULER_DEFAULT_TIER,
+    ):
+        self.scheduler = scheduler
+        self.client = client
+        self.key_prefix = key_prefix
+        self.tier_weights = dict(tier_weights or settings.FAIR_SCHEDULER_TIER_WEIGHTS)
+        self.tier_concurrency = dict(tier_concurrency or settings.FAIR_SCHEDULER_TIER_CONCURRENCY)
+        self.default_tier = default_tier
+        self._dispatch_script = None
+        self._settle_script = None
+
+    @property
+    def tiers_key(self) -> str:
+        return f"{self.key_prefix}:tiers"
+
+    def wait_key(self, tier: str) -> str:
+        return f"{self.key_prefix}:wait:{tier}"
+
+    def _state_keys(self, task_type: str) -> List[str]:
+        prefix = f"{self.key_prefix}:{task_type}"
+        return [
+            f"{prefix}:active",
+            f"{prefix}:deficit",
+            f"{prefix}:rounds",
+            f"{prefix}:running",
+            f"{prefix}:clock",
+            self.tiers_key,
+        ]
+
+    def _prelude_args(self, task_type: str, extra: Sequence[Any]) -> List[Any]:
+        tier_args: List[Any] = []
+        for tier, weight in self.tier_weights.items():
+            cap = self.tier_concurrency.get(tier, self.tier_concurrency.get(self.default_tier, 1))
+            tier_args.extend([tier, max(1, int(weight)), max(1, int(cap))])
+        first_tier_index = 4 + len(extra)
+        return [
+            f"{self.key_prefix}:{task_type}:ready:",
+            self.default_tier,
+            first_tier_index,
+            *extra,
+            *tier_args,
+        ]
+
+    async def set_user_tiers(self, tiers: Mapping[Any, Optional[str]]) -> None:
+        """Record the subscription tier of each user for weighting"""
+        mapping = {str(user_id): tier or self.default_tier for user_id, tier in tiers.items()}
+        if not mapping:
+            return
+        client = await self.client.get_client()
+        await client.hset(self.tiers_key, mapping=mapping)
+
+    async def dispatch(self, task_type: str, limit: int) -> List[DispatchedTask]:
+        """Promote due entries and pick up to limit tasks in fair order.
+
+        Every returned task holds one of its owner's concurrency slots until
+        settle() is called for it, whether or not the claim succeeds.
+        """
+        if limit <= 0:
+            return []
+        client = await self.client.get_client()
+        if self._dispatch_script is None:
+            self._dispatch_script = client.register_script(DISPATCH_SCRIPT)
+        now = time.time()
+        args = self._prelude_args(
+            task_type, [now, limit, settings.FAIR_SCHEDULER_PROMOTE_BATCH, PRIORITY_SCALE]
+        )
+        raw = await self._dispatch_script(
+            keys=[*self._state_keys(task_type), self.scheduler.key_for(task_type)],
+            args=args,
+            client=client,
+        )
+
+        dispatched = []
+        for i in range(0, len(raw), 4):
+            user_id, task_id, due_at, tier = raw[i:i + 4]
+            dispatched.append(DispatchedTask(user_id, task_id, tier, max(0.0, now - float(due_at))))
+
+        if dispatched:
+            try:
+                await self._record_waits(dispatched)
+            except Exception as e:
+                logger.warning(f"Failed to record queue wait metrics: {e}")
+        return dispatched
+
+    async def settle(self, task_type: str, user_ids: Sequence[str], delta: int = -1) -> None:
+        """Free one concurrency slot per entry and re-activate users with queued work"""
+        if not user_ids:
+            return
+        client = await self.client.get_client()
+        if self._settle_script is None:
+            self._settle_script = client.register_script(SETTLE_SCRIPT)
+        # User ids sit between the fixed arguments and the tier triples
+        args = self._prelude_args(task_type, [delta, *[str(user_id) for user_id in user_ids]])
+        await self._settle_script(keys=self._state_keys(task_type), args=args, client=client)
+
+    async def has_ready_work(self, task_types: Sequence[str]) -> bool:
+        """Whether any user of these task types is waiting in the rotation"""
+        if not task_types:
+            return False
+        client = await self.client.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for task_type in task_types:
+                pipe.zcard(self._state_keys(task_type)[0])
+            sizes = await pipe.execute()
+        return any(sizes)
+
+    async def seconds_until_next_work(self, task_types: Sequence[str]) -> Optional[float]:
+        """Zero if users are waiting in the rotation, else the next due time"""
+        if await self.has_ready_work(task_types):
+            return 0.0
+        return await self.scheduler.seconds_until_next_due(task_types)
+
+    async def _record_waits(self, dispatched: Sequence[DispatchedTask]) -> None:
+        buckets = settings.QUEUE_WAIT_BUCKETS_SECONDS
+        client = await self.client.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for task in dispatched:
+                key = self.wait_key(task.tier)
+                pipe.hincrby(key, "count", 1)
+                pipe.hincrbyfloat(key, "sum", task.wait_seconds)
+                bound = next((b for b in buckets if task.wait_seconds <= b), None)
+                pipe.hincrby(key, f"le:{bound}" if bound is not None else "le:inf", 1)
+            await pipe.execute()
+
+    async def queue_wait_metrics(self) -> List[Dict[str, Any]]:
+        """Cumulative due-to-dispatch wait statistics per subscription tier"""
+        buckets = settings.QUEUE_WAIT_BUCKETS_SECONDS
+        tiers = list(self.tier_weights)
+        client = await self.client.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for tier in tiers:
+                pipe.hgetall(self.wait_key(tier))
+            hashes = await pipe.execute()
+
+        metrics = []
+        for tier, raw in zip(tiers, hashes):
+            values = {field: float(value) for field, value in raw.items()}
+            count = int(values.get("count", 0))
+            bucket_counts = [int(values.get(f"le:{bound}", 0)) for bound in buckets]
+            overflow = int(values.get("le:inf", 0))
+            metrics.append({
+                "tier": tier,
+                "weight": self.tier_weights[tier],
+                "concurrency_cap": self.tier_concurrency.get(tier),
+                "dispatched": count,
+                "mean_wait_seconds": values.get("sum", 0.0) / count if count else None,
+                "p50_wait_seconds": _percentile(buckets, bucket_counts, count, 0.5),
+                "p95_wait_seconds": _percentile(buckets, bucket_counts, count, 0.95),
+                "wait_buckets": {
+                    **{str(bound): n for bound, n in zip(buckets, bucket_counts)},
+                    "inf": overflow,
+                },
+            })
+        return metrics
+
+    async def reconcile(self, session: AsyncSession, task_types: Sequence[str]) -> None:
+        """Rebuild tiers and running counts from Postgres and re-index pending tasks.
+
+        Running counts drift if a worker dies between dispatch and settle, and
+        a user left at its cap would never be re-activated, so they are
+        rewritten from the running tasks and parked users are re-activated.
+        """
+        if not task_types:
+            return
+        await self.scheduler.reconcile(session, task_types)
+
+        tier_rows = await session.execute(
+            select(User.id, User.subscription_tier)
+            .where(
+                User.id.in_(
+                    select(AutomationTask.user_id).where(
+                        AutomationTask.status.in_([
+                            status_literal(TaskStatus.PENDING),
+                            status_literal(TaskStatus.RUNNING),
+                        ]),
+                        AutomationTask.task_type.in_(task_types),
+                    )
+                )
+            )
+        )
+        await self.set_user_tiers({user_id: tier for user_id, tier in tier_rows.all()})
+
+        running_rows = await session.execute(
+            select(AutomationTask.task_type, AutomationTask.user_id, func.count())
+            .where(
+                AutomationTask.status == status_literal(TaskStatus.RUNNING),
+                AutomationTask.task_type.in_(task_types),
+            )
+            .group_by(AutomationTask.task_type, AutomationTask.user_id)
+        )
+        running: Dict[str, Dict[str, int]] = {task_type: {} for task_type in task_types}
+        for task_type, user_id, count in running_rows.all():
+            running[task_type][str(user_id)] = count
+
+        client = await self.client.get_client()
+        for task_type in task_types:
+            _, _, rounds_key, running_key, _, _ = self._state_keys(task_type)
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.delete(running_key)
+                if running[task_type]:
+                    pipe.hset(running_key, mapping=running[task_type])
+                await pipe.execute()
+            parked = await client.hkeys(rounds_key)
+            if parked:
+                await self.settle(task_type, parked, delta=0)
+
+        logger.info(f"Reconciled fair dispatcher state for {len(task_types)} task types")
+
+
+# Global fair dispatcher instance
+fair_dispatcher = FairTaskDispatcher()
@@ -0,0 +1,202 @@
+"""
+Fetch Cache
+Conditional re-fetching of scraped job pages: unchanged pages are neither parsed nor ingested
+"""
+
+import asyncio
+import hashlib
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.services.browser_session_pool import PooledBrowserSession
+from app.services.scraper_client import ScraperClient, scraper_client
+
+logger = logging.getLogger(__name__)
+
+# Validators larger than the columns are not worth keeping
+ETAG_MAX_LENGTH = 500
+LAST_MODIFIED_MAX_LENGTH = 100
+
+CACHE_ENTRY_SQL = text("""
+    SELECT etag, last_modified, body_hash, body_bytes, parse_ms
+    FROM fetch_cache
+    WHERE url_hash = :url_hash
+""")
+
+# Revalidated (304 or same body): only the bookkeeping changes
+TOUCH_ENTRY_SQL = text("""
+    UPDATE fetch_cache
+    SET fetch_count = fetch_count + 1, fetched_at = NOW(),
+        etag = COALESCE(:etag, etag), last_modified = COALESCE(:last_modified, last_modified)
+    WHERE url_hash = :url_hash
+""")
+
+STORE_ENTRY_SQL = text("""
+    INSERT INTO fetch_cache (url_hash, url, platform, etag, last_modified, body_hash, body_bytes, parse_ms)
+    VALUES (:url_hash, :url, :platform, :etag, :last_modified, :body_hash, :body_bytes, :parse_ms)
+    ON CONFLICT (url_hash) DO UPDATE
+    SET etag = EXCLUDED.etag,
+        last_modified = EXCLUDED.last_modified,
+        body_hash = EXCLUDED.body_hash,
+        body_bytes = EXCLUDED.body_bytes,
+        parse_ms = CASE WHEN EXCLUDED.parse_ms > 0 THEN EXCLUDED.parse_ms ELSE fetch_cache.parse_ms END,
+        fetch_count = fetch_cache.fetch_count + 1,
+        change_count = fetch_cache.change_count + 1,
+        fetched_at = NOW(),
+        changed_at = NOW()
+""")
+
+FETCH_SAVINGS_SQL = text("""
+    SELECT platform_name,
+           SUM(COALESCE(successful_scrapes, 0)) AS successful,
+           SUM(COALESCE(successful_scrapes, 0) + COALESCE(failed_scrapes, 0)) AS fetches,
+           SUM(COALESCE(not_modified_responses, 0)) AS not_modified,
+           SUM(COALESCE(unchanged_responses, 0)) AS unchanged,
+           SUM(COALESCE(bytes_saved, 0)) AS bytes_saved,
+           SUM(COALESCE(parse_ms_saved, 0)) AS parse_ms_saved
+    FROM platform_metrics
+    WHERE metric_date > CURRENT_DATE - CAST(:days AS integer)
+    GROUP BY platform_name
+    ORDER BY platform_name
+""")
+
+
+class FetchStatus(str):
+    CHANGED = "changed"
+    NOT_MODIFIED = "not_modified"
+    UNCHANGED = "unchanged"
+    ERROR = "error"
+
+
+class FetchResult(NamedTuple):
+    url: str
+    status: str
+    status_code: int
+    # Body, parse result and the new cache entry are only set for changed pages
+    body: Optional[bytes] = None
+    parsed: Any = None
+    entry: Optional[Dict[str, Any]] = None
+
+    @property
+    def changed(self) -> bool:
+        return self.status == FetchStatus.CHANGED
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _validator(value: Optional[str], max_length: int) -> Optional[str]:
+    return value if value and len(value) <= max_length else None
+
+
+class FetchCache:
+    """Conditional GETs for listing and detail pages (keyed by URL, e.g. JobPosting.source_url).
+
+    The ETag and Last-Modified of the last response are sent back as
+    If-None-Match / If-Modified-Since. A 304, or a 200 whose body hashes
+    to the cached hash (boards that ignore validators), returns an
+    unchanged result without calling parse, so callers skip ingestion too.
+    The bytes not downloaded and the parse time not spent (the page's last
+    measured parse time) are added to the platform's metrics.
+
+    A changed page's new validators are not written by fetch: the caller
+    stores them with store() in the transaction that ingests the page, so
+    a page whose ingestion rolls back is fetched as changed again.
+    """
+
+    def __init__(self, client: ScraperClient = scraper_client):
+        self.client = client
+
+    async def fetch(
+        self,
+        platform: str,
+        url: str,
+        parse: Optional[Callable[[bytes], Any]] = None,
+        session: Optional[PooledBrowserSession] = None,
+    ) -> FetchResult:
+        """Fetch a page, parsing it only if it changed since the last fetch"""
+        key = url_hash(url)
+        async with AsyncSessionLocal() as db:
+            entry = (await db.execute(CACHE_ENTRY_SQL, {"url_hash": key})).first()
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        response = await self.client.get(platform, url, headers=headers, session=session)
+        etag = _validator(response.headers.get("etag"), ETAG_MAX_LENGTH)
+        last_modified = _validator(response.headers.get("last-modified"), LAST_MODIFIED_MAX_LENGTH)
+
+        if response.status_code == 304 and entry is not None:
+            await self._touch(key, etag, last_modified)
+            self.client.record_cache_hit(platform, True, entry.body_bytes, entry.parse_ms)
+            return FetchResult(url, FetchStatus.NOT_MODIFIED, response.status_code)
+        if response.status_code >= 300:
+            return FetchResult(url, FetchStatus.ERROR, response.status_code)
+
+        body = response.content
+        body_hash = hashlib.sha256(body).hexdigest()
+        if entry is not None and entry.body_hash == body_hash:
+            await self._touch(key, etag, last_modified)
+            self.client.record_cache_hit(platform, False, 0, entry.parse_ms)
+            return FetchResult(url, FetchStatus.UNCHANGED, response.status_code)
+
+        parsed = None
+        parse_ms = 0
+        if parse is not None:
+            started = time.perf_counter()
+            parsed = await asyncio.to_thread(parse, body)
+            parse_ms = int((time.perf_counter() - started) * 1000)
+        entry = {
+            "url_hash": key,
+            "url": url,
+            "platform": platform,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": body_hash,
+            "body_bytes": len(body),
+            "parse_ms": parse_ms,
+        }
+        return FetchResult(url, FetchStatus.CHANGED, response.status_code, body=body, parsed=parsed, entry=entry)
+
+    async def store(self, session: AsyncSession, result: FetchResult) -> None:
+        """Record a changed page's validators and hash; the caller owns the transaction"""
+        if result.entry is not None:
+            await session.execute(STORE_ENTRY_SQL, result.entry)
+
+    async def _touch(self, key: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(TOUCH_ENTRY_SQL, {"url_hash": key, "etag": etag, "last_modified": last_modified})
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to update fetch cache entry {key}: {e}")
+
+
+async def fetch_savings(session: AsyncSession, days: int) -> List[Dict[str, Any]]:
+    """Per-platform conditional fetch hits and savings over the last days"""
+    rows = (await session.execute(FETCH_SAVINGS_SQL, {"days": days})).all()
+    return [
+        {
+            "platform_name": row.platform_name,
+            "fetches": row.fetches,
+            "not_modified_responses": row.not_modified,
+            "unchanged_responses": row.unchanged,
+            "hit_rate": (row.not_modified + row.unchanged) / row.successful if row.successful else None,
+            "bytes_saved": row.bytes_saved,
+            "parse_seconds_saved": row.parse_ms_saved / 1000,
+        }
+        for row in rows
+    ]
+
+
+# Global fetch cache instance
+fetch_cache = FetchCache()
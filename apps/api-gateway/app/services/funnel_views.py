@@ -0,0 +1,160 @@
+"""
+Funnel Views Service
+Refreshes the application funnel and time-in-stage materialized views and reads them
+"""
+
+from typing import Any, Dict
+import uuid
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import RedisClient, redis_client
+
+logger = logging.getLogger(__name__)
+
+FUNNEL_VIEWS_STATE = "application_funnel"
+FUNNEL_REFRESH_LEASE_KEY = "analytics:funnel:lease"
+
+# Defined in migrations/016_application_funnel.sql; each has the unique
+# index CONCURRENTLY needs
+MATERIALIZED_VIEWS = (
+    "user_application_funnel",
+    "application_funnel",
+    "user_stage_durations",
+    "stage_durations",
+)
+
+REFRESH_VIEW_SQL = {
+    view: text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+    for view in MATERIALIZED_VIEWS
+}
+
+# When the refresh started; every view holds at least the history committed by then
+RECORD_REFRESH_SQL = text("""
+    INSERT INTO analytics_rollup_state (name, watermark)
+    VALUES (:name, :refreshed_at)
+    ON CONFLICT (name) DO UPDATE SET watermark = EXCLUDED.watermark
+""")
+
+REFRESH_STARTED_SQL = text("SELECT NOW()")
+
+# Funnel order, then the statuses that leave the funnel
+STAGE_ORDER_SQL = (
+    "array_position(ARRAY['pending', 'submitted', 'reviewing', 'interviewed', 'offered', "
+    "'rejected', 'withdrawn'], stage)"
+)
+
+REFRESHED_AT_SQL = text("""
+    SELECT watermark FROM analytics_rollup_state WHERE name = :name
+""")
+
+USER_FUNNEL_SQL = text("""
+    SELECT stage, applications, conversion_rate
+    FROM user_application_funnel
+    WHERE user_id = :user_id
+    ORDER BY stage_order
+""")
+
+FUNNEL_SQL = text("""
+    SELECT stage, applications, conversion_rate
+    FROM application_funnel
+    ORDER BY stage_order
+""")
+
+USER_STAGE_DURATIONS_SQL = text(f"""
+    SELECT stage, transitions, median_seconds
+    FROM user_stage_durations
+    WHERE user_id = :user_id
+    ORDER BY {STAGE_ORDER_SQL}
+""")
+
+STAGE_DURATIONS_SQL = text(f"""
+    SELECT stage, transitions, median_seconds
+    FROM stage_durations
+    ORDER BY {STAGE_ORDER_SQL}
+""")
+
+
+class FunnelViews:
+    """Keeps the funnel materialized views current off the request path.
+
+    Funnel and time-in-stage queries window over the whole status history,
+    so they run only on the worker's schedule; a concurrent refresh swaps
+    in the new rows without blocking readers, and the endpoints read the
+    small precomputed views.
+    """
+
+    def __init__(self, client: RedisClient = redis_client):
+        self.client = client
+
+    async def acquire_refresh_lease(self, seconds: int) -> bool:
+        """Let only one worker refresh per period"""
+        client = await self.client.get_client()
+        return bool(await client.set(FUNNEL_REFRESH_LEASE_KEY, 1, nx=True, ex=seconds))
+
+    async def refresh(self) -> None:
+        """Refresh each view in its own short transaction.
+
+        Each refresh reads its own snapshot, so the views are not mutually
+        consistent: history committed during the refresh may show in the
+        per-user views but not yet in the overall ones, until the next run.
+        """
+        async with AsyncSessionLocal() as session:
+            refreshed_at = (await session.execute(REFRESH_STARTED_SQL)).scalar()
+        for view in MATERIALIZED_VIEWS:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    await session.execute(REFRESH_VIEW_SQL[view])
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await session.execute(RECORD_REFRESH_SQL, {"name": FUNNEL_VIEWS_STATE, "refreshed_at": refreshed_at})
+        logger.info("Refreshed application funnel views")
+
+
+async def _refreshed_at(session: AsyncSession):
+    return (await session.execute(REFRESHED_AT_SQL, {"name": FUNNEL_VIEWS_STATE})).scalar()
+
+
+def _funnel_stage(row) -> Dict[str, Any]:
+    return {
+        "stage": row.stage,
+        "applications": row.applications,
+        "conversion_rate": float(row.conversion_rate) if row.conversion_rate is not None else None,
+    }
+
+
+def _stage_duration(row) -> Dict[str, Any]:
+    return {
+        "stage": row.stage,
+        "transitions": row.transitions,
+        "median_hours": round(row.median_seconds / 3600, 2),
+    }
+
+
+async def application_funnel(session: AsyncSession, user_id: uuid.UUID) -> Dict[str, Any]:
+    """Funnel of the user's applications and of all applications"""
+    user = (await session.execute(USER_FUNNEL_SQL, {"user_id": user_id})).all()
+    overall = (await session.execute(FUNNEL_SQL)).all()
+    return {
+        "refreshed_at": await _refreshed_at(session),
+        "user": [_funnel_stage(row) for row in user],
+        "overall": [_funnel_stage(row) for row in overall],
+    }
+
+
+async def time_in_stage(session: AsyncSession, user_id: uuid.UUID) -> Dict[str, Any]:
+    """Median time in each status for the user's applications and for all applications"""
+    user = (await session.execute(USER_STAGE_DURATIONS_SQL, {"user_id": user_id})).all()
+    overall = (await session.execute(STAGE_DURATIONS_SQL)).all()
+    return {
+        "refreshed_at": await _refreshed_at(session),
+        "user": [_stage_duration(row) for row in user],
+        "overall": [_stage_duration(row) for row in overall],
+    }
+
+
+# Global funnel views instance
+funnel_views = FunnelViews()
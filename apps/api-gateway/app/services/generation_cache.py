@@ -0,0 +1,342 @@
+"""
+Generation Cache
+Content-addressed cache of LLM generations in Redis and Postgres
+"""
+
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import time
+import unicodedata
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+import logging
+
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import RedisClient, redis_client
+from app.models.application import GenerationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+GENERATION_CACHE_KEY_PREFIX = "llm:generation"
+GENERATION_CACHE_STATS_KEY = "llm:generation:stats"
+GENERATION_CACHE_EVICT_LEASE_KEY = "llm:generation:evict"
+# Cache key -> Redis hits not yet recorded in Postgres
+GENERATION_CACHE_HITS_KEY = "llm:generation:hits"
+
+# Hot tier hits count as accesses of the durable entry too, so its
+# recency, hit count and expiry follow real use
+RECORD_HITS_SQL = text("""
+    UPDATE llm_generation_cache c
+    SET hit_count = c.hit_count + h.hits,
+        last_accessed_at = NOW(),
+        expires_at = GREATEST(c.expires_at, NOW() + make_interval(days => CAST(:ttl_days AS integer)))
+    FROM unnest(CAST(:cache_keys AS TEXT[]), CAST(:hits AS INTEGER[])) AS h(cache_key, hits)
+    WHERE c.cache_key = h.cache_key
+""")
+
+
+class CacheSource(str):
+    REDIS = "redis"
+    POSTGRES = "postgres"
+
+
+class Generation(NamedTuple):
+    content_text: str
+    model_used: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    generation_ms: int = 0
+    metadata: Optional[Dict[str, Any]] = None
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt so formatting-only differences share a cache entry.
+
+    Unicode is NFC-normalized, line endings unified and trailing whitespace
+    removed; whitespace inside lines is kept because it can matter to the
+    model (indentation, tables).
+    """
+    text = unicodedata.normalize("NFC", prompt).replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def generation_cache_key(prompt: str, model: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """SHA-256 of the normalized prompt, model and generation parameters"""
+    payload = {
+        "prompt": normalize_prompt(prompt),
+        "model": model,
+        # Unset and explicitly-None parameters mean the same to the API
+        "params": {k: v for k, v in (params or {}).items() if v is not None},
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _generation_from_entry(entry: Any) -> Generation:
+    return Generation(
+        content_text=entry.content_text,
+        model_used=entry.model_used,
+        prompt_tokens=entry.prompt_tokens or 0,
+        completion_tokens=entry.completion_tokens or 0,
+        generation_ms=entry.generation_ms or 0,
+        metadata=entry.generation_metadata,
+    )
+
+
+class GenerationCache:
+    """Two-tier cache of LLM output keyed by generation_cache_key.
+
+    Redis is the hot tier: entries expire after a sliding TTL that is
+    refreshed on every hit, so rarely used entries age out first (and, having
+    a TTL, are what Redis evicts under volatile-lru memory pressure).
+    Postgres is the durable tier: a hit there is promoted back into Redis,
+    and periodic eviction removes expired rows and the least recently used
+    rows beyond the configured cap. Every access, in either tier, extends
+    the entry's expiry by ttl_days and makes it most recently used; Redis
+    hits are counted in a hash and applied to Postgres in one batch before
+    each eviction.
+
+    Cache failures never fail a generation; they only cost a cache miss.
+    Database work runs in a savepoint of the caller's session, so the caller
+    owns the transaction as with other services.
+    """
+
+    def __init__(
+        self,
+        client: RedisClient = redis_client,
+        key_prefix: str = GENERATION_CACHE_KEY_PREFIX,
+        redis_ttl: int = settings.GENERATION_CACHE_REDIS_TTL_SECONDS,
+        ttl_days: int = settings.GENERATION_CACHE_TTL_DAYS,
+        max_entries: int = settings.GENERATION_CACHE_MAX_ENTRIES,
+    ):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.redis_ttl = redis_ttl
+        self.ttl_days = ttl_days
+        self.max_entries = max_entries
+
+    def redis_key(self, cache_key: str) -> str:
+        return f"{self.key_prefix}:{cache_key}"
+
+    async def get_or_generate(
+        self,
+        session: AsyncSession,
+        prompt: str,
+        model: str,
+        params: Optional[Dict[str, Any]],
+        generate: Callable[[], Awaitable[Generation]],
+        bypass: bool = False,
+    ) -> Tuple[Generation, Optional[str]]:
+        """Return a cached generation or produce and cache a new one.
+
+        Returns (generation, source) where source is the tier that served the
+        hit, or None if generate() ran. With bypass (an explicit "regenerate")
+        the lookup is skipped and the fresh result replaces the cached one.
+        """
+        if not settings.GENERATION_CACHE_ENABLED:
+            return await generate(), None
+
+        cache_key = generation_cache_key(prompt, model, params)
+        if not bypass:
+            cached = await self.lookup(session, cache_key)
+            if cached is not None:
+                generation, source = cached
+                await self.record_stats(source, generation)
+                return generation, source
+
+        started = time.perf_counter()
+        generation = await generate()
+        if not generation.generation_ms:
+            generation = generation._replace(
+                generation_ms=int((time.perf_counter() - started) * 1000)
+            )
+        await self.store(session, cache_key, generation)
+        await self.record_stats("bypasses" if bypass else "misses", generation)
+        return generation, None
+
+    async def lookup(self, session: AsyncSession, cache_key: str) -> Optional[Tuple[Generation, str]]:
+        """Find a generation in Redis, then Postgres (promoting it to Redis)"""
+        try:
+            client = await self.client.get_client()
+            redis_key = self.redis_key(cache_key)
+            raw = await client.get(redis_key)
+            if raw is not None:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.expire(redis_key, self.redis_ttl)
+                    pipe.hincrby(GENERATION_CACHE_HITS_KEY, cache_key, 1)
+                    await pipe.execute()
+                return Generation(**json.loads(raw)), CacheSource.REDIS
+        except Exception as e:
+            logger.warning(f"Generation cache hot tier unavailable: {e}")
+
+        try:
+            async with session.begin_nested():
+                result = await session.execute(
+                    update(GenerationCacheEntry)
+                    .where(
+                        GenerationCacheEntry.cache_key == cache_key,
+                        GenerationCacheEntry.expires_at > func.now(),
+                    )
+                    .values(
+                        hit_count=GenerationCacheEntry.hit_count + 1,
+                        last_accessed_at=func.now(),
+                        expires_at=func.greatest(
+                            GenerationCacheEntry.expires_at,
+                            datetime.now(timezone.utc) + timedelta(days=self.ttl_days),
+                        ),
+                    )
+                    .returning(GenerationCacheEntry)
+                    .execution_options(synchronize_session=False)
+                )
+                entry = result.scalars().first()
+        except Exception as e:
+            logger.warning(f"Generation cache durable tier unavailable: {e}")
+            return None
+        if entry is None:
+            return None
+
+        generation = _generation_from_entry(entry)
+        await self._store_hot(cache_key, generation)
+        return generation, CacheSource.POSTGRES
+
+    async def store(self, session: AsyncSession, cache_key: str, generation: Generation) -> None:
+        """Write a generation to both tiers, replacing any existing entry"""
+        values = {
+            "model_used": generation.model_used,
+            "content_text": generation.content_text,
+            "prompt_tokens": generation.prompt_tokens,
+            "completion_tokens": generation.completion_tokens,
+            "generation_ms": generation.generation_ms,
+            "generation_metadata": generation.metadata,
+            "last_accessed_at": func.now(),
+            "expires_at": datetime.now(timezone.utc) + timedelta(days=self.ttl_days),
+        }
+        stmt = insert(GenerationCacheEntry).values(cache_key=cache_key, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[GenerationCacheEntry.cache_key],
+            set_={**values, "created_at": func.now(), "hit_count": 0},
+        )
+        try:
+            async with session.begin_nested():
+                await session.execute(stmt)
+        except Exception as e:
+            logger.warning(f"Failed to store generation in durable cache: {e}")
+        await self._store_hot(cache_key, generation)
+
+    async def invalidate(self, session: AsyncSession, cache_key: str) -> None:
+        """Drop an entry from both tiers"""
+        try:
+            await self.client.delete_cache(self.redis_key(cache_key))
+        except Exception as e:
+            logger.warning(f"Failed to invalidate generation in hot cache: {e}")
+        async with session.begin_nested():
+            await session.execute(
+                delete(GenerationCacheEntry).where(GenerationCacheEntry.cache_key == cache_key)
+            )
+
+    async def record_hot_hits(self, session: AsyncSession) -> int:
+        """Apply the Redis hits counted since the last call to their Postgres entries.
+
+        The counts are taken from Redis atomically, so hits arriving meanwhile
+        are kept for the next call. The caller owns the transaction.
+        """
+        client = await self.client.get_client()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hgetall(GENERATION_CACHE_HITS_KEY)
+            pipe.delete(GENERATION_CACHE_HITS_KEY)
+            hits, _ = await pipe.execute()
+        if not hits:
+            return 0
+        async with session.begin_nested():
+            await session.execute(RECORD_HITS_SQL, {
+                "cache_keys": list(hits),
+                "hits": [int(count) for count in hits.values()],
+                "ttl_days": self.ttl_days,
+            })
+        return len(hits)
+
+    async def evict(self, session: AsyncSession) -> int:
+        """Record Redis hits, then delete expired rows and least recently used rows beyond max_entries"""
+        try:
+            await self.record_hot_hits(session)
+        except Exception as e:
+            logger.warning(f"Failed to record hot generation cache hits: {e}")
+        expired = await session.execute(
+            delete(GenerationCacheEntry).where(GenerationCacheEntry.expires_at <= func.now())
+        )
+        overflow = (
+            select(GenerationCacheEntry.cache_key)
+            .order_by(GenerationCacheEntry.last_accessed_at.desc())
+            .offset(self.max_entries)
+            .scalar_subquery()
+        )
+        evicted = await session.execute(
+            delete(GenerationCacheEntry)
+            .where(GenerationCacheEntry.cache_key.in_(overflow))
+            .execution_options(synchronize_session=False)
+        )
+        total = (expired.rowcount or 0) + (evicted.rowcount or 0)
+        if total:
+            logger.info(f"Evicted {total} generation cache entries")
+        return total
+
+    async def acquire_evict_lease(self, seconds: int) -> bool:
+        """Let only one worker evict per period"""
+        client = await self.client.get_client()
+        return bool(await client.set(GENERATION_CACHE_EVICT_LEASE_KEY, 1, nx=True, ex=seconds))
+
+    async def stats(self) -> Dict[str, Any]:
+        """Cumulative hit rate and work saved by the cache"""
+        client = await self.client.get_client()
+        raw = await client.hgetall(GENERATION_CACHE_STATS_KEY)
+        redis_hits = int(raw.get(f"hits:{CacheSource.REDIS}", 0))
+        postgres_hits = int(raw.get(f"hits:{CacheSource.POSTGRES}", 0))
+        misses = int(raw.get("misses", 0))
+        bypasses = int(raw.get("bypasses", 0))
+        hits = redis_hits + postgres_hits
+        lookups = hits + misses
+        return {
+            "lookups": lookups,
+            "hits": hits,
+            "redis_hits": redis_hits,
+            "postgres_hits": postgres_hits,
+            "misses": misses,
+            "bypasses": bypasses,
+            "hit_rate": hits / lookups if lookups else None,
+            "tokens_saved": int(raw.get("tokens_saved", 0)),
+            "generation_seconds_saved": int(raw.get("ms_saved", 0)) / 1000,
+        }
+
+    async def _store_hot(self, cache_key: str, generation: Generation) -> None:
+        try:
+            await self.client.set_cache(
+                self.redis_key(cache_key), generation._asdict(), expiry=self.redis_ttl
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store generation in hot cache: {e}")
+
+    async def record_stats(self, outcome: str, generation: Generation) -> None:
+        try:
+            client = await self.client.get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                if outcome in (CacheSource.REDIS, CacheSource.POSTGRES):
+                    pipe.hincrby(GENERATION_CACHE_STATS_KEY, f"hits:{outcome}", 1)
+                    pipe.hincrby(
+                        GENERATION_CACHE_STATS_KEY,
+                        "tokens_saved",
+                        generation.prompt_tokens + generation.completion_tokens,
+                    )
+                    pipe.hincrby(GENERATION_CACHE_STATS_KEY, "ms_saved", generation.generation_ms)
+                else:
+                    pipe.hincrby(GENERATION_CACHE_STATS_KEY, outcome, 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to record generation cache stats: {e}")
+
+
+# Global generation cache instance
+generation_cache = GenerationCache()
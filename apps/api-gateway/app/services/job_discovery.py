@@ -0,0 +1,196 @@
+"""
+Job Discovery Service
+Crawls a saved search's result pages on a platform and ingests the new postings
+"""
+
+import json
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.job import JobSearchPreference
+from app.services.browser_session_pool import BrowserSessionPool, browser_session_pool
+from app.services.fetch_cache import FetchCache, FetchResult, FetchStatus, fetch_cache
+from app.services.scraper_client import ScraperError
+
+logger = logging.getLogger(__name__)
+
+# Postings already ingested from the platform (same external id, unique per
+# platform) are skipped, also when a concurrent crawl inserts them first;
+# enum fields the database does not know are dropped rather than failing the batch
+INGEST_POSTINGS_SQL = text("""
+    WITH incoming AS (
+        SELECT DISTINCT ON (p.external_id) p.*
+        FROM jsonb_to_recordset(CAST(:postings AS jsonb)) AS p(
+            external_id text, title text, description text, requirements text, benefits text,
+            company_name text, source_url text, salary_min integer, salary_max integer,
+            experience_level text, employment_type text, work_arrangement text,
+            location_city text, location_state text, location_country text, posted_date date
+        )
+        WHERE p.external_id IS NOT NULL AND p.title IS NOT NULL AND p.source_url IS NOT NULL
+    )
+    INSERT INTO job_postings (
+        external_id, company_id, title, description, requirements, benefits,
+        salary_min, salary_max, experience_level, employment_type, work_arrangement,
+        location_city, location_state, location_country, source_platform, source_url, posted_date
+    )
+    SELECT i.external_id,
+           (SELECT c.id FROM companies c WHERE c.name = i.company_name ORDER BY c.created_at LIMIT 1),
+           left(i.title, 300), COALESCE(i.description, ''), i.requirements, i.benefits,
+           i.salary_min, i.salary_max,
+           CASE WHEN i.experience_level = ANY(enum_range(NULL::experience_level)::text[])
+                THEN i.experience_level::experience_level END,
+           CASE WHEN i.employment_type = ANY(enum_range(NULL::employment_type)::text[])
+                THEN i.employment_type::employment_type END,
+           CASE WHEN i.work_arrangement = ANY(enum_range(NULL::work_arrangement)::text[])
+                THEN i.work_arrangement::work_arrangement END,
+           left(i.location_city, 100), left(i.location_state, 50), left(i.location_country, 50),
+           CAST(:platform AS varchar), left(i.source_url, 1000), i.posted_date
+    FROM incoming i
+    ON CONFLICT (source_platform, external_id) DO NOTHING
+    RETURNING id
+""")
+
+KNOWN_POSTINGS_SQL = text("""
+    SELECT external_id
+    FROM job_postings
+    WHERE source_platform = CAST(:platform AS varchar)
+      AND external_id = ANY(CAST(:external_ids AS TEXT[]))
+""")
+
+
+class JobSearchCrawler(ABC):
+    """Turns a saved search into result page URLs and result pages into postings.
+
+    Subclass and register per platform. search_urls() returns the result
+    pages newest first; parse() returns one dict per posting with at least
+    external_id, title and source_url (other keys match job_postings columns,
+    plus company_name). parse() runs in a worker thread.
+    """
+
+    @abstractmethod
+    def search_urls(self, search: JobSearchPreference) -> List[str]:
+        """Result page URLs of the search, newest postings first"""
+
+    @abstractmethod
+    def parse(self, body: bytes) -> List[Dict[str, Any]]:
+        """Postings on a result page"""
+
+
+class JobSearchCrawlerRegistry:
+    """Maps platforms to their search crawler; only these platforms are crawled"""
+
+    def __init__(self):
+        self._crawlers: Dict[str, JobSearchCrawler] = {}
+
+    def register(self, platform: str) -> Callable[[Type[JobSearchCrawler]], Type[JobSearchCrawler]]:
+        """Class decorator registering a search crawler for a platform"""
+        def decorator(crawler_class: Type[JobSearchCrawler]) -> Type[JobSearchCrawler]:
+            if platform in self._crawlers:
+                raise ValueError(f"Search crawler already registered for platform {platform}")
+            self._crawlers[platform] = crawler_class()
+            return crawler_class
+        return decorator
+
+    def get(self, platform: str) -> Optional[JobSearchCrawler]:
+        return self._crawlers.get(platform)
+
+    @property
+    def platforms(self) -> List[str]:
+        return list(self._crawlers)
+
+
+async def ingest_postings(session: AsyncSession, platform: str, postings: List[Dict[str, Any]]) -> List[uuid.UUID]:
+    """Insert postings not yet ingested from the platform; returns the new ids"""
+    if not postings:
+        return []
+    result = await session.execute(INGEST_POSTINGS_SQL, {
+        "platform": platform,
+        "postings": json.dumps(postings, default=str),
+    })
+    return [row.id for row in result.all()]
+
+
+async def has_new_postings(platform: str, postings: Sequence[Dict[str, Any]]) -> bool:
+    """Whether any of the postings is not ingested yet (read in a short session of its own)"""
+    external_ids = list({str(p["external_id"]) for p in postings if p.get("external_id") is not None})
+    if not external_ids:
+        return False
+    async with AsyncSessionLocal() as db:
+        known = set((await db.execute(KNOWN_POSTINGS_SQL, {
+            "platform": platform, "external_ids": external_ids,
+        })).scalars().all())
+    return len(known) < len(external_ids)
+
+
+async def fetch_search_pages(
+    platform: str,
+    search: JobSearchPreference,
+    crawler: JobSearchCrawler,
+    cache: FetchCache = fetch_cache,
+    pool: BrowserSessionPool = browser_session_pool,
+) -> List[FetchResult]:
+    """Fetch the search's result pages, newest first, without holding a transaction.
+
+    Pages are fetched through the conditional fetch cache with one of the
+    user's pooled sessions. Result pages are newest first, so the crawl
+    stops at the first page that is unchanged or brings nothing new: the
+    pages after it were seen before. Nothing is written; the pages are
+    ingested with ingest_search_pages.
+    """
+    pages: List[FetchResult] = []
+    urls = crawler.search_urls(search)[:settings.CRAWL_MAX_PAGES_PER_CRAWL]
+    async with pool.session(search.user_id, platform) as browser_session:
+        for url in urls:
+            result = await cache.fetch(platform, url, parse=crawler.parse, session=browser_session)
+            if result.status == FetchStatus.ERROR:
+                # The crawl is retried rather than recorded as finding nothing
+                raise ScraperError(f"{platform} search page {url} returned {result.status_code}")
+            pages.append(result)
+            if not result.changed or not await has_new_postings(platform, result.parsed or []):
+                break
+    return pages
+
+
+async def ingest_search_pages(
+    session: AsyncSession,
+    platform: str,
+    search: JobSearchPreference,
+    pages: Sequence[FetchResult],
+    cache: FetchCache = fetch_cache,
+) -> Dict[str, Any]:
+    """Ingest the new postings of fetched pages and store their cache entries.
+
+    A page's cache entry is stored with its postings, so both commit or
+    roll back together. The caller owns the transaction.
+    """
+    changed_pages = 0
+    job_posting_ids: List[uuid.UUID] = []
+    for result in pages:
+        if not result.changed:
+            continue
+        changed_pages += 1
+        job_posting_ids.extend(await ingest_postings(session, platform, result.parsed or []))
+        await cache.store(session, result)
+
+    logger.info(
+        f"Crawled search {search.id} on {platform}: {len(pages)} pages, "
+        f"{changed_pages} changed, {len(job_posting_ids)} new postings"
+    )
+    return {
+        "platform": platform,
+        "pages": len(pages),
+        "changed_pages": changed_pages,
+        "new_postings": len(job_posting_ids),
+        "job_posting_ids": [str(job_posting_id) for job_posting_id in job_posting_ids],
+    }
+
+
+# Global search crawler registry
+search_crawlers = JobSearchCrawlerRegistry()
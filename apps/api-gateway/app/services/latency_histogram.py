@@ -0,0 +1,69 @@
+"""
+Latency Histogram
+Mergeable log-linear latency histogram (HDR style) with bounded relative error
+"""
+
+from typing import Dict, Mapping, Optional
+
+# 2**4 sub-buckets per power of two: a bucket's upper bound is within 1/16
+# (6.25%) of every value in it; values below 16ms are kept exactly
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+def bucket_bound(value_ms: int) -> int:
+    """Upper bound of the bucket holding a value"""
+    value_ms = max(int(value_ms), 0)
+    if value_ms < SUB_BUCKETS:
+        return value_ms
+    shift = value_ms.bit_length() - SUB_BUCKET_BITS - 1
+    return (((value_ms >> shift) + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Sparse bucket counts of latencies, summable across processes and days.
+
+    Buckets are keyed by their upper bound, so histograms merge by adding
+    counts per key (in Postgres too, see latency_histogram_merge) and
+    percentiles are reported as bucket upper bounds.
+    """
+
+    def __init__(self, counts: Optional[Mapping[int, int]] = None):
+        self.counts: Dict[int, int] = dict(counts or {})
+        self.count = sum(self.counts.values())
+        self.total_ms = 0
+        self.max_ms: Optional[int] = None
+
+    def record(self, value_ms: int) -> None:
+        bound = bucket_bound(value_ms)
+        self.counts[bound] = self.counts.get(bound, 0) + 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = value_ms if self.max_ms is None else max(self.max_ms, value_ms)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for bound, count in other.counts.items():
+            self.counts[bound] = self.counts.get(bound, 0) + count
+        self.count += other.count
+        self.total_ms += other.total_ms
+        if other.max_ms is not None:
+            self.max_ms = other.max_ms if self.max_ms is None else max(self.max_ms, other.max_ms)
+
+    def percentile(self, q: float) -> Optional[int]:
+        """Upper bound of the bucket holding the q-th quantile"""
+        if self.count <= 0:
+            return None
+        threshold = q * self.count
+        cumulative = 0
+        for bound in sorted(self.counts):
+            cumulative += self.counts[bound]
+            if cumulative >= threshold:
+                return bound
+        return None
+
+    def to_json(self) -> Dict[str, int]:
+        return {str(bound): count for bound, count in self.counts.items()}
+
+    @classmethod
+    def from_json(cls, data: Optional[Mapping[str, int]]) -> "LatencyHistogram":
+        return cls({int(bound): int(count) for bound, count in (data or {}).items()})
@@ -0,0 +1,607 @@
+"""
+LLM Client
+Shared rate-limited async client for OpenAI-compatible chat completions and embeddings
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Sequence
+import logging
+
+import httpx
+
+from app.core.config import settings
+from app.services.generation_cache import Generation
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Upper bounds (ms) of the per-lane latency histogram
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class LLMPriority(str):
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+
+# Lower rank is admitted first
+PRIORITY_RANKS = {LLMPriority.INTERACTIVE: 0, LLMPriority.BATCH: 1}
+
+
+class LLMError(Exception):
+    """Raised when a completion fails after retries (or with a non-retryable status)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMResponse(NamedTuple):
+    content: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_ms: int
+    queue_ms: int
+    finish_reason: Optional[str] = None
+
+    def to_generation(self, metadata: Optional[Dict[str, Any]] = None) -> Generation:
+        """Convert to a generation cache entry"""
+        return Generation(
+            content_text=self.content,
+            model_used=self.model,
+            prompt_tokens=self.prompt_tokens,
+            completion_tokens=self.completion_tokens,
+            generation_ms=self.latency_ms,
+            metadata=metadata,
+        )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for rate budgeting"""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def estimate_message_tokens(messages: Sequence[Dict[str, Any]]) -> int:
+    # Each message carries a few tokens of role/formatting overhead
+    return sum(estimate_tokens(str(m.get("content") or "")) + 4 for m in messages) + 2
+
+
+class TokenBucket:
+    """Continuously refilling bucket; rate is units per second.
+
+    Balances may go negative when actual usage exceeds an estimate, which
+    simply delays later callers until the debt is refilled.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until amount units are available (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Debit (positive) or refund (negative) units after the fact"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdmissionGate:
+    """Admits calls in priority order within concurrency and rate limits.
+
+    Only the highest-priority waiter (FIFO within a lane) may take rate
+    budget, so a queue of batch calls cannot consume the budget an
+    interactive call arriving later needs.
+
+    When the API rate-limits us anyway (limits shared with other clients, or
+    configured too high), the request rate is halved and then raised 5% per
+    success, so the gate converges on what the API accepts.
+    """
+
+    def __init__(self, concurrency: int, requests: TokenBucket, tokens: TokenBucket):
+        self.concurrency = concurrency
+        self.requests = requests
+        self.tokens = tokens
+        self.max_request_rate = requests.rate
+        self.active = 0
+        self.paused_until = 0.0
+        self._cond = asyncio.Condition()
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, rank: int, token_estimate: int) -> None:
+        entry = (rank, next(self._seq))
+        async with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] != entry or self.active >= self.concurrency:
+                        await self._cond.wait()
+                        continue
+                    delay = max(
+                        self.paused_until - time.monotonic(),
+                        self.requests.delay(1),
+                        self.tokens.delay(token_estimate),
+                    )
+                    if delay <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(token_estimate)
+            self.active += 1
+            self._cond.notify_all()
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    async def throttle(self, seconds: float) -> None:
+        """Hold all admissions for seconds and halve the request rate (after a 429)"""
+        async with self._cond:
+            now = time.monotonic()
+            # Calls already in flight hit the same limit; count it once
+            if now >= self.paused_until:
+                self.requests.rate = max(self.max_request_rate / 100, self.requests.rate / 2)
+                self.requests.tokens = min(self.requests.tokens, 0.0)
+            self.paused_until = max(self.paused_until, now + seconds)
+            self._cond.notify_all()
+
+    def recover(self) -> None:
+        """Step the request rate back towards its configured maximum"""
+        if self.requests.rate < self.max_request_rate:
+            self.requests.rate = min(self.max_request_rate, self.requests.rate * 1.05)
+
+
+class LLMClientMetrics:
+    """In-process per-lane call, token and latency counters"""
+
+    def __init__(self):
+        self.lanes: Dict[str, Dict[str, Any]] = {}
+
+    def _lane(self, priority: str) -> Dict[str, Any]:
+        if priority not in self.lanes:
+            self.lanes[priority] = {
+                "requests": 0,
+                "errors": 0,
+                "rate_limited": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "latency_ms_total": 0,
+                "queue_ms_total": 0,
+                "latency_buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            }
+        return self.lanes[priority]
+
+    def record(self, priority: str, response: LLMResponse) -> None:
+        lane = self._lane(priority)
+        lane["requests"] += 1
+        lane["prompt_tokens"] += response.prompt_tokens
+        lane["completion_tokens"] += response.completion_tokens
+        lane["latency_ms_total"] += response.latency_ms
+        lane["queue_ms_total"] += response.queue_ms
+        index = next(
+            (i for i, bound in enumerate(LATENCY_BUCKETS_MS) if response.latency_ms <= bound),
+            len(LATENCY_BUCKETS_MS),
+        )
+        lane["latency_buckets"][index] += 1
+
+    def record_error(self, priority: str, rate_limited: bool = False) -> None:
+        lane = self._lane(priority)
+        lane["errors"] += 1
+        if rate_limited:
+            lane["rate_limited"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        lanes = {}
+        for priority, lane in self.lanes.items():
+            requests = lane["requests"]
+            buckets = lane["latency_buckets"]
+            lanes[priority] = {
+                "requests": requests,
+                "errors": lane["errors"],
+                "rate_limited": lane["rate_limited"],
+                "prompt_tokens": lane["prompt_tokens"],
+                "completion_tokens": lane["completion_tokens"],
+                "mean_latency_ms": lane["latency_ms_total"] / requests if requests else None,
+                "mean_queue_ms": lane["queue_ms_total"] / requests if requests else None,
+                "latency_buckets_ms": {
+                    **{str(bound): n for bound, n in zip(LATENCY_BUCKETS_MS, buckets)},
+                    "inf": buckets[-1],
+                },
+            }
+        return lanes
+
+
+class LLMStream:
+    """Streaming completion; iterate for text deltas, then read .response.
+
+    Use as an async context manager so the admission slot and connection are
+    released even if the consumer stops early.
+    """
+
+    def __init__(self, client: "LLMClient", payload: Dict[str, Any], priority: str, token_estimate: int):
+        self._client = client
+        self._payload = payload
+        self._priority = priority
+        self._token_estimate = token_estimate
+        self._http_response: Optional[httpx.Response] = None
+        self._admitted = False
+        self._started = 0.0
+        self._queue_ms = 0
+        self._parts: List[str] = []
+        self._usage: Dict[str, int] = {}
+        self._model = payload["model"]
+        self._finish_reason: Optional[str] = None
+        self.response: Optional[LLMResponse] = None
+
+    async def __aenter__(self) -> "LLMStream":
+        self._http_response, self._queue_ms = await self._client._open_stream(
+            self._payload, self._priority, self._token_estimate
+        )
+        self._admitted = True
+        self._started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if self._http_response is not None:
+                await self._http_response.aclose()
+        finally:
+            if self._admitted:
+                self._admitted = False
+                await self._client._finish(self._priority, self._token_estimate, self.response, exc is not None)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        async for line in self._http_response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            self._model = chunk.get("model") or self._model
+            if chunk.get("usage"):
+                self._usage = chunk["usage"]
+            for choice in chunk.get("choices") or []:
+                delta = (choice.get("delta") or {}).get("content")
+                if choice.get("finish_reason"):
+                    self._finish_reason = choice["finish_reason"]
+                if delta:
+                    self._parts.append(delta)
+                    yield delta
+
+        content = "".join(self._parts)
+        self.response = LLMResponse(
+            content=content,
+            model=self._model,
+            prompt_tokens=self._usage.get("prompt_tokens", self._token_estimate),
+            completion_tokens=self._usage.get("completion_tokens", estimate_tokens(content)),
+            latency_ms=int((time.monotonic() - self._started) * 1000),
+            queue_ms=self._queue_ms,
+            finish_reason=self._finish_reason,
+        )
+
+
+class LLMClient:
+    """Process-wide client for OpenAI-compatible chat completions.
+
+    One pooled httpx connection serves every caller. Calls are admitted in
+    priority order (interactive before batch) within a concurrency limit and
+    request- and token-per-minute buckets; the token bucket is charged the
+    estimated prompt plus max_tokens up front and corrected with the actual
+    usage afterwards. A 429 pauses all admissions for its Retry-After before
+    the call is retried, so the client backs off as a whole rather than
+    every caller hammering the API.
+
+    Point OPENAI_BASE_URL at app.devtools.llm_stub to run without the real API.
+    """
+
+    def __init__(
+        self,
+        base_url: str = settings.OPENAI_BASE_URL,
+        api_key: str = settings.OPENAI_API_KEY,
+        concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        requests_per_minute: int = settings.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = settings.LLM_TOKENS_PER_MINUTE,
+        timeout: float = settings.LLM_REQUEST_TIMEOUT_SECONDS,
+        max_retries: int = settings.LLM_MAX_RETRIES,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.gate = AdmissionGate(
+            concurrency,
+            TokenBucket(requests_per_minute / 60.0, max(1, requests_per_minute / 60.0 * 10)),
+            TokenBucket(tokens_per_minute / 60.0, tokens_per_minute),
+        )
+        self.metrics = LLMClientMetrics()
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _get_http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+                ),
+            )
+        return self._http
+
+    def _payload(
+        self,
+        messages: Sequence[Dict[str, Any]],
+        model: Optional[str],
+        max_tokens: Optional[int],
+        params: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        payload = {
+            "model": model or settings.LLM_DEFAULT_MODEL,
+            "messages": list(messages),
+            "max_tokens": max_tokens or settings.LLM_DEFAULT_MAX_TOKENS,
+        }
+        payload.update({k: v for k, v in params.items() if v is not None})
+        return payload
+
+    async def chat(
+        self,
+        messages: Sequence[Dict[str, Any]],
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        priority: str = LLMPriority.BATCH,
+        **params: Any,
+    ) -> LLMResponse:
+        """Run a chat completion and return the full response"""
+        payload = self._payload(messages, model, max_tokens, params)
+        token_estimate = estimate_message_tokens(messages) + payload["max_tokens"]
+
+        for attempt in range(self.max_retries + 1):
+            queue_ms = await self._admit(priority, token_estimate)
+            started = time.monotonic()
+            response = None
+            try:
+                http_response = await self._get_http().post("/chat/completions", json=payload)
+                if not await self._should_retry(http_response, attempt, priority):
+                    self._raise_for_status(http_response)
+                    body = http_response.json()
+                    usage = body.get("usage") or {}
+                    choice = (body.get("choices") or [{}])[0]
+                    response = LLMResponse(
+                        content=(choice.get("message") or {}).get("content") or "",
+                        model=body.get("model") or payload["model"],
+                        prompt_tokens=usage.get("prompt_tokens", 0),
+                        completion_tokens=usage.get("completion_tokens", 0),
+                        latency_ms=int((time.monotonic() - started) * 1000),
+                        queue_ms=queue_ms,
+                        finish_reason=choice.get("finish_reason"),
+                    )
+                    return response
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise LLMError(f"LLM request failed: {e}") from e
+                logger.warning(f"LLM request failed ({e}), retrying")
+                await asyncio.sleep(self._backoff(attempt))
+            finally:
+                await self._finish(priority, token_estimate, response, response is None)
+
+        raise LLMError("LLM request failed after retries")
+
+    def stream_chat(
+        self,
+        messages: Sequence[Dict[str, Any]],
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        priority: str = LLMPriority.INTERACTIVE,
+        **params: Any,
+    ) -> LLMStream:
+        """Streaming chat completion (use with async with, then async for)"""
+        payload = self._payload(messages, model, max_tokens, params)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        token_estimate = estimate_message_tokens(messages) + payload["max_tokens"]
+        return LLMStream(self, payload, priority, token_estimate)
+
+    async def embed(
+        self,
+        texts: Sequence[str],
+        model: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        priority: str = LLMPriority.BATCH,
+    ) -> List[List[float]]:
+        """Embed texts, batching requests; vectors are returned in input order"""
+        model = model or settings.EMBEDDING_MODEL
+        dimensions = dimensions or settings.EMBEDDING_DIMENSIONS
+        vectors: List[List[float]] = []
+        batch_size = settings.EMBEDDING_BATCH_SIZE
+        for start in range(0, len(texts), batch_size):
+            batch = list(texts[start:start + batch_size])
+            vectors.extend(await self._embed_batch(batch, model, dimensions, priority))
+        return vectors
+
+    async def _embed_batch(
+        self, texts: List[str], model: str, dimensions: int, priority: str
+    ) -> List[List[float]]:
+        payload = {"model": model, "input": texts, "dimensions": dimensions}
+        token_estimate = sum(estimate_tokens(text) for text in texts)
+
+        for attempt in range(self.max_retries + 1):
+            queue_ms = await self._admit(priority, token_estimate)
+            started = time.monotonic()
+            response = None
+            try:
+                http_response = await self._get_http().post("/embeddings", json=payload)
+                if not await self._should_retry(http_response, attempt, priority):
+                    self._raise_for_status(http_response)
+                    body = http_response.json()
+                    data = sorted(body.get("data") or [], key=lambda item: item["index"])
+                    if len(data) != len(texts):
+                        raise LLMError(f"Expected {len(texts)} embeddings, got {len(data)}")
+                    response = LLMResponse(
+                        content="",
+                        model=body.get("model") or model,
+                        prompt_tokens=(body.get("usage") or {}).get("prompt_tokens", token_estimate),
+                        completion_tokens=0,
+                        latency_ms=int((time.monotonic() - started) * 1000),
+                        queue_ms=queue_ms,
+                    )
+                    return [item["embedding"] for item in data]
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise LLMError(f"Embedding request failed: {e}") from e
+                logger.warning(f"Embedding request failed ({e}), retrying")
+                await asyncio.sleep(self._backoff(attempt))
+            finally:
+                await self._finish(priority, token_estimate, response, response is None)
+
+        raise LLMError("Embedding request failed after retries")
+
+    async def _open_stream(self, payload: Dict[str, Any], priority: str, token_estimate: int):
+        """Admit and open a streaming response, retrying until headers are good"""
+        for attempt in range(self.max_retries + 1):
+            queue_ms = await self._admit(priority, token_estimate)
+            http = self._get_http()
+            try:
+                http_response = await http.send(
+                    http.build_request("POST", "/chat/completions", json=payload), stream=True
+                )
+            except httpx.TransportError as e:
+                await self._finish(priority, token_estimate, None, True)
+                if attempt >= self.max_retries:
+                    raise LLMError(f"LLM request failed: {e}") from e
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if http_response.status_code < 400:
+                return http_response, queue_ms
+            await http_response.aread()
+            await http_response.aclose()
+            retry = await self._should_retry(http_response, attempt, priority)
+            await self._finish(priority, token_estimate, None, True)
+            if not retry:
+                self._raise_for_status(http_response)
+        raise LLMError("LLM request failed after retries")
+
+    async def _admit(self, priority: str, token_estimate: int) -> int:
+        queued = time.monotonic()
+        await self.gate.acquire(PRIORITY_RANKS.get(priority, len(PRIORITY_RANKS)), token_estimate)
+        return int((time.monotonic() - queued) * 1000)
+
+    async def _finish(
+        self, priority: str, token_estimate: int, response: Optional[LLMResponse], failed: bool
+    ) -> None:
+        if response is not None:
+            # Settle the up-front estimate against what was actually used
+            self.gate.tokens.adjust(response.prompt_tokens + response.completion_tokens - token_estimate)
+            self.metrics.record(priority, response)
+            self.gate.recover()
+            logger.debug(
+                f"LLM call ({priority}) {response.model}: {response.latency_ms}ms, "
+                f"queued {response.queue_ms}ms, {response.prompt_tokens}+"
+                f"{response.completion_tokens} tokens"
+            )
+        elif failed:
+            self.gate.tokens.adjust(-token_estimate)
+        await self.gate.release()
+
+    async def _should_retry(self, http_response: httpx.Response, attempt: int, priority: str) -> bool:
+        if http_response.status_code not in RETRYABLE_STATUS_CODES:
+            return False
+        rate_limited = http_response.status_code == 429
+        self.metrics.record_error(priority, rate_limited=rate_limited)
+        if attempt >= self.max_retries:
+            return False
+        delay = self._retry_after(http_response) or self._backoff(attempt)
+        if rate_limited:
+            await self.gate.throttle(delay)
+        else:
+            await asyncio.sleep(delay)
+        logger.warning(
+            f"LLM request got {http_response.status_code}, retry {attempt + 1}/"
+            f"{self.max_retries} in {delay:.1f}s"
+        )
+        return True
+
+    @staticmethod
+    def _retry_after(http_response: httpx.Response) -> Optional[float]:
+        value = http_response.headers.get("retry-after-ms")
+        if value:
+            try:
+                return float(value) / 1000
+            except ValueError:
+                pass
+        value = http_response.headers.get("retry-after")
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(30.0, 0.5 * 2 ** attempt)
+
+    @staticmethod
+    def _raise_for_status(http_response: httpx.Response) -> None:
+        if http_response.status_code >= 400:
+            raise LLMError(
+                f"LLM request failed with {http_response.status_code}: {http_response.text[:200]}",
+                status_code=http_response.status_code,
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current admission state and per-lane metrics"""
+        return {
+            "active": self.gate.active,
+            "waiting": self.gate.waiting,
+            "concurrency": self.gate.concurrency,
+            "lanes": self.metrics.snapshot(),
+        }
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+# Global LLM client instance
+llm_client = LLMClient()
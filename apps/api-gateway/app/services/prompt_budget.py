@@ -0,0 +1,291 @@
+"""
+Prompt Budget Service
+Token-budgeted prompt assembly over cached tokenizations of source text
+"""
+
+from collections import OrderedDict
+import hashlib
+import math
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, NamedTuple, Optional, Sequence, Tuple
+import logging
+
+from app.core.config import settings
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Words and punctuation runs; roughly one BPE token each, plus one token per
+# four characters for long words, when tiktoken is unavailable
+APPROXIMATE_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]+")
+# Segments are paragraphs or list items; boundaries inside them are sentences
+SEGMENT_PATTERN = re.compile(r"[^\n]+(?:\n(?![ \t]*(?:[-*•]|\d+[.)])\s)[^\n]+)*")
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?;])\s+")
+KEYWORD_PATTERN = re.compile(r"[a-z][a-z0-9+#.\-]{2,}")
+
+STOPWORDS = frozenset(
+    "the and for with you our are will your that this from have has who what "
+    "can all any into about their them they its not but more work working "
+    "team teams role including such use using able across within years year "
+    "experience strong plus must should would well other".split()
+)
+
+
+class TrimStrategy(str):
+    HEAD = "head"            # keep from the start, cutting at a sentence boundary
+    RELEVANT = "relevant"    # keep the segments most relevant to the job, in order
+
+
+class Segment(NamedTuple):
+    text: str
+    tokens: int
+    # (end offset in text, cumulative tokens) at each sentence boundary
+    boundaries: Tuple[Tuple[int, int], ...]
+    keywords: FrozenSet[str]
+
+
+class TokenizedText(NamedTuple):
+    content_hash: str
+    tokens: int
+    segments: Tuple[Segment, ...]
+
+
+class PromptSection(NamedTuple):
+    name: str
+    text: str
+    strategy: str = TrimStrategy.HEAD
+    # Share of the contested budget relative to other sections
+    weight: float = 1.0
+    # Required sections are never trimmed
+    required: bool = False
+
+
+class AssembledPrompt(NamedTuple):
+    sections: Dict[str, str]
+    tokens: int
+    budget: int
+    dropped_tokens: int
+    dropped_by_section: Dict[str, int]
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "tokens": self.tokens,
+            "budget": self.budget,
+            "dropped_tokens": self.dropped_tokens,
+            "dropped_by_section": {k: v for k, v in self.dropped_by_section.items() if v},
+        }
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def tokenizer_name(model: str) -> str:
+    encoding = _encoding(model)
+    return encoding.name if encoding is not None else "approximate"
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Token count with the model's tiktoken encoding, or an approximation"""
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(
+        max(1, math.ceil(len(word) / 4))
+        for word in APPROXIMATE_TOKEN_PATTERN.findall(text)
+    )
+
+
+def extract_keywords(text: str) -> FrozenSet[str]:
+    return frozenset(
+        word.strip(".-") for word in KEYWORD_PATTERN.findall(text.lower())
+        if word.strip(".-") not in STOPWORDS
+    )
+
+
+def prompt_budget_for(model: str) -> int:
+    return settings.PROMPT_TOKEN_BUDGETS.get(model, settings.PROMPT_DEFAULT_TOKEN_BUDGET)
+
+
+class TokenizationCache:
+    """Process-wide LRU of tokenized source text, keyed by content hash.
+
+    A resume or job description is tokenized once per tokenizer and reused
+    for every prompt built from it, e.g. all the applications of a bulk
+    submission. Token counts are kept per sentence, so trimming to any
+    budget is arithmetic over cached counts rather than re-tokenizing.
+    """
+
+    def __init__(self, max_entries: int = settings.PROMPT_TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, TokenizedText]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def tokenize(self, text: str, model: str) -> TokenizedText:
+        tokenizer = tokenizer_name(model)
+        key = hashlib.sha256(f"{tokenizer}\0{text}".encode()).hexdigest()
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        segments = tuple(self._segment(match.group(0), model) for match in SEGMENT_PATTERN.finditer(text))
+        tokenized = TokenizedText(key, sum(segment.tokens for segment in segments), segments)
+        self._entries[key] = tokenized
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return tokenized
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _segment(self, text: str, model: str) -> Segment:
+        boundaries = []
+        start, total = 0, 0
+        for match in SENTENCE_END_PATTERN.finditer(text):
+            total += count_tokens(text[start:match.end()], model)
+            boundaries.append((match.start(), total))
+            start = match.end()
+        total += count_tokens(text[start:], model)
+        boundaries.append((len(text), total))
+        # Separator between segments when reassembled
+        return Segment(text, total + 1, tuple(boundaries), extract_keywords(text))
+
+
+def _truncate(segment: Segment, tokens: int) -> Optional[Tuple[str, int]]:
+    """Longest sentence prefix of a segment within tokens"""
+    best = None
+    for end, used in segment.boundaries:
+        if used + 1 > tokens:
+            break
+        best = (segment.text[:end].rstrip(), used + 1)
+    return best
+
+
+def _fit(tokenized: TokenizedText, allowance: int, strategy: str, keywords: FrozenSet[str]) -> Tuple[str, int]:
+    """Select segments of a section within allowance; returns (text, tokens)"""
+    segments = tokenized.segments
+    if strategy == TrimStrategy.RELEVANT and keywords:
+        ranked = sorted(
+            range(len(segments)),
+            key=lambda i: (-len(segments[i].keywords & keywords) / math.sqrt(segments[i].tokens), i),
+        )
+    else:
+        ranked = list(range(len(segments)))
+
+    chosen: Dict[int, str] = {}
+    used = 0
+    for i in ranked:
+        segment = segments[i]
+        if used + segment.tokens <= allowance:
+            chosen[i] = segment.text
+            used += segment.tokens
+        elif strategy == TrimStrategy.HEAD:
+            partial = _truncate(segment, allowance - used)
+            if partial is not None:
+                chosen[i], tokens = partial
+                used += tokens
+            break
+    return "\n".join(chosen[i] for i in sorted(chosen)), used
+
+
+def _allocate(demands: Dict[str, int], weights: Dict[str, float], budget: int) -> Dict[str, int]:
+    """Weighted max-min fair split: sections under their share keep it all"""
+    allocation: Dict[str, int] = {}
+    remaining = dict(demands)
+    while remaining and budget > 0:
+        total_weight = sum(weights[name] for name in remaining)
+        satisfied = [
+            name for name in remaining
+            if remaining[name] <= budget * weights[name] / total_weight
+        ]
+        if not satisfied:
+            for name in remaining:
+                allocation[name] = int(budget * weights[name] / total_weight)
+            return allocation
+        for name in satisfied:
+            allocation[name] = remaining.pop(name)
+            budget -= allocation[name]
+    for name in remaining:
+        allocation[name] = 0
+    return allocation
+
+
+class PromptAssembler:
+    """Fits prompt sections into a per-model token budget.
+
+    Required sections are always kept. If the rest do not fit, the remaining
+    budget is split across them by weight, with sections smaller than their
+    share keeping all of it and the surplus going to the larger ones. An
+    over-budget section is then trimmed by its strategy: HEAD keeps whole
+    paragraphs from the start and cuts the last at a sentence boundary;
+    RELEVANT keeps the paragraphs (e.g. achievements) sharing the most
+    keywords with the job, in their original order.
+    """
+
+    def __init__(self, cache: Optional[TokenizationCache] = None):
+        self.cache = cache or TokenizationCache()
+
+    def assemble(
+        self,
+        sections: Sequence[PromptSection],
+        model: str,
+        budget: Optional[int] = None,
+        keywords: Optional[FrozenSet[str]] = None,
+    ) -> AssembledPrompt:
+        budget = budget if budget is not None else prompt_budget_for(model)
+        tokenized = {
+            section.name: self.cache.tokenize(section.text, model)
+            for section in sections if section.text and section.text.strip()
+        }
+        demands = {name: t.tokens for name, t in tokenized.items()}
+        available = budget - sum(demands[s.name] for s in sections if s.required and s.name in demands)
+        optional = {s.name: demands[s.name] for s in sections if not s.required and s.name in demands}
+        allocation = (
+            optional if sum(optional.values()) <= available
+            else _allocate(optional, {s.name: s.weight for s in sections}, max(0, available))
+        )
+
+        texts: Dict[str, str] = {}
+        dropped: Dict[str, int] = {}
+        used = 0
+        for section in sections:
+            if section.name not in tokenized:
+                continue
+            demand = demands[section.name]
+            if section.required or allocation[section.name] >= demand:
+                text, tokens = section.text.strip(), demand
+            else:
+                text, tokens = _fit(
+                    tokenized[section.name], allocation[section.name], section.strategy, keywords or frozenset()
+                )
+            dropped[section.name] = demand - tokens
+            used += tokens
+            if text:
+                texts[section.name] = text
+
+        assembled = AssembledPrompt(texts, used, budget, sum(dropped.values()), dropped)
+        if assembled.dropped_tokens:
+            logger.info(
+                f"Prompt trimmed to {used}/{budget} tokens for {model}, "
+                f"dropped {assembled.dropped_tokens}: {assembled.report()['dropped_by_section']}"
+            )
+        return assembled
+
+
+# Global prompt assembler instance
+prompt_assembler = PromptAssembler()
@@ -0,0 +1,434 @@
+"""
+Scraper HTTP Client
+Shared pooled HTTP client for job board scrapers with adaptive per-platform rate limits
+"""
+
+import asyncio
+import importlib.util
+import json
+import time
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import logging
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.browser_session_pool import PooledBrowserSession
+from app.services.latency_histogram import LatencyHistogram
+from app.services.llm_client import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+RATE_LIMIT_STATUS_CODES = {429, 503}
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# Responses that usually mean the scraper was recognised as a bot
+DETECTION_STATUS_CODES = {403}
+
+# One row per platform and day; concurrent workers add to it. The latency
+# histograms are merged bucket-wise and a trigger derives the percentiles
+FLUSH_PLATFORM_METRICS_SQL = text("""
+    INSERT INTO platform_metrics AS pm
+        (platform_name, metric_date, successful_scrapes, failed_scrapes, rate_limit_hits,
+         detection_events, not_modified_responses, unchanged_responses, bytes_saved, parse_ms_saved,
+         total_response_time_ms, average_response_time_ms, max_response_time_ms, latency_histogram)
+    VALUES (
+        CAST(:platform_name AS varchar), CAST(:metric_date AS date), CAST(:successful AS integer),
+        CAST(:failed AS integer), CAST(:rate_limited AS integer), CAST(:detected AS integer),
+        CAST(:not_modified AS integer), CAST(:unchanged AS integer), CAST(:bytes_saved AS bigint),
+        CAST(:parse_ms_saved AS bigint), CAST(:latency_ms_total AS bigint),
+        CASE WHEN CAST(:successful AS integer) > 0
+             THEN ROUND(CAST(:latency_ms_total AS bigint) / CAST(CAST(:successful AS integer) AS numeric)) END,
+        CAST(:latency_ms_max AS integer), CAST(:latency_histogram AS jsonb)
+    )
+    ON CONFLICT (platform_name, metric_date) DO UPDATE
+    SET successful_scrapes = COALESCE(pm.successful_scrapes, 0) + EXCLUDED.successful_scrapes,
+        failed_scrapes = COALESCE(pm.failed_scrapes, 0) + EXCLUDED.failed_scrapes,
+        rate_limit_hits = COALESCE(pm.rate_limit_hits, 0) + EXCLUDED.rate_limit_hits,
+        detection_events = COALESCE(pm.detection_events, 0) + EXCLUDED.detection_events,
+        not_modified_responses = COALESCE(pm.not_modified_responses, 0) + EXCLUDED.not_modified_responses,
+        unchanged_responses = COALESCE(pm.unchanged_responses, 0) + EXCLUDED.unchanged_responses,
+        bytes_saved = COALESCE(pm.bytes_saved, 0) + EXCLUDED.bytes_saved,
+        parse_ms_saved = COALESCE(pm.parse_ms_saved, 0) + EXCLUDED.parse_ms_saved,
+        total_response_time_ms = COALESCE(pm.total_response_time_ms, 0) + EXCLUDED.total_response_time_ms,
+        average_response_time_ms = CASE
+            WHEN COALESCE(pm.successful_scrapes, 0) + EXCLUDED.successful_scrapes = 0 THEN pm.average_response_time_ms
+            ELSE ROUND(
+                (COALESCE(pm.total_response_time_ms, 0) + EXCLUDED.total_response_time_ms)
+                / CAST(COALESCE(pm.successful_scrapes, 0) + EXCLUDED.successful_scrapes AS numeric)
+            )
+        END,
+        max_response_time_ms = GREATEST(pm.max_response_time_ms, EXCLUDED.max_response_time_ms),
+        latency_histogram = latency_histogram_merge(pm.latency_histogram, EXCLUDED.latency_histogram)
+""")
+
+PLATFORM_METRICS_SQL = text("""
+    SELECT platform_name, metric_date,
+           COALESCE(total_jobs_scraped, 0) AS total_jobs_scraped,
+           COALESCE(successful_scrapes, 0) AS successful_scrapes,
+           COALESCE(failed_scrapes, 0) AS failed_scrapes,
+           COALESCE(rate_limit_hits, 0) AS rate_limit_hits,
+           COALESCE(detection_events, 0) AS detection_events,
+           average_response_time_ms, p50_response_time_ms, p95_response_time_ms,
+           p99_response_time_ms, max_response_time_ms,
+           COALESCE(not_modified_responses, 0) AS not_modified_responses,
+           COALESCE(unchanged_responses, 0) AS unchanged_responses,
+           COALESCE(bytes_saved, 0) AS bytes_saved,
+           COALESCE(parse_ms_saved, 0) AS parse_ms_saved
+    FROM platform_metrics
+    WHERE metric_date > CURRENT_DATE - CAST(:days AS integer)
+    ORDER BY metric_date DESC, platform_name
+""")
+
+
+class ScraperError(Exception):
+    """Raised when a scraper request fails after retries"""
+
+
+class PlatformPausedError(ScraperError):
+    """Raised instead of waiting when a platform asked us to back off for long"""
+
+
+class PlatformRateLimiter:
+    """Token bucket and concurrency cap for one platform, adapting to its limits.
+
+    A 429 (or 503) pauses the platform for its Retry-After and halves the
+    request rate (once per pause, however many requests were in flight).
+    Each SCRAPER_RATE_RECOVERY_SECONDS without one, the rate climbs back by
+    a tenth of the configured maximum, so the limiter settles just below
+    the rate the platform tolerates instead of oscillating around it.
+    """
+
+    def __init__(self, rate: float, concurrency: int):
+        self.max_rate = rate
+        self.min_rate = rate / 20
+        self.bucket = TokenBucket(rate, max(1.0, rate * settings.SCRAPER_BURST_SECONDS))
+        self.paused_until = 0.0
+        self._slots = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+        self._last_change = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    async def acquire(self) -> None:
+        await self._slots.acquire()
+        try:
+            # Callers take turns, so waiting requests are admitted in order
+            async with self._lock:
+                while True:
+                    paused = self.paused_until - time.monotonic()
+                    if paused > settings.SCRAPER_MAX_RETRY_AFTER_SECONDS:
+                        raise PlatformPausedError(f"Platform paused for another {paused:.0f}s")
+                    delay = max(paused, self.bucket.delay(1))
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                self.bucket.take(1)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self) -> None:
+        self._slots.release()
+
+    def throttle(self, seconds: float) -> None:
+        now = time.monotonic()
+        if now >= self.paused_until:
+            self.bucket.adjust(0)
+            self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+            self.bucket.tokens = min(self.bucket.tokens, 0.0)
+        self.paused_until = max(self.paused_until, now + seconds)
+        self._last_change = now
+
+    def recover(self) -> None:
+        now = time.monotonic()
+        if self.bucket.rate < self.max_rate and now - self._last_change >= settings.SCRAPER_RATE_RECOVERY_SECONDS:
+            self.bucket.adjust(0)
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + self.max_rate / 10)
+            self._last_change = now
+
+
+class PlatformRequestStats:
+    """Request outcomes of one platform since the last flush"""
+
+    COUNTERS = (
+        "successful", "failed", "rate_limited", "detected",
+        "not_modified", "unchanged", "bytes_saved", "parse_ms_saved",
+    )
+
+    def __init__(self):
+        self.successful = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.detected = 0
+        # Response times of successful requests
+        self.latency = LatencyHistogram()
+        # Conditional fetch cache (see FetchCache)
+        self.not_modified = 0
+        self.unchanged = 0
+        self.bytes_saved = 0
+        self.parse_ms_saved = 0
+
+    def merge(self, other: "PlatformRequestStats") -> None:
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.latency.merge(other.latency)
+
+    def as_params(self) -> Dict[str, Any]:
+        return {
+            **{name: getattr(self, name) for name in self.COUNTERS},
+            "latency_ms_total": self.latency.total_ms,
+            "latency_ms_max": self.latency.max_ms,
+            "latency_histogram": json.dumps(self.latency.to_json()),
+        }
+
+
+class ScraperClient:
+    """Process-wide HTTP client for job board scrapers.
+
+    Each host gets its own pooled httpx client (HTTP/2 when h2 is
+    installed), so connections are reused across requests and one slow
+    board cannot exhaust the connections of another. Requests are admitted
+    by their platform's adaptive rate limiter and retried on 429/5xx and
+    transport errors. Outcomes and a latency histogram are aggregated in
+    memory and upserted into the platform's PlatformMetrics row of the day
+    every SCRAPER_METRICS_FLUSH_SECONDS, so scrapes never write to the
+    database themselves.
+    """
+
+    def __init__(
+        self,
+        timeout: float = settings.SCRAPER_REQUEST_TIMEOUT_SECONDS,
+        max_retries: int = settings.SCRAPER_MAX_RETRIES,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._limiters: Dict[str, PlatformRateLimiter] = {}
+        self._stats: Dict[Tuple[str, date], PlatformRequestStats] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    def limiter(self, platform: str) -> PlatformRateLimiter:
+        if platform not in self._limiters:
+            rate = settings.SCRAPER_PLATFORM_RATE_LIMITS.get(platform, settings.SCRAPER_DEFAULT_RATE_PER_SECOND)
+            self._limiters[platform] = PlatformRateLimiter(rate, settings.SCRAPER_PLATFORM_CONCURRENCY)
+        return self._limiters[platform]
+
+    def _client(self, url: str) -> httpx.AsyncClient:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self._clients:
+            self._clients[origin] = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=settings.SCRAPER_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=settings.SCRAPER_MAX_CONNECTIONS_PER_HOST,
+                    keepalive_expiry=settings.SCRAPER_KEEPALIVE_SECONDS,
+                ),
+                headers={"User-Agent": settings.BROWSER_SESSION_USER_AGENT},
+                follow_redirects=True,
+            )
+        return self._clients[origin]
+
+    async def get(self, platform: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request(platform, "GET", url, **kwargs)
+
+    async def request(
+        self,
+        platform: str,
+        method: str,
+        url: str,
+        session: Optional[PooledBrowserSession] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send a request within the platform's rate limit, retrying transient failures.
+
+        With a pooled browser session, its user agent and cookies are sent.
+        Responses with other error statuses (e.g. 404) are returned to the
+        caller; ScraperError is raised when no response could be obtained.
+        """
+        if session is not None:
+            headers = dict(kwargs.pop("headers", None) or {})
+            if session.state.user_agent:
+                headers.setdefault("User-Agent", session.state.user_agent)
+            if session.state.cookies:
+                headers.setdefault("Cookie", session.state.cookies)
+            kwargs["headers"] = headers
+
+        self._ensure_flusher()
+        limiter = self.limiter(platform)
+        client = self._client(url)
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            started = time.monotonic()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                self._record(platform, failed=True)
+                if attempt >= self.max_retries:
+                    raise ScraperError(f"{platform} request to {url} failed: {e}") from e
+                logger.warning(f"{platform} request failed ({e}), retrying")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            finally:
+                limiter.release()
+            latency_ms = int((time.monotonic() - started) * 1000)
+
+            delay = self._retry_after(response) or self._backoff(attempt)
+            if response.status_code in RATE_LIMIT_STATUS_CODES:
+                # Later requests wait out the pause even if this one gives up
+                limiter.throttle(delay)
+            if (
+                response.status_code in RETRYABLE_STATUS_CODES
+                and attempt < self.max_retries
+                and delay <= settings.SCRAPER_MAX_RETRY_AFTER_SECONDS
+            ):
+                if response.status_code in RATE_LIMIT_STATUS_CODES:
+                    self._record(platform, rate_limited=True)
+                    logger.warning(
+                        f"{platform} rate limited ({response.status_code}), "
+                        f"rate now {limiter.rate:.2f}/s, retry in {delay:.1f}s"
+                    )
+                else:
+                    self._record(platform, failed=True)
+                    await asyncio.sleep(delay)
+                await response.aclose()
+                continue
+
+            if response.status_code < 400:
+                self._record(platform, latency_ms=latency_ms)
+                limiter.recover()
+            else:
+                self._record(
+                    platform,
+                    failed=True,
+                    rate_limited=response.status_code in RATE_LIMIT_STATUS_CODES,
+                    detected=response.status_code in DETECTION_STATUS_CODES,
+                )
+            return response
+        raise ScraperError(f"{platform} request to {url} failed after retries")
+
+    def record_cache_hit(self, platform: str, not_modified: bool, bytes_saved: int, parse_ms_saved: int) -> None:
+        """Count a fetch whose parsing was skipped (304, or a body identical to the cached one)"""
+        stats = self._platform_stats(platform)
+        if not_modified:
+            stats.not_modified += 1
+        else:
+            stats.unchanged += 1
+        stats.bytes_saved += bytes_saved
+        stats.parse_ms_saved += parse_ms_saved
+
+    def _platform_stats(self, platform: str) -> PlatformRequestStats:
+        key = (platform, datetime.now(timezone.utc).date())
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = PlatformRequestStats()
+        return stats
+
+    def _record(
+        self,
+        platform: str,
+        latency_ms: Optional[int] = None,
+        failed: bool = False,
+        rate_limited: bool = False,
+        detected: bool = False,
+    ) -> None:
+        stats = self._platform_stats(platform)
+        if latency_ms is not None:
+            stats.successful += 1
+            stats.latency.record(latency_ms)
+        stats.failed += failed
+        stats.rate_limited += rate_limited
+        stats.detected += detected
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.SCRAPER_METRICS_FLUSH_SECONDS)
+            await self.flush_metrics()
+
+    async def flush_metrics(self) -> None:
+        """Add request outcomes since the previous flush to the PlatformMetrics rows"""
+        if not self._stats:
+            return
+        pending, self._stats = self._stats, {}
+        try:
+            async with AsyncSessionLocal() as db:
+                # Rows are upserted in key order so concurrent flushes cannot deadlock
+                await db.execute(FLUSH_PLATFORM_METRICS_SQL, [
+                    {"platform_name": platform, "metric_date": metric_date, **stats.as_params()}
+                    for (platform, metric_date), stats in sorted(pending.items())
+                ])
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to flush platform metrics: {e}")
+            # Merge back so the counts are written by the next flush
+            for key, stats in pending.items():
+                self._stats.setdefault(key, PlatformRequestStats()).merge(stats)
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        value = response.headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(60.0, 1.0 * 2 ** attempt)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current rate, pause and open connection pools per platform"""
+        now = time.monotonic()
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "hosts": len(self._clients),
+            "platforms": {
+                platform: {
+                    "rate_per_second": round(limiter.rate, 3),
+                    "max_rate_per_second": limiter.max_rate,
+                    "paused_seconds": round(max(0.0, limiter.paused_until - now), 1),
+                }
+                for platform, limiter in self._limiters.items()
+            },
+        }
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush_metrics()
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+async def recent_platform_metrics(session: AsyncSession, days: int) -> List[Dict[str, Any]]:
+    """Daily platform metrics over the last days, newest first"""
+    rows = (await session.execute(PLATFORM_METRICS_SQL, {"days": days})).all()
+    return [dict(row._mapping) for row in rows]
+
+
+# Global scraper client instance
+scraper_client = ScraperClient()
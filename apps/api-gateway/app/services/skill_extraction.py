@@ -0,0 +1,350 @@
+"""
+Skill Extraction Service
+Single-pass matching of resume and job posting text against the skill vocabulary
+"""
+
+import hashlib
+import json
+import re
+import uuid
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.automation import TaskType
+from app.models.job import JobPosting
+from app.models.user import UserProfile, UserSkill
+from app.services.skill_taxonomy import skill_taxonomy
+from app.services.skill_vocabulary import SKILL_VOCABULARY, SKILL_VOCABULARY_VERSION, SkillEntry
+
+logger = logging.getLogger(__name__)
+
+# Words, keeping the punctuation that is part of skill names (C++, C#, .NET,
+# Node.js, CI/CD, scikit-learn); "&" joins words too, so "R&D" is one
+# token that never matches "R"
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9+#]+(?:[./\-&][A-Za-z0-9+#]+)*|\.[A-Za-z]+")
+COMPOUND_SEPARATOR_PATTERN = re.compile(r"[./\-]")
+# Text between two tokens that ends a sentence or starts a bullet
+SENTENCE_BREAK_PATTERN = re.compile(r"[.!?\n•·▪◦]")
+
+# Posting headings that switch between required and preferred skills
+PREFERRED_HEADING_PATTERN = re.compile(
+    r"\b(preferred|nice[\s-]to[\s-]have|bonus|pluses|desired|good[\s-]to[\s-]have)\b", re.IGNORECASE
+)
+REQUIRED_HEADING_PATTERN = re.compile(
+    r"\b(requirements|required|qualifications|must[\s-]have|what you bring|you have|about you)\b",
+    re.IGNORECASE,
+)
+HEADING_MAX_LENGTH = 60
+# Headings without a trailing colon are short titles ("Nice to have")
+HEADING_MAX_WORDS = 3
+BULLET_PATTERN = re.compile(r"^(?:[-*•·▪◦]|\d{1,2}[.)])\s")
+
+INSERT_USER_SKILL_SQL = text("""
+    INSERT INTO user_skills (user_id, skill_name, skill_category, skill_id)
+    VALUES (:user_id, :skill_name, CAST(:skill_category AS skill_category), :skill_id)
+""")
+
+UPDATE_POSTING_SKILLS_SQL = text("""
+    UPDATE job_postings
+    SET required_skills = :required_skills,
+        preferred_skills = :preferred_skills,
+        required_skill_ids = CAST(:required_skill_ids AS INTEGER[]),
+        preferred_skill_ids = CAST(:preferred_skill_ids AS INTEGER[]),
+        skills_source_hash = :skills_source_hash
+    WHERE id = :id
+""")
+
+QUEUE_SKILLS_EXTRACTION_SQL = text("""
+    INSERT INTO automation_tasks (user_id, task_type, status, priority, scheduled_at, task_config)
+    VALUES (:user_id, :task_type, 'pending'::task_status, :priority, NOW(), CAST(:task_config AS jsonb))
+    RETURNING task_type, id::text, scheduled_at, user_id::text, priority
+""")
+
+_TERMINAL = ""
+
+
+class SkillMatch(NamedTuple):
+    name: str
+    category: str
+    count: int
+    # Token index of the first mention
+    position: int
+
+
+def skills_source_hash(*texts: Optional[str]) -> str:
+    """Hash of extraction input; unchanged text and vocabulary need no re-run"""
+    digest = hashlib.sha256(f"skills-v{SKILL_VOCABULARY_VERSION}".encode())
+    for source in texts:
+        digest.update(b"\0")
+        digest.update((source or "").encode())
+    return digest.hexdigest()
+
+
+def heading_section(line: str) -> Optional[str]:
+    """"required" or "preferred" if the line is a section heading, else None.
+
+    Bullets are never headings; other lines are when they end in ":" or are
+    short titles, with markdown emphasis ignored.
+    """
+    stripped = line.strip()
+    if not stripped or len(stripped) > HEADING_MAX_LENGTH or BULLET_PATTERN.match(stripped):
+        return None
+    title = stripped.strip("#*_ ")
+    if not title.endswith(":") and len(title.split()) > HEADING_MAX_WORDS:
+        return None
+    if PREFERRED_HEADING_PATTERN.search(title):
+        return "preferred"
+    if REQUIRED_HEADING_PATTERN.search(title):
+        return "required"
+    return None
+
+
+def resume_extraction_config(user_id: uuid.UUID, resume_text: Optional[str]) -> Dict[str, Any]:
+    """task_config of a resume extraction.
+
+    The source fields are what the task coalescer keys on, so repeated
+    extractions of the same resume text share one run.
+    """
+    return {"source_type": "resume", "source_id": str(user_id), "source_hash": skills_source_hash(resume_text)}
+
+
+class SkillMatcher:
+    """Vocabulary compiled into a token trie for single-pass matching.
+
+    Text is tokenized once with one regex; the scan walks the trie from each
+    token and takes the longest alias ending there, so "Google Cloud
+    Platform" wins over "Google Cloud" and multi-word aliases cost no extra
+    passes. Compound tokens that are not vocabulary words themselves
+    ("Python/Django", "React-based") are split into their parts. Exact
+    aliases ("Go", "R") match only with their original casing, and not
+    as the first word of a sentence unless a skill follows.
+    """
+
+    def __init__(self, vocabulary: Sequence[SkillEntry] = SKILL_VOCABULARY):
+        self.entries = list(vocabulary)
+        self._trie: Dict[str, Any] = {}
+        self._words = set()
+        for index, entry in enumerate(self.entries):
+            for alias in entry.aliases:
+                self._add(alias, index, exact=False)
+            for alias in entry.exact_aliases:
+                self._add(alias, index, exact=True)
+
+    def _add(self, alias: str, index: int, exact: bool) -> None:
+        words = TOKEN_PATTERN.findall(alias)
+        if not words:
+            return
+        node = self._trie
+        for word in words:
+            lowered = word.lower()
+            self._words.add(lowered)
+            node = node.setdefault(lowered, {})
+        node.setdefault(_TERMINAL, []).append((index, " ".join(words) if exact else None))
+
+    def tokenize(self, source: str) -> Tuple[List[str], List[bool]]:
+        """Tokens of the text and, per token, whether it starts a sentence"""
+        tokens: List[str] = []
+        starts: List[bool] = []
+        end = 0
+        for found in TOKEN_PATTERN.finditer(source):
+            token = found.group()
+            start = not tokens or SENTENCE_BREAK_PATTERN.search(source, end, found.start()) is not None
+            end = found.end()
+            if token.lower() in self._words or not COMPOUND_SEPARATOR_PATTERN.search(token):
+                parts = [token]
+            else:
+                parts = [part for part in COMPOUND_SEPARATOR_PATTERN.split(token) if part]
+            tokens.extend(parts)
+            starts.extend([start] + [False] * (len(parts) - 1))
+        return tokens, starts
+
+    def scan(self, source: str) -> Iterable[Tuple[int, int]]:
+        """(entry index, token position) for each mention, left to right.
+
+        An exact alias opening a sentence ("Go ahead and apply", "Excel at
+        teamwork") is only a mention when the next token starts another
+        one ("Go, Rust and Python").
+        """
+        tokens, starts = self.tokenize(source)
+        lowered = [token.lower() for token in tokens]
+        trie = self._trie
+        count = len(tokens)
+        matches = []
+        i = 0
+        while i < count:
+            node = trie.get(lowered[i])
+            if node is None:
+                i += 1
+                continue
+            best = None
+            j = i + 1
+            while True:
+                for index, exact in node.get(_TERMINAL, ()):
+                    if exact is None or " ".join(tokens[i:j]) == exact:
+                        best = (index, j, exact is not None)
+                        break
+                if j >= count:
+                    break
+                node = node.get(lowered[j])
+                if node is None:
+                    break
+                j += 1
+            if best is None:
+                i += 1
+                continue
+            matches.append((best[0], i, best[1], best[2]))
+            i = best[1]
+        following = {position for _, position, _, _ in matches}
+        for index, position, end, exact in matches:
+            if exact and starts[position] and (end not in following or starts[end]):
+                continue
+            yield index, position
+
+    def extract(self, source: Optional[str]) -> List[SkillMatch]:
+        """Skills mentioned in text, in order of first mention"""
+        if not source:
+            return []
+        found: Dict[int, List[int]] = {}
+        for index, position in self.scan(source):
+            if index in found:
+                found[index][0] += 1
+            else:
+                found[index] = [1, position]
+        return [
+            SkillMatch(self.entries[index].name, self.entries[index].category, count, position)
+            for index, (count, position) in found.items()
+        ]
+
+    def extract_posting(
+        self, description: Optional[str], requirements: Optional[str]
+    ) -> Tuple[List[str], List[str]]:
+        """Required and preferred skill names of a posting.
+
+        Skills under a "preferred"/"nice to have" heading are preferred; all
+        others are required. A skill mentioned in both is required.
+        """
+        required: Dict[str, None] = {}
+        preferred: Dict[str, None] = {}
+        for source in (requirements, description):
+            target = required
+            for line in (source or "").splitlines():
+                section = heading_section(line)
+                if section == "preferred":
+                    target = preferred
+                elif section == "required":
+                    target = required
+                for index, _ in self.scan(line):
+                    target.setdefault(self.entries[index].name, None)
+        return list(required), [name for name in preferred if name not in required]
+
+
+async def extract_profile_skills(session: AsyncSession, user_id: uuid.UUID) -> Dict[str, Any]:
+    """Add skills found in the user's resume_text as UserSkill rows.
+
+    Existing skills (including ones the user entered) are kept; only missing
+    skills are added. Skipped when resume_text is unchanged since the last
+    run. The caller owns the transaction.
+    """
+    profile = (await session.execute(
+        select(UserProfile).where(UserProfile.user_id == user_id)
+    )).scalars().first()
+    if profile is None or not profile.resume_text:
+        return {"skipped": True, "skills_added": 0}
+
+    source_hash = skills_source_hash(profile.resume_text)
+    if profile.skills_source_hash == source_hash:
+        return {"skipped": True, "skills_added": 0}
+
+    matches = skill_matcher.extract(profile.resume_text)
+    skills = await skill_taxonomy.resolve([match.name for match in matches])
+    existing = (await session.execute(
+        select(UserSkill.skill_id, func.lower(UserSkill.skill_name)).where(UserSkill.user_id == user_id)
+    )).all()
+    existing_ids = {row[0] for row in existing if row[0] is not None}
+    existing_names = {row[1] for row in existing}
+    new_skills = [
+        (match, skill) for match, skill in zip(matches, skills)
+        if skill.id not in existing_ids and match.name.lower() not in existing_names
+    ]
+    if new_skills:
+        await session.execute(INSERT_USER_SKILL_SQL, [
+            {"user_id": user_id, "skill_name": skill.name, "skill_category": match.category, "skill_id": skill.id}
+            for match, skill in new_skills
+        ])
+    profile.skills_source_hash = source_hash
+
+    logger.info(f"Extracted {len(matches)} skills for user {user_id} ({len(new_skills)} new)")
+    return {"skipped": False, "skills_found": len(matches), "skills_added": len(new_skills)}
+
+
+async def extract_posting_skills(
+    session: AsyncSession,
+    job_posting_ids: Optional[Sequence[uuid.UUID]] = None,
+    limit: int = 1000,
+) -> Dict[str, Any]:
+    """Fill required/preferred skill names and ids from posting text.
+
+    With job_posting_ids, those postings are checked and re-extracted only if
+    their text changed; without, up to limit never-extracted postings are
+    processed (backfill), skipping ones another backfill has locked. The
+    caller owns the transaction.
+    """
+    query = select(
+        JobPosting.id, JobPosting.description, JobPosting.requirements, JobPosting.skills_source_hash
+    )
+    if job_posting_ids is not None:
+        query = query.where(JobPosting.id.in_(list(job_posting_ids)))
+    else:
+        query = (
+            query.where(JobPosting.skills_source_hash.is_(None))
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    rows = (await session.execute(query)).all()
+
+    updates = []
+    for row in rows:
+        source_hash = skills_source_hash(row.description, row.requirements)
+        if row.skills_source_hash == source_hash:
+            continue
+        required, preferred = skill_matcher.extract_posting(row.description, row.requirements)
+        updates.append({
+            "id": row.id,
+            "required_skills": required,
+            "preferred_skills": preferred,
+            "required_skill_ids": await skill_taxonomy.ids_for(required),
+            "preferred_skill_ids": await skill_taxonomy.ids_for(preferred),
+            "skills_source_hash": source_hash,
+        })
+    if updates:
+        await session.execute(UPDATE_POSTING_SKILLS_SQL, updates)
+
+    logger.info(f"Extracted skills for {len(updates)} of {len(rows)} job postings")
+    return {"postings_checked": len(rows), "postings_updated": len(updates)}
+
+
+async def queue_skills_extraction(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    task_config: Optional[Dict[str, Any]] = None,
+    priority: int = 5,
+) -> Tuple[Any, ...]:
+    """Create a pending SKILLS_EXTRACTION task; returns its schedule entry.
+
+    The caller owns the transaction and indexes the entry in the delayed
+    scheduler after committing.
+    """
+    result = await session.execute(QUEUE_SKILLS_EXTRACTION_SQL, {
+        "user_id": user_id,
+        "task_type": TaskType.SKILLS_EXTRACTION,
+        "priority": priority,
+        "task_config": json.dumps(task_config or {}),
+    })
+    return tuple(result.one())
+
+
+# Global skill matcher instance
+skill_matcher = SkillMatcher()
@@ -0,0 +1,309 @@
+"""
+Skill Taxonomy Service
+Canonical integer skill ids for free-text skill names, and indexed skill-overlap job queries
+"""
+
+import asyncio
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.models.user import SkillCategory
+from app.services.skill_vocabulary import SKILL_VOCABULARY, SKILL_VOCABULARY_VERSION, SkillEntry
+
+logger = logging.getLogger(__name__)
+
+SKILL_CATEGORIES = frozenset({
+    SkillCategory.TECHNICAL, SkillCategory.SOFT, SkillCategory.LANGUAGE, SkillCategory.CERTIFICATION
+})
+
+# Same normalization as normalize_skill_name, for rows written before skill ids
+NORMALIZED_SQL = r"lower(regexp_replace(btrim({column}), '\s+', ' ', 'g'))"
+
+# Serializes vocabulary syncs of API and worker processes starting together
+SYNC_LOCK_SQL = text("SELECT pg_advisory_xact_lock(hashtext('skill_taxonomy_sync'))")
+
+# Both upserts return the rows they changed, so only user skills affected by
+# a vocabulary change are renormalized
+UPSERT_SKILLS_SQL = text("""
+    INSERT INTO skills (name, normalized_name, skill_category)
+    SELECT v.name, v.normalized_name, CAST(v.skill_category AS skill_category)
+    FROM unnest(
+        CAST(:names AS TEXT[]), CAST(:normalized_names AS TEXT[]), CAST(:skill_categories AS TEXT[])
+    ) AS v(name, normalized_name, skill_category)
+    ON CONFLICT ON CONSTRAINT uq_skills_normalized_name DO UPDATE SET
+        name = EXCLUDED.name,
+        skill_category = EXCLUDED.skill_category
+    WHERE skills.name IS DISTINCT FROM EXCLUDED.name
+       OR skills.skill_category IS DISTINCT FROM EXCLUDED.skill_category
+    RETURNING id
+""")
+
+# Vocabulary synonyms take over spellings previously interned as their own skill
+UPSERT_SYNONYMS_SQL = text("""
+    INSERT INTO skill_synonyms (normalized_name, skill_id)
+    SELECT v.normalized_name, s.id
+    FROM unnest(CAST(:normalized_names AS TEXT[]), CAST(:skill_normalized_names AS TEXT[]))
+         AS v(normalized_name, skill_normalized_name)
+    JOIN skills s ON s.normalized_name = v.skill_normalized_name
+    ON CONFLICT (normalized_name) DO UPDATE SET skill_id = EXCLUDED.skill_id
+    WHERE skill_synonyms.skill_id <> EXCLUDED.skill_id
+    RETURNING normalized_name
+""")
+
+INTERN_SKILL_SQL = text("""
+    INSERT INTO skills (name, normalized_name, skill_category)
+    VALUES (:name, :normalized_name, CAST(:skill_category AS skill_category))
+    ON CONFLICT ON CONSTRAINT uq_skills_normalized_name DO NOTHING
+""")
+
+INTERN_SYNONYM_SQL = text("""
+    INSERT INTO skill_synonyms (normalized_name, skill_id)
+    SELECT normalized_name, id FROM skills WHERE normalized_name = :normalized_name
+    ON CONFLICT (normalized_name) DO NOTHING
+""")
+
+LOOKUP_SQL = text("""
+    SELECT syn.normalized_name, s.id, s.name, s.skill_category::text AS skill_category
+    FROM skill_synonyms syn
+    JOIN skills s ON s.id = syn.skill_id
+    WHERE syn.normalized_name = ANY(CAST(:names AS TEXT[]))
+""")
+
+# User skills without an id get one: unknown names are interned, then every
+# row is pointed at (and renamed to) the skill its name is a synonym of
+INTERN_USER_SKILLS_SQL = text(rf"""
+    INSERT INTO skills (name, normalized_name)
+    SELECT DISTINCT ON (normalized_name) name, normalized_name
+    FROM (
+        SELECT regexp_replace(btrim(skill_name), '\s+', ' ', 'g') AS name,
+               {NORMALIZED_SQL.format(column="skill_name")} AS normalized_name
+        FROM user_skills
+        WHERE skill_id IS NULL
+    ) pending
+    WHERE normalized_name <> ''
+      AND NOT EXISTS (SELECT 1 FROM skill_synonyms syn WHERE syn.normalized_name = pending.normalized_name)
+    ORDER BY normalized_name
+    ON CONFLICT ON CONSTRAINT uq_skills_normalized_name DO NOTHING
+""")
+
+CANONICAL_SYNONYMS_SQL = text("""
+    INSERT INTO skill_synonyms (normalized_name, skill_id)
+    SELECT normalized_name, id FROM skills s
+    WHERE NOT EXISTS (SELECT 1 FROM skill_synonyms syn WHERE syn.normalized_name = s.normalized_name)
+    ON CONFLICT (normalized_name) DO NOTHING
+""")
+
+# Rows without an id, rows of skills the vocabulary renamed, and rows spelled
+# like a synonym that moved to another skill
+NORMALIZE_USER_SKILLS_SQL = text(f"""
+    UPDATE user_skills us
+    SET skill_id = syn.skill_id, skill_name = s.name
+    FROM skill_synonyms syn
+    JOIN skills s ON s.id = syn.skill_id
+    WHERE syn.normalized_name = {NORMALIZED_SQL.format(column="us.skill_name")}
+      AND (us.skill_id IS NULL
+           OR us.skill_id = ANY(CAST(:skill_ids AS INTEGER[]))
+           OR syn.normalized_name = ANY(CAST(:synonyms AS TEXT[])))
+      AND (us.skill_id IS DISTINCT FROM syn.skill_id OR us.skill_name <> s.name)
+""")
+
+USER_SKILL_IDS_SQL = text("""
+    SELECT skill_id, skill_name
+    FROM user_skills
+    WHERE user_id = :user_id AND skill_id IS NOT NULL
+""")
+
+# Candidates come from a bitmap scan of the GIN index(es) on the skill id
+# arrays; only those rows have their matched skills (in posting order)
+# collected and sorted by count
+MATCHING_JOBS_SQL = """
+    SELECT j.id, j.title, j.company_id, j.source_platform, j.source_url, j.posted_date,
+           cardinality(j.required_skill_ids) AS required_skill_count,
+           m.matched_required_ids, m.matched_preferred_ids
+    FROM job_postings j
+    CROSS JOIN LATERAL (
+        SELECT ARRAY(
+                   SELECT skill_id FROM unnest(j.required_skill_ids) skill_id
+                   WHERE skill_id = ANY(CAST(:skill_ids AS INTEGER[]))
+               ) AS matched_required_ids,
+               ARRAY(
+                   SELECT skill_id FROM unnest(j.preferred_skill_ids) skill_id
+                   WHERE skill_id = ANY(CAST(:skill_ids AS INTEGER[]))
+               ) AS matched_preferred_ids
+    ) m
+    WHERE {overlap}
+      AND j.is_active = true
+    ORDER BY cardinality(m.matched_required_ids) DESC,
+             cardinality(m.matched_preferred_ids) DESC,
+             j.posted_date DESC NULLS LAST,
+             j.id
+    LIMIT :limit OFFSET :offset
+"""
+REQUIRED_OVERLAP = "j.required_skill_ids && CAST(:skill_ids AS INTEGER[])"
+PREFERRED_OVERLAP = "j.preferred_skill_ids && CAST(:skill_ids AS INTEGER[])"
+MATCHING_JOBS_REQUIRED_SQL = text(MATCHING_JOBS_SQL.format(overlap=REQUIRED_OVERLAP))
+MATCHING_JOBS_ANY_SQL = text(MATCHING_JOBS_SQL.format(overlap=f"({REQUIRED_OVERLAP} OR {PREFERRED_OVERLAP})"))
+
+
+class CanonicalSkill(NamedTuple):
+    id: int
+    name: str
+    category: Optional[str]
+
+
+def normalize_skill_name(name: Optional[str]) -> str:
+    """Lowercased with whitespace collapsed; the key synonyms are stored under"""
+    return " ".join((name or "").split()).lower()[:100]
+
+
+def _vocabulary_synonyms(vocabulary: Sequence[SkillEntry]) -> Dict[str, str]:
+    """Normalized synonym -> normalized canonical name.
+
+    Canonical names are claimed first, then aliases in vocabulary order, so
+    a spelling shared by two entries belongs to the first.
+    """
+    synonyms: Dict[str, str] = {}
+    for entry in vocabulary:
+        synonyms.setdefault(normalize_skill_name(entry.name), normalize_skill_name(entry.name))
+    for entry in vocabulary:
+        for alias in entry.aliases + entry.exact_aliases:
+            synonyms.setdefault(normalize_skill_name(alias), normalize_skill_name(entry.name))
+    return synonyms
+
+
+class SkillTaxonomy:
+    """Maps skill names to canonical skills with stable integer ids.
+
+    The vocabulary used by skill extraction is synced into the skills and
+    skill_synonyms tables once per process. Names are normalized when they
+    are written, so "PostgreSQL", "Postgres" and "postgres" all become skill
+    PostgreSQL with one id; names outside the vocabulary are interned as new
+    skills on first use. Resolved names are cached in-process, and since ids
+    never change, extraction of a batch of postings resolves its skills
+    without a query.
+
+    Taxonomy rows are shared reference data and are written in their own
+    short transactions, independent of the caller's session.
+    """
+
+    def __init__(self, vocabulary: Sequence[SkillEntry] = SKILL_VOCABULARY):
+        self.vocabulary = vocabulary
+        self._by_name: Dict[str, CanonicalSkill] = {}
+        self._synced = False
+        self._lock = asyncio.Lock()
+
+    async def sync(self) -> None:
+        """Write vocabulary changes, normalize the user skills they affect, and warm the cache.
+
+        User skills are only renormalized when they have no id yet or the
+        vocabulary changed their skill, so a sync with an unchanged
+        vocabulary writes nothing.
+        """
+        async with self._lock:
+            if self._synced:
+                return
+            synonyms = _vocabulary_synonyms(self.vocabulary)
+            async with AsyncSessionLocal() as session:
+                await session.execute(SYNC_LOCK_SQL)
+                changed_skill_ids = (await session.execute(UPSERT_SKILLS_SQL, {
+                    "names": [entry.name for entry in self.vocabulary],
+                    "normalized_names": [normalize_skill_name(entry.name) for entry in self.vocabulary],
+                    "skill_categories": [entry.category for entry in self.vocabulary],
+                })).scalars().all()
+                changed_synonyms = (await session.execute(UPSERT_SYNONYMS_SQL, {
+                    "normalized_names": list(synonyms),
+                    "skill_normalized_names": list(synonyms.values()),
+                })).scalars().all()
+                await session.execute(INTERN_USER_SKILLS_SQL)
+                await session.execute(CANONICAL_SYNONYMS_SQL)
+                normalized = await session.execute(NORMALIZE_USER_SKILLS_SQL, {
+                    "skill_ids": list(changed_skill_ids),
+                    "synonyms": list(changed_synonyms),
+                })
+                await session.commit()
+                await self._load(session, list(synonyms))
+            self._synced = True
+            logger.info(
+                f"Skill taxonomy synced (vocabulary v{SKILL_VOCABULARY_VERSION}, "
+                f"{len(self.vocabulary)} skills, {len(synonyms)} synonyms, "
+                f"{normalized.rowcount} user skills normalized)"
+            )
+
+    async def resolve(
+        self, names: Sequence[Optional[str]], categories: Optional[Sequence[Optional[str]]] = None
+    ) -> List[Optional[CanonicalSkill]]:
+        """Canonical skill per name (None for blank names), interning unknown names.
+
+        categories, parallel to names, only apply to newly interned skills.
+        """
+        if not self._synced:
+            await self.sync()
+        normalized = [normalize_skill_name(name) for name in names]
+        missing = list(dict.fromkeys(key for key in normalized if key and key not in self._by_name))
+        if missing:
+            async with AsyncSessionLocal() as session:
+                await self._load(session, missing)
+                unknown = [key for key in missing if key not in self._by_name]
+                if unknown:
+                    originals: Dict[str, Dict[str, Optional[str]]] = {}
+                    for i, key in enumerate(normalized):
+                        if key in unknown and key not in originals:
+                            category = categories[i] if categories is not None else None
+                            originals[key] = {
+                                "name": " ".join(names[i].split())[:100],
+                                "normalized_name": key,
+                                "skill_category": category if category in SKILL_CATEGORIES else None,
+                            }
+                    await session.execute(INTERN_SKILL_SQL, list(originals.values()))
+                    await session.execute(INTERN_SYNONYM_SQL, [
+                        {"normalized_name": values["normalized_name"]} for values in originals.values()
+                    ])
+                    await session.commit()
+                    await self._load(session, unknown)
+                    logger.info(f"Interned {len(unknown)} new skills")
+        return [self._by_name.get(key) if key else None for key in normalized]
+
+    async def canonical(self, name: Optional[str], category: Optional[str] = None) -> Optional[CanonicalSkill]:
+        [skill] = await self.resolve([name], [category])
+        return skill
+
+    async def ids_for(self, names: Sequence[Optional[str]]) -> List[int]:
+        """Distinct skill ids of names, in order of first mention"""
+        return list(dict.fromkeys(skill.id for skill in await self.resolve(names) if skill is not None))
+
+    async def _load(self, session: AsyncSession, keys: Sequence[str]) -> None:
+        rows = (await session.execute(LOOKUP_SQL, {"names": list(keys)})).all()
+        for row in rows:
+            self._by_name[row.normalized_name] = CanonicalSkill(row.id, row.name, row.skill_category)
+
+
+async def user_skill_ids(session: AsyncSession, user_id) -> Dict[int, str]:
+    """Skill id -> name of a user's skills"""
+    rows = (await session.execute(USER_SKILL_IDS_SQL, {"user_id": user_id})).all()
+    return {row.skill_id: row.skill_name for row in rows}
+
+
+async def find_matching_jobs(
+    session: AsyncSession,
+    skill_ids: Sequence[int],
+    include_preferred: bool = False,
+    limit: int = 50,
+    offset: int = 0,
+) -> List:
+    """Active postings requiring (or preferring) any of the skills, most matches first"""
+    if not skill_ids:
+        return []
+    query = MATCHING_JOBS_ANY_SQL if include_preferred else MATCHING_JOBS_REQUIRED_SQL
+    return (await session.execute(query, {
+        "skill_ids": list(skill_ids),
+        "limit": limit,
+        "offset": offset,
+    })).all()
+
+
+# Global skill taxonomy instance
+skill_taxonomy = SkillTaxonomy()
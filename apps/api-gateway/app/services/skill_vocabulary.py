@@ -0,0 +1,364 @@
+"""
+Skill Vocabulary
+Canonical skills with categories and aliases used by skill extraction
+"""
+
+from typing import NamedTuple, Tuple
+
+from app.models.user import SkillCategory
+
+# Bump whenever entries change so previously extracted text is re-scanned
+SKILL_VOCABULARY_VERSION = 2
+
+
+class SkillEntry(NamedTuple):
+    name: str
+    category: str
+    # Matched case-insensitively
+    aliases: Tuple[str, ...]
+    # Matched only with this exact casing (words that are also common English)
+    exact_aliases: Tuple[str, ...]
+
+
+def _skill(name: str, category: str, *aliases: str, exact: Tuple[str, ...] = ()) -> SkillEntry:
+    # A name that is itself an exact alias is not matched case-insensitively
+    return SkillEntry(name, category, aliases if name in exact else (name,) + aliases, exact)
+
+
+T = SkillCategory.TECHNICAL
+S = SkillCategory.SOFT
+L = SkillCategory.LANGUAGE
+C = SkillCategory.CERTIFICATION
+
+SKILL_VOCABULARY: Tuple[SkillEntry, ...] = (
+    # Programming languages
+    _skill("Python", T, "python3", "python 3"),
+    _skill("Java", T, "java 8", "java 11", "java 17"),
+    _skill("JavaScript", T, "js", "ecmascript", "es6", "es2015"),
+    _skill("TypeScript", T),
+    _skill("Go", T, "golang", exact=("Go",)),
+    _skill("Rust", T, exact=("Rust",)),
+    _skill("C", T, "ansi c", exact=("C",)),
+    _skill("C++", T, "cpp", "c plus plus"),
+    _skill("C#", T, "csharp", "c sharp"),
+    _skill("Ruby", T),
+    _skill("PHP", T),
+    _skill("Kotlin", T),
+    _skill("Swift", T, exact=("Swift",)),
+    _skill("Objective-C", T, "objective c", "objc"),
+    _skill("Scala", T),
+    _skill("R", T, "r programming", "rstudio", exact=("R",)),
+    _skill("MATLAB", T),
+    _skill("Perl", T),
+    _skill("Haskell", T),
+    _skill("Elixir", T),
+    _skill("Erlang", T),
+    _skill("Clojure", T),
+    _skill("F#", T, "fsharp"),
+    _skill("Dart", T, exact=("Dart",)),
+    _skill("Lua", T),
+    _skill("Julia", T, exact=("Julia",)),
+    _skill("Groovy", T),
+    _skill("Shell Scripting", T, "shell scripting", "shell scripts"),
+    _skill("Bash", T, "bash scripting"),
+    _skill("PowerShell", T),
+    _skill("SQL", T, "t-sql", "tsql", "pl/sql", "plsql", "ansi sql"),
+    _skill("HTML", T, "html5"),
+    _skill("CSS", T, "css3"),
+    _skill("Sass", T, "scss"),
+    _skill("Solidity", T),
+    _skill("COBOL", T),
+    _skill("Fortran", T),
+    _skill("Assembly", T, "assembly language", "x86 assembly"),
+    _skill("VBA", T, "visual basic"),
+    # Frontend
+    _skill("React", T, "react.js", "reactjs"),
+    _skill("React Native", T, "react-native"),
+    _skill("Angular", T, "angularjs", "angular.js"),
+    _skill("Vue.js", T, "vue", "vuejs"),
+    _skill("Svelte", T, "sveltekit"),
+    _skill("Next.js", T, "nextjs"),
+    _skill("Nuxt.js", T, "nuxt", "nuxtjs"),
+    _skill("Redux", T),
+    _skill("jQuery", T),
+    _skill("Tailwind CSS", T, "tailwind", "tailwindcss"),
+    _skill("Bootstrap", T, exact=("Bootstrap",)),
+    _skill("Webpack", T),
+    _skill("Vite", T),
+    _skill("GraphQL", T),
+    _skill("Apollo", T, "apollo graphql", exact=("Apollo",)),
+    _skill("Flutter", T),
+    _skill("Ionic", T),
+    _skill("Electron", T, exact=("Electron",)),
+    _skill("Storybook", T),
+    _skill("WebAssembly", T, "wasm"),
+    _skill("D3.js", T, "d3"),
+    _skill("Three.js", T, "threejs"),
+    # Backend frameworks
+    _skill("Node.js", T, "nodejs", "node.js", exact=("Node",)),
+    _skill("Express", T, "express.js", "expressjs", exact=("Express",)),
+    _skill("NestJS", T, "nest.js"),
+    _skill("Django", T, "django rest framework", "drf"),
+    _skill("Flask", T),
+    _skill("FastAPI", T),
+    _skill("Spring", T, "spring framework", "spring boot", "springboot", exact=("Spring",)),
+    _skill("Hibernate", T),
+    _skill("Ruby on Rails", T, "ror", exact=("Rails",)),
+    _skill("Laravel", T),
+    _skill("Symfony", T),
+    _skill(".NET", T, "dotnet", "net core", ".net core", "asp.net", "asp.net core"),
+    _skill("Entity Framework", T),
+    _skill("Phoenix", T, exact=("Phoenix",)),
+    _skill("gRPC", T),
+    _skill("REST APIs", T, "restful", "rest api", "restful apis", "restful api"),
+    _skill("Microservices", T, "microservice", "micro-services", "microservices architecture"),
+    _skill("Celery", T),
+    _skill("SQLAlchemy", T),
+    _skill("Pydantic", T),
+    _skill("asyncio", T),
+    # Data stores
+    _skill("PostgreSQL", T, "postgres", "postgresql", "psql"),
+    _skill("MySQL", T, "mariadb"),
+    _skill("SQLite", T),
+    _skill("Oracle Database", T, "oracle db", "oracle database", exact=("Oracle",)),
+    _skill("Microsoft SQL Server", T, "sql server", "mssql", "ms sql"),
+    _skill("MongoDB", T, "mongo"),
+    _skill("Redis", T),
+    _skill("Cassandra", T, "apache cassandra"),
+    _skill("DynamoDB", T, "dynamo db"),
+    _skill("Elasticsearch", T, "elastic search", "opensearch", exact=("ELK",)),
+    _skill("Neo4j", T),
+    _skill("CouchDB", T),
+    _skill("Firebase", T, "firestore"),
+    _skill("Snowflake", T, exact=("Snowflake",)),
+    _skill("BigQuery", T, "google bigquery"),
+    _skill("Redshift", T, "amazon redshift"),
+    _skill("ClickHouse", T),
+    _skill("pgvector", T),
+    _skill("Memcached", T),
+    # Data engineering and analytics
+    _skill("Apache Kafka", T, "kafka"),
+    _skill("RabbitMQ", T),
+    _skill("Apache Spark", T, "pyspark", exact=("Spark",)),
+    _skill("Hadoop", T, "hdfs", "mapreduce"),
+    _skill("Apache Airflow", T, "airflow"),
+    _skill("dbt", T, "data build tool"),
+    _skill("Apache Flink", T, "flink"),
+    _skill("Databricks", T),
+    _skill("ETL", T, "elt", "etl pipelines", "data pipelines"),
+    _skill("Data Warehousing", T, "data warehouse", "data warehousing"),
+    _skill("Data Modeling", T, "data modelling"),
+    _skill("Pandas", T),
+    _skill("NumPy", T),
+    _skill("SciPy", T),
+    _skill("Tableau", T),
+    _skill("Power BI", T, "powerbi"),
+    _skill("Looker", T),
+    _skill("Excel", T, "microsoft excel", "ms excel", "spreadsheets", exact=("Excel",)),
+    _skill("Data Analysis", T, "data analytics"),
+    _skill("Data Visualization", T, "data visualisation"),
+    _skill("Statistics", T, "statistical analysis", "statistical modeling"),
+    _skill("A/B Testing", T, "ab testing", "a/b tests", "experimentation"),
+    # Machine learning and AI
+    _skill("Machine Learning", T, "ml"),
+    _skill("Deep Learning", T),
+    _skill("Natural Language Processing", T, "nlp"),
+    _skill("Computer Vision", T),
+    _skill("Large Language Models", T, "llm", "llms", "large language model"),
+    _skill("Generative AI", T, "genai", "gen ai"),
+    _skill("Prompt Engineering", T),
+    _skill("Retrieval-Augmented Generation", T, "rag", "retrieval augmented generation"),
+    _skill("TensorFlow", T),
+    _skill("PyTorch", T, "torch"),
+    _skill("Keras", T),
+    _skill("scikit-learn", T, "sklearn", "scikit learn"),
+    _skill("XGBoost", T),
+    _skill("Hugging Face", T, "huggingface"),
+    _skill("LangChain", T),
+    _skill("OpenAI API", T, "openai"),
+    _skill("MLOps", T),
+    _skill("MLflow", T),
+    _skill("Kubeflow", T),
+    _skill("Recommender Systems", T, "recommendation systems"),
+    _skill("Reinforcement Learning", T),
+    _skill("Time Series Analysis", T, "time series", "forecasting"),
+    _skill("Jupyter", T, "jupyter notebooks"),
+    # Cloud and infrastructure
+    _skill("AWS", T, "amazon web services"),
+    _skill("Microsoft Azure", T, "azure"),
+    _skill("Google Cloud Platform", T, "gcp", "google cloud"),
+    _skill("AWS Lambda", T, "lambda functions", exact=("Lambda",)),
+    _skill("Amazon S3", T, "s3"),
+    _skill("Amazon EC2", T, "ec2"),
+    _skill("Amazon ECS", T, "ecs", "fargate"),
+    _skill("Amazon EKS", T, "eks"),
+    _skill("CloudFormation", T, "aws cloudformation"),
+    _skill("Serverless", T, "serverless architecture"),
+    _skill("Docker", T, "docker compose", "docker-compose", "containerization"),
+    _skill("Kubernetes", T, "k8s", "kubectl"),
+    _skill("Helm", T, exact=("Helm",)),
+    _skill("Terraform", T),
+    _skill("Pulumi", T),
+    _skill("Ansible", T),
+    _skill("Chef", T, exact=("Chef",)),
+    _skill("Puppet", T, exact=("Puppet",)),
+    _skill("Infrastructure as Code", T, "iac"),
+    _skill("Linux", T, "ubuntu", "centos", "red hat", "rhel", "debian"),
+    _skill("Unix", T),
+    _skill("Nginx", T),
+    _skill("Apache HTTP Server", T, "apache httpd"),
+    _skill("Heroku", T),
+    _skill("Vercel", T),
+    _skill("Netlify", T),
+    _skill("Cloudflare", T),
+    _skill("OpenStack", T),
+    _skill("VMware", T, "vsphere"),
+    _skill("Networking", T, "tcp/ip", "dns", "load balancing"),
+    # DevOps and quality
+    _skill("CI/CD", T, "continuous integration", "continuous delivery", "continuous deployment"),
+    _skill("Jenkins", T),
+    _skill("GitHub Actions", T),
+    _skill("GitLab CI", T, "gitlab ci/cd", "gitlab"),
+    _skill("CircleCI", T),
+    _skill("Argo CD", T, "argocd"),
+    _skill("Git", T, "github", "version control"),
+    _skill("DevOps", T),
+    _skill("Site Reliability Engineering", T, "sre"),
+    _skill("Prometheus", T),
+    _skill("Grafana", T),
+    _skill("Datadog", T),
+    _skill("New Relic", T),
+    _skill("Splunk", T),
+    _skill("OpenTelemetry", T),
+    _skill("Observability", T),
+    _skill("Unit Testing", T, "unit tests", "tdd", "test-driven development", "test driven development"),
+    _skill("Test Automation", T, "automated testing", "qa automation"),
+    _skill("pytest", T),
+    _skill("JUnit", T),
+    _skill("Jest", T, exact=("Jest",)),
+    _skill("Cypress", T, exact=("Cypress",)),
+    _skill("Selenium", T),
+    _skill("Playwright", T),
+    _skill("Postman", T),
+    _skill("Performance Testing", T, "load testing", "jmeter", "k6"),
+    # Architecture and practices
+    _skill("System Design", T, "distributed systems", "software architecture"),
+    _skill("Event-Driven Architecture", T, "event driven architecture", "event sourcing", "cqrs"),
+    _skill("Object-Oriented Programming", T, "oop", "object oriented programming", "object-oriented design"),
+    _skill("Functional Programming", T),
+    _skill("Design Patterns", T),
+    _skill("Domain-Driven Design", T, "ddd", "domain driven design"),
+    _skill("Data Structures and Algorithms", T, "data structures", "algorithms"),
+    _skill("API Design", T),
+    _skill("Caching", T),
+    _skill("Concurrency", T, "multithreading", "parallel programming"),
+    _skill("Performance Optimization", T, "performance tuning", "profiling"),
+    _skill("Web Scraping", T, "scrapy", "beautifulsoup", "beautiful soup"),
+    _skill("Mobile Development", T, "ios development", "android development"),
+    _skill("iOS", T, exact=("iOS",)),
+    _skill("Android", T),
+    _skill("SwiftUI", T),
+    _skill("Jetpack Compose", T),
+    _skill("Unity", T, exact=("Unity",)),
+    _skill("Unreal Engine", T),
+    _skill("Embedded Systems", T, "firmware", "rtos"),
+    _skill("Blockchain", T, "web3", "ethereum", "smart contracts"),
+    _skill("Agile", T, "agile methodologies", "agile development"),
+    _skill("Scrum", T),
+    _skill("Kanban", T),
+    _skill("Jira", T),
+    _skill("Confluence", T),
+    _skill("Figma", T),
+    _skill("Sketch", T, exact=("Sketch",)),
+    _skill("Adobe Photoshop", T, "photoshop"),
+    _skill("Adobe Illustrator", T, "illustrator"),
+    _skill("UX Design", T, "ux", "user experience", "user research", "usability testing"),
+    _skill("UI Design", T, "user interface design"),
+    _skill("Wireframing", T, "prototyping"),
+    _skill("Accessibility", T, "wcag", "a11y"),
+    _skill("SEO", T, "search engine optimization"),
+    _skill("Salesforce", T),
+    _skill("SAP", T),
+    _skill("HubSpot", T),
+    # Security
+    _skill("Cybersecurity", T, "information security", "infosec", "security engineering"),
+    _skill("Penetration Testing", T, "pentesting", "pen testing"),
+    _skill("OWASP", T),
+    _skill("OAuth", T, "oauth2", "oauth 2.0", "openid connect", "oidc"),
+    _skill("Identity and Access Management", T, exact=("IAM",)),
+    _skill("Encryption", T, "cryptography", "tls", "ssl"),
+    _skill("SOC 2", T, "soc2"),
+    _skill("GDPR", T),
+    # Product and business
+    _skill("Product Management", T, "product roadmap", "roadmapping"),
+    _skill("Project Management", T, "program management"),
+    _skill("Technical Writing", T, "technical documentation"),
+    _skill("Digital Marketing", T, "ppc", "google ads", exact=("SEM",)),
+    _skill("Content Marketing", T, "copywriting"),
+    _skill("Financial Modeling", T, "financial modelling"),
+    _skill("Budgeting", T, "forecasting budgets", "budget management"),
+    _skill("Customer Success", T, "account management"),
+    _skill("Sales", T, "business development", exact=("Sales",)),
+    # Soft skills
+    _skill("Leadership", S, "team leadership", "technical leadership", "led a team", "people management"),
+    _skill("Communication", S, "communication skills", "written communication", "verbal communication"),
+    _skill("Collaboration", S, "teamwork", "cross-functional collaboration", "cross-functional teams"),
+    _skill("Problem Solving", S, "problem-solving", "troubleshooting"),
+    _skill("Mentoring", S, "mentorship", "coaching", "mentored"),
+    _skill("Stakeholder Management", S, "stakeholder communication", "managing stakeholders"),
+    _skill("Public Speaking", S, "presentations"),
+    _skill("Critical Thinking", S, "analytical thinking", "analytical skills"),
+    _skill("Time Management", S, "prioritization"),
+    _skill("Adaptability", S, "flexibility"),
+    _skill("Attention to Detail", S, "detail-oriented", "detail oriented"),
+    _skill("Negotiation", S),
+    _skill("Conflict Resolution", S),
+    _skill("Decision Making", S, "decision-making"),
+    _skill("Creativity", S, "creative thinking"),
+    _skill("Customer Focus", S, "customer-focused", "customer obsession"),
+    _skill("Ownership", S, "accountability"),
+    _skill("Strategic Thinking", S, "strategic planning"),
+    _skill("Hiring", S, "recruiting", "interviewing"),
+    # Spoken languages
+    _skill("English", L),
+    _skill("Spanish", L),
+    _skill("French", L),
+    _skill("German", L),
+    _skill("Portuguese", L),
+    _skill("Italian", L),
+    _skill("Dutch", L),
+    _skill("Mandarin", L, "mandarin chinese"),
+    _skill("Cantonese", L),
+    _skill("Japanese", L),
+    _skill("Korean", L),
+    _skill("Hindi", L),
+    _skill("Arabic", L),
+    _skill("Russian", L),
+    _skill("Polish", L, exact=("Polish",)),
+    _skill("Turkish", L),
+    _skill("Vietnamese", L),
+    _skill("Hebrew", L),
+    _skill("Swedish", L),
+    _skill("Sign Language", L, "asl", "american sign language"),
+    # Certifications
+    _skill("AWS Certified Solutions Architect", C, "aws solutions architect", "aws certified solutions architect associate", "aws certified solutions architect professional"),
+    _skill("AWS Certified Developer", C, "aws certified developer associate"),
+    _skill("AWS Certified Cloud Practitioner", C),
+    _skill("Microsoft Certified: Azure Administrator", C, "az-104", "azure administrator"),
+    _skill("Google Professional Cloud Architect", C, "professional cloud architect"),
+    _skill("Certified Kubernetes Administrator", C, "cka"),
+    _skill("Certified Kubernetes Application Developer", C, "ckad"),
+    _skill("PMP", C, "project management professional"),
+    _skill("Certified ScrumMaster", C, "csm", "scrum master", "certified scrum master", "psm"),
+    _skill("CISSP", C),
+    _skill("CISM", C),
+    _skill("CompTIA Security+", C, "security+", "comptia security plus"),
+    _skill("CompTIA A+", C, "a+ certification"),
+    _skill("CCNA", C, "cisco certified network associate"),
+    _skill("CPA", C, "certified public accountant"),
+    _skill("CFA", C, "chartered financial analyst"),
+    _skill("Six Sigma", C, "lean six sigma", "six sigma green belt", "six sigma black belt"),
+    _skill("ITIL", C),
+    _skill("Oracle Certified Professional", C, "ocp java", "oracle certified java programmer"),
+    _skill("Terraform Associate", C, "hashicorp certified terraform associate"),
+)
@@ -0,0 +1,159 @@
+"""
+Task Coalescing
+Single-flight execution and result caching for identical automation work
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence
+import logging
+
+from app.core.config import settings
+from app.core.redis_client import RedisClient, redis_client
+from app.models.automation import AutomationTask, TaskType
+
+logger = logging.getLogger(__name__)
+
+COALESCING_KEY_PREFIX = "automation:singleflight"
+
+# task_config fields that determine the output of a task type. Anything else
+# in task_config (user, application, callbacks) does not change the result,
+# so tasks agreeing on these fields can share one execution.
+COALESCED_TASK_FIELDS: Dict[str, Sequence[str]] = {
+    TaskType.COMPANY_RESEARCH: ("company_id", "company_name", "company_domain"),
+    TaskType.SKILLS_EXTRACTION: ("source_type", "source_id", "source_hash", "job_posting_ids"),
+}
+
+# Join the in-flight execution if there is one; KEYS[1] is the in-flight
+# marker, KEYS[2] the waiter list
+ATTACH_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[1])
+    redis.call('EXPIRE', KEYS[2], tonumber(ARGV[2]))
+    return 1
+end
+return 0
+"""
+
+# Take all waiters and clear the in-flight marker (if still ours) atomically,
+# so no task can attach after the leader has collected its waiters
+FINISH_SCRIPT = """
+local waiters = redis.call('LRANGE', KEYS[2], 0, -1)
+redis.call('DEL', KEYS[2])
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+return waiters
+"""
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def coalescing_key(task_type: str, task_config: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Canonical hash of a task's type and result-relevant config.
+
+    Returns None for task types that are not coalesced or when none of the
+    relevant fields are present.
+    """
+    fields = COALESCED_TASK_FIELDS.get(task_type)
+    if not fields:
+        return None
+    config = task_config or {}
+    relevant = {field: _canonical(config[field]) for field in fields if config.get(field) is not None}
+    if not relevant:
+        return None
+    payload = json.dumps(
+        {"task_type": task_type, "config": relevant},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TaskCoalescer:
+    """Redis-backed single-flight groups for automation tasks.
+
+    The first task with a given key becomes the leader and runs the handler;
+    duplicates arriving meanwhile attach to its waiter list and are completed
+    with the leader's result. Completed results stay cached for
+    TASK_RESULT_CACHE_TTL_SECONDS and are served to later duplicates.
+    """
+
+    def __init__(
+        self,
+        client: RedisClient = redis_client,
+        key_prefix: str = COALESCING_KEY_PREFIX,
+        result_ttl: int = settings.TASK_RESULT_CACHE_TTL_SECONDS,
+        lease_seconds: int = settings.WORKER_TASK_TIMEOUT_SECONDS * 2,
+    ):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self._attach_script = None
+        self._finish_script = None
+
+    def key_for(self, task: AutomationTask) -> Optional[str]:
+        return coalescing_key(task.task_type, task.task_config)
+
+    def _keys(self, key: str) -> List[str]:
+        return [f"{self.key_prefix}:{key}:leader", f"{self.key_prefix}:{key}:waiters"]
+
+    async def get_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached {"task_id", "result_data"} of a completed execution"""
+        return await self.client.get_cache(f"{self.key_prefix}:{key}:result")
+
+    async def acquire(self, key: str, task_id: str) -> bool:
+        """Try to become the leader for key"""
+        client = await self.client.get_client()
+        leader_key, _ = self._keys(key)
+        return bool(await client.set(leader_key, str(task_id), nx=True, ex=self.lease_seconds))
+
+    async def attach(self, key: str, task_id: str) -> bool:
+        """Attach to the in-flight leader; False if there is none anymore"""
+        client = await self.client.get_client()
+        if self._attach_script is None:
+            self._attach_script = client.register_script(ATTACH_SCRIPT)
+        attached = await self._attach_script(
+            keys=self._keys(key), args=[str(task_id), self.lease_seconds], client=client
+        )
+        return bool(attached)
+
+    async def finish(
+        self, key: str, task_id: str, result_data: Optional[Dict[str, Any]]
+    ) -> List[str]:
+        """Cache the leader's result and hand back the attached task ids"""
+        await self.client.set_cache(
+            f"{self.key_prefix}:{key}:result",
+            {"task_id": str(task_id), "result_data": result_data},
+            expiry=self.result_ttl,
+        )
+        return await self._take_waiters(key, task_id)
+
+    async def abandon(self, key: str, task_id: str) -> List[str]:
+        """Give up leadership after a failure and hand back the attached task ids"""
+        return await self._take_waiters(key, task_id)
+
+    async def _take_waiters(self, key: str, task_id: str) -> List[str]:
+        client = await self.client.get_client()
+        if self._finish_script is None:
+            self._finish_script = client.register_script(FINISH_SCRIPT)
+        return await self._finish_script(keys=self._keys(key), args=[str(task_id)], client=client)
+
+
+def coalesced_result(result_data: Optional[Dict[str, Any]], source_task_id: str) -> Dict[str, Any]:
+    """Result data recorded on a task served by another task's execution"""
+    return {**(result_data or {}), "coalesced_from_task_id": str(source_task_id)}
+
+
+# Global coalescer instance
+task_coalescer = TaskCoalescer()
@@ -0,0 +1,162 @@
+"""
+Task Counters
+Per-user automation task counts kept in Redis hashes
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis_client import RedisClient, redis_client
+from app.models.automation import AutomationTask, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+TASK_COUNTERS_KEY_PREFIX = "automation:counters:user"
+TASK_COUNTERS_RECONCILE_LEASE_KEY = "automation:counters:reconcile"
+
+TOTAL_FIELD = "total"
+STATUS_FIELD_PREFIX = "status:"
+TYPE_FIELD_PREFIX = "type:"
+
+
+class TaskCounters:
+    """Maintains total, per-status and per-type task counts for each user.
+
+    Every task state transition adjusts the owner's hash with HINCRBY inside
+    a MULTI block, so the dashboard reads one hash instead of grouping over
+    automation_tasks. Periodic reconciliation rewrites the hashes from
+    Postgres to correct any drift (e.g. increments lost while Redis was down).
+    """
+
+    def __init__(self, client: RedisClient = redis_client, key_prefix: str = TASK_COUNTERS_KEY_PREFIX):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def key_for(self, user_id: Any) -> str:
+        return f"{self.key_prefix}:{user_id}"
+
+    async def record_created(self, user_id: Any, task_types: Iterable[str]) -> None:
+        """Count newly created (pending) tasks"""
+        by_type: Dict[str, int] = defaultdict(int)
+        for task_type in task_types:
+            by_type[task_type] += 1
+        created = sum(by_type.values())
+        if not created:
+            return
+
+        key = self.key_for(user_id)
+        redis = await self.client.get_client()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(key, TOTAL_FIELD, created)
+            pipe.hincrby(key, STATUS_FIELD_PREFIX + TaskStatus.PENDING, created)
+            for task_type, count in by_type.items():
+                pipe.hincrby(key, TYPE_FIELD_PREFIX + task_type, count)
+            await pipe.execute()
+
+    async def record_transition(self, tasks: Iterable[AutomationTask], from_status: str) -> None:
+        """Move tasks from from_status to their current status"""
+        deltas: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for task in tasks:
+            if task.status == from_status:
+                continue
+            user_deltas = deltas[self.key_for(task.user_id)]
+            user_deltas[STATUS_FIELD_PREFIX + from_status] -= 1
+            user_deltas[STATUS_FIELD_PREFIX + task.status] += 1
+        if not deltas:
+            return
+
+        redis = await self.client.get_client()
+        async with redis.pipeline(transaction=True) as pipe:
+            for key, fields in deltas.items():
+                for field, delta in fields.items():
+                    if delta:
+                        pipe.hincrby(key, field, delta)
+            await pipe.execute()
+
+    async def get(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        """Counts for a user, or None if the user has no counters yet"""
+        redis = await self.client.get_client()
+        fields = await redis.hgetall(self.key_for(user_id))
+        if not fields:
+            return None
+        return self._parse(fields)
+
+    async def count_rows(self, session: AsyncSession, user_id: Any) -> list:
+        """(status, task_type, count) rows for one user, straight from Postgres"""
+        stmt = (
+            select(AutomationTask.status, AutomationTask.task_type, func.count())
+            .where(AutomationTask.user_id == user_id)
+            .group_by(AutomationTask.status, AutomationTask.task_type)
+        )
+        return list((await session.execute(stmt)).all())
+
+    def counts_from_rows(self, rows) -> Dict[str, Any]:
+        return self._parse(self._fields(rows))
+
+    async def reconcile_user(self, session: AsyncSession, user_id: Any) -> Dict[str, Any]:
+        """Rebuild one user's counters from Postgres and return them"""
+        fields = self._fields(await self.count_rows(session, user_id))
+        await self._replace({self.key_for(user_id): fields})
+        return self._parse(fields)
+
+    async def reconcile_all(self, session: AsyncSession) -> int:
+        """Rebuild every user's counters from Postgres; returns users reconciled"""
+        stmt = select(
+            AutomationTask.user_id,
+            AutomationTask.status,
+            AutomationTask.task_type,
+            func.count(),
+        ).group_by(AutomationTask.user_id, AutomationTask.status, AutomationTask.task_type)
+        rows_by_user: Dict[Any, list] = defaultdict(list)
+        for user_id, status, task_type, count in (await session.execute(stmt)).all():
+            rows_by_user[user_id].append((status, task_type, count))
+
+        await self._replace(
+            {self.key_for(user_id): self._fields(rows) for user_id, rows in rows_by_user.items()}
+        )
+        logger.info(f"Reconciled task counters for {len(rows_by_user)} users")
+        return len(rows_by_user)
+
+    async def acquire_reconcile_lease(self, seconds: int) -> bool:
+        """Let only one worker reconcile per period"""
+        redis = await self.client.get_client()
+        return bool(await redis.set(TASK_COUNTERS_RECONCILE_LEASE_KEY, 1, nx=True, ex=seconds))
+
+    async def _replace(self, hashes: Dict[str, Dict[str, int]]) -> None:
+        redis = await self.client.get_client()
+        async with redis.pipeline(transaction=True) as pipe:
+            for key, fields in hashes.items():
+                pipe.delete(key)
+                if fields:
+                    pipe.hset(key, mapping=fields)
+            await pipe.execute()
+
+    @staticmethod
+    def _fields(rows) -> Dict[str, int]:
+        fields: Dict[str, int] = defaultdict(int)
+        for status, task_type, count in rows:
+            fields[TOTAL_FIELD] += count
+            fields[STATUS_FIELD_PREFIX + status] += count
+            fields[TYPE_FIELD_PREFIX + task_type] += count
+        return dict(fields)
+
+    @staticmethod
+    def _parse(fields: Dict[str, Any]) -> Dict[str, Any]:
+        counts: Dict[str, Any] = {"total": 0, "tasks_by_status": {}, "tasks_by_type": {}}
+        for field, value in fields.items():
+            value = int(value)
+            if field == TOTAL_FIELD:
+                counts["total"] = value
+            elif value and field.startswith(STATUS_FIELD_PREFIX):
+                counts["tasks_by_status"][field[len(STATUS_FIELD_PREFIX):]] = value
+            elif value and field.startswith(TYPE_FIELD_PREFIX):
+                counts["tasks_by_type"][field[len(TYPE_FIELD_PREFIX):]] = value
+        return counts
+
+
+# Global counters instance
+task_counters = TaskCounters()
@@ -0,0 +1,153 @@
+"""
+Task Events
+Redis pub/sub fan-out of automation task status transitions
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+import logging
+
+from app.core.config import settings
+from app.core.redis_client import RedisClient, redis_client
+from app.models.automation import AutomationTask, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+TASK_EVENTS_CHANNEL_PREFIX = "automation:events:user"
+
+
+def user_channel(user_id: Any) -> str:
+    return f"{TASK_EVENTS_CHANNEL_PREFIX}:{user_id}"
+
+
+def task_event(task: AutomationTask) -> Dict[str, Any]:
+    """Event payload describing a task's current state"""
+    event = {
+        "task_id": str(task.id),
+        "task_type": task.task_type,
+        "application_id": str(task.application_id) if task.application_id else None,
+        "status": task.status,
+        "retry_count": task.retry_count,
+        "scheduled_at": task.scheduled_at,
+        "at": datetime.utcnow(),
+    }
+    if task.status == TaskStatus.COMPLETED:
+        event["result_data"] = task.result_data
+    elif task.error_message and task.status in (TaskStatus.PENDING, TaskStatus.DEAD_LETTER):
+        event["error_message"] = task.error_message
+    return event
+
+
+async def publish_task_events(
+    tasks: Iterable[AutomationTask], client: RedisClient = redis_client
+) -> None:
+    """Publish the state of each task to its owner's channel in one pipeline"""
+    tasks = list(tasks)
+    if not tasks:
+        return
+    redis = await client.get_client()
+    async with redis.pipeline(transaction=False) as pipe:
+        for task in tasks:
+            pipe.publish(user_channel(task.user_id), json.dumps(task_event(task), default=str))
+        await pipe.execute()
+
+
+class TaskEventBroker:
+    """Shares one Redis pub/sub connection between all streaming clients.
+
+    A user's channel is subscribed while at least one of their streams is
+    open, and every message is copied into the bounded queue of each local
+    stream. Idle streams therefore cost a queue each, not a Redis connection.
+    """
+
+    def __init__(
+        self,
+        client: RedisClient = redis_client,
+        queue_size: int = settings.TASK_EVENTS_QUEUE_SIZE,
+    ):
+        self.client = client
+        self.queue_size = queue_size
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._lock = asyncio.Lock()
+        self._has_channels = asyncio.Event()
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: Any) -> AsyncIterator[asyncio.Queue]:
+        """Queue receiving the user's task events for the duration of the block"""
+        channel = user_channel(user_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        async with self._lock:
+            await self._ensure_started()
+            queues = self._subscribers.setdefault(channel, set())
+            if not queues:
+                await self._pubsub.subscribe(channel)
+                self._has_channels.set()
+            queues.add(queue)
+        try:
+            yield queue
+        finally:
+            async with self._lock:
+                queues = self._subscribers.get(channel)
+                if queues is not None:
+                    queues.discard(queue)
+                    if not queues:
+                        del self._subscribers[channel]
+                        try:
+                            await self._pubsub.unsubscribe(channel)
+                        except Exception as e:
+                            logger.warning(f"Failed to unsubscribe from {channel}: {e}")
+
+    @property
+    def stream_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    async def _ensure_started(self) -> None:
+        if self._pubsub is None:
+            redis = await self.client.get_client()
+            self._pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self) -> None:
+        while True:
+            if not self._pubsub.subscribed:
+                self._has_channels.clear()
+                await self._has_channels.wait()
+                continue
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Task event subscription error: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is not None and message.get("type") == "message":
+                self._dispatch(message["channel"], message["data"])
+
+    def _dispatch(self, channel: str, data: str) -> None:
+        for queue in self._subscribers.get(channel, ()):
+            if queue.full():
+                # A stalled client loses its oldest event rather than
+                # buffering without bound
+                queue.get_nowait()
+            queue.put_nowait(data)
+
+
+# Global broker instance (gateway side)
+task_event_broker = TaskEventBroker()
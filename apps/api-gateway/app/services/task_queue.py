@@ -0,0 +1,256 @@
+"""
+Automation Task Queue
+Postgres-backed queue operations for automation tasks
+"""
+
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence
+import logging
+import random
+
+from sqlalchemy import case, func, literal_column, null, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.automation import AutomationTask, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+
+def status_literal(status: str):
+    """Task status as an inline SQL literal.
+
+    The column is the task_status enum in Postgres, so bound VARCHAR
+    parameters don't compare against it; literals also let the planner match
+    the partial index predicates (status = 'pending' / 'running').
+    """
+    return literal_column(f"'{status}'")
+
+
+async def claim_tasks(
+    session: AsyncSession,
+    task_types: Sequence[str],
+    batch_size: int,
+    task_ids: Optional[Sequence[str]] = None,
+) -> List[AutomationTask]:
+    """Claim up to batch_size due pending tasks and mark them running.
+
+    Tasks are taken in priority order (lower value first), then by due time.
+    Rows locked by other workers are skipped rather than waited on, so any
+    number of workers can claim concurrently without contending. Served by
+    the partial index idx_automation_tasks_claim.
+
+    With task_ids, only those tasks are candidates (the fair dispatcher has
+    already chosen them); ids that are no longer pending are simply skipped.
+    """
+    if not task_types or batch_size <= 0:
+        return []
+
+    conditions = [
+        AutomationTask.status == status_literal(TaskStatus.PENDING),
+        AutomationTask.scheduled_at <= func.now(),
+        AutomationTask.task_type.in_(task_types),
+    ]
+    if task_ids is not None:
+        if not task_ids:
+            return []
+        conditions.append(AutomationTask.id.in_(list(task_ids)))
+
+    due = (
+        select(AutomationTask.id)
+        .where(*conditions)
+        .order_by(AutomationTask.priority, AutomationTask.scheduled_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .cte("due")
+    )
+    stmt = (
+        update(AutomationTask)
+        .where(AutomationTask.id == due.c.id)
+        .values(status=status_literal(TaskStatus.RUNNING), started_at=func.now())
+        .returning(AutomationTask)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.scalars(stmt)
+    return list(result.all())
+
+
+async def complete_task(
+    session: AsyncSession,
+    task: AutomationTask,
+    result_data: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """Mark a running task completed. Returns False if the task was not running."""
+    stmt = (
+        update(AutomationTask)
+        .where(
+            AutomationTask.id == task.id,
+            AutomationTask.status == status_literal(TaskStatus.RUNNING),
+        )
+        .values(
+            status=status_literal(TaskStatus.COMPLETED),
+            completed_at=func.now(),
+            error_message=None,
+            result_data=result_data,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    return result.rowcount > 0
+
+
+async def complete_tasks(
+    session: AsyncSession,
+    task_ids: Sequence[str],
+    result_data: Optional[Dict[str, Any]] = None,
+) -> List[AutomationTask]:
+    """Mark several running tasks completed with the same result"""
+    if not task_ids:
+        return []
+    stmt = (
+        update(AutomationTask)
+        .where(
+            AutomationTask.id.in_(task_ids),
+            AutomationTask.status == status_literal(TaskStatus.RUNNING),
+        )
+        .values(
+            status=status_literal(TaskStatus.COMPLETED),
+            completed_at=func.now(),
+            error_message=None,
+            result_data=result_data,
+        )
+        .returning(AutomationTask)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.scalars(stmt)
+    return list(result.all())
+
+
+async def release_tasks(session: AsyncSession, task_ids: Sequence[str]) -> List[AutomationTask]:
+    """Return running tasks to pending, due now, without counting a retry"""
+    if not task_ids:
+        return []
+    stmt = (
+        update(AutomationTask)
+        .where(
+            AutomationTask.id.in_(task_ids),
+            AutomationTask.status == status_literal(TaskStatus.RUNNING),
+        )
+        .values(status=status_literal(TaskStatus.PENDING), scheduled_at=func.now(), started_at=None)
+        .returning(AutomationTask)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.scalars(stmt)
+    return list(result.all())
+
+
+def retry_delay_seconds(retry_count: int) -> float:
+    """Exponential backoff with jitter for the given retry attempt.
+
+    The delay doubles per attempt up to TASK_RETRY_MAX_DELAY_SECONDS. Half of
+    it is fixed and half is random, so retries always back off but tasks that
+    failed together (e.g. during an outage) do not all come back at once.
+    """
+    delay = min(
+        settings.TASK_RETRY_MAX_DELAY_SECONDS,
+        settings.TASK_RETRY_BASE_DELAY_SECONDS * (2 ** retry_count),
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+async def fail_task(
+    session: AsyncSession,
+    task: AutomationTask,
+    error_message: str,
+    retryable: bool = True,
+) -> Optional[AutomationTask]:
+    """Record a task failure.
+
+    While retries remain the task goes back to pending with scheduled_at
+    pushed out by retry_delay_seconds(). Once exhausted (or when the failure
+    is not retryable) it is moved to dead_letter with its error message.
+    Returns the updated task, or None if it was no longer running.
+    """
+    retry_count = task.retry_count or 0
+    max_retries = task.max_retries if task.max_retries is not None else 3
+
+    if retryable and retry_count < max_retries:
+        delay = retry_delay_seconds(retry_count)
+        values = {
+            "status": status_literal(TaskStatus.PENDING),
+            "retry_count": retry_count + 1,
+            "scheduled_at": func.now() + timedelta(seconds=delay),
+            "started_at": None,
+            "error_message": error_message,
+        }
+    else:
+        values = {
+            "status": status_literal(TaskStatus.DEAD_LETTER),
+            "completed_at": func.now(),
+            "error_message": error_message,
+        }
+
+    stmt = (
+        update(AutomationTask)
+        .where(
+            AutomationTask.id == task.id,
+            AutomationTask.status == status_literal(TaskStatus.RUNNING),
+        )
+        .values(**values)
+        .returning(AutomationTask)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.scalars(stmt)
+    return result.one_or_none()
+
+
+STALE_TASK_ERROR = "worker lost (stale running task)"
+
+
+async def requeue_stale_tasks(session: AsyncSession, timeout_seconds: int) -> List[AutomationTask]:
+    """Retry tasks stuck in running (e.g. after a worker crash) like failures.
+
+    A task that kills or hangs its worker counts a retry each time it is
+    found stale: it goes back to pending with the same backoff as
+    fail_task(), computed per row, and once its retries are exhausted it
+    is moved to dead_letter instead of being re-run forever.
+    """
+    retry_count = func.coalesce(AutomationTask.retry_count, 0)
+    exhausted = retry_count >= func.coalesce(AutomationTask.max_retries, 3)
+    # retry_delay_seconds() in SQL: half fixed, half random
+    delay = func.least(
+        settings.TASK_RETRY_MAX_DELAY_SECONDS,
+        settings.TASK_RETRY_BASE_DELAY_SECONDS * func.power(2, retry_count),
+    )
+    jittered_delay = delay / 2 + func.random() * delay / 2
+    stmt = (
+        update(AutomationTask)
+        .where(
+            AutomationTask.status == status_literal(TaskStatus.RUNNING),
+            AutomationTask.started_at < func.now() - timedelta(seconds=timeout_seconds),
+        )
+        .values(
+            status=case(
+                (exhausted, literal_column(f"'{TaskStatus.DEAD_LETTER}'::task_status")),
+                else_=literal_column(f"'{TaskStatus.PENDING}'::task_status"),
+            ),
+            retry_count=case((exhausted, retry_count), else_=retry_count + 1),
+            scheduled_at=case(
+                (exhausted, AutomationTask.scheduled_at),
+                else_=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, jittered_delay),
+            ),
+            started_at=case((exhausted, AutomationTask.started_at), else_=null()),
+            completed_at=case((exhausted, func.now()), else_=AutomationTask.completed_at),
+            error_message=STALE_TASK_ERROR,
+        )
+        .returning(AutomationTask)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.scalars(stmt)
+    stale = list(result.all())
+    if stale:
+        dead = sum(1 for task in stale if task.status == TaskStatus.DEAD_LETTER)
+        logger.warning(
+            f"Requeued {len(stale) - dead} stale automation tasks, moved {dead} to dead_letter"
+        )
+    return stale
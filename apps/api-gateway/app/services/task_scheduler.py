@@ -0,0 +1,147 @@
+"""
+Delayed Task Scheduler
+Redis sorted-set index of pending automation tasks keyed by due time
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis_client import RedisClient, redis_client
+from app.models.automation import AutomationTask, TaskStatus
+from app.services.task_queue import status_literal
+
+logger = logging.getLogger(__name__)
+
+DELAYED_TASKS_KEY_PREFIX = "automation:tasks:due"
+
+RECONCILE_CHUNK_SIZE = 1000
+DEFAULT_TASK_PRIORITY = 5
+
+# (task_type, task_id, due_at, user_id, priority)
+ScheduleEntry = Tuple[str, str, Optional[datetime], str, int]
+
+
+def _due_score(due_at: Optional[datetime]) -> float:
+    return due_at.timestamp() if due_at is not None else time.time()
+
+
+def due_member(user_id: Any, priority: int, task_id: Any) -> str:
+    """Due index member; carries the owner and priority for the fair dispatcher"""
+    return f"{user_id}:{int(priority or DEFAULT_TASK_PRIORITY)}:{task_id}"
+
+
+def schedule_entry(task: AutomationTask) -> ScheduleEntry:
+    return (task.task_type, str(task.id), task.scheduled_at, str(task.user_id), task.priority)
+
+
+class DelayedTaskScheduler:
+    """Mirrors pending automation tasks into one sorted set per task type.
+
+    Scores are due times as epoch seconds, so workers learn when the next task
+    is due from Redis instead of polling automation_tasks. Postgres stays the
+    source of truth: due entries are moved into per-user queues by the fair
+    dispatcher, and the worker then claims the chosen tasks from the database.
+    Entries for tasks that were cancelled or claimed elsewhere are harmless
+    and simply yield nothing.
+    """
+
+    def __init__(self, client: RedisClient = redis_client, key_prefix: str = DELAYED_TASKS_KEY_PREFIX):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def key_for(self, task_type: str) -> str:
+        return f"{self.key_prefix}:{task_type}"
+
+    async def schedule(
+        self,
+        task_type: str,
+        task_id: str,
+        user_id: str,
+        priority: int,
+        due_at: Optional[datetime] = None,
+    ) -> None:
+        """Add or move a task in the due index (due now if no due time given)"""
+        await self.schedule_many([(task_type, task_id, due_at, user_id, priority)])
+
+    async def schedule_many(self, entries: Iterable[ScheduleEntry]) -> int:
+        """Add (task_type, task_id, due_at, user_id, priority) entries in a single pipeline"""
+        by_key: Dict[str, Dict[str, float]] = {}
+        for task_type, task_id, due_at, user_id, priority in entries:
+            member = due_member(user_id, priority, task_id)
+            by_key.setdefault(self.key_for(task_type), {})[member] = _due_score(due_at)
+        if not by_key:
+            return 0
+
+        client = await self.client.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for key, mapping in by_key.items():
+                pipe.zadd(key, mapping)
+            await pipe.execute()
+        return sum(len(mapping) for mapping in by_key.values())
+
+    async def seconds_until_next_due(self, task_types: Sequence[str]) -> Optional[float]:
+        """Seconds until the earliest entry across task types is due (None if empty)"""
+        if not task_types:
+            return None
+        client = await self.client.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for task_type in task_types:
+                pipe.zrange(self.key_for(task_type), 0, 0, withscores=True)
+            heads = await pipe.execute()
+
+        scores = [head[0][1] for head in heads if head]
+        if not scores:
+            return None
+        return max(0.0, min(scores) - time.time())
+
+    async def reconcile(
+        self, session: AsyncSession, task_types: Sequence[str], overdue_seconds: Optional[float] = None
+    ) -> int:
+        """Re-add every pending task of the given types from Postgres.
+
+        Run on worker startup so tasks created while Redis was unavailable (or
+        lost with it) are indexed again, and periodically with overdue_seconds
+        for just the tasks that should have run by now. ZADD is idempotent, so
+        concurrent reconciliation by several workers is safe.
+        """
+        if not task_types:
+            return 0
+
+        stmt = (
+            select(
+                AutomationTask.task_type,
+                AutomationTask.id,
+                AutomationTask.scheduled_at,
+                AutomationTask.user_id,
+                AutomationTask.priority,
+            )
+            .where(
+                AutomationTask.status == status_literal(TaskStatus.PENDING),
+                AutomationTask.task_type.in_(task_types),
+            )
+            .execution_options(yield_per=RECONCILE_CHUNK_SIZE)
+        )
+        if overdue_seconds is not None:
+            stmt = stmt.where(
+                AutomationTask.scheduled_at <= func.now() - timedelta(seconds=overdue_seconds)
+            )
+        total = 0
+        result = await session.stream(stmt)
+        async for partition in result.partitions(RECONCILE_CHUNK_SIZE):
+            total += await self.schedule_many(
+                (task_type, str(task_id), scheduled_at, str(user_id), priority)
+                for task_type, task_id, scheduled_at, user_id, priority in partition
+            )
+
+        if total or overdue_seconds is None:
+            logger.info(f"Reconciled {total} pending tasks into the delayed scheduler")
+        return total
+
+
+# Global scheduler instance
+task_scheduler = DelayedTaskScheduler()
@@ -0,0 +1,11 @@
+# Automation Workers Package
+# Job Application Assistance System
+
+from .runtime import PermanentTaskError, TaskHandlerRegistry, TaskWorker, task_registry
+
+__all__ = [
+    "PermanentTaskError",
+    "TaskHandlerRegistry",
+    "TaskWorker",
+    "task_registry",
+]
@@ -0,0 +1,72 @@
+"""
+Automation worker entrypoint
+
+    python -m app.workers
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.core.config import settings
+from app.core.database import close_db
+from app.core.redis_client import redis_client
+from app.services.analytics_rollup import analytics_rollup
+from app.services.browser_session_pool import browser_session_pool
+from app.services.crawl_scheduler import crawl_scheduler
+from app.services.fair_scheduler import fair_dispatcher
+from app.services.funnel_views import funnel_views
+from app.services.generation_cache import generation_cache
+from app.services.llm_client import llm_client
+from app.services.scraper_client import scraper_client
+from app.services.skill_taxonomy import skill_taxonomy
+from app.services.task_coalescing import task_coalescer
+from app.services.task_counters import task_counters
+from app.services.task_events import publish_task_events
+from app.services.task_scheduler import task_scheduler
+from app.workers import handlers  # noqa: F401  (registers task handlers)
+from app.workers.runtime import TaskWorker
+
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    use_scheduler = settings.WORKER_USE_DELAYED_SCHEDULER
+    worker = TaskWorker(
+        scheduler=task_scheduler if use_scheduler else None,
+        dispatcher=fair_dispatcher if use_scheduler else None,
+        coalescer=task_coalescer,
+        event_publisher=publish_task_events,
+        counters=task_counters,
+        generation_cache=generation_cache,
+        crawl_scheduler=crawl_scheduler,
+        analytics_rollup=analytics_rollup,
+        funnel_views=funnel_views,
+        backfill_posting_skills=True,
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await skill_taxonomy.sync()
+    except Exception as e:
+        logger.error(f"Skill taxonomy sync failed: {e}")
+
+    try:
+        await worker.run()
+    finally:
+        await browser_session_pool.close()
+        await scraper_client.close()
+        await llm_client.close()
+        await close_db()
+        await redis_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
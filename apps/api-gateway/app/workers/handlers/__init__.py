@@ -0,0 +1,11 @@
+# Automation Task Handlers Package
+# Job Application Assistance System
+#
+# Importing this package registers every handler with the task registry.
+
+from . import discovery, skills
+
+__all__ = [
+    "discovery",
+    "skills",
+]
@@ -0,0 +1,68 @@
+"""
+Job Discovery Handler
+Crawls a saved search on one platform and ingests its new postings
+"""
+
+from typing import Any, Dict, Optional
+from uuid import UUID
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.automation import AutomationTask, TaskType
+from app.models.job import JobSearchPreference
+from app.services.crawl_scheduler import crawl_scheduler
+from app.services.job_discovery import fetch_search_pages, ingest_search_pages, search_crawlers
+from app.services.skill_extraction import queue_skills_extraction
+from app.services.task_counters import task_counters
+from app.services.task_scheduler import task_scheduler
+from app.workers.runtime import PermanentTaskError, task_registry
+
+logger = logging.getLogger(__name__)
+
+
+@task_registry.register(TaskType.JOB_DISCOVERY)
+async def run_job_discovery(task: AutomationTask) -> Optional[Dict[str, Any]]:
+    """Crawl the search, record the crawl in its source's history, and queue
+    skills extraction of the new postings.
+
+    task_config:
+        {"platform": p, "search_preference_id": id}   (the crawl scheduler also
+                                                        adds its expectations)
+    """
+    config = task.task_config or {}
+    platform = config.get("platform")
+    crawler = search_crawlers.get(platform) if platform else None
+    if crawler is None:
+        raise PermanentTaskError(f"No search crawler registered for platform {platform}")
+    try:
+        search_preference_id = UUID(str(config.get("search_preference_id")))
+    except ValueError as e:
+        raise PermanentTaskError(f"Invalid search preference id: {e}") from e
+
+    async with AsyncSessionLocal() as session:
+        search = await session.get(JobSearchPreference, search_preference_id)
+    if search is None or search.user_id != task.user_id:
+        raise PermanentTaskError(f"Search preference {search_preference_id} not found")
+
+    # Pages are fetched before any transaction opens; the writes are one short transaction
+    pages = await fetch_search_pages(platform, search, crawler)
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            result = await ingest_search_pages(session, platform, search, pages)
+            await crawl_scheduler.record_crawl(session, platform, search_preference_id, result)
+            task_entry = None
+            if result["job_posting_ids"]:
+                task_entry = await queue_skills_extraction(
+                    session, task.user_id, {"job_posting_ids": result["job_posting_ids"]},
+                    priority=settings.CRAWL_TASK_PRIORITY,
+                )
+
+    if task_entry is not None:
+        # Unindexed pending tasks are picked up by the workers' fallback reconcile
+        try:
+            await task_scheduler.schedule_many([task_entry])
+            await task_counters.record_created(task.user_id, [task_entry[0]])
+        except Exception as e:
+            logger.warning(f"Failed to index skills extraction task {task_entry[1]}: {e}")
+    return result
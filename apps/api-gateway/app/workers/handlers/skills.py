@@ -0,0 +1,36 @@
+"""
+Skills Extraction Handler
+Extracts skills from a user's resume or from job postings
+"""
+
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from app.core.database import AsyncSessionLocal
+from app.models.automation import AutomationTask, TaskType
+from app.services.skill_extraction import extract_posting_skills, extract_profile_skills
+from app.workers.runtime import PermanentTaskError, task_registry
+
+
+@task_registry.register(TaskType.SKILLS_EXTRACTION)
+async def run_skills_extraction(task: AutomationTask) -> Optional[Dict[str, Any]]:
+    """Extract skills for the task's target.
+
+    task_config:
+        {"source_type": "resume", ...}   the task user's resume_text (any
+                                         config without the keys below)
+        {"job_posting_ids": [...]}        those postings (e.g. an ingestion batch)
+        {"backfill": true, "limit": n}   up to n never-extracted postings
+    """
+    config = task.task_config or {}
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            if config.get("job_posting_ids") is not None:
+                try:
+                    job_posting_ids = [UUID(str(pid)) for pid in config["job_posting_ids"]]
+                except ValueError as e:
+                    raise PermanentTaskError(f"Invalid job posting id: {e}") from e
+                return await extract_posting_skills(session, job_posting_ids)
+            if config.get("backfill"):
+                return await extract_posting_skills(session, limit=int(config.get("limit", 1000)))
+            return await extract_profile_skills(session, task.user_id)
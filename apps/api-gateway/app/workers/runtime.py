@@ -0,0 +1,596 @@
+"""
+Automation Worker Runtime
+Claims automation tasks from Postgres and dispatches them to registered handlers
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.automation import AutomationTask
+from app.models.automation import TaskStatus
+from app.services.analytics_rollup import AnalyticsRollup
+from app.services.circuit_breaker import CircuitBreakerRegistry, CircuitState
+from app.services.crawl_scheduler import CrawlScheduler
+from app.services.fair_scheduler import FairTaskDispatcher
+from app.services.funnel_views import FunnelViews
+from app.services.generation_cache import GenerationCache
+from app.services.skill_extraction import extract_posting_skills
+from app.services.task_coalescing import TaskCoalescer, coalesced_result
+from app.services.task_counters import TaskCounters
+from app.services.task_queue import (
+    claim_tasks,
+    complete_task,
+    complete_tasks,
+    fail_task,
+    release_tasks,
+    requeue_stale_tasks,
+)
+from app.services.task_scheduler import DelayedTaskScheduler, schedule_entry
+
+logger = logging.getLogger(__name__)
+
+TaskHandler = Callable[[AutomationTask], Awaitable[Optional[Dict[str, Any]]]]
+EventPublisher = Callable[[Iterable[AutomationTask]], Awaitable[None]]
+
+
+class PermanentTaskError(Exception):
+    """Raised by handlers for failures that retrying cannot fix (e.g. bad input).
+
+    The task goes straight to dead_letter and does not count against the
+    task type's circuit breaker.
+    """
+
+
+class TaskHandlerRegistry:
+    """Maps task types to the coroutine that executes them"""
+
+    def __init__(self):
+        self._handlers: Dict[str, TaskHandler] = {}
+
+    def register(self, task_type: str) -> Callable[[TaskHandler], TaskHandler]:
+        """Decorator registering a handler for a task type"""
+        def decorator(handler: TaskHandler) -> TaskHandler:
+            if task_type in self._handlers:
+                raise ValueError(f"Handler already registered for task type {task_type}")
+            self._handlers[task_type] = handler
+            return handler
+        return decorator
+
+    def get(self, task_type: str) -> Optional[TaskHandler]:
+        return self._handlers.get(task_type)
+
+    @property
+    def task_types(self) -> List[str]:
+        return list(self._handlers)
+
+
+class TaskWorker:
+    """Async worker that claims due tasks and runs them with bounded concurrency.
+
+    Only as many tasks as there are free execution slots are claimed, so a
+    worker never holds locked-in work it cannot start.
+
+    With a delayed scheduler the worker sleeps until Redis reports the next
+    due task and only queries Postgres when something is due. Due tasks are
+    handed out by the fair dispatcher, which shares capacity between users by
+    subscription tier and caps each user's running tasks; every claim goes
+    through it, and a slow fallback poll only re-indexes overdue pending
+    tasks Redis may have lost. Without a scheduler it polls Postgres every
+    poll_interval.
+
+    Each task type has a circuit breaker: during a burst of failures the
+    worker stops claiming that type until a trial task succeeds, while failed
+    tasks wait out their retry backoff.
+
+    With a coalescer, identical tasks of coalesced types share one execution
+    (see TaskCoalescer) and recently completed results are reused.
+
+    With an event publisher, every status transition the worker makes is
+    published so clients can follow progress without polling. With task
+    counters, transitions also update the per-user dashboard counters, which
+    one worker at a time periodically reconciles against Postgres. With a
+    generation cache, one worker at a time periodically evicts its expired
+    and least recently used entries. With a crawl scheduler, one worker at a
+    time periodically creates the job_discovery tasks of due crawl sources.
+    With backfill_posting_skills, workers periodically extract the skills of
+    postings that have none yet (ones whose extraction task was never
+    queued, or reset by a migration).
+    """
+
+    def __init__(
+        self,
+        registry: Optional[TaskHandlerRegistry] = None,
+        concurrency: int = settings.WORKER_CONCURRENCY,
+        batch_size: int = settings.WORKER_BATCH_SIZE,
+        poll_interval: float = settings.WORKER_POLL_INTERVAL_SECONDS,
+        task_timeout: int = settings.WORKER_TASK_TIMEOUT_SECONDS,
+        scheduler: Optional[DelayedTaskScheduler] = None,
+        coalescer: Optional[TaskCoalescer] = None,
+        event_publisher: Optional[EventPublisher] = None,
+        counters: Optional[TaskCounters] = None,
+        dispatcher: Optional[FairTaskDispatcher] = None,
+        generation_cache: Optional[GenerationCache] = None,
+        crawl_scheduler: Optional[CrawlScheduler] = None,
+        analytics_rollup: Optional[AnalyticsRollup] = None,
+        funnel_views: Optional[FunnelViews] = None,
+        backfill_posting_skills: bool = False,
+    ):
+        self.registry = registry or task_registry
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.task_timeout = task_timeout
+        self.scheduler = scheduler
+        if scheduler is not None and dispatcher is None:
+            dispatcher = FairTaskDispatcher(scheduler)
+        self.dispatcher = dispatcher
+        self.coalescer = coalescer
+        self.event_publisher = event_publisher
+        self.counters = counters
+        self.generation_cache = generation_cache
+        self.crawl_scheduler = crawl_scheduler
+        self.analytics_rollup = analytics_rollup
+        self.funnel_views = funnel_views
+        self.backfill_posting_skills = backfill_posting_skills
+        self.breakers = CircuitBreakerRegistry()
+        self._in_flight: Set[asyncio.Task] = set()
+        # Task id -> (task type, user id) holding a fair dispatcher slot
+        self._dispatched: Dict[str, Tuple[str, str]] = {}
+        self._stopping = asyncio.Event()
+        self._next_fallback_poll = 0.0
+        self._type_offset = 0
+
+    async def run(self) -> None:
+        """Run the claim loop until stop() is called"""
+        task_types = self.registry.task_types
+        logger.info(
+            f"Worker started (concurrency={self.concurrency}, "
+            f"batch_size={self.batch_size}, task_types={task_types})"
+        )
+        loop = asyncio.get_running_loop()
+        next_stale_check = loop.time()
+        next_counter_reconcile = loop.time()
+        next_cache_eviction = loop.time()
+        next_crawl_schedule = loop.time()
+        next_analytics_rollup = loop.time()
+        next_funnel_refresh = loop.time()
+        next_skills_backfill = loop.time()
+
+        if self.scheduler is not None:
+            await self._reconcile()
+
+        while not self._stopping.is_set():
+            if loop.time() >= next_stale_check:
+                await self._requeue_stale()
+                next_stale_check = loop.time() + settings.WORKER_STALE_TASK_CHECK_SECONDS
+
+            if self.counters is not None and loop.time() >= next_counter_reconcile:
+                await self._reconcile_counters()
+                next_counter_reconcile = loop.time() + settings.TASK_COUNTERS_RECONCILE_SECONDS
+
+            if self.generation_cache is not None and loop.time() >= next_cache_eviction:
+                await self._evict_generation_cache()
+                next_cache_eviction = loop.time() + settings.GENERATION_CACHE_EVICT_SECONDS
+
+            if self.crawl_scheduler is not None and loop.time() >= next_crawl_schedule:
+                await self._schedule_crawls()
+                next_crawl_schedule = loop.time() + settings.CRAWL_SCHEDULE_SECONDS
+
+            if self.analytics_rollup is not None and loop.time() >= next_analytics_rollup:
+                await self._rollup_analytics()
+                next_analytics_rollup = loop.time() + settings.ANALYTICS_ROLLUP_SECONDS
+
+            if self.funnel_views is not None and loop.time() >= next_funnel_refresh:
+                await self._refresh_funnel_views()
+                next_funnel_refresh = loop.time() + settings.ANALYTICS_FUNNEL_REFRESH_SECONDS
+
+            if self.backfill_posting_skills and loop.time() >= next_skills_backfill:
+                await self._backfill_posting_skills()
+                next_skills_backfill = loop.time() + settings.SKILLS_BACKFILL_SECONDS
+
+            free_slots = self.concurrency - len(self._in_flight)
+            if free_slots <= 0:
+                await asyncio.wait(self._in_flight, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            limit = min(self.batch_size, free_slots)
+            try:
+                claimed = await self._claim_next(limit)
+            except Exception as e:
+                logger.error(f"Task claim failed: {e}")
+                claimed = []
+
+            await self._transitioned(claimed, TaskStatus.PENDING)
+            for task in claimed:
+                self._spawn(task)
+
+            # A full batch means more work is probably waiting; claim again at once
+            if len(claimed) < limit:
+                await self._sleep(await self._idle_delay())
+
+        if self._in_flight:
+            logger.info(f"Waiting for {len(self._in_flight)} in-flight tasks")
+            await asyncio.wait(self._in_flight)
+        logger.info("Worker stopped")
+
+    def stop(self) -> None:
+        """Stop claiming new work; in-flight tasks are allowed to finish"""
+        self._stopping.set()
+
+    async def _claim_next(self, limit: int) -> List[AutomationTask]:
+        if self.scheduler is None:
+            return await self._claim_polled(limit)
+
+        loop = asyncio.get_running_loop()
+        if loop.time() >= self._next_fallback_poll:
+            self._next_fallback_poll = loop.time() + settings.WORKER_FALLBACK_POLL_SECONDS
+            await self._reindex_overdue()
+
+        # Claiming around the dispatcher would bypass its fairness and caps,
+        # so without Redis nothing is claimed until it is back
+        try:
+            return await self._claim_signalled(limit)
+        except Exception as e:
+            logger.warning(f"Fair dispatcher unavailable, not claiming: {e}")
+            return []
+
+    async def _reindex_overdue(self) -> None:
+        """Put overdue pending tasks missing from Redis back into the due index"""
+        try:
+            async with AsyncSessionLocal() as session:
+                await self.scheduler.reconcile(
+                    session, self.registry.task_types, overdue_seconds=settings.WORKER_FALLBACK_POLL_SECONDS
+                )
+        except Exception as e:
+            logger.warning(f"Failed to re-index overdue tasks: {e}")
+
+    async def _claim_polled(self, limit: int) -> List[AutomationTask]:
+        """Claim from Postgres directly, skipping task types whose circuit is open"""
+        closed_types, trial_types = [], []
+        for task_type in self.registry.task_types:
+            breaker = self.breakers.get(task_type)
+            if breaker.state == CircuitState.CLOSED:
+                closed_types.append(task_type)
+            elif breaker.allowance(1):
+                trial_types.append(task_type)
+
+        claimed = await self._claim(closed_types, limit) if closed_types else []
+        for task_type in trial_types:
+            trial = await self._claim([task_type], 1) if len(claimed) < limit else []
+            self.breakers.get(task_type).release(1 - len(trial))
+            claimed.extend(trial)
+        return claimed
+
+    async def _claim_signalled(self, limit: int) -> List[AutomationTask]:
+        """Claim the tasks the fair dispatcher picks from the due index.
+
+        Dispatched tasks that can no longer be claimed (cancelled, or
+        dispatched twice after a re-index) give their user's slot back
+        straight away.
+        Entries of task types whose circuit is open stay in Redis.
+        """
+        task_types = self.registry.task_types
+        if not task_types:
+            return []
+        # Rotate the starting type so one busy type cannot starve the others
+        self._type_offset = (self._type_offset + 1) % len(task_types)
+        ordered_types = task_types[self._type_offset:] + task_types[:self._type_offset]
+
+        claimed: List[AutomationTask] = []
+        for task_type in ordered_types:
+            remaining = limit - len(claimed)
+            if remaining <= 0:
+                break
+            breaker = self.breakers.get(task_type)
+            allowed = breaker.allowance(remaining)
+            if not allowed:
+                continue
+            dispatched = await self.dispatcher.dispatch(task_type, allowed)
+            owners = {task.task_id: task.user_id for task in dispatched}
+            try:
+                batch = await self._claim([task_type], len(owners), list(owners)) if owners else []
+            except Exception:
+                await self._settle(task_type, list(owners.values()))
+                raise
+            breaker.release(allowed - len(batch))
+            for task in batch:
+                task_id = str(task.id)
+                self._dispatched[task_id] = (task_type, owners.pop(task_id))
+            await self._settle(task_type, list(owners.values()))
+            claimed.extend(batch)
+        return claimed
+
+    async def _claim(
+        self, task_types: List[str], batch_size: int, task_ids: Optional[List[str]] = None
+    ) -> List[AutomationTask]:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                return await claim_tasks(session, task_types, batch_size, task_ids)
+
+    async def _settle(self, task_type: str, user_ids: List[str]) -> None:
+        if not user_ids:
+            return
+        try:
+            await self.dispatcher.settle(task_type, user_ids)
+        except Exception as e:
+            # Reconciliation on the next worker start rebuilds the slot counts
+            logger.warning(f"Failed to release fair dispatcher slots: {e}")
+
+    async def _idle_delay(self) -> float:
+        if self.scheduler is None:
+            return self.poll_interval
+        # Open circuits leave their work queued; it must not keep the worker awake
+        task_types = [
+            task_type for task_type in self.registry.task_types
+            if self.breakers.get(task_type).state != CircuitState.OPEN
+        ]
+        try:
+            next_due = await self.dispatcher.seconds_until_next_work(task_types)
+        except Exception as e:
+            logger.warning(f"Delayed scheduler unavailable: {e}")
+            return self.poll_interval
+        if next_due is None:
+            return settings.DELAYED_SCHEDULER_MAX_SLEEP_SECONDS
+        return min(next_due, settings.DELAYED_SCHEDULER_MAX_SLEEP_SECONDS)
+
+    async def _reconcile(self) -> None:
+        try:
+            async with AsyncSessionLocal() as session:
+                await self.dispatcher.reconcile(session, self.registry.task_types)
+        except Exception as e:
+            logger.error(f"Delayed scheduler reconciliation failed: {e}")
+
+    async def _reconcile_counters(self) -> None:
+        try:
+            if not await self.counters.acquire_reconcile_lease(settings.TASK_COUNTERS_RECONCILE_SECONDS):
+                return
+            async with AsyncSessionLocal() as session:
+                await self.counters.reconcile_all(session)
+        except Exception as e:
+            logger.error(f"Task counter reconciliation failed: {e}")
+
+    async def _evict_generation_cache(self) -> None:
+        try:
+            if not await self.generation_cache.acquire_evict_lease(settings.GENERATION_CACHE_EVICT_SECONDS):
+                return
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    await self.generation_cache.evict(session)
+        except Exception as e:
+            logger.error(f"Generation cache eviction failed: {e}")
+
+    async def _rollup_analytics(self) -> None:
+        try:
+            if not await self.analytics_rollup.acquire_rollup_lease(settings.ANALYTICS_ROLLUP_SECONDS):
+                return
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    await self.analytics_rollup.run(session)
+        except Exception as e:
+            logger.error(f"Analytics rollup failed: {e}")
+
+    async def _refresh_funnel_views(self) -> None:
+        try:
+            if not await self.funnel_views.acquire_refresh_lease(settings.ANALYTICS_FUNNEL_REFRESH_SECONDS):
+                return
+            await self.funnel_views.refresh()
+        except Exception as e:
+            logger.error(f"Funnel view refresh failed: {e}")
+
+    async def _backfill_posting_skills(self) -> None:
+        try:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    await extract_posting_skills(session, limit=settings.SKILLS_BACKFILL_BATCH_SIZE)
+        except Exception as e:
+            logger.error(f"Posting skills backfill failed: {e}")
+
+    async def _schedule_crawls(self) -> None:
+        try:
+            if not await self.crawl_scheduler.acquire_schedule_lease(settings.CRAWL_SCHEDULE_SECONDS):
+                return
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    entries = await self.crawl_scheduler.schedule_due(session)
+        except Exception as e:
+            logger.error(f"Crawl scheduling failed: {e}")
+            return
+        if not entries:
+            return
+
+        if self.scheduler is not None:
+            try:
+                await self.scheduler.schedule_many(entries)
+            except Exception as e:
+                logger.warning(f"Failed to index crawl tasks in the delayed scheduler: {e}")
+        if self.counters is not None:
+            by_user: Dict[str, List[str]] = {}
+            for task_type, _, _, user_id, _ in entries:
+                by_user.setdefault(user_id, []).append(task_type)
+            try:
+                for user_id, task_types in by_user.items():
+                    await self.counters.record_created(user_id, task_types)
+            except Exception as e:
+                logger.warning(f"Failed to update task counters: {e}")
+
+    async def _index(self, tasks: List[AutomationTask]) -> None:
+        """Mirror tasks that went back to pending into the delayed scheduler"""
+        if self.scheduler is None or not tasks:
+            return
+        try:
+            await self.scheduler.schedule_many(schedule_entry(task) for task in tasks)
+        except Exception as e:
+            logger.warning(f"Failed to index tasks in the delayed scheduler: {e}")
+
+    def _spawn(self, task: AutomationTask) -> None:
+        execution = asyncio.create_task(self._run(task))
+        self._in_flight.add(execution)
+        execution.add_done_callback(self._in_flight.discard)
+
+    async def _run(self, task: AutomationTask) -> None:
+        try:
+            await self._execute(task)
+        finally:
+            slot = self._dispatched.pop(str(task.id), None)
+            if slot is not None:
+                await self._settle(slot[0], [slot[1]])
+
+    async def _execute(self, task: AutomationTask) -> None:
+        coalescing_key = None
+        if self.coalescer is not None:
+            coalescing_key = self.coalescer.key_for(task)
+        if coalescing_key is not None:
+            try:
+                served, is_leader = await self._join_coalesced(task, coalescing_key)
+            except Exception as e:
+                logger.warning(f"Task coalescing unavailable for task {task.id}: {e}")
+                served, is_leader = False, False
+            if served:
+                return
+            if not is_leader:
+                coalescing_key = None
+
+        handler = self.registry.get(task.task_type)
+        breaker = self.breakers.get(task.task_type)
+        try:
+            if handler is None:
+                raise PermanentTaskError(f"No handler registered for task type {task.task_type}")
+            result_data = await asyncio.wait_for(handler(task), timeout=self.task_timeout)
+        except Exception as e:
+            error_message = str(e) or e.__class__.__name__
+            retryable = not isinstance(e, PermanentTaskError)
+            if retryable:
+                breaker.record_failure()
+            else:
+                breaker.release(1)
+            if coalescing_key is not None:
+                await self._abandon_coalesced(task, coalescing_key)
+            updated = await self._record(fail_task, task, error_message, retryable)
+            if updated is None:
+                return
+            await self._transitioned([updated], TaskStatus.RUNNING)
+            if updated.status == TaskStatus.PENDING:
+                logger.warning(
+                    f"Task {task.id} ({task.task_type}) failed, retry "
+                    f"{updated.retry_count}/{updated.max_retries} at {updated.scheduled_at}: "
+                    f"{error_message}"
+                )
+                await self._index([updated])
+            else:
+                logger.error(
+                    f"Task {task.id} ({task.task_type}) moved to dead letter: {error_message}"
+                )
+            return
+
+        breaker.record_success()
+        await self._complete(task, result_data)
+        if coalescing_key is not None:
+            await self._finish_coalesced(task, coalescing_key, result_data)
+
+    async def _join_coalesced(self, task: AutomationTask, key: str) -> Tuple[bool, bool]:
+        """Serve a task from the result cache or an in-flight duplicate.
+
+        Returns (served, is_leader). An attached task stays running until the
+        leader completes it; if the leader dies, the stale task check requeues it.
+        """
+        for _ in range(3):
+            cached = await self.coalescer.get_result(key)
+            if cached is not None:
+                await self._complete(
+                    task, coalesced_result(cached.get("result_data"), cached.get("task_id"))
+                )
+                logger.info(f"Task {task.id} ({task.task_type}) served from result cache")
+                return True, False
+            if await self.coalescer.acquire(key, str(task.id)):
+                return False, True
+            if await self.coalescer.attach(key, str(task.id)):
+                logger.info(f"Task {task.id} ({task.task_type}) attached to in-flight duplicate")
+                return True, False
+        return False, False
+
+    async def _finish_coalesced(
+        self, task: AutomationTask, key: str, result_data: Optional[Dict[str, Any]]
+    ) -> None:
+        try:
+            waiters = await self.coalescer.finish(key, str(task.id), result_data)
+            if waiters:
+                async with AsyncSessionLocal() as session:
+                    async with session.begin():
+                        completed = await complete_tasks(
+                            session, waiters, coalesced_result(result_data, task.id)
+                        )
+                logger.info(f"Task {task.id} completed {len(completed)} coalesced duplicates")
+                await self._transitioned(completed, TaskStatus.RUNNING)
+        except Exception as e:
+            logger.error(f"Failed to complete tasks coalesced with {task.id}: {e}")
+
+    async def _abandon_coalesced(self, task: AutomationTask, key: str) -> None:
+        """Send attached duplicates back to the queue so one of them can lead"""
+        try:
+            waiters = await self.coalescer.abandon(key, str(task.id))
+            if not waiters:
+                return
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    released = await release_tasks(session, waiters)
+        except Exception as e:
+            logger.error(f"Failed to release tasks coalesced with {task.id}: {e}")
+            return
+        await self._transitioned(released, TaskStatus.RUNNING)
+        await self._index(released)
+
+    async def _complete(self, task: AutomationTask, result_data: Optional[Dict[str, Any]]) -> None:
+        if await self._record(complete_task, task, result_data):
+            task.status = TaskStatus.COMPLETED
+            task.result_data = result_data
+            task.error_message = None
+            await self._transitioned([task], TaskStatus.RUNNING)
+
+    async def _transitioned(self, tasks: List[AutomationTask], from_status: str) -> None:
+        """Propagate status changes to the dashboard counters and event stream"""
+        if not tasks:
+            return
+        if self.counters is not None:
+            try:
+                await self.counters.record_transition(tasks, from_status)
+            except Exception as e:
+                logger.warning(f"Failed to update task counters: {e}")
+        if self.event_publisher is not None:
+            try:
+                await self.event_publisher(tasks)
+            except Exception as e:
+                logger.warning(f"Failed to publish task events: {e}")
+
+    async def _record(self, operation, task: AutomationTask, *args) -> Any:
+        try:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    return await operation(session, task, *args)
+        except Exception as e:
+            # The stale task check will eventually requeue the task
+            logger.error(f"Failed to record outcome of task {task.id}: {e}")
+            return None
+
+    async def _requeue_stale(self) -> None:
+        try:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    requeued = await requeue_stale_tasks(session, self.task_timeout * 2)
+        except Exception as e:
+            logger.error(f"Stale task check failed: {e}")
+            return
+        await self._transitioned(requeued, TaskStatus.RUNNING)
+        await self._index([task for task in requeued if task.status == TaskStatus.PENDING])
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+# Global handler registry
+task_registry = TaskHandlerRegistry()
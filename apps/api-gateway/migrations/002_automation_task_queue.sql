@@ -0,0 +1,21 @@
+-- Automation Task Queue Migration
+-- Job Application Assistance System
+-- Version: 1.1.0
+-- Supports claiming due automation tasks with FOR UPDATE SKIP LOCKED
+
+-- Every pending task needs a due time so the claim query can use the index
+ALTER TABLE automation_tasks ALTER COLUMN scheduled_at SET DEFAULT NOW();
+
+UPDATE automation_tasks
+SET scheduled_at = created_at
+WHERE scheduled_at IS NULL AND status = 'pending';
+
+-- Claim index: only pending rows, in claim order (priority, then due time)
+CREATE INDEX IF NOT EXISTS idx_automation_tasks_claim
+    ON automation_tasks (priority, scheduled_at)
+    WHERE status = 'pending';
+
+-- Stale task recovery scans running tasks by start time
+CREATE INDEX IF NOT EXISTS idx_automation_tasks_running
+    ON automation_tasks (started_at)
+    WHERE status = 'running';
@@ -0,0 +1,6 @@
+-- Automation Task Dead-Letter Migration
+-- Job Application Assistance System
+-- Version: 1.2.0
+-- Tasks that exhaust their retries are parked in a dead_letter state
+
+ALTER TYPE task_status ADD VALUE IF NOT EXISTS 'dead_letter';
@@ -0,0 +1,11 @@
+-- Automation Dashboard Index Migration
+-- Job Application Assistance System
+-- Version: 1.3.0
+-- Per-user recent and failed task lists for the automation dashboard
+
+CREATE INDEX IF NOT EXISTS idx_automation_tasks_user_created
+    ON automation_tasks (user_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_automation_tasks_user_failed
+    ON automation_tasks (user_id, completed_at DESC)
+    WHERE status IN ('failed', 'dead_letter');
@@ -0,0 +1,25 @@
+-- LLM Generation Cache Migration
+-- Job Application Assistance System
+-- Version: 1.4.0
+-- Durable tier of the content-addressed cache for LLM generations
+
+CREATE TABLE IF NOT EXISTS llm_generation_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    model_used VARCHAR(50) NOT NULL,
+    content_text TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    generation_ms INTEGER NOT NULL DEFAULT 0,
+    generation_metadata JSONB,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    last_accessed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Eviction: expired entries first, then least recently used beyond the cap
+CREATE INDEX IF NOT EXISTS idx_llm_generation_cache_expires
+    ON llm_generation_cache (expires_at);
+
+CREATE INDEX IF NOT EXISTS idx_llm_generation_cache_last_accessed
+    ON llm_generation_cache (last_accessed_at);
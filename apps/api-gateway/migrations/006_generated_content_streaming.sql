@@ -0,0 +1,15 @@
+-- Generated Content Streaming Migration
+-- Job Application Assistance System
+-- Version: 1.5.0
+-- Checkpoint timestamps and latest-version lookup for streamed generations
+
+-- The model has always declared updated_at; checkpoints rely on it
+ALTER TABLE generated_content
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+DROP TRIGGER IF EXISTS update_generated_content_updated_at ON generated_content;
+CREATE TRIGGER update_generated_content_updated_at BEFORE UPDATE ON generated_content
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE INDEX IF NOT EXISTS idx_generated_content_app_type_created
+    ON generated_content (application_id, content_type, created_at DESC);
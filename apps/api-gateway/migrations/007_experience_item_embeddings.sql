@@ -0,0 +1,23 @@
+-- Experience Item Embeddings Migration
+-- Job Application Assistance System
+-- Version: 1.6.0
+-- Per-achievement and per-technology embeddings for relevance-ranked resume tailoring
+
+CREATE TABLE IF NOT EXISTS experience_item_embeddings (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    experience_id UUID NOT NULL REFERENCES user_experiences(id) ON DELETE CASCADE,
+    item_type VARCHAR(20) NOT NULL,
+    item_index INTEGER NOT NULL,
+    item_text TEXT NOT NULL,
+    -- Hash of item text and embedding model; a mismatch means the item changed
+    content_hash CHAR(64) NOT NULL,
+    embedding VECTOR(384) NOT NULL,
+    embedding_model VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_experience_item_embeddings_item UNIQUE (experience_id, item_type, item_index)
+);
+
+-- Ranking reads every item of one user against a job embedding
+CREATE INDEX IF NOT EXISTS idx_experience_item_embeddings_user
+    ON experience_item_embeddings (user_id);
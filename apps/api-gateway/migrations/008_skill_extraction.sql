@@ -0,0 +1,12 @@
+-- Skill Extraction Migration
+-- Job Application Assistance System
+-- Version: 1.7.0
+-- Source text hashes so skill extraction re-runs only when text changes
+
+ALTER TABLE user_profiles ADD COLUMN IF NOT EXISTS skills_source_hash CHAR(64);
+ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS skills_source_hash CHAR(64);
+
+-- Ingestion backfill picks postings that were never extracted
+CREATE INDEX IF NOT EXISTS idx_job_postings_skills_pending
+    ON job_postings (created_at)
+    WHERE skills_source_hash IS NULL;
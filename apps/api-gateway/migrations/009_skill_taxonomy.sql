@@ -0,0 +1,42 @@
+-- Skill Taxonomy Migration
+-- Job Application Assistance System
+-- Version: 1.8.0
+-- Canonical skills with synonyms and integer ids, and indexed skill-id arrays on job postings
+
+CREATE TABLE IF NOT EXISTS skills (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    -- Lowercased, whitespace-collapsed name; one row per canonical skill
+    normalized_name VARCHAR(100) NOT NULL,
+    skill_category skill_category,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_skills_normalized_name UNIQUE (normalized_name)
+);
+
+-- Every spelling of a skill, including its canonical name, maps to one skill id
+CREATE TABLE IF NOT EXISTS skill_synonyms (
+    normalized_name VARCHAR(100) PRIMARY KEY,
+    skill_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_skill_synonyms_skill_id ON skill_synonyms (skill_id);
+
+ALTER TABLE user_skills ADD COLUMN IF NOT EXISTS skill_id INTEGER REFERENCES skills(id);
+CREATE INDEX IF NOT EXISTS idx_user_skills_skill_id ON user_skills (skill_id);
+
+ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS required_skill_ids INTEGER[] NOT NULL DEFAULT '{}';
+ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS preferred_skill_ids INTEGER[] NOT NULL DEFAULT '{}';
+
+-- "Jobs requiring any of my skills" is an && (overlap) query on these
+CREATE INDEX IF NOT EXISTS idx_job_postings_required_skill_ids
+    ON job_postings USING GIN (required_skill_ids);
+CREATE INDEX IF NOT EXISTS idx_job_postings_preferred_skill_ids
+    ON job_postings USING GIN (preferred_skill_ids);
+
+-- Postings extracted before skill ids existed are re-extracted by the backfill
+UPDATE job_postings
+SET skills_source_hash = NULL
+WHERE skills_source_hash IS NOT NULL
+  AND cardinality(required_skill_ids) = 0
+  AND cardinality(preferred_skill_ids) = 0
+  AND (cardinality(required_skills) > 0 OR cardinality(preferred_skills) > 0);
@@ -0,0 +1,25 @@
+-- Document Store Migration
+-- Job Application Assistance System
+-- Version: 1.9.0
+-- Content-addressed document blobs, stored once however many users and applications reference them
+
+CREATE TABLE IF NOT EXISTS documents (
+    -- SHA-256 of the content; also the blob's key in the storage backend
+    content_hash CHAR(64) PRIMARY KEY,
+    size_bytes BIGINT NOT NULL,
+    content_type VARCHAR(100) NOT NULL,
+    storage_backend VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Which users may read a document, and under what file name they uploaded it
+CREATE TABLE IF NOT EXISTS user_documents (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    content_hash CHAR(64) NOT NULL REFERENCES documents(content_hash),
+    filename VARCHAR(255),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_user_documents_user_content UNIQUE (user_id, content_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_documents_content_hash ON user_documents (content_hash);
@@ -0,0 +1,18 @@
+-- Browser Session Pool Migration
+-- Job Application Assistance System
+-- Version: 1.10.0
+-- Lookup of reusable sessions per user and platform for the session pool
+
+-- The model has always declared updated_at; ORM reads of sessions rely on it
+ALTER TABLE browser_sessions
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+DROP TRIGGER IF EXISTS update_browser_sessions_updated_at ON browser_sessions;
+CREATE TRIGGER update_browser_sessions_updated_at BEFORE UPDATE ON browser_sessions
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Most recently used active session of a user on a platform, restored when
+-- the pool has no warm one
+CREATE INDEX IF NOT EXISTS idx_browser_sessions_pool
+    ON browser_sessions (user_id, platform, last_used_at DESC NULLS LAST)
+    WHERE is_active;
@@ -0,0 +1,31 @@
+-- Fetch Cache Migration
+-- Job Application Assistance System
+-- Version: 1.11.0
+-- Validators and body hashes of scraped pages for conditional re-fetching, and the savings per platform
+
+CREATE TABLE IF NOT EXISTS fetch_cache (
+    -- SHA-256 of the URL (URLs can exceed the btree key limit)
+    url_hash CHAR(64) PRIMARY KEY,
+    url TEXT NOT NULL,
+    platform VARCHAR(50) NOT NULL,
+    etag VARCHAR(500),
+    last_modified VARCHAR(100),
+    -- SHA-256 of the last body received
+    body_hash CHAR(64) NOT NULL,
+    body_bytes INTEGER NOT NULL DEFAULT 0,
+    -- Parse time of the last changed body, i.e. what a skipped parse saves
+    parse_ms INTEGER NOT NULL DEFAULT 0,
+    fetch_count INTEGER NOT NULL DEFAULT 1,
+    change_count INTEGER NOT NULL DEFAULT 1,
+    fetched_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_fetch_cache_platform_fetched ON fetch_cache (platform, fetched_at);
+
+ALTER TABLE platform_metrics
+    ADD COLUMN IF NOT EXISTS not_modified_responses INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS unchanged_responses INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS bytes_saved BIGINT DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS parse_ms_saved BIGINT DEFAULT 0;
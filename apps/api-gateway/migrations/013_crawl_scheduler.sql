@@ -0,0 +1,41 @@
+-- Crawl Scheduler Migration
+-- Job Application Assistance System
+-- Version: 1.12.0
+-- Learned posting arrival and change rates per saved search and platform for adaptive recrawling
+
+CREATE TABLE IF NOT EXISTS crawl_sources (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    platform VARCHAR(50) NOT NULL,
+    search_preference_id UUID NOT NULL REFERENCES job_search_preferences(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    -- Exponentially decayed crawl history (each crawl multiplies the old values by the decay)
+    new_postings DOUBLE PRECISION NOT NULL DEFAULT 0,
+    observed_hours DOUBLE PRECISION NOT NULL DEFAULT 0,
+    crawls DOUBLE PRECISION NOT NULL DEFAULT 0,
+    changed_crawls DOUBLE PRECISION NOT NULL DEFAULT 0,
+    pages_per_crawl DOUBLE PRECISION NOT NULL DEFAULT 1,
+    crawl_count INTEGER NOT NULL DEFAULT 0,
+    total_new_postings INTEGER NOT NULL DEFAULT 0,
+    -- Latest job_discovery task, so a source is never scheduled twice
+    task_id UUID REFERENCES automation_tasks(id) ON DELETE SET NULL,
+    scheduled_at TIMESTAMP WITH TIME ZONE,
+    last_crawled_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE (platform, search_preference_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_crawl_sources_search ON crawl_sources (search_preference_id);
+
+DROP TRIGGER IF EXISTS update_crawl_sources_updated_at ON crawl_sources;
+CREATE TRIGGER update_crawl_sources_updated_at BEFORE UPDATE ON crawl_sources
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Requests spent per platform in the budget window
+CREATE INDEX IF NOT EXISTS idx_automation_tasks_discovery
+    ON automation_tasks ((task_config->>'platform'), created_at)
+    WHERE task_type = 'job_discovery';
+
+-- Ingestion de-duplicates postings by their platform id
+CREATE INDEX IF NOT EXISTS idx_job_postings_source_external
+    ON job_postings (source_platform, external_id);
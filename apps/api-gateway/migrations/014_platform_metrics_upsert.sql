@@ -0,0 +1,105 @@
+-- Platform Metrics Upsert Migration
+-- Job Application Assistance System
+-- Version: 1.13.0
+-- One platform_metrics row per platform and day, upserted with a mergeable latency histogram and percentiles
+
+ALTER TABLE platform_metrics ADD COLUMN IF NOT EXISTS total_response_time_ms BIGINT;
+ALTER TABLE platform_metrics ADD COLUMN IF NOT EXISTS max_response_time_ms INTEGER;
+ALTER TABLE platform_metrics ADD COLUMN IF NOT EXISTS p50_response_time_ms INTEGER;
+ALTER TABLE platform_metrics ADD COLUMN IF NOT EXISTS p95_response_time_ms INTEGER;
+ALTER TABLE platform_metrics ADD COLUMN IF NOT EXISTS p99_response_time_ms INTEGER;
+-- Sparse histogram of successful response times: {"bucket upper bound in ms": count}
+ALTER TABLE platform_metrics ADD COLUMN IF NOT EXISTS latency_histogram JSONB NOT NULL DEFAULT '{}';
+
+-- Exact totals keep the average mergeable
+UPDATE platform_metrics
+SET total_response_time_ms = CAST(average_response_time_ms AS BIGINT) * COALESCE(successful_scrapes, 0)
+WHERE total_response_time_ms IS NULL AND average_response_time_ms IS NOT NULL;
+
+-- Merge rows of the same platform and day into the oldest one
+WITH totals AS (
+    SELECT platform_name, metric_date,
+           (array_agg(id ORDER BY created_at, id))[1] AS keep_id,
+           SUM(COALESCE(total_jobs_scraped, 0)) AS total_jobs_scraped,
+           SUM(COALESCE(successful_scrapes, 0)) AS successful_scrapes,
+           SUM(COALESCE(failed_scrapes, 0)) AS failed_scrapes,
+           SUM(COALESCE(rate_limit_hits, 0)) AS rate_limit_hits,
+           SUM(COALESCE(detection_events, 0)) AS detection_events,
+           SUM(COALESCE(not_modified_responses, 0)) AS not_modified_responses,
+           SUM(COALESCE(unchanged_responses, 0)) AS unchanged_responses,
+           SUM(COALESCE(bytes_saved, 0)) AS bytes_saved,
+           SUM(COALESCE(parse_ms_saved, 0)) AS parse_ms_saved,
+           SUM(total_response_time_ms) AS total_response_time_ms
+    FROM platform_metrics
+    GROUP BY platform_name, metric_date
+    HAVING COUNT(*) > 1
+),
+merged AS (
+    UPDATE platform_metrics pm
+    SET total_jobs_scraped = t.total_jobs_scraped,
+        successful_scrapes = t.successful_scrapes,
+        failed_scrapes = t.failed_scrapes,
+        rate_limit_hits = t.rate_limit_hits,
+        detection_events = t.detection_events,
+        not_modified_responses = t.not_modified_responses,
+        unchanged_responses = t.unchanged_responses,
+        bytes_saved = t.bytes_saved,
+        parse_ms_saved = t.parse_ms_saved,
+        total_response_time_ms = t.total_response_time_ms,
+        average_response_time_ms = CASE WHEN t.successful_scrapes > 0
+            THEN ROUND(t.total_response_time_ms / CAST(t.successful_scrapes AS numeric)) END
+    FROM totals t
+    WHERE pm.id = t.keep_id
+)
+DELETE FROM platform_metrics pm
+USING totals t
+WHERE pm.platform_name = t.platform_name AND pm.metric_date = t.metric_date AND pm.id <> t.keep_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_platform_metrics_platform_date
+    ON platform_metrics (platform_name, metric_date);
+
+-- Bucket-wise sum of two sparse histograms
+CREATE OR REPLACE FUNCTION latency_histogram_merge(a JSONB, b JSONB)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_object_agg(bucket, total), '{}'::jsonb)
+    FROM (
+        SELECT key AS bucket, SUM(CAST(value AS BIGINT)) AS total
+        FROM (
+            SELECT * FROM jsonb_each_text(COALESCE(a, '{}'::jsonb))
+            UNION ALL
+            SELECT * FROM jsonb_each_text(COALESCE(b, '{}'::jsonb))
+        ) buckets
+        GROUP BY key
+    ) merged
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Upper bound of the bucket holding the q-th quantile
+CREATE OR REPLACE FUNCTION latency_histogram_percentile(histogram JSONB, q DOUBLE PRECISION)
+RETURNS INTEGER AS $$
+    SELECT bucket
+    FROM (
+        SELECT CAST(key AS INTEGER) AS bucket,
+               SUM(CAST(value AS BIGINT)) OVER (ORDER BY CAST(key AS INTEGER)) AS cumulative,
+               SUM(CAST(value AS BIGINT)) OVER () AS total
+        FROM jsonb_each_text(COALESCE(histogram, '{}'::jsonb))
+    ) buckets
+    WHERE cumulative >= q * total
+    ORDER BY bucket
+    LIMIT 1
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION update_platform_metrics_percentiles()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.latency_histogram IS DISTINCT FROM OLD.latency_histogram THEN
+        NEW.p50_response_time_ms = latency_histogram_percentile(NEW.latency_histogram, 0.5);
+        NEW.p95_response_time_ms = latency_histogram_percentile(NEW.latency_histogram, 0.95);
+        NEW.p99_response_time_ms = latency_histogram_percentile(NEW.latency_histogram, 0.99);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_platform_metrics_percentiles ON platform_metrics;
+CREATE TRIGGER update_platform_metrics_percentiles BEFORE INSERT OR UPDATE ON platform_metrics
+    FOR EACH ROW EXECUTE FUNCTION update_platform_metrics_percentiles();
@@ -0,0 +1,68 @@
+-- User Analytics Rollup Migration
+-- Job Application Assistance System
+-- Version: 1.14.0
+-- Daily user_analytics rows maintained incrementally from application events past a watermark
+
+-- The model has always declared updated_at
+ALTER TABLE user_analytics ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+-- Applications with a first employer response that day (feeds response_rate)
+ALTER TABLE user_analytics ADD COLUMN IF NOT EXISTS responses_received INTEGER DEFAULT 0;
+
+DROP TRIGGER IF EXISTS update_user_analytics_updated_at ON user_analytics;
+CREATE TRIGGER update_user_analytics_updated_at BEFORE UPDATE ON user_analytics
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Merge rows of the same user and day into the oldest one
+WITH totals AS (
+    SELECT user_id, metric_date,
+           (array_agg(id ORDER BY created_at, id))[1] AS keep_id,
+           SUM(COALESCE(applications_submitted, 0)) AS applications_submitted,
+           SUM(COALESCE(jobs_discovered, 0)) AS jobs_discovered,
+           SUM(COALESCE(resumes_generated, 0)) AS resumes_generated,
+           SUM(COALESCE(cover_letters_generated, 0)) AS cover_letters_generated,
+           SUM(COALESCE(interviews_scheduled, 0)) AS interviews_scheduled,
+           SUM(COALESCE(offers_received, 0)) AS offers_received,
+           SUM(COALESCE(responses_received, 0)) AS responses_received,
+           SUM(COALESCE(time_saved_minutes, 0)) AS time_saved_minutes
+    FROM user_analytics
+    GROUP BY user_id, metric_date
+    HAVING COUNT(*) > 1
+),
+merged AS (
+    UPDATE user_analytics ua
+    SET applications_submitted = t.applications_submitted,
+        jobs_discovered = t.jobs_discovered,
+        resumes_generated = t.resumes_generated,
+        cover_letters_generated = t.cover_letters_generated,
+        interviews_scheduled = t.interviews_scheduled,
+        offers_received = t.offers_received,
+        responses_received = t.responses_received,
+        time_saved_minutes = t.time_saved_minutes
+    FROM totals t
+    WHERE ua.id = t.keep_id
+)
+DELETE FROM user_analytics ua
+USING totals t
+WHERE ua.user_id = t.user_id AND ua.metric_date = t.metric_date AND ua.id <> t.keep_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_user_analytics_user_date
+    ON user_analytics (user_id, metric_date);
+
+-- Events up to the watermark have been rolled up
+CREATE TABLE IF NOT EXISTS analytics_rollup_state (
+    name VARCHAR(50) PRIMARY KEY,
+    watermark TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+DROP TRIGGER IF EXISTS update_analytics_rollup_state_updated_at ON analytics_rollup_state;
+CREATE TRIGGER update_analytics_rollup_state_updated_at BEFORE UPDATE ON analytics_rollup_state
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Incremental scans: content completes after it is created, so it is found by updated_at
+CREATE INDEX IF NOT EXISTS idx_generated_content_updated_at
+    ON generated_content (updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_automation_tasks_discovery_completed
+    ON automation_tasks (completed_at)
+    WHERE task_type = 'job_discovery' AND status = 'completed';
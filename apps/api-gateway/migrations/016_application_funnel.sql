@@ -0,0 +1,92 @@
+-- Application Funnel Migration
+-- Job Application Assistance System
+-- Version: 1.15.0
+-- Funnel conversion and time-in-stage materialized views over application_status_history, refreshed concurrently
+
+-- Per-application history in order; replaces the application_id index
+CREATE INDEX IF NOT EXISTS idx_app_status_history_app_created
+    ON application_status_history (application_id, created_at, id);
+DROP INDEX IF EXISTS idx_app_status_history_app_id;
+
+-- Each stretch an application spent in a status, ended by its next status
+-- change (left_at is NULL while it is still there); repeated rows of the
+-- same status do not start a new stretch
+CREATE OR REPLACE VIEW application_stage_visits AS
+SELECT a.user_id, c.application_id, c.stage, c.created_at AS entered_at,
+       LEAD(c.created_at) OVER (PARTITION BY c.application_id ORDER BY c.created_at, c.id) AS left_at
+FROM (
+    SELECT h.id, h.application_id, h.status::text AS stage, h.created_at,
+           LAG(h.status::text) OVER (PARTITION BY h.application_id ORDER BY h.created_at, h.id) AS previous_stage
+    FROM application_status_history h
+) c
+JOIN applications a ON a.id = c.application_id
+WHERE c.previous_stage IS DISTINCT FROM c.stage;
+
+-- Furthest funnel stage each application reached: reviewing counts as
+-- submitted, rejected and withdrawn do not advance it
+CREATE OR REPLACE VIEW application_funnel_reach AS
+SELECT user_id, application_id,
+       MAX(CASE stage
+               WHEN 'pending' THEN 1
+               WHEN 'submitted' THEN 2
+               WHEN 'reviewing' THEN 2
+               WHEN 'interviewed' THEN 3
+               WHEN 'offered' THEN 4
+               ELSE 0
+           END) AS reached
+FROM application_stage_visits
+GROUP BY user_id, application_id;
+
+CREATE OR REPLACE VIEW application_funnel_stages (stage, stage_order) AS
+VALUES ('pending', 1), ('submitted', 2), ('interviewed', 3), ('offered', 4);
+
+-- Applications reaching each stage or beyond, and the share of the previous
+-- stage that got there
+CREATE MATERIALIZED VIEW IF NOT EXISTS user_application_funnel AS
+SELECT user_id, stage, stage_order, applications,
+       ROUND(applications / CAST(NULLIF(LAG(applications) OVER w, 0) AS numeric), 4) AS conversion_rate
+FROM (
+    SELECT r.user_id, s.stage, s.stage_order, COUNT(*) FILTER (WHERE r.reached >= s.stage_order) AS applications
+    FROM application_funnel_reach r
+    CROSS JOIN application_funnel_stages s
+    GROUP BY r.user_id, s.stage, s.stage_order
+) counts
+WINDOW w AS (PARTITION BY user_id ORDER BY stage_order);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_user_application_funnel_user_stage
+    ON user_application_funnel (user_id, stage);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS application_funnel AS
+SELECT stage, stage_order, applications,
+       ROUND(applications / CAST(NULLIF(LAG(applications) OVER w, 0) AS numeric), 4) AS conversion_rate
+FROM (
+    SELECT s.stage, s.stage_order, COUNT(r.application_id) FILTER (WHERE r.reached >= s.stage_order) AS applications
+    FROM application_funnel_stages s
+    LEFT JOIN application_funnel_reach r ON TRUE
+    GROUP BY s.stage, s.stage_order
+) counts
+WINDOW w AS (ORDER BY stage_order);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_application_funnel_stage
+    ON application_funnel (stage);
+
+-- Median time in each status over the stretches that have ended
+CREATE MATERIALIZED VIEW IF NOT EXISTS user_stage_durations AS
+SELECT user_id, stage, COUNT(*) AS transitions,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM left_at - entered_at)) AS median_seconds
+FROM application_stage_visits
+WHERE left_at IS NOT NULL
+GROUP BY user_id, stage;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_user_stage_durations_user_stage
+    ON user_stage_durations (user_id, stage);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS stage_durations AS
+SELECT stage, COUNT(*) AS transitions,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM left_at - entered_at)) AS median_seconds
+FROM application_stage_visits
+WHERE left_at IS NOT NULL
+GROUP BY stage;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_stage_durations_stage
+    ON stage_durations (stage);
@@ -0,0 +1,31 @@
+-- Unique Applications Migration
+-- Job Application Assistance System
+-- Version: 1.16.0
+-- One application per user and job posting, enforced so concurrent bulk requests cannot both insert
+
+-- Fold duplicate applications into the oldest one, keeping their history,
+-- generated content and tasks
+CREATE TEMPORARY TABLE duplicate_applications ON COMMIT DROP AS
+SELECT id, keep_id
+FROM (
+    SELECT id, FIRST_VALUE(id) OVER (PARTITION BY user_id, job_posting_id ORDER BY created_at, id) AS keep_id
+    FROM applications
+    WHERE job_posting_id IS NOT NULL
+) ranked
+WHERE id <> keep_id;
+
+UPDATE application_status_history h SET application_id = d.keep_id
+FROM duplicate_applications d WHERE h.application_id = d.id;
+
+UPDATE generated_content g SET application_id = d.keep_id
+FROM duplicate_applications d WHERE g.application_id = d.id;
+
+UPDATE automation_tasks t SET application_id = d.keep_id
+FROM duplicate_applications d WHERE t.application_id = d.id;
+
+DELETE FROM applications a
+USING duplicate_applications d
+WHERE a.id = d.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_applications_user_job_posting
+    ON applications (user_id, job_posting_id);
@@ -0,0 +1,6 @@
+-- Job Embedding Hash Migration
+-- Job Application Assistance System
+-- Version: 1.17.0
+-- Hash of the posting text a job embedding was computed from, so edited postings are re-embedded
+
+ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS embedding_hash CHAR(64);
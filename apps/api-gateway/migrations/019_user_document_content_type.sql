@@ -0,0 +1,14 @@
+-- User Document Content Type Migration
+-- Job Application Assistance System
+-- Version: 1.18.0
+-- Content type per user reference to a document, instead of the first uploader's on the shared blob
+
+ALTER TABLE user_documents ADD COLUMN IF NOT EXISTS content_type VARCHAR(100);
+
+-- Existing references are served as a download until re-uploaded
+UPDATE user_documents
+SET content_type = 'application/octet-stream'
+WHERE content_type IS NULL;
+
+ALTER TABLE user_documents ALTER COLUMN content_type SET DEFAULT 'application/octet-stream';
+ALTER TABLE user_documents ALTER COLUMN content_type SET NOT NULL;
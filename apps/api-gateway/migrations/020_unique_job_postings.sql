@@ -0,0 +1,58 @@
+-- Unique Job Postings Migration
+-- Job Application Assistance System
+-- Version: 1.19.0
+-- One posting per platform id, enforced so concurrent or retried crawls cannot both insert
+
+-- Fold duplicate postings into the oldest one
+CREATE TEMPORARY TABLE duplicate_job_postings ON COMMIT DROP AS
+SELECT id, keep_id
+FROM (
+    SELECT id, FIRST_VALUE(id) OVER (PARTITION BY source_platform, external_id ORDER BY created_at, id) AS keep_id
+    FROM job_postings
+    WHERE external_id IS NOT NULL
+) ranked
+WHERE id <> keep_id;
+
+-- A user's applications to postings being folded together become one
+-- application (the oldest), keeping their history, generated content and tasks
+CREATE TEMPORARY TABLE duplicate_posting_applications ON COMMIT DROP AS
+SELECT id, keep_id
+FROM (
+    SELECT a.id,
+           FIRST_VALUE(a.id) OVER (
+               PARTITION BY a.user_id, COALESCE(d.keep_id, a.job_posting_id) ORDER BY a.created_at, a.id
+           ) AS keep_id
+    FROM applications a
+    LEFT JOIN duplicate_job_postings d ON d.id = a.job_posting_id
+    WHERE a.job_posting_id IN (
+        SELECT id FROM duplicate_job_postings
+        UNION
+        SELECT keep_id FROM duplicate_job_postings
+    )
+) ranked
+WHERE id <> keep_id;
+
+UPDATE application_status_history h SET application_id = d.keep_id
+FROM duplicate_posting_applications d WHERE h.application_id = d.id;
+
+UPDATE generated_content g SET application_id = d.keep_id
+FROM duplicate_posting_applications d WHERE g.application_id = d.id;
+
+UPDATE automation_tasks t SET application_id = d.keep_id
+FROM duplicate_posting_applications d WHERE t.application_id = d.id;
+
+DELETE FROM applications a
+USING duplicate_posting_applications d
+WHERE a.id = d.id;
+
+UPDATE applications a SET job_posting_id = d.keep_id
+FROM duplicate_job_postings d WHERE a.job_posting_id = d.id;
+
+DELETE FROM job_postings j
+USING duplicate_job_postings d
+WHERE j.id = d.id;
+
+-- Replaces the non-unique index ingestion used to look postings up
+CREATE UNIQUE INDEX IF NOT EXISTS uq_job_postings_source_external
+    ON job_postings (source_platform, external_id);
+DROP INDEX IF EXISTS idx_job_postings_source_external;
@@ -0,0 +1,7 @@
+-- Browser Session Leases Migration
+-- Job Application Assistance System
+-- Version: 1.20.0
+-- Which pool process holds a stored browser session, so no two processes restore the same one
+
+ALTER TABLE browser_sessions ADD COLUMN IF NOT EXISTS leased_by VARCHAR(100);
+ALTER TABLE browser_sessions ADD COLUMN IF NOT EXISTS leased_until TIMESTAMP WITH TIME ZONE;
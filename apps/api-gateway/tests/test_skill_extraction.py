@@ -0,0 +1,22 @@
+from app.services.skill_extraction import SkillMatcher
+
+matcher = SkillMatcher()
+
+
+def names(source):
+    return [match.name for match in matcher.extract(source)]
+
+
+def test_exact_alias_at_sentence_start_is_not_a_skill():
+    assert names("Express yourself.") == []
+    assert names("Excel at teamwork") == ["Collaboration"]
+    assert matcher.extract_posting("Go ahead and send us your resume", None) == ([], [])
+
+
+def test_exact_alias_at_sentence_start_followed_by_a_skill():
+    assert names("Go, Rust and Python.") == ["Go", "Rust", "Python"]
+    assert names("We ship Go services. Express, Node.js APIs too.") == ["Go", "Express", "Node.js"]
+
+
+def test_ambiguous_words_are_not_skills():
+    assert names("Chinese market, TS reports, UI tweaks, SEO and transformers, containers, monitoring") == ["SEO"]